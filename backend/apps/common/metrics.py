@@ -0,0 +1,130 @@
+"""
+Métriques Prometheus du backend TKF, exposées sur `/metrics` (job
+`tkf-backend` de monitoring/prometheus.yml).
+
+Latence des requêtes par route résolue et statut, nombre et durée des
+requêtes SQL par requête. Enregistrer une mesure ne coûte que quelques
+microsecondes, sans aller-retour réseau.
+
+Plusieurs workers Gunicorn : définir `PROMETHEUS_MULTIPROC_DIR` (répertoire
+vide) avant de les lancer ; `/metrics` agrège alors tous les processus.
+Sans `prometheus_client` installé, les mesures sont ignorées.
+"""
+import ipaddress
+import os
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+
+try:
+    import prometheus_client
+    from prometheus_client import Histogram
+except ImportError:
+    prometheus_client = None
+
+
+DEFAULT_METRICS = {
+    'ENABLED': True,
+    # Réseaux autorisés à lire /metrics (Prometheus tourne dans le réseau Docker)
+    'ALLOWED_NETWORKS': ['127.0.0.0/8', '10.0.0.0/8', '172.16.0.0/12', '192.168.0.0/16', '::1/128'],
+}
+
+
+def get_metrics_settings():
+    """Paramètres des métriques (défauts < METRICS)"""
+    return {**DEFAULT_METRICS, **getattr(settings, 'METRICS', {})}
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+if prometheus_client is not None:
+    REQUEST_LATENCY = Histogram(
+        'tkf_http_request_duration_seconds', 'Durée des requêtes HTTP par route',
+        ['method', 'route', 'status'], buckets=LATENCY_BUCKETS,
+    )
+    REQUEST_DB_QUERIES = Histogram(
+        'tkf_http_request_db_queries', 'Requêtes SQL par requête HTTP',
+        ['route'], buckets=QUERY_COUNT_BUCKETS,
+    )
+    DB_QUERY_DURATION = Histogram(
+        'tkf_db_query_duration_seconds', 'Durée des requêtes SQL',
+        ['alias'], buckets=LATENCY_BUCKETS,
+    )
+
+
+class MetricsMiddleware:
+    """Latence par route (nom d'URL résolu) et requêtes SQL de chaque requête"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = prometheus_client is not None and get_metrics_settings()['ENABLED']
+
+    def __call__(self, request):
+        if not self.enabled:
+            return self.get_response(request)
+
+        queries = 0
+
+        def record_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                DB_QUERY_DURATION.labels(context['connection'].alias).observe(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        wrappers = [connection.execute_wrapper(record_query) for connection in connections.all()]
+        for wrapper in wrappers:
+            wrapper.__enter__()
+        try:
+            response = self.get_response(request)
+        finally:
+            for wrapper in reversed(wrappers):
+                wrapper.__exit__(None, None, None)
+
+        route = route_name(request)
+        REQUEST_LATENCY.labels(request.method, route, str(response.status_code)).observe(
+            time.perf_counter() - started
+        )
+        REQUEST_DB_QUERIES.labels(route).observe(queries)
+        return response
+
+
+def route_name(request):
+    """Nom d'URL résolu (cardinalité bornée, contrairement au chemin)"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match.route or 'unnamed'
+
+
+def client_allowed(request):
+    """Adresse du client dans un des réseaux ALLOWED_NETWORKS"""
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network) for network in get_metrics_settings()['ALLOWED_NETWORKS'])
+
+
+def metrics_view(request):
+    """Exposition Prometheus (agrégée sur tous les processus en mode multi-processus)"""
+    if prometheus_client is None:
+        return HttpResponse('prometheus_client non installé\n', status=503, content_type='text/plain')
+    if not get_metrics_settings()['ENABLED']:
+        return HttpResponse(status=404)
+    if not client_allowed(request):
+        return HttpResponse(status=403)
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import CollectorRegistry, multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return HttpResponse(prometheus_client.generate_latest(registry), content_type=prometheus_client.CONTENT_TYPE_LATEST)
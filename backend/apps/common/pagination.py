@@ -0,0 +1,16 @@
+"""
+Pagination partagée par les modules
+Pagination par curseur pour les journaux volumineux (audit trail)
+"""
+from rest_framework.pagination import CursorPagination
+
+
+class TimestampCursorPagination(CursorPagination):
+    """
+    Pagination par curseur sur le timestamp, sans COUNT(*) ni OFFSET.
+    Le coût d'une page reste constant quelle que soit sa profondeur.
+    """
+    page_size = 50
+    page_size_query_param = 'page_size'
+    max_page_size = 200
+    ordering = ('-timestamp', '-id')
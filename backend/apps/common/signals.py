@@ -9,7 +9,10 @@ logger = logging.getLogger(__name__)
 
 @receiver(post_save, sender=AuditTrail)
 def log_audit_trail(sender, instance, created, **kwargs):
-    """Logger l'audit trail dans le système de log"""
+    """
+    Logger l'audit trail dans le système de log
+    (les entrées écrites par lots via write_behind.audit sont loggées à la mise en file)
+    """
     if created:
         logger.info(
             f"Audit: {instance.model_name}({instance.object_id}) - "
@@ -0,0 +1,56 @@
+"""Tests pour l'écriture différée de l'audit trail"""
+import pytest
+from apps.common.models import AuditTrail
+from apps.common.write_behind import WriteBehindQueue
+
+
+@pytest.mark.django_db
+class TestWriteBehindQueue:
+    """Tests pour la file d'écriture différée"""
+
+    def make_queue(self, monkeypatch, **options):
+        options = {'max_queue': 100, 'batch_size': 10, 'flush_interval': 60, 'overflow': 'drop', **options}
+        pending = WriteBehindQueue(**options)
+        monkeypatch.setattr(pending, 'ensure_flusher', lambda: None)
+        return pending
+
+    def test_flush_writes_in_batches(self, monkeypatch, django_assert_max_num_queries):
+        """Les entrées sont insérées par lots de BATCH_SIZE"""
+        pending = self.make_queue(monkeypatch)
+        for i in range(25):
+            pending.put('common.AuditTrail', model_name='Ticket', object_id=str(i), action='UPDATE')
+
+        with django_assert_max_num_queries(3):
+            assert pending.flush() == 25
+        assert AuditTrail.objects.count() == 25
+
+    def test_overflow_is_counted(self, monkeypatch, tmp_path):
+        """File pleine : spool sur disque puis relecture"""
+        pending = self.make_queue(monkeypatch, max_queue=2, overflow='spool', spool_dir=tmp_path)
+        for i in range(5):
+            pending.put('common.AuditTrail', model_name='Ticket', object_id=str(i), action='UPDATE')
+
+        assert pending.stats()['spooled'] == 3
+        assert pending.flush() + pending.replay_spool() == 5
+        assert AuditTrail.objects.count() == 5
+
+
+class TestMetricsEndpoint:
+    """Tests de l'exposition Prometheus scrapée par le job tkf-backend"""
+
+    def test_metrics_route_is_served(self):
+        """/metrics est routé (le scrape ne tombe plus en 404)"""
+        from django.urls import resolve
+        from apps.common.metrics import metrics_view
+
+        assert resolve('/metrics').func is metrics_view
+
+    def test_private_networks_only(self, rf):
+        """Seuls les réseaux privés lisent les métriques"""
+        from apps.common import metrics
+
+        assert metrics.client_allowed(rf.get('/metrics', REMOTE_ADDR='172.18.0.5'))
+        assert not metrics.client_allowed(rf.get('/metrics', REMOTE_ADDR='8.8.8.8'))
+        if metrics.prometheus_client is not None:
+            assert metrics.metrics_view(rf.get('/metrics', REMOTE_ADDR='8.8.8.8')).status_code == 403
+            assert metrics.metrics_view(rf.get('/metrics', REMOTE_ADDR='172.18.0.5')).status_code == 200
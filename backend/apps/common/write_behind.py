@@ -0,0 +1,237 @@
+"""
+Écriture différée de l'audit trail et des logs système.
+
+Les entrées passent par une file bornée en mémoire ; un thread les insère
+par lots (bulk_create) toutes les FLUSH_INTERVAL secondes ou dès BATCH_SIZE
+entrées. File pleine ou base indisponible : spool JSONL dans SPOOL_DIR
+(rejoué au démarrage du thread) ou abandon compté (OVERFLOW='drop').
+
+Perte maximale sur arrêt brutal : MAX_QUEUE + BATCH_SIZE entrées.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_WRITE_BEHIND = {
+    'ENABLED': True,
+    'MAX_QUEUE': 10000,
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 1.0,
+    'OVERFLOW': 'spool',
+    'SPOOL_DIR': None,
+}
+
+
+def get_write_behind_settings():
+    """Paramètres de l'écriture différée (défauts < WRITE_BEHIND)"""
+    config = {**DEFAULT_WRITE_BEHIND, **getattr(settings, 'WRITE_BEHIND', {})}
+    if config['SPOOL_DIR'] is None:
+        config['SPOOL_DIR'] = Path(settings.BASE_DIR) / 'logs' / 'write_behind'
+    return config
+
+
+class WriteBehindQueue:
+    """File bornée d'insertions vidée par lots par un thread dédié"""
+
+    def __init__(self, max_queue, batch_size, flush_interval, overflow='spool', spool_dir=None):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.spool_dir = Path(spool_dir) if spool_dir else None
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.counters = Counter()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def put(self, model_label, **values):
+        """Déposer une insertion, False si elle a débordé"""
+        self.ensure_flusher()
+        try:
+            self.queue.put_nowait((model_label, values))
+        except queue.Full:
+            self._overflow([(model_label, values)])
+            return False
+        return True
+
+    def ensure_flusher(self):
+        """Démarrer le thread d'écriture (à nouveau après un fork)"""
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            if self._pid is None:
+                atexit.register(self.close)
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='write-behind', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        try:
+            self.replay_spool()
+        except Exception as e:
+            logger.error(f"Relecture du spool impossible: {e}")
+        while not self._stop.is_set():
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size and time.monotonic() < deadline:
+                try:
+                    batch.append(self.queue.get(timeout=max(deadline - time.monotonic(), 0.001)))
+                except queue.Empty:
+                    break
+            if batch:
+                close_old_connections()
+                self.write(batch)
+
+    def write(self, entries, spool_failures=True):
+        """Insérer par modèle ; en cas d'échec du lot, ligne par ligne"""
+        by_model = defaultdict(list)
+        for model_label, values in entries:
+            by_model[model_label].append(values)
+
+        written, failed = 0, []
+        for model_label, rows in by_model.items():
+            model = apps.get_model(model_label)
+            try:
+                model.objects.bulk_create([model(**values) for values in rows], batch_size=self.batch_size)
+                written += len(rows)
+                continue
+            except Exception as e:
+                logger.error(f"Écriture différée en lot échouée ({model_label}): {e}")
+            for values in rows:
+                try:
+                    model.objects.create(**values)
+                    written += 1
+                except Exception:
+                    failed.append((model_label, values))
+
+        self.counters['written'] += written
+        if failed and spool_failures:
+            self._overflow(failed)
+        elif failed:
+            self.counters['dropped'] += len(failed)
+        return written
+
+    def flush(self):
+        """Vider la file dans le thread courant"""
+        written = 0
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            if not batch:
+                return written
+            written += self.write(batch)
+
+    def close(self, timeout=5.0):
+        """Arrêt normal : stopper le thread et vider la file"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+    def _overflow(self, entries):
+        if self.overflow == 'spool' and self.spool_dir is not None:
+            try:
+                with self._lock:
+                    self.spool_dir.mkdir(parents=True, exist_ok=True)
+                    with open(self.spool_dir / f'{os.getpid()}.jsonl', 'a', encoding='utf-8') as spool:
+                        for model_label, values in entries:
+                            spool.write(json.dumps({'model': model_label, 'values': values}, cls=DjangoJSONEncoder) + '\n')
+                self.counters['spooled'] += len(entries)
+                return
+            except (OSError, TypeError) as e:
+                logger.error(f"Spool impossible: {e}")
+        self.counters['dropped'] += len(entries)
+        logger.warning(f"Écriture différée saturée: {self.counters['dropped']} entrées abandonnées")
+
+    def replay_spool(self):
+        """Réinsérer les fichiers spoolés (une seule tentative par ligne)"""
+        if self.spool_dir is None or not self.spool_dir.is_dir():
+            return 0
+        replayed = 0
+        for path in sorted(self.spool_dir.glob('*.jsonl')):
+            claimed = path.with_suffix(f'.replay-{os.getpid()}')
+            try:
+                path.rename(claimed)
+            except OSError:
+                continue
+            with open(claimed, encoding='utf-8') as spool:
+                entries = [(item['model'], item['values']) for item in map(json.loads, filter(str.strip, spool))]
+            for start in range(0, len(entries), self.batch_size):
+                replayed += self.write(entries[start:start + self.batch_size], spool_failures=False)
+            claimed.unlink()
+        return replayed
+
+    def stats(self):
+        return {'pending': self.queue.qsize(), **self.counters}
+
+
+_write_behind = None
+_write_behind_lock = threading.Lock()
+
+
+def get_write_behind():
+    """File d'écriture différée du processus"""
+    global _write_behind
+    if _write_behind is None:
+        with _write_behind_lock:
+            if _write_behind is None:
+                config = get_write_behind_settings()
+                _write_behind = WriteBehindQueue(
+                    max_queue=config['MAX_QUEUE'],
+                    batch_size=config['BATCH_SIZE'],
+                    flush_interval=config['FLUSH_INTERVAL'],
+                    overflow=config['OVERFLOW'],
+                    spool_dir=config['SPOOL_DIR'],
+                )
+    return _write_behind
+
+
+def enqueue(model_label, **values):
+    """Insérer une ligne sans bloquer la requête (synchrone si désactivé)"""
+    if not get_write_behind_settings()['ENABLED']:
+        apps.get_model(model_label).objects.create(**values)
+        return True
+    return get_write_behind().put(model_label, **values)
+
+
+def audit(user, model_name, object_id, action, new_values=None, old_values=None, **extra):
+    """Enregistrer une entrée d'audit trail (écriture différée)"""
+    user_id = user.pk if user is not None else None
+    if get_write_behind_settings()['ENABLED']:
+        # bulk_create n'émet pas post_save : logger ici ce que log_audit_trail loggait
+        logger.info(
+            f"Audit: {model_name}({object_id}) - {action} by {user}",
+            extra={'model': model_name, 'action': action, 'user_id': user_id}
+        )
+    return enqueue(
+        'common.AuditTrail',
+        user_id=user_id,
+        model_name=model_name,
+        object_id=str(object_id),
+        action=action,
+        new_values=new_values,
+        old_values=old_values,
+        **extra
+    )
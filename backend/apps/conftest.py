@@ -0,0 +1,8 @@
+"""Fixtures partagées des tests"""
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def synchronous_write_behind(settings):
+    """Audit trail écrit immédiatement pendant les tests (pas de thread d'écriture)"""
+    settings.WRITE_BEHIND = {**settings.WRITE_BEHIND, 'ENABLED': False}
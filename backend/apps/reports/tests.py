@@ -0,0 +1,72 @@
+"""Tests pour les rapports (budget de requêtes et pagination de l'audit trail)"""
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+from apps.common.models import AuditTrail
+from apps.users.models import User
+from apps.reports.views import AuditTrailViewSet
+
+
+@pytest.mark.django_db
+class TestAuditTrailByUser:
+    """Tests pour l'action by_user"""
+
+    def test_by_user_query_count_is_constant(self, django_assert_max_num_queries):
+        """Le nombre de requêtes ne dépend pas du nombre d'entrées"""
+        user = User.objects.create_user(
+            email='audit@example.com',
+            phone='+237670000010',
+            first_name='Audit',
+            last_name='User',
+            password='password123'
+        )
+        AuditTrail.objects.bulk_create([
+            AuditTrail(user=user, model_name='Ticket', object_id=str(i), action=AuditTrail.ActionChoices.UPDATE)
+            for i in range(20)
+        ])
+
+        request = APIRequestFactory().get('/api/v1/reports/audit/by_user/', {'user': user.id})
+        force_authenticate(request, user=user)
+        view = AuditTrailViewSet.as_view({'get': 'by_user'})
+
+        with django_assert_max_num_queries(2):
+            response = view(request)
+
+        assert response.status_code == 200
+        assert len(response.data['results']) == min(AuditTrail.objects.filter(user=user).count(), 50)
+        assert len(response.data['results']) > 20
+        assert response.data['results'][0]['user'] == 'audit@example.com'
+
+    @pytest.mark.parametrize('action', ['list', 'by_user'])
+    def test_pages_rows_with_identical_timestamps_exactly_once(self, action):
+        """Horodatages égaux : aucune entrée sautée ni répétée d'une page à l'autre"""
+        user = User.objects.create_user(
+            email='audit-pages@example.com',
+            phone='+237670000011',
+            first_name='Audit',
+            last_name='Pages',
+            password='password123'
+        )
+        AuditTrail.objects.bulk_create([
+            AuditTrail(user=user, model_name='Ticket', object_id=str(i), action=AuditTrail.ActionChoices.UPDATE)
+            for i in range(7)
+        ])
+        AuditTrail.objects.update(timestamp=timezone.now())
+        expected = set(str(pk) for pk in AuditTrail.objects.filter(user=user).values_list('id', flat=True))
+
+        view = AuditTrailViewSet.as_view({'get': action})
+        seen, params = [], {'user': user.id, 'page_size': 2}
+        while True:
+            request = APIRequestFactory().get('/api/v1/reports/audit-trails/by_user/', params)
+            force_authenticate(request, user=user)
+            response = view(request)
+            assert response.status_code == 200
+            seen.extend(trail['id'] for trail in response.data['results'])
+            if not response.data['next']:
+                break
+            params = {**params, 'cursor': parse_qs(urlparse(response.data['next']).query)['cursor'][0]}
+
+        assert len(seen) == len(set(seen))
+        assert set(seen) == expected
@@ -4,21 +4,29 @@ Viewsets pour les rapports et statistiques avancées
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.filters import SearchFilter
+from django_filters.rest_framework import DjangoFilterBackend
 from django.db.models import Count, Sum, Q, Avg
 from apps.common.models import AuditTrail
+from apps.common.pagination import TimestampCursorPagination
 from apps.employees.models import Employee
 from apps.cities.models import City
 from apps.trips.models import Trip
 from apps.tickets.models import Ticket
 from apps.payments.models import Payment
+from .serializers import AuditTrailSerializer
 
 
 class AuditTrailViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet pour l'audit trail"""
-    queryset = AuditTrail.objects.all()
+    queryset = AuditTrail.objects.select_related('user')
+    serializer_class = AuditTrailSerializer
+    pagination_class = TimestampCursorPagination
+    # Pas d'OrderingFilter : le curseur exige un ordre total (timestamp puis id)
+    filter_backends = [DjangoFilterBackend, SearchFilter]
     filter_fields = ['user', 'model_name', 'action']
     search_fields = ['object_id', 'user__email']
-    ordering = ['-timestamp']
+    ordering = ['-timestamp', '-id']
 
     @action(detail=False, methods=['get'])
     def by_user(self, request):
@@ -27,7 +35,9 @@ class AuditTrailViewSet(viewsets.ReadOnlyModelViewSet):
         if not user:
             return Response({'error': 'User parameter required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        trails = AuditTrail.objects.filter(user__id=user)
+        # select_related : l'email de l'auteur sans une requête par entrée
+        # Pagination par curseur : une page profonde coûte autant que la première
+        trails = self.paginate_queryset(AuditTrail.objects.filter(user__id=user).select_related('user'))
         serialized = []
         for trail in trails:
             serialized.append({
@@ -39,11 +49,7 @@ class AuditTrailViewSet(viewsets.ReadOnlyModelViewSet):
                 'user': trail.user.email if trail.user else None,
             })
         
-        return Response({
-            'user_id': user,
-            'audit_count': len(serialized),
-            'trails': serialized
-        })
+        return self.get_paginated_response(serialized)
 
     @action(detail=False, methods=['get'])
     def statistics(self, request):
@@ -4,7 +4,7 @@ from django.db import models
 from django.core.validators import RegexValidator
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
-from apps.common.models import BaseModel, Role, AuditTrail
+from apps.common.models import BaseModel, Role
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,15 +22,7 @@ class UserManager(DjangoUserManager):
         user = self.model(email=email, **extra_fields)
         user.set_password(password)
         user.save(using=self._db)
-        
-        # Créer l'audit trail
-        AuditTrail.objects.create(
-            user=user,
-            model_name='User',
-            object_id=str(user.id),
-            action='CREATE',
-            new_values={'email': email}
-        )
+        # L'audit trail de création est écrit par le signal post_save
         
         return user
     
@@ -1,7 +1,7 @@
 """Signaux pour les modèles utilisateurs"""
 from django.db.models.signals import post_save
 from django.dispatch import receiver
-from apps.common.models import AuditTrail
+from apps.common.write_behind import audit
 from .models import User, UserSession
 import logging
 
@@ -12,10 +12,4 @@ logger = logging.getLogger(__name__)
 def audit_user_changes(sender, instance, created, **kwargs):
     """Auditer les changements utilisateurs"""
     if created:
-        AuditTrail.objects.create(
-            user=instance,
-            model_name='User',
-            object_id=str(instance.id),
-            action='CREATE',
-            new_values={'email': instance.email}
-        )
+        audit(instance, 'User', instance.id, 'CREATE', new_values={'email': instance.email})
@@ -15,7 +15,7 @@ from .serializers import (
     PasswordResetRequestSerializer, UserSessionSerializer
 )
 from .permissions import IsVerified, CanManageUser, IsOwnerOrReadOnly
-from apps.common.models import AuditTrail
+from apps.common.write_behind import audit
 import logging
 
 logger = logging.getLogger(__name__)
@@ -160,11 +160,11 @@ class UserViewSet(viewsets.ModelViewSet):
         serializer.save()
         
         # Audit
-        AuditTrail.objects.create(
-            user=request.user,
-            model_name='User',
-            object_id=str(user.id),
-            action='UPDATE',
+        audit(
+            request.user,
+            'User',
+            str(user.id),
+            'UPDATE',
             new_values=serializer.data
         )
         
@@ -181,11 +181,11 @@ class UserViewSet(viewsets.ModelViewSet):
         user = serializer.save()
         
         # Audit
-        AuditTrail.objects.create(
-            user=request.user,
-            model_name='User',
-            object_id=str(user.id),
-            action='UPDATE',
+        audit(
+            request.user,
+            'User',
+            str(user.id),
+            'UPDATE',
             new_values={'password_changed': True}
         )
         
@@ -211,11 +211,11 @@ class UserViewSet(viewsets.ModelViewSet):
         user.block(reason)
         
         # Audit
-        AuditTrail.objects.create(
-            user=request.user,
-            model_name='User',
-            object_id=str(user.id),
-            action='UPDATE',
+        audit(
+            request.user,
+            'User',
+            str(user.id),
+            'UPDATE',
             new_values={'is_blocked': True, 'block_reason': reason}
         )
         
@@ -234,11 +234,11 @@ class UserViewSet(viewsets.ModelViewSet):
         user.unblock()
         
         # Audit
-        AuditTrail.objects.create(
-            user=request.user,
-            model_name='User',
-            object_id=str(user.id),
-            action='UPDATE',
+        audit(
+            request.user,
+            'User',
+            str(user.id),
+            'UPDATE',
             new_values={'is_blocked': False}
         )
         
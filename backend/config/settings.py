@@ -37,7 +37,6 @@ INSTALLED_APPS = [
     'django_celery_beat',
     'django_celery_results',
     'django_extensions',
-    'debug_toolbar',
     'storages',
     
     # Local apps
@@ -54,6 +53,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'apps.common.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -63,7 +63,6 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -262,6 +261,21 @@ LOGGING = {
     },
 }
 
+# Écriture différée de l'audit trail et des logs système (apps.common.write_behind)
+WRITE_BEHIND = {
+    'ENABLED': config('WRITE_BEHIND_ENABLED', default=True, cast=bool),
+    'MAX_QUEUE': 10000,
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 1.0,  # secondes
+    'OVERFLOW': 'spool',  # 'spool' (JSONL rejoué au démarrage) ou 'drop'
+    'SPOOL_DIR': BASE_DIR / 'logs' / 'write_behind',
+}
+
+# Métriques Prometheus sur /metrics (apps.common.metrics, job tkf-backend)
+METRICS = {
+    'ENABLED': config('METRICS_ENABLED', default=True, cast=bool),
+}
+
 # Security Settings
 SECURE_SSL_REDIRECT = config('SECURE_SSL_REDIRECT', default=False, cast=bool)
 SESSION_COOKIE_SECURE = config('SESSION_COOKIE_SECURE', default=False, cast=bool)
@@ -319,7 +333,10 @@ if USE_S3:
     STATIC_URL = f'https://{AWS_S3_CUSTOM_DOMAIN}/static/'
     STATICFILES_STORAGE = 'storages.backends.s3boto3.S3Boto3Storage'
 
-# Debug Toolbar
+# Debug Toolbar : développement uniquement (instrumente chaque requête SQL)
+if DEBUG:
+    INSTALLED_APPS += ['debug_toolbar']
+    MIDDLEWARE += ['debug_toolbar.middleware.DebugToolbarMiddleware']
 INTERNAL_IPS = ['127.0.0.1']
 
 # Sentry (optionnel)
@@ -8,10 +8,15 @@ from django.conf import settings
 from django.conf.urls.static import static
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
+from apps.common.metrics import metrics_view
+
 urlpatterns = [
     # Admin
     path('admin/', admin.site.urls),
     
+    # Métriques Prometheus (job tkf-backend)
+    path('metrics', metrics_view, name='prometheus-metrics'),
+    
     # API Documentation
     path('api/v1/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('api/v1/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
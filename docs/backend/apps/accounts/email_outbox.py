@@ -0,0 +1,215 @@
+# apps/accounts/email_outbox.py
+# ===============================
+
+"""
+Envoi différé des emails transactionnels (outbox).
+
+Les requêtes et signaux ne parlent plus au serveur SMTP : `queue_email`
+insère le message rendu dans la table `email_outbox` et la tâche Celery
+`send_email_outbox` (toutes les 10 secondes, Celery Beat) l'envoie
+par lots sur une connexion SMTP gardée ouverte par le worker.
+
+- Échec d'envoi : nouvelle tentative avec backoff exponentiel
+  (BACKOFF_BASE * 2^(tentatives - 1), plafonné à BACKOFF_MAX), puis statut
+  `failed` après MAX_ATTEMPTS tentatives.
+- Déduplication : un email du même type au même destinataire (et même
+  `dedup_key`) n'est pas remis en file dans sa fenêtre DEDUP_WINDOWS.
+- Templates : compilés une fois par processus (`render_email`).
+
+Exemple :
+    queue_email(subject, user.email, html_body=render_email('emails/welcome.html', context), kind='welcome')
+"""
+
+import logging
+import threading
+import time
+from datetime import timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Union
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import transaction
+from django.db.models import F, Q
+from django.template.loader import get_template
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_EMAIL_OUTBOX = {
+    'BATCH_SIZE': 50,
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_BASE': 60,  # secondes
+    'BACKOFF_MAX': 3600,
+    'SENDING_TIMEOUT': 300,  # Reprise des emails bloqués en `sending` (worker arrêté)
+    'CONNECTION_MAX_IDLE': 60,  # Reconnexion SMTP au-delà (serveurs qui coupent les connexions inactives)
+    'DEDUP_WINDOWS': {  # secondes, par type d'email
+        'login_notification': 3600,
+        'welcome': 86400,
+        'verification': 60,
+        'password_reset': 60,
+    },
+}
+
+
+def get_email_outbox_settings():
+    """Paramètres de l'outbox (défauts < EMAIL_OUTBOX)."""
+    config = {**DEFAULT_EMAIL_OUTBOX, **getattr(settings, 'EMAIL_OUTBOX', {})}
+    config['DEDUP_WINDOWS'] = {
+        **DEFAULT_EMAIL_OUTBOX['DEDUP_WINDOWS'],
+        **getattr(settings, 'EMAIL_OUTBOX', {}).get('DEDUP_WINDOWS', {}),
+    }
+    return config
+
+
+# ===== TEMPLATES =====
+
+@lru_cache(maxsize=None)
+def _compiled_template(template_name: str):
+    return get_template(template_name)
+
+
+def render_email(template_name: str, context: Dict) -> str:
+    """Rendre un template d'email compilé une seule fois par processus."""
+    return _compiled_template(template_name).render(context)
+
+
+# ===== MISE EN FILE =====
+
+def queue_email(subject, to: Union[str, Iterable[str]], text_body: str = '', html_body: str = '',
+                kind: str = '', dedup_key: str = '', from_email: Optional[str] = None) -> int:
+    """
+    Mettre un email en file, un message par destinataire.
+
+    Returns:
+        int: Nombre d'emails mis en file (hors doublons de la fenêtre de déduplication)
+    """
+    recipients = list(dict.fromkeys([to] if isinstance(to, str) else to))
+    window = get_email_outbox_settings()['DEDUP_WINDOWS'].get(kind) if kind else None
+
+    if window:
+        already_queued = set(OutboundEmail.objects.filter(
+            kind=kind,
+            dedup_key=dedup_key,
+            to_email__in=recipients,
+            created_at__gte=timezone.now() - timedelta(seconds=window),
+        ).values_list('to_email', flat=True))
+        recipients = [email for email in recipients if email not in already_queued]
+
+    OutboundEmail.objects.bulk_create([
+        OutboundEmail(
+            kind=kind,
+            dedup_key=dedup_key,
+            subject=str(subject)[:255],
+            from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+            to_email=email,
+            text_body=text_body,
+            html_body=html_body,
+        )
+        for email in recipients
+    ])
+    return len(recipients)
+
+
+# ===== ENVOI =====
+
+class _SMTPConnection:
+    """Connexion au backend email gardée ouverte entre les lots du worker."""
+
+    def __init__(self):
+        self.backend = None
+        self.last_used = 0.0
+        self.lock = threading.Lock()
+
+    def get(self, max_idle: float):
+        if self.backend is not None and time.monotonic() - self.last_used > max_idle:
+            self.close()
+        if self.backend is None:
+            self.backend = get_connection(fail_silently=False)
+            self.backend.open()
+        self.last_used = time.monotonic()
+        return self.backend
+
+    def close(self):
+        if self.backend is not None:
+            try:
+                self.backend.close()
+            except Exception:
+                pass
+            self.backend = None
+
+
+_smtp = _SMTPConnection()
+
+
+def _claim(batch_size: int, sending_timeout: int):
+    """Réserver un lot d'emails dus (les autres workers sautent les lignes verrouillées)."""
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(
+            OutboundEmail.objects.select_for_update(skip_locked=True)
+            .filter(
+                Q(status='pending', next_attempt_at__lte=now)
+                | Q(status='sending', locked_at__lt=now - timedelta(seconds=sending_timeout))
+            )
+            .order_by('next_attempt_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        OutboundEmail.objects.filter(id__in=ids).update(
+            status='sending', locked_at=now, attempts=F('attempts') + 1
+        )
+    return list(OutboundEmail.objects.filter(id__in=ids).order_by('next_attempt_at'))
+
+
+def backoff_delay(attempts: int, config: Dict) -> int:
+    """Délai avant la tentative suivante (exponentiel, plafonné)."""
+    return min(config['BACKOFF_BASE'] * 2 ** max(attempts - 1, 0), config['BACKOFF_MAX'])
+
+
+def send_outbox(batch_size: Optional[int] = None) -> Dict[str, int]:
+    """Envoyer un lot d'emails en attente sur la connexion SMTP persistante."""
+    config = get_email_outbox_settings()
+    emails = _claim(batch_size or config['BATCH_SIZE'], config['SENDING_TIMEOUT'])
+    stats = {'sent': 0, 'retried': 0, 'failed': 0}
+    if not emails:
+        return stats
+
+    with _smtp.lock:
+        for email in emails:
+            message = EmailMultiAlternatives(
+                subject=email.subject,
+                body=email.text_body,
+                from_email=email.from_email,
+                to=[email.to_email],
+            )
+            if email.html_body:
+                message.attach_alternative(email.html_body, 'text/html')
+
+            try:
+                message.connection = _smtp.get(config['CONNECTION_MAX_IDLE'])
+                message.send()
+            except Exception as e:
+                _smtp.close()  # Connexion possiblement rompue : rouverte au message suivant
+                if email.attempts >= config['MAX_ATTEMPTS']:
+                    email.status = 'failed'
+                    stats['failed'] += 1
+                    logger.error(f"❌ Email {email.kind} à {email.to_email} abandonné après {email.attempts} tentatives: {e}")
+                else:
+                    email.status = 'pending'
+                    email.next_attempt_at = timezone.now() + timedelta(seconds=backoff_delay(email.attempts, config))
+                    stats['retried'] += 1
+                    logger.warning(f"⚠️ Échec envoi email {email.kind} à {email.to_email} (tentative {email.attempts}): {e}")
+                email.last_error = str(e)[:1000]
+                email.save(update_fields=['status', 'next_attempt_at', 'last_error'])
+                continue
+
+            email.status = 'sent'
+            email.sent_at = timezone.now()
+            email.save(update_fields=['status', 'sent_at'])
+            stats['sent'] += 1
+
+    logger.info(f"📧 Outbox: {stats['sent']} envoyés, {stats['retried']} reportés, {stats['failed']} abandonnés")
+    return stats
@@ -4,14 +4,11 @@
 import logging
 from typing import Dict, List, Optional, Any
 from django.conf import settings
-from django.core.mail import send_mail, EmailMultiAlternatives
-from django.template.loader import render_to_string
 from django.utils.translation import gettext_lazy as _
 from django.contrib.auth import get_user_model
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
 import smtplib
-import ssl
+
+from .email_outbox import queue_email, render_email
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -48,15 +45,15 @@ class EmailService:
             
             # Rendu des templates
             subject = f"Vérifiez votre email - {context['site_name']}"
-            html_content = render_to_string('emails/verify_email.html', context)
-            text_content = render_to_string('emails/verify_email.txt', context)
+            html_content = render_email('emails/verify_email.html', context)
+            text_content = render_email('emails/verify_email.txt', context)
             
             return self._send_email(
                 subject=subject,
                 html_content=html_content,
                 text_content=text_content,
                 recipient_list=[user.email],
-                context=context
+                kind='verification'
             )
             
         except Exception as e:
@@ -77,15 +74,15 @@ class EmailService:
             }
             
             subject = f"Réinitialisation de votre mot de passe - {context['site_name']}"
-            html_content = render_to_string('emails/password_reset.html', context)
-            text_content = render_to_string('emails/password_reset.txt', context)
+            html_content = render_email('emails/password_reset.html', context)
+            text_content = render_email('emails/password_reset.txt', context)
             
             return self._send_email(
                 subject=subject,
                 html_content=html_content,
                 text_content=text_content,
                 recipient_list=[user.email],
-                context=context
+                kind='password_reset'
             )
             
         except Exception as e:
@@ -103,15 +100,15 @@ class EmailService:
             }
             
             subject = f"Bienvenue sur {context['site_name']} ! 🎮"
-            html_content = render_to_string('emails/welcome.html', context)
-            text_content = render_to_string('emails/welcome.txt', context)
+            html_content = render_email('emails/welcome.html', context)
+            text_content = render_email('emails/welcome.txt', context)
             
             return self._send_email(
                 subject=subject,
                 html_content=html_content,
                 text_content=text_content,
                 recipient_list=[user.email],
-                context=context
+                kind='welcome'
             )
             
         except Exception as e:
@@ -132,15 +129,15 @@ class EmailService:
             }
             
             subject = f"Nouvelle connexion détectée - {context['site_name']}"
-            html_content = render_to_string('emails/login_notification.html', context)
-            text_content = render_to_string('emails/login_notification.txt', context)
+            html_content = render_email('emails/login_notification.html', context)
+            text_content = render_email('emails/login_notification.txt', context)
             
             return self._send_email(
                 subject=subject,
                 html_content=html_content,
                 text_content=text_content,
                 recipient_list=[user.email],
-                context=context
+                kind='login_notification'
             )
             
         except Exception as e:
@@ -148,65 +145,22 @@ class EmailService:
             return False
     
     def _send_email(self, subject: str, html_content: str, text_content: str, 
-                   recipient_list: List[str], context: Dict[str, Any] = None) -> bool:
-        """Méthode privée pour envoyer les emails"""
-        
-        # Méthode 1: Utiliser Django EmailMultiAlternatives (recommandé)
+                   recipient_list: List[str], kind: str = '') -> bool:
+        """Mettre l'email en file (outbox) : l'envoi SMTP se fait hors requête."""
         try:
-            msg = EmailMultiAlternatives(
+            queued = queue_email(
                 subject=subject,
-                body=text_content,
-                from_email=self.from_email,
-                to=recipient_list
+                to=recipient_list,
+                text_body=text_content,
+                html_body=html_content,
+                kind=kind,
+                from_email=self.from_email
             )
-            msg.attach_alternative(html_content, "text/html")
-            msg.send()
-            
-            logger.info(f"Email envoyé avec succès à {recipient_list}")
-            return True
-            
-        except Exception as django_error:
-            logger.warning(f"Échec envoi Django mail: {django_error}")
-            
-            # Méthode 2: Fallback avec SMTP direct
-            return self._send_email_smtp_direct(subject, html_content, text_content, recipient_list)
-    
-    def _send_email_smtp_direct(self, subject: str, html_content: str, 
-                               text_content: str, recipient_list: List[str]) -> bool:
-        """Envoi direct via SMTP (fallback)"""
-        try:
-            # Créer le message
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = self.from_email
-            msg['To'] = ', '.join(recipient_list)
-            
-            # Ajouter les parties text et HTML
-            part1 = MIMEText(text_content, 'plain', 'utf-8')
-            part2 = MIMEText(html_content, 'html', 'utf-8')
-            
-            msg.attach(part1)
-            msg.attach(part2)
-            
-            # Connexion SMTP
-            if self.use_tls:
-                server = smtplib.SMTP(self.smtp_host, self.smtp_port)
-                server.starttls(context=ssl.create_default_context())
-            else:
-                server = smtplib.SMTP_SSL(self.smtp_host, self.smtp_port)
-            
-            # Authentification et envoi
-            if self.smtp_user and self.smtp_password:
-                server.login(self.smtp_user, self.smtp_password)
-            
-            server.send_message(msg)
-            server.quit()
-            
-            logger.info(f"Email SMTP direct envoyé avec succès à {recipient_list}")
+            logger.info(f"Email {kind} mis en file pour {recipient_list} ({queued} nouveau(x))")
             return True
             
-        except Exception as smtp_error:
-            logger.error(f"Échec envoi SMTP direct: {smtp_error}")
+        except Exception as e:
+            logger.error(f"Échec mise en file email {kind}: {e}")
             return False
     
     def test_email_configuration(self) -> Dict[str, Any]:
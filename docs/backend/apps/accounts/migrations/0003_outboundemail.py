@@ -0,0 +1,44 @@
+import uuid
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0002_usersettings_kyc_banner_dismissed_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboundEmail',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('kind', models.CharField(blank=True, max_length=50, verbose_name="Type d'email")),
+                ('dedup_key', models.CharField(blank=True, max_length=100, verbose_name='Clé de déduplication')),
+                ('subject', models.CharField(max_length=255, verbose_name='Sujet')),
+                ('from_email', models.CharField(max_length=255, verbose_name='Expéditeur')),
+                ('to_email', models.EmailField(max_length=254, verbose_name='Destinataire')),
+                ('text_body', models.TextField(blank=True, verbose_name='Corps texte')),
+                ('html_body', models.TextField(blank=True, verbose_name='Corps HTML')),
+                ('status', models.CharField(choices=[('pending', 'En attente'), ('sending', "En cours d'envoi"), ('sent', 'Envoyé'), ('failed', 'Échoué')], default='pending', max_length=10, verbose_name='Statut')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Tentatives')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Prochaine tentative')),
+                ('locked_at', models.DateTimeField(blank=True, null=True, verbose_name='Pris en charge le')),
+                ('last_error', models.TextField(blank=True, verbose_name='Dernière erreur')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Envoyé le')),
+            ],
+            options={
+                'verbose_name': 'Email sortant',
+                'verbose_name_plural': 'Emails sortants',
+                'db_table': 'email_outbox',
+                'ordering': ['next_attempt_at'],
+                'indexes': [
+                    models.Index(fields=['status', 'next_attempt_at'], name='email_outbo_status_c5a6aa_idx'),
+                    models.Index(fields=['to_email', 'kind', '-created_at'], name='email_outbo_to_emai_cdd55f_idx'),
+                ],
+            },
+        ),
+    ]
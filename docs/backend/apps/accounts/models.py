@@ -8,7 +8,7 @@ from decimal import Decimal
 from datetime import timedelta
 
 from django.contrib.auth.models import AbstractUser
-from django.db import models, transaction
+from django.db import connections, models, router, transaction
 from django.core.validators import (
     MinValueValidator, MaxValueValidator, 
     RegexValidator, FileExtensionValidator
@@ -19,6 +19,9 @@ from django.core.exceptions import ValidationError
 from django.conf import settings
 from django.contrib.auth.base_user import BaseUserManager
 
+from apps.core.field_signals import FieldTrackingMixin
+
+
 class UserManager(BaseUserManager):
     """Manager personnalisé pour les utilisateurs."""
     
@@ -47,7 +50,7 @@ class UserManager(BaseUserManager):
 # apps/accounts/models.py
 # Remplacez votre classe User par celle-ci (version complète)
 
-class User(AbstractUser):
+class User(FieldTrackingMixin, AbstractUser):
     """Modèle utilisateur personnalisé pour RUMO RUSH."""
     
     # Statuts KYC
@@ -59,6 +62,13 @@ class User(AbstractUser):
         ('expired', _('Expiré')),
     ]
     
+    # Champ de solde par devise
+    BALANCE_FIELDS = {
+        'FCFA': 'balance_fcfa',
+        'EUR': 'balance_eur',
+        'USD': 'balance_usd',
+    }
+    
     # Langues supportées - AJOUTÉ
     LANGUAGE_CHOICES = [
         ('fr', _('Français')),
@@ -290,7 +300,11 @@ class User(AbstractUser):
     
     def update_balance(self, currency, amount, operation='add'):
         """
-        Mettre à jour le solde de l'utilisateur.
+        Mettre à jour le solde de l'utilisateur en une seule requête atomique.
+        
+        `UPDATE ... SET solde = solde + montant WHERE solde + montant >= 0
+        RETURNING solde` : deux crédits simultanés ne s'écrasent pas et le
+        découvert est refusé par la base, sans verrou ni relecture.
         
         Args:
             currency (str): Code de la devise
@@ -299,41 +313,73 @@ class User(AbstractUser):
         
         Returns:
             Decimal: Le nouveau solde
+        
+        Raises:
+            ValueError: Devise ou opération non supportée, solde insuffisant
         """
         currency = currency.upper()
         
         # Déterminer le champ de balance
-        if currency == 'FCFA':
-            balance_field = 'balance_fcfa'
-        elif currency == 'EUR':
-            balance_field = 'balance_eur'
-        elif currency == 'USD':
-            balance_field = 'balance_usd'
-        else:
+        balance_field = self.BALANCE_FIELDS.get(currency)
+        if balance_field is None:
             raise ValueError(f"Devise non supportée: {currency}")
         
-        current_balance = getattr(self, balance_field)
+        amount = Decimal(str(amount))
+        field = self._meta.get_field(balance_field)
+        connection = connections[router.db_for_write(type(self), instance=self)]
+        quote = connection.ops.quote_name
+        table, column, pk_column = quote(self._meta.db_table), quote(field.column), quote(self._meta.pk.column)
+        pk = self._meta.pk.get_db_prep_value(self.pk, connection)
         
-        # Calculer le nouveau solde
-        if operation == 'add':
-            new_balance = current_balance + amount
-        elif operation == 'subtract':
-            new_balance = current_balance - amount
+        if operation in ('add', 'subtract'):
+            delta = amount if operation == 'add' else -amount
+            sql = (
+                f'UPDATE {table} SET {column} = {column} + %s '
+                f'WHERE {pk_column} = %s AND {column} + %s >= 0 RETURNING {column}'
+            )
+            prepared = field.get_db_prep_save(delta, connection)
+            params = [prepared, pk, prepared]
         elif operation == 'set':
-            new_balance = amount
+            if amount < 0:
+                raise ValueError("Le solde ne peut pas devenir négatif")
+            sql = f'UPDATE {table} SET {column} = %s WHERE {pk_column} = %s RETURNING {column}'
+            params = [field.get_db_prep_save(amount, connection), pk]
         else:
             raise ValueError(f"Opération non supportée: {operation}")
         
-        # Vérifier que le solde ne devient pas négatif
-        if new_balance < 0:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+        
+        # Aucune ligne modifiée : le solde serait devenu négatif
+        if row is None:
             raise ValueError("Le solde ne peut pas devenir négatif")
         
-        # Mettre à jour le solde
+        new_balance = Decimal(str(row[0])).quantize(Decimal(1).scaleb(-field.decimal_places))
+        old_balance = getattr(self, balance_field) if operation == 'set' else new_balance - delta
         setattr(self, balance_field, new_balance)
-        self.save(update_fields=[balance_field])
+        self.snapshot_fields([balance_field])  # Déjà en base : pas de second journal au prochain save()
         
+        self.log_balance_change(currency, old_balance, new_balance)
         return new_balance
     
+    def log_balance_change(self, currency, old_balance, new_balance):
+        """Enregistrer un changement de solde dans l'historique d'activité."""
+        from apps.core.utils import log_user_activity
+        
+        change = new_balance - old_balance
+        log_user_activity(
+            user=self,
+            activity_type='balance_updated',
+            description=f'Solde {currency.upper()} modifié: {change}',
+            metadata={
+                'currency': currency.lower(),
+                'old_balance': str(old_balance),
+                'new_balance': str(new_balance),
+                'change_amount': str(change)
+            }
+        )
+    
     def has_sufficient_balance(self, currency, amount):
         """
         Vérifier si l'utilisateur a un solde suffisant.
@@ -798,3 +844,49 @@ class UserSettings(models.Model):
     
     def __str__(self):
         return f"Paramètres de {self.user.username}"
+
+
+class OutboundEmail(models.Model):
+    """File d'envoi des emails transactionnels (outbox)."""
+    
+    STATUS_CHOICES = [
+        ('pending', _('En attente')),
+        ('sending', _('En cours d\'envoi')),
+        ('sent', _('Envoyé')),
+        ('failed', _('Échoué')),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    kind = models.CharField(_('Type d\'email'), max_length=50, blank=True)
+    dedup_key = models.CharField(_('Clé de déduplication'), max_length=100, blank=True)
+    
+    # Message rendu
+    subject = models.CharField(_('Sujet'), max_length=255)
+    from_email = models.CharField(_('Expéditeur'), max_length=255)
+    to_email = models.EmailField(_('Destinataire'))
+    text_body = models.TextField(_('Corps texte'), blank=True)
+    html_body = models.TextField(_('Corps HTML'), blank=True)
+    
+    # Envoi
+    status = models.CharField(_('Statut'), max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(_('Tentatives'), default=0)
+    next_attempt_at = models.DateTimeField(_('Prochaine tentative'), default=timezone.now)
+    locked_at = models.DateTimeField(_('Pris en charge le'), null=True, blank=True)
+    last_error = models.TextField(_('Dernière erreur'), blank=True)
+    
+    # Horodatage
+    created_at = models.DateTimeField(_('Créé le'), auto_now_add=True)
+    sent_at = models.DateTimeField(_('Envoyé le'), null=True, blank=True)
+    
+    class Meta:
+        db_table = 'email_outbox'
+        verbose_name = _('Email sortant')
+        verbose_name_plural = _('Emails sortants')
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+            models.Index(fields=['to_email', 'kind', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind or 'email'} → {self.to_email} ({self.get_status_display()})"
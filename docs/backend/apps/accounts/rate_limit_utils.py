@@ -5,7 +5,12 @@ Gestion des adresses IP avec fallback pour environnements locaux/proxy
 
 from django_ratelimit.core import _get_ip
 from django.core.exceptions import ImproperlyConfigured
+import functools
 import logging
+import math
+
+from apps.core.exceptions import RateLimitExceededException
+from apps.core.rate_limit import get_rate_limiter, parse_rate
 
 logger = logging.getLogger(__name__)
 
@@ -95,4 +100,41 @@ def safe_user_or_ip_key(group, request):
     Returns:
         str: ID utilisateur ou IP pour le rate limiting
     """
-    return get_user_or_ip(request)
\ No newline at end of file
+    return get_user_or_ip(request)
+
+
+def ratelimit(key, rate, method=None, block=True, group=None):
+    """
+    Remplaçant de `django_ratelimit.decorators.ratelimit` adossé au limiteur
+    partagé de `apps.core.rate_limit` (atomique entre processus).
+    
+    Args:
+        key: Fonction (group, request) → identifiant
+        rate: Taux au format django-ratelimit ('3/m', '10/h')
+        method: Méthode(s) HTTP limitée(s), toutes par défaut
+        block: Lever une erreur 429 si la limite est atteinte, sinon
+            marquer `request.limited`
+        group: Groupe de la limite (par défaut le nom qualifié de la vue)
+    """
+    limit, window = parse_rate(rate)
+    methods = {method} if isinstance(method, str) else set(method or ())
+    
+    def decorator(view_func):
+        limit_group = group or f"{view_func.__module__}.{view_func.__qualname__}"
+        # Partagé : `method_decorator` réapplique ce décorateur à chaque requête
+        limiter = get_rate_limiter(f"accounts:{limit_group}", limit, window)
+        
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            request.limited = getattr(request, 'limited', False)
+            if not methods or request.method in methods:
+                result = limiter.hit(key(limit_group, request))
+                if not result.allowed:
+                    request.limited = True
+                    if block:
+                        raise RateLimitExceededException(retry_after=max(1, math.ceil(result.retry_after)))
+            return view_func(request, *args, **kwargs)
+        
+        return wrapper
+    
+    return decorator
@@ -7,14 +7,14 @@ from django.db.models.signals import (
 )
 from django.dispatch import receiver
 from django.utils import timezone
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
 from django.conf import settings
 from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
 from decimal import Decimal
 
 from .models import User, KYCDocument, UserSettings
+from apps.core.field_signals import on_field_change
 from apps.core.utils import log_user_activity, get_client_ip
+from .email_outbox import queue_email, render_email
 
 
 # ==========================================
@@ -151,15 +151,13 @@ def send_referral_bonus_email(referrer, new_user, bonus_amount):
             'site_name': 'RUMO RUSH'
         }
         
-        message = render_to_string('emails/referral_bonus.html', context)
+        message = render_email('emails/referral_bonus.html', context)
         
-        send_mail(
+        queue_email(
             subject,
-            '',
-            settings.DEFAULT_FROM_EMAIL,
             [referrer.email],
-            html_message=message,
-            fail_silently=True
+            html_body=message,
+            kind='referral_bonus'
         )
         
     except Exception as e:
@@ -181,15 +179,13 @@ def send_level_upgrade_email(referrer, level_name, commission_rate, total_referr
             'site_name': 'RUMO RUSH'
         }
         
-        message = render_to_string('emails/referral_level_upgrade.html', context)
+        message = render_email('emails/referral_level_upgrade.html', context)
         
-        send_mail(
+        queue_email(
             subject,
-            '',
-            settings.DEFAULT_FROM_EMAIL,
             [referrer.email],
-            html_message=message,
-            fail_silently=True
+            html_body=message,
+            kind='referral_level_upgrade'
         )
         
     except Exception as e:
@@ -236,150 +232,87 @@ def create_user_related_objects(sender, instance, created, **kwargs):
         )
 
 
-@receiver(post_save, sender=User)
-def handle_user_verification_changes(sender, instance, created, **kwargs):
-    """Gérer les changements de vérification utilisateur."""
-    if not created:
-        # Vérifier si l'email vient d'être vérifié
-        if instance.is_verified:
-            try:
-                old_instance = User.objects.get(pk=instance.pk)
-                if hasattr(old_instance, '_state') and not old_instance.is_verified:
-                    # Email vient d'être vérifié
-                    log_user_activity(
-                        user=instance,
-                        activity_type='email_verified',
-                        description='Adresse email vérifiée'
-                    )
-                    
-                    # Envoyer email de bienvenue
-                    send_welcome_email(instance)
-                    
-                    # 🎁 Bonus de bienvenue pour email vérifié
-                    welcome_bonus = Decimal('1000.00')
-                    instance.balance_fcfa += welcome_bonus
-                    instance.save(update_fields=['balance_fcfa'])
-                    
-                    log_user_activity(
-                        user=instance,
-                        activity_type='welcome_bonus_received',
-                        description=f'🎁 Bonus de bienvenue : {welcome_bonus} FCFA',
-                        metadata={'bonus_amount': str(welcome_bonus)}
-                    )
-                    
-            except User.DoesNotExist:
-                pass
+@on_field_change(User, fields=['is_verified'])
+def handle_user_verification_changes(instance, changes, created):
+    """Gérer la vérification de l'email (passage de is_verified à True)."""
+    was_verified, is_verified = changes['is_verified']
+    if was_verified or not is_verified:
+        return
+    
+    log_user_activity(
+        user=instance,
+        activity_type='email_verified',
+        description='Adresse email vérifiée'
+    )
+    
+    # Envoyer email de bienvenue
+    send_welcome_email(instance)
+    
+    # 🎁 Bonus de bienvenue pour email vérifié
+    welcome_bonus = Decimal('1000.00')
+    instance.update_balance('FCFA', welcome_bonus, 'add')
+    
+    log_user_activity(
+        user=instance,
+        activity_type='welcome_bonus_received',
+        description=f'🎁 Bonus de bienvenue : {welcome_bonus} FCFA',
+        metadata={'bonus_amount': str(welcome_bonus)}
+    )
 
 
 @receiver(pre_save, sender=User)
-def track_kyc_status_changes(sender, instance, **kwargs):
-    """Suivre les changements de statut KYC."""
-    if instance.pk:
-        try:
-            old_instance = User.objects.get(pk=instance.pk)
-            
-            if old_instance.kyc_status != instance.kyc_status:
-                if instance.kyc_status in ['approved', 'rejected'] and not instance.kyc_reviewed_at:
-                    instance.kyc_reviewed_at = timezone.now()
-                
-                log_user_activity(
-                    user=instance,
-                    activity_type='kyc_status_changed',
-                    description=f'Statut KYC changé de {old_instance.kyc_status} à {instance.kyc_status}',
-                    metadata={
-                        'old_status': old_instance.kyc_status,
-                        'new_status': instance.kyc_status,
-                        'reviewed_at': instance.kyc_reviewed_at.isoformat() if instance.kyc_reviewed_at else None
-                    }
-                )
-                
-        except User.DoesNotExist:
-            pass
-
-
-@receiver(post_save, sender=User)
-def handle_kyc_status_notifications(sender, instance, created, **kwargs):
-    """Envoyer des notifications selon le statut KYC."""
-    if not created:
-        try:
-            old_instance = User.objects.get(pk=instance.pk)
-            
-            if old_instance.kyc_status != 'approved' and instance.kyc_status == 'approved':
-                send_kyc_approved_email(instance)
-                log_user_activity(
-                    user=instance,
-                    activity_type='kyc_approved',
-                    description='KYC approuvé - notification envoyée'
-                )
-            
-            elif old_instance.kyc_status != 'rejected' and instance.kyc_status == 'rejected':
-                send_kyc_rejected_email(instance)
-                log_user_activity(
-                    user=instance,
-                    activity_type='kyc_rejected',
-                    description='KYC rejeté - notification envoyée',
-                    metadata={'rejection_reason': instance.kyc_rejection_reason}
-                )
-                
-        except User.DoesNotExist:
-            pass
+def stamp_kyc_review(sender, instance, update_fields=None, **kwargs):
+    """Horodater la revue KYC quand le statut passe à approuvé ou rejeté (sans relecture)."""
+    if instance.pk and not instance.kyc_reviewed_at and instance.kyc_status in ['approved', 'rejected']:
+        if instance.get_field_changes(['kyc_status']):
+            instance.kyc_reviewed_at = timezone.now()
 
 
-@receiver(pre_save, sender=User)
-def track_balance_changes(sender, instance, **kwargs):
-    """Suivre les changements de solde pour audit."""
-    if instance.pk:
-        try:
-            old_instance = User.objects.get(pk=instance.pk)
-            
-            balance_changes = {}
-            
-            if old_instance.balance_fcfa != instance.balance_fcfa:
-                balance_changes['fcfa'] = {
-                    'old': str(old_instance.balance_fcfa),
-                    'new': str(instance.balance_fcfa),
-                    'change': str(instance.balance_fcfa - old_instance.balance_fcfa)
-                }
-            
-            if old_instance.balance_eur != instance.balance_eur:
-                balance_changes['eur'] = {
-                    'old': str(old_instance.balance_eur),
-                    'new': str(instance.balance_eur),
-                    'change': str(instance.balance_eur - old_instance.balance_eur)
-                }
-            
-            if old_instance.balance_usd != instance.balance_usd:
-                balance_changes['usd'] = {
-                    'old': str(old_instance.balance_usd),
-                    'new': str(instance.balance_usd),
-                    'change': str(instance.balance_usd - old_instance.balance_usd)
-                }
-            
-            if balance_changes:
-                instance._balance_changes = balance_changes
-                
-        except User.DoesNotExist:
-            pass
+@on_field_change(User, fields=['kyc_status'])
+def handle_kyc_status_change(instance, changes, created):
+    """Journaliser le changement de statut KYC et notifier l'utilisateur."""
+    old_status, new_status = changes['kyc_status']
+    
+    log_user_activity(
+        user=instance,
+        activity_type='kyc_status_changed',
+        description=f'Statut KYC changé de {old_status} à {new_status}',
+        metadata={
+            'old_status': old_status,
+            'new_status': new_status,
+            'reviewed_at': instance.kyc_reviewed_at.isoformat() if instance.kyc_reviewed_at else None
+        }
+    )
+    
+    if new_status == 'approved':
+        send_kyc_approved_email(instance)
+        log_user_activity(
+            user=instance,
+            activity_type='kyc_approved',
+            description='KYC approuvé - notification envoyée'
+        )
+    
+    elif new_status == 'rejected':
+        send_kyc_rejected_email(instance)
+        log_user_activity(
+            user=instance,
+            activity_type='kyc_rejected',
+            description='KYC rejeté - notification envoyée',
+            metadata={'rejection_reason': instance.kyc_rejection_reason}
+        )
 
 
-@receiver(post_save, sender=User)
-def log_balance_changes(sender, instance, created, **kwargs):
-    """Logger les changements de solde après sauvegarde."""
-    if not created and hasattr(instance, '_balance_changes'):
-        for currency, change in instance._balance_changes.items():
-            log_user_activity(
-                user=instance,
-                activity_type='balance_updated',
-                description=f'Solde {currency.upper()} modifié: {change["change"]}',
-                metadata={
-                    'currency': currency,
-                    'old_balance': change['old'],
-                    'new_balance': change['new'],
-                    'change_amount': change['change']
-                }
-            )
-        
-        delattr(instance, '_balance_changes')
+@on_field_change(User, fields=list(User.BALANCE_FIELDS.values()))
+def log_balance_changes(instance, changes, created):
+    """
+    Journaliser les soldes modifiés par save().
+    
+    User.update_balance journalise lui-même et ne passe pas par save().
+    """
+    for currency, field in User.BALANCE_FIELDS.items():
+        if field in changes:
+            old_balance, new_balance = changes[field]
+            instance.log_balance_change(currency, old_balance, new_balance)
 
 
 # ==========================================
@@ -556,15 +489,13 @@ def send_welcome_email(user):
             'site_name': 'RUMO RUSH',
             'login_url': f"{settings.FRONTEND_URL}/login/"
         }
-        message = render_to_string('emails/welcome.html', context)
+        message = render_email('emails/welcome.html', context)
         
-        send_mail(
+        queue_email(
             subject,
-            '',
-            settings.DEFAULT_FROM_EMAIL,
             [user.email],
-            html_message=message,
-            fail_silently=True
+            html_body=message,
+            kind='welcome'
         )
         
     except Exception as e:
@@ -582,15 +513,13 @@ def send_kyc_approved_email(user):
             'site_name': 'RUMO RUSH',
             'dashboard_url': f"{settings.FRONTEND_URL}/dashboard/"
         }
-        message = render_to_string('emails/kyc_approved.html', context)
+        message = render_email('emails/kyc_approved.html', context)
         
-        send_mail(
+        queue_email(
             subject,
-            '',
-            settings.DEFAULT_FROM_EMAIL,
             [user.email],
-            html_message=message,
-            fail_silently=True
+            html_body=message,
+            kind='kyc_approved'
         )
         
     except Exception as e:
@@ -609,15 +538,13 @@ def send_kyc_rejected_email(user):
             'site_name': 'RUMO RUSH',
             'kyc_url': f"{settings.FRONTEND_URL}/kyc/"
         }
-        message = render_to_string('emails/kyc_rejected.html', context)
+        message = render_email('emails/kyc_rejected.html', context)
         
-        send_mail(
+        queue_email(
             subject,
-            '',
-            settings.DEFAULT_FROM_EMAIL,
             [user.email],
-            html_message=message,
-            fail_silently=True
+            html_body=message,
+            kind='kyc_rejected'
         )
         
     except Exception as e:
@@ -641,15 +568,14 @@ def send_login_notification(user, request):
             'user_agent': request.META.get('HTTP_USER_AGENT', '') if request else '',
             'site_name': 'RUMO RUSH'
         }
-        message = render_to_string('emails/login_notification.html', context)
+        message = render_email('emails/login_notification.html', context)
         
-        send_mail(
+        queue_email(
             subject,
-            '',
-            settings.DEFAULT_FROM_EMAIL,
             [user.email],
-            html_message=message,
-            fail_silently=True
+            html_body=message,
+            kind='login_notification',
+            dedup_key=current_ip or ''
         )
         
     except Exception as e:
@@ -673,15 +599,13 @@ def notify_admin_kyc_upload(document):
                 'user': document.user,
                 'admin_url': f"{settings.BACKEND_URL}/admin/accounts/kycdocument/{document.id}/change/"
             }
-            message = render_to_string('emails/admin_kyc_notification.html', context)
+            message = render_email('emails/admin_kyc_notification.html', context)
             
-            send_mail(
+            queue_email(
                 subject,
-                '',
-                settings.DEFAULT_FROM_EMAIL,
                 list(admin_emails),
-                html_message=message,
-                fail_silently=True
+                html_body=message,
+                kind='admin_kyc_notification'
             )
             
     except Exception as e:
@@ -0,0 +1,15 @@
+# apps/accounts/tasks.py
+# ======================
+
+from celery import shared_task
+import logging
+
+from .email_outbox import send_outbox
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='apps.accounts.tasks.send_email_outbox', ignore_result=True)
+def send_email_outbox(batch_size=None):
+    """Envoyer les emails en attente de l'outbox (connexion SMTP réutilisée)."""
+    return send_outbox(batch_size)
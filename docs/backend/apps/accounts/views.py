@@ -11,15 +11,13 @@ from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 
 from django.contrib.auth import authenticate
 from django.utils.translation import gettext_lazy as _
-from django.core.mail import send_mail
-from django.template.loader import render_to_string
 from django.conf import settings
 from django.utils import timezone
 from django.db import transaction
-from django_ratelimit.decorators import ratelimit
 from django.utils.decorators import method_decorator
 
 from .models import User, KYCDocument, UserActivity, UserSettings
+from .email_outbox import queue_email, render_email
 from .serializers import (
     UserRegistrationSerializer, UserProfileSerializer, 
     UserBalanceSerializer, KYCDocumentSerializer,
@@ -32,7 +30,7 @@ from .serializers import (
 from apps.core.permissions import IsOwnerOrReadOnly
 from apps.core.utils import log_user_activity, get_client_ip, log_user_activity_with_ip
 from apps.core.pagination import StandardResultsSetPagination
-from .rate_limit_utils import safe_ratelimit_key, safe_user_or_ip_key, get_user_or_ip
+from .rate_limit_utils import ratelimit, safe_ratelimit_key, safe_user_or_ip_key, get_user_or_ip
 
 
 class CustomTokenObtainPairView(TokenObtainPairView):
@@ -103,7 +101,7 @@ class UserRegistrationView(generics.CreateAPIView):
         (Too Many Requests) avec un message clair au lieu d'un 403 générique.
         Utilise safe_ratelimit_key pour éviter les erreurs d'IP en développement.
         """
-        # Si la requête a dépassé la limite, `django-ratelimit` marque
+        # Si la requête a dépassé la limite, `ratelimit` marque
         # `request.limited` à True (avec block=False). Retourner 429.
         if getattr(request, 'limited', False):
             return Response({
@@ -166,7 +164,7 @@ class UserRegistrationView(generics.CreateAPIView):
             }
             
             # Template HTML et version texte
-            html_message = render_to_string('emails/verify_email.html', context)
+            html_message = render_email('emails/verify_email.html', context)
             text_message = f"""
 Bonjour {user.first_name or user.username},
 
@@ -185,13 +183,12 @@ support@rumorush.com
             """.strip()
 
             # Envoi avec version texte ET HTML (meilleur score anti-spam)
-            send_mail(
+            queue_email(
                 subject,
-                text_message,  # Version texte obligatoire
-                settings.DEFAULT_FROM_EMAIL,
                 [user.email],
-                html_message=html_message,
-                fail_silently=True
+                text_body=text_message,  # Version texte obligatoire
+                html_body=html_message,
+                kind='verification'
             )
 
             # Logger l'envoi d'email
@@ -521,15 +518,13 @@ class PasswordResetRequestView(APIView):
                 'reset_link': f"{settings.FRONTEND_URL}/reset-password/{uid}/{token}/",
                 'site_name': 'RUMO RUSH'
             }
-            message = render_to_string('emails/password_reset.html', context)
+            message = render_email('emails/password_reset.html', context)
             
-            send_mail(
+            queue_email(
                 subject,
-                '',
-                settings.DEFAULT_FROM_EMAIL,
                 [user.email],
-                html_message=message,
-                fail_silently=True
+                html_body=message,
+                kind='password_reset'
             )
             
             # Logger l'activité
@@ -677,15 +672,13 @@ class ResendVerificationEmailView(APIView):
                 'verification_link': verification_link,
                 'site_name': 'RUMO RUSH'
             }
-            message = render_to_string('emails/verify_email.html', context)
+            message = render_email('emails/verify_email.html', context)
 
-            send_mail(
+            queue_email(
                 subject,
-                '',
-                settings.DEFAULT_FROM_EMAIL,
                 [user.email],
-                html_message=message,
-                fail_silently=False
+                html_body=message,
+                kind='verification'
             )
 
             # Logger l'activité
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import GameSession, PlayerStats, GameEvent
+from .models import AnalyticsRollup, GameSession, PlayerStats, GameEvent
 
 @admin.register(GameSession)
 class GameSessionAdmin(admin.ModelAdmin):
@@ -20,3 +20,10 @@ class GameEventAdmin(admin.ModelAdmin):
     list_filter = ('event_type', 'timestamp')
     search_fields = ('session__player_id', 'event_type')
     readonly_fields = ('timestamp',)
+
+@admin.register(AnalyticsRollup)
+class AnalyticsRollupAdmin(admin.ModelAdmin):
+    list_display = ('granularity', 'bucket', 'sessions_started', 'sessions_ended', 'total_events', 'updated_at')
+    list_filter = ('granularity', 'bucket')
+    readonly_fields = ('updated_at',)
+    exclude = ('players_hll',)
@@ -0,0 +1,268 @@
+"""
+Stockage de la table des événements de jeu (`analytics_gameevent`).
+
+- Partitionnement journalier PostgreSQL (RANGE sur `timestamp`) et création
+  anticipée des partitions des jours à venir.
+- Rétention : les partitions antérieures à RETENTION_DAYS sont détachées et
+  supprimées d'un bloc ; sans partitionnement (ou dans la partition par
+  défaut), les événements expirés sont supprimés par lots.
+"""
+import logging
+import re
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+
+from django.db import connection, transaction as db_transaction
+from django.utils import timezone
+
+from .ingestion import get_analytics_events_settings
+from .models import GameEvent
+
+logger = logging.getLogger(__name__)
+
+PARTITION_NAME_RE = re.compile(r'_d(?P<year>\d{4})(?P<month>\d{2})(?P<day>\d{2})$')
+
+
+class EventStorageError(Exception):
+    """Erreur de maintenance du stockage des événements."""
+
+
+# ============= PARTITIONS JOURNALIÈRES =============
+
+def day_start(value):
+    """Jour UTC de `value` (date ou datetime)."""
+    if isinstance(value, datetime):
+        return value.astimezone(dt_timezone.utc).date() if timezone.is_aware(value) else value.date()
+    return value
+
+
+def day_bounds(day):
+    """Bornes [début, fin) d'un jour en datetimes UTC."""
+    start = datetime.combine(day, time.min, tzinfo=dt_timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def retention_cutoff_day(retention_days=None):
+    """Premier jour conservé : les jours antérieurs sont supprimés."""
+    if retention_days is None:
+        retention_days = get_analytics_events_settings()['RETENTION_DAYS']
+    return day_start(timezone.now()) - timedelta(days=retention_days)
+
+
+def partition_name(day):
+    """Nom de la partition d'un jour, ex. `analytics_gameevent_d20250301`."""
+    return f"{GameEvent._meta.db_table}_d{day:%Y%m%d}"
+
+
+def _require_postgresql():
+    if connection.vendor != 'postgresql':
+        raise EventStorageError(
+            f"Le partitionnement nécessite PostgreSQL (base actuelle : {connection.vendor})"
+        )
+
+
+def is_partitioned():
+    """La table des événements est-elle déjà une table partitionnée ?"""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+            [GameEvent._meta.db_table]
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """Partitions journalières existantes, sous forme {jour: nom}."""
+    _require_postgresql()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(%s)
+            """,
+            [GameEvent._meta.db_table]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME_RE.search(name)
+        if match:
+            partitions[date(int(match['year']), int(match['month']), int(match['day']))] = name
+    return dict(sorted(partitions.items()))
+
+
+def create_day_partition(day, cursor=None):
+    """Créer (si besoin) la partition d'un jour. Retourne son nom."""
+    _require_postgresql()
+    start, end = day_bounds(day)
+    name = partition_name(day)
+    qn = connection.ops.quote_name
+    sql = (
+        f"CREATE TABLE IF NOT EXISTS {qn(name)} PARTITION OF {qn(GameEvent._meta.db_table)} "
+        f"FOR VALUES FROM (%s) TO (%s)"
+    )
+    if cursor is not None:
+        cursor.execute(sql, [start, end])
+    else:
+        with connection.cursor() as new_cursor:
+            new_cursor.execute(sql, [start, end])
+    return name
+
+
+def ensure_partitions(days_ahead=None, dry_run=False):
+    """
+    Garantir l'existence des partitions du jour courant et des `days_ahead`
+    jours suivants, pour que la partition par défaut reste vide.
+    """
+    _require_postgresql()
+    if not is_partitioned():
+        raise EventStorageError(
+            "La table des événements n'est pas partitionnée (lancer d'abord --convert)"
+        )
+    if days_ahead is None:
+        days_ahead = get_analytics_events_settings()['PARTITIONS_AHEAD']
+
+    existing = list_partitions()
+    today = day_start(timezone.now())
+    created = []
+    for offset in range(days_ahead + 1):
+        day = today + timedelta(days=offset)
+        if day in existing:
+            continue
+        if not dry_run:
+            create_day_partition(day)
+        created.append(partition_name(day))
+
+    if created:
+        logger.info(f"🗂️ Partitions d'événements créées: {', '.join(created)}")
+    return created
+
+
+def convert_to_partitioned(days_ahead=None):
+    """
+    Convertir la table des événements existante en table partitionnée par jour.
+
+    Même procédure que pour les transactions (apps.payments.transaction_storage) :
+    une transaction sous verrou exclusif, partitions couvrant la période
+    conservée, copie des lignes puis création des index. La clé primaire
+    devient (id, timestamp) et la séquence des identifiants reprend au
+    maximum copié. Les événements hors rétention ne sont pas copiés.
+    """
+    _require_postgresql()
+    if is_partitioned():
+        raise EventStorageError("La table des événements est déjà partitionnée")
+    if days_ahead is None:
+        days_ahead = get_analytics_events_settings()['PARTITIONS_AHEAD']
+
+    table = GameEvent._meta.db_table
+    legacy = f"{table}_legacy"
+    qn = connection.ops.quote_name
+    session_column = GameEvent._meta.get_field('session').column
+    session_table = GameEvent._meta.get_field('session').related_model._meta.db_table
+    ts = qn(GameEvent._meta.get_field('timestamp').column)
+    cutoff, _ = day_bounds(retention_cutoff_day())
+
+    with db_transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {qn(table)} IN ACCESS EXCLUSIVE MODE")
+            cursor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}")
+            cursor.execute(
+                f"CREATE TABLE {qn(table)} "
+                f"(LIKE {qn(legacy)} INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING CONSTRAINTS INCLUDING STORAGE) "
+                f"PARTITION BY RANGE ({ts})"
+            )
+
+            cursor.execute(
+                f"SELECT MIN({ts}), MAX({ts}) FROM {qn(legacy)} WHERE {ts} >= %s", [cutoff]
+            )
+            oldest, newest = cursor.fetchone()
+
+            today = day_start(timezone.now())
+            day = day_start(oldest) if oldest else today
+            last = max(day_start(newest) if newest else today, today + timedelta(days=days_ahead))
+            while day <= last:
+                create_day_partition(day, cursor=cursor)
+                day += timedelta(days=1)
+            cursor.execute(f"CREATE TABLE {qn(table + '_default')} PARTITION OF {qn(table)} DEFAULT")
+
+            cursor.execute(f"INSERT INTO {qn(table)} SELECT * FROM {qn(legacy)} WHERE {ts} >= %s", [cutoff])
+            row_count = cursor.rowcount
+            cursor.execute(
+                f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE((SELECT MAX(id) FROM {qn(legacy)}), 0) + 1, false)",
+                [table]
+            )
+            cursor.execute(f"DROP TABLE {qn(legacy)}")
+
+            # Les contraintes d'unicité doivent inclure la clé de partition
+            cursor.execute(f"ALTER TABLE {qn(table)} ADD PRIMARY KEY (id, {ts})")
+            cursor.execute(
+                f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(f'{table}_{session_column}_fk')} "
+                f"FOREIGN KEY ({qn(session_column)}) REFERENCES {qn(session_table)} (id) "
+                f"DEFERRABLE INITIALLY DEFERRED"
+            )
+            cursor.execute(
+                f"CREATE INDEX {qn(f'{table}_{session_column}_idx')} ON {qn(table)} ({qn(session_column)})"
+            )
+
+        with connection.schema_editor(atomic=False) as editor:
+            for index in GameEvent._meta.indexes:
+                editor.add_index(GameEvent, index)
+
+    logger.info(f"🗂️ Table {table} partitionnée par jour: {row_count} lignes copiées")
+    return {'rows': row_count, 'partitions': list(list_partitions().values())}
+
+
+def drop_expired_partitions(before_day, dry_run=False):
+    """Détacher et supprimer les partitions des jours antérieurs à `before_day`."""
+    _require_postgresql()
+    qn = connection.ops.quote_name
+    table = GameEvent._meta.db_table
+    dropped = []
+    with connection.cursor() as cursor:
+        for day, name in list_partitions().items():
+            if day >= before_day:
+                continue
+            if not dry_run:
+                cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}")
+                cursor.execute(f"DROP TABLE {qn(name)}")
+            dropped.append(name)
+    if dropped and not dry_run:
+        logger.info(f"🗑️ Partitions d'événements supprimées: {', '.join(dropped)}")
+    return dropped
+
+
+# ============= RÉTENTION =============
+
+def purge_expired_events(before_day, batch_size=None, dry_run=False):
+    """Supprimer par lots les événements antérieurs à `before_day` (tables non partitionnées)."""
+    if batch_size is None:
+        batch_size = get_analytics_events_settings()['PURGE_BATCH_SIZE']
+    cutoff, _ = day_bounds(before_day)
+    expired = GameEvent.objects.filter(timestamp__lt=cutoff)
+    if dry_run:
+        return expired.count()
+
+    deleted = 0
+    while True:
+        ids = list(expired.order_by('timestamp').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        deleted += GameEvent.objects.filter(id__in=ids, timestamp__lt=cutoff).delete()[0]
+    if deleted:
+        logger.info(f"🗑️ {deleted} événements expirés supprimés (avant {before_day})")
+    return deleted
+
+
+def apply_retention(retention_days=None, dry_run=False):
+    """Appliquer la rétention : partitions expirées supprimées, puis purge des lignes restantes."""
+    before_day = retention_cutoff_day(retention_days)
+    stats = {'cutoff': before_day.isoformat(), 'partitions_dropped': [], 'rows_deleted': 0}
+    if is_partitioned():
+        stats['partitions_dropped'] = drop_expired_partitions(before_day, dry_run=dry_run)
+    # Partition par défaut ou table non partitionnée
+    stats['rows_deleted'] = purge_expired_events(before_day, dry_run=dry_run)
+    return stats
@@ -0,0 +1,281 @@
+# apps/analytics/ingestion.py
+# =============================
+
+"""
+Ingestion par lots des événements de jeu (`GameEvent`).
+
+Un appel HTTP transporte jusqu'à MAX_BATCH événements. Chacun est validé
+contre le schéma de son type (`EVENT_SCHEMAS`), les sessions sont vérifiées
+en une requête, puis les lignes valides sont déposées dans une file
+d'écriture différée dédiée (apps.core.write_behind) : la requête ne touche
+pas à la table des événements. Le thread d'écriture insère par lots de
+BATCH_SIZE, avec COPY sous PostgreSQL (USE_COPY) et `bulk_create` ailleurs,
+et met à jour les agrégats (apps.analytics.rollups) dans la même transaction.
+
+File pleine ou base indisponible : spool JSONL dans SPOOL_DIR, rejoué
+ensuite (voir apps.core.write_behind). BUFFERED=False écrit le lot dans la
+requête (tests).
+
+La même file transporte les variations d'agrégats des vues unitaires
+(`queue_rollups` : début et fin de session, événement isolé), appliquées
+par le thread d'écriture plutôt que dans la requête.
+
+Exemple :
+    result = ingest_events([
+        {'session_id': '…', 'event_type': 'level_complete', 'data': {'level': 3}},
+    ])
+    # {'accepted': 1, 'rejected': []}
+"""
+
+import csv
+import io
+import json
+import logging
+import threading
+import uuid
+from datetime import timedelta, timezone as dt_timezone
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.core.write_behind import WriteBehindQueue
+
+from . import rollups
+from .models import GameEvent, GameSession
+
+logger = logging.getLogger(__name__)
+
+EVENT_MODEL = 'analytics.GameEvent'
+
+
+DEFAULT_ANALYTICS_EVENTS = {
+    'MAX_BATCH': 1000,  # Événements par appel HTTP
+    'BUFFERED': True,  # False : écriture synchrone dans la requête
+    'MAX_QUEUE': 100000,
+    'BATCH_SIZE': 5000,  # Lignes par COPY / bulk_create
+    'FLUSH_INTERVAL': 0.5,  # secondes
+    'OVERFLOW': 'spool',
+    'SPOOL_DIR': None,  # Défaut : <BASE_DIR>/logs/analytics_events
+    'USE_COPY': True,  # COPY FROM STDIN sous PostgreSQL
+    'MAX_DATA_KEYS': 32,
+    'MAX_CLOCK_SKEW': 300,  # secondes d'avance tolérées sur l'horodatage client
+    'RETENTION_DAYS': 90,
+    'PARTITIONS_AHEAD': 7,  # Partitions journalières créées à l'avance
+    'PURGE_BATCH_SIZE': 10000,
+}
+
+
+def get_analytics_events_settings() -> Dict[str, Any]:
+    """Paramètres de l'ingestion des événements (défauts < ANALYTICS_EVENTS)."""
+    config = {**DEFAULT_ANALYTICS_EVENTS, **getattr(settings, 'ANALYTICS_EVENTS', {})}
+    if config['SPOOL_DIR'] is None:
+        config['SPOOL_DIR'] = Path(settings.BASE_DIR) / 'logs' / 'analytics_events'
+    return config
+
+
+# ===== SCHÉMAS =====
+
+class EventSchema(NamedTuple):
+    required: Dict[str, tuple]
+    optional: Dict[str, tuple] = {}
+
+
+NUMBER = (int, float)
+
+# Clés de `data` par type d'événement ; les clés non déclarées sont acceptées telles quelles
+EVENT_SCHEMAS: Dict[str, EventSchema] = {
+    'level_start': EventSchema(required={'level': (int,)}),
+    'level_complete': EventSchema(
+        required={'level': (int,)},
+        optional={'score': (int,), 'time_taken': NUMBER, 'stars': (int,)},
+    ),
+    'game_over': EventSchema(
+        required={},
+        optional={'score': (int,), 'level': (int,), 'reason': (str,)},
+    ),
+    'power_up_used': EventSchema(required={'power_up': (str,)}, optional={'level': (int,)}),
+    'achievement_unlocked': EventSchema(required={'achievement': (str,)}),
+    'item_collected': EventSchema(required={'item': (str,)}, optional={'value': NUMBER, 'level': (int,)}),
+    'obstacle_hit': EventSchema(required={}, optional={'obstacle': (str,), 'damage': NUMBER, 'level': (int,)}),
+}
+
+
+def _matches(value, types: tuple) -> bool:
+    # bool est un int pour Python, pas pour le schéma
+    return isinstance(value, types) and not isinstance(value, bool)
+
+
+def validate_event(raw: Any, now=None, config: Optional[Dict] = None) -> Tuple[Optional[Dict], Optional[str]]:
+    """
+    Valider un événement brut.
+
+    Returns:
+        tuple: (valeurs prêtes à insérer, None) ou (None, message d'erreur)
+    """
+    config = config or get_analytics_events_settings()
+    now = now or timezone.now()
+    if not isinstance(raw, dict):
+        return None, 'event must be an object'
+
+    event_type = raw.get('event_type')
+    schema = EVENT_SCHEMAS.get(event_type)
+    if schema is None:
+        return None, f'unknown event_type: {event_type!r}'
+
+    try:
+        session_id = uuid.UUID(str(raw.get('session_id')))
+    except ValueError:
+        return None, 'invalid session_id'
+
+    data = raw.get('data', {})
+    if not isinstance(data, dict):
+        return None, 'data must be an object'
+    if len(data) > config['MAX_DATA_KEYS']:
+        return None, f"data has more than {config['MAX_DATA_KEYS']} keys"
+    for key, types in schema.required.items():
+        if key not in data:
+            return None, f'data.{key} is required for {event_type}'
+    for key, types in (*schema.required.items(), *schema.optional.items()):
+        if key in data and not _matches(data[key], types):
+            return None, f"data.{key} must be {' or '.join(t.__name__ for t in types)}"
+
+    timestamp = now
+    if raw.get('timestamp') is not None:
+        timestamp = parse_datetime(str(raw['timestamp']))
+        if timestamp is None:
+            return None, 'invalid timestamp'
+        if timezone.is_naive(timestamp):
+            timestamp = timestamp.replace(tzinfo=dt_timezone.utc)
+        if timestamp > now + timedelta(seconds=config['MAX_CLOCK_SKEW']):
+            return None, 'timestamp is in the future'
+        if timestamp < now - timedelta(days=config['RETENTION_DAYS']):
+            return None, 'timestamp is older than the retention period'
+
+    return {'session_id': str(session_id), 'event_type': event_type, 'timestamp': timestamp, 'data': data}, None
+
+
+def validate_events(events: List[Any]) -> Tuple[List[Dict], List[Dict]]:
+    """Valider un lot : (lignes valides, erreurs [{'index', 'error'}]). Une requête pour les sessions."""
+    config = get_analytics_events_settings()
+    now = timezone.now()
+    rows, errors = [], []
+    for index, raw in enumerate(events):
+        values, error = validate_event(raw, now, config)
+        if error:
+            errors.append({'index': index, 'error': error})
+        else:
+            rows.append((index, values))
+
+    session_ids = {values['session_id'] for _, values in rows}
+    known = {
+        str(session_id)
+        for session_id in GameSession.objects.filter(id__in=session_ids).values_list('id', flat=True)
+    } if session_ids else set()
+
+    valid = []
+    for index, values in rows:
+        if values['session_id'] in known:
+            valid.append(values)
+        else:
+            errors.append({'index': index, 'error': 'unknown session_id'})
+    errors.sort(key=lambda error: error['index'])
+    return valid, errors
+
+
+# ===== ÉCRITURE =====
+
+def _copy_events(rows: List[Dict], now):
+    """COPY FROM STDIN (CSV) : une seule commande par lot."""
+    fields = [GameEvent._meta.get_field(name) for name in ('session', 'event_type', 'timestamp', 'data')]
+    qn = connection.ops.quote_name
+    sql = (
+        f"COPY {qn(GameEvent._meta.db_table)} ({', '.join(qn(field.column) for field in fields)}) "
+        f"FROM STDIN WITH (FORMAT csv)"
+    )
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for values in rows:
+        timestamp = values.get('timestamp') or now
+        writer.writerow([
+            values['session_id'],
+            values['event_type'],
+            timestamp.isoformat() if hasattr(timestamp, 'isoformat') else timestamp,
+            json.dumps(values.get('data') or {}, cls=DjangoJSONEncoder, separators=(',', ':')),
+        ])
+
+    with connection.cursor() as cursor:
+        raw_cursor = cursor.cursor
+        if hasattr(raw_cursor, 'copy_expert'):  # psycopg2
+            buffer.seek(0)
+            raw_cursor.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with raw_cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+def write_events(rows: List[Dict]):
+    """
+    Insérer un lot d'événements validés (COPY sous PostgreSQL, sinon
+    bulk_create) et mettre à jour les agrégats horaires et journaliers dans
+    la même transaction.
+    """
+    config = get_analytics_events_settings()
+    now = timezone.now()
+    with transaction.atomic():
+        if config['USE_COPY'] and connection.vendor == 'postgresql':
+            _copy_events(rows, now)
+        else:
+            GameEvent.objects.bulk_create(
+                [GameEvent(**{'timestamp': now, **values}) for values in rows], batch_size=config['BATCH_SIZE']
+            )
+        rollups.record_events(rows, now)
+
+
+_event_queue: Optional[WriteBehindQueue] = None
+_event_queue_lock = threading.Lock()
+
+
+def get_event_queue() -> WriteBehindQueue:
+    """File d'écriture différée des événements du processus."""
+    global _event_queue
+    if _event_queue is None:
+        with _event_queue_lock:
+            if _event_queue is None:
+                config = get_analytics_events_settings()
+                _event_queue = WriteBehindQueue(
+                    max_queue=config['MAX_QUEUE'],
+                    batch_size=config['BATCH_SIZE'],
+                    flush_interval=config['FLUSH_INTERVAL'],
+                    overflow=config['OVERFLOW'],
+                    spool_dir=config['SPOOL_DIR'],
+                    writers={EVENT_MODEL: write_events, rollups.ROLLUP_MODEL: rollups.write_deltas},
+                    name='analytics-events',
+                )
+    return _event_queue
+
+
+def ingest_events(events: List[Any]) -> Dict[str, Any]:
+    """Valider puis mettre en file un lot d'événements."""
+    rows, rejected = validate_events(events)
+    if rows:
+        if get_analytics_events_settings()['BUFFERED']:
+            get_event_queue().put_many(EVENT_MODEL, rows)
+        else:
+            write_events(rows)
+    if rejected:
+        logger.debug(f"📉 {len(rejected)} événements rejetés sur {len(events)}")
+    return {'accepted': len(rows), 'rejected': rejected}
+
+
+def queue_rollups(rows: List[Dict[str, Any]]):
+    """Mettre en file des variations d'agrégats (rollups.session_started_row, …)."""
+    if get_analytics_events_settings()['BUFFERED']:
+        get_event_queue().put_many(rollups.ROLLUP_MODEL, rows)
+    else:
+        rollups.write_deltas(rows)
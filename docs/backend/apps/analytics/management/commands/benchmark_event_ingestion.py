@@ -0,0 +1,110 @@
+"""
+Benchmark de l'ingestion des événements de jeu.
+
+Mesure, dans une transaction annulée à la fin :
+- avant : une création `GameEvent` par événement (ancien `log_event`) ;
+- après : validation par lots de `--batch` événements (`validate_events`)
+  puis écriture par lots (`write_events` : COPY sous PostgreSQL,
+  bulk_create ailleurs).
+
+Exemples :
+    python manage.py benchmark_event_ingestion
+    python manage.py benchmark_event_ingestion --events 200000 --batch 1000
+"""
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.analytics.ingestion import EVENT_SCHEMAS, get_analytics_events_settings, validate_events, write_events
+from apps.analytics.models import GameEvent, GameSession
+
+
+class Rollback(Exception):
+    """Annuler les données du benchmark."""
+
+
+SAMPLE_DATA = {
+    'level_start': {'level': 3},
+    'level_complete': {'level': 3, 'score': 1200, 'time_taken': 84.5},
+    'game_over': {'score': 1200, 'reason': 'timeout'},
+    'power_up_used': {'power_up': 'shield', 'level': 3},
+    'achievement_unlocked': {'achievement': 'first_win'},
+    'item_collected': {'item': 'coin', 'value': 10},
+    'obstacle_hit': {'obstacle': 'wall', 'damage': 5},
+}
+
+
+class Command(BaseCommand):
+    help = 'Mesurer le débit d\'ingestion des événements (données annulées)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--events',
+            type=int,
+            default=50000,
+            help='Événements ingérés par la variante par lots (défaut: 50000)'
+        )
+        parser.add_argument(
+            '--batch',
+            type=int,
+            default=1000,
+            help='Événements par appel (défaut: 1000)'
+        )
+        parser.add_argument(
+            '--legacy-events',
+            type=int,
+            default=2000,
+            help='Événements créés un par un pour la référence (défaut: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                sessions = [GameSession.objects.create(player_id=f'bench_{i}') for i in range(20)]
+                events = self.make_events(sessions, options['events'])
+                self.measure_legacy(sessions, options['legacy_events'])
+                self.measure_batched(events, options['batch'])
+                raise Rollback()
+        except Rollback:
+            self.stdout.write('↩️ Données du benchmark annulées')
+
+    def make_events(self, sessions, count):
+        types = list(EVENT_SCHEMAS)
+        events = []
+        for i in range(count):
+            event_type = types[i % len(types)]
+            events.append({
+                'session_id': str(random.choice(sessions).id),
+                'event_type': event_type,
+                'data': SAMPLE_DATA[event_type],
+            })
+        return events
+
+    def measure_legacy(self, sessions, count):
+        started = time.perf_counter()
+        for i in range(count):
+            GameEvent.objects.create(session=sessions[i % len(sessions)], event_type='level_start', data={'level': 1})
+        self.report('Avant (un INSERT par événement)', count, time.perf_counter() - started)
+
+    def measure_batched(self, events, batch):
+        write_size = get_analytics_events_settings()['BATCH_SIZE']
+        validated = []
+        started = time.perf_counter()
+        for start in range(0, len(events), batch):
+            rows, _ = validate_events(events[start:start + batch])
+            validated.extend(rows)
+        validation = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for start in range(0, len(validated), write_size):
+            write_events(validated[start:start + write_size])
+        writing = time.perf_counter() - started
+
+        self.report(f'Validation (lots de {batch})', len(events), validation)
+        self.report(f'Écriture (lots de {write_size})', len(validated), writing)
+        self.report('Après (validation + écriture)', len(validated), validation + writing)
+
+    def report(self, label, count, elapsed):
+        self.stdout.write(f"⏱️ {label}: {count} événements en {elapsed:.2f} s, {count / elapsed:,.0f} événements/s")
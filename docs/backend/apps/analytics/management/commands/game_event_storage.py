@@ -0,0 +1,86 @@
+"""
+Commande Django de maintenance du stockage des événements de jeu.
+
+Exemples :
+    python manage.py game_event_storage --convert
+    python manage.py game_event_storage --ensure-partitions --days-ahead 14
+    python manage.py game_event_storage --apply-retention --retention-days 30 --dry-run
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.analytics import event_storage
+from apps.analytics.event_storage import EventStorageError
+
+
+class Command(BaseCommand):
+    help = 'Partitionner par jour et purger la table des événements de jeu'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Convertir la table des événements en table partitionnée par jour (PostgreSQL)'
+        )
+        parser.add_argument(
+            '--ensure-partitions',
+            action='store_true',
+            help='Créer les partitions du jour courant et des jours suivants'
+        )
+        parser.add_argument(
+            '--days-ahead',
+            type=int,
+            default=None,
+            help='Nombre de jours futurs à partitionner à l\'avance'
+        )
+        parser.add_argument(
+            '--apply-retention',
+            action='store_true',
+            help='Supprimer les partitions et événements plus anciens que la rétention'
+        )
+        parser.add_argument(
+            '--retention-days',
+            type=int,
+            default=None,
+            help='Durée de conservation des événements en jours'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Afficher ce qui serait fait sans rien modifier'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        actions = ('convert', 'ensure_partitions', 'apply_retention')
+        if not any(options[name] for name in actions):
+            raise CommandError('Aucune action demandée (voir --help)')
+
+        try:
+            if options['convert']:
+                if dry_run:
+                    self.stdout.write('🗂️ [dry-run] Conversion de la table des événements en table partitionnée')
+                else:
+                    result = event_storage.convert_to_partitioned(options['days_ahead'])
+                    self.stdout.write(self.style.SUCCESS(
+                        f"✅ Table partitionnée: {result['rows']} lignes, "
+                        f"{len(result['partitions'])} partitions"
+                    ))
+
+            if options['ensure_partitions']:
+                created = event_storage.ensure_partitions(options['days_ahead'], dry_run=dry_run)
+                if created:
+                    for name in created:
+                        self.stdout.write(self.style.SUCCESS(f"✅ Partition créée: {name}"))
+                else:
+                    self.stdout.write('ℹ️ Toutes les partitions existent déjà')
+
+            if options['apply_retention']:
+                stats = event_storage.apply_retention(options['retention_days'], dry_run=dry_run)
+                for name in stats['partitions_dropped']:
+                    self.stdout.write(self.style.WARNING(f"🗑️ Partition supprimée: {name}"))
+                self.stdout.write(self.style.SUCCESS(
+                    f"🗑️ Événements expirés supprimés: {stats['rows_deleted']} (avant {stats['cutoff']})"
+                ))
+
+        except EventStorageError as e:
+            raise CommandError(str(e))
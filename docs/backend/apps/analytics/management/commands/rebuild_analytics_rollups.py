@@ -0,0 +1,51 @@
+"""
+Commande Django de reconstruction des agrégats analytics (heure / jour).
+
+Les agrégats sont maintenus à l'ingestion ; cette commande les recalcule
+depuis les sessions et événements bruts (premier déploiement, correction
+après une purge ou un incident).
+
+Exemples :
+    python manage.py rebuild_analytics_rollups
+    python manage.py rebuild_analytics_rollups --since 2026-10-01
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_date
+
+from apps.analytics import rollups
+
+
+class Command(BaseCommand):
+    help = 'Recalculer les agrégats horaires et journaliers des analytics de jeu'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            type=str,
+            default=None,
+            help='Date ou date-heure ISO (UTC) à partir de laquelle reconstruire (défaut: tout l\'historique)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=5000,
+            help='Lignes lues par itération (défaut: 5000)'
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            since = parse_datetime(options['since'])
+            if since is None:
+                day = parse_date(options['since'])
+                if day is None:
+                    raise CommandError(f"Date invalide: {options['since']}")
+                since = datetime(day.year, day.month, day.day, tzinfo=dt_timezone.utc)
+            if timezone.is_naive(since):
+                since = since.replace(tzinfo=dt_timezone.utc)
+
+        buckets = rollups.rebuild(since=since, chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(f"✅ Agrégats reconstruits: {buckets} buckets"))
@@ -0,0 +1,15 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="gameevent",
+            index=models.Index(fields=["timestamp"], name="analytics_event_ts_idx"),
+        ),
+    ]
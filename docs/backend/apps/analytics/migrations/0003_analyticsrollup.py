@@ -0,0 +1,52 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("analytics", "0002_gameevent_timestamp_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AnalyticsRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "granularity",
+                    models.CharField(
+                        choices=[("hour", "Hour"), ("day", "Day")], max_length=4
+                    ),
+                ),
+                ("bucket", models.DateTimeField()),
+                ("sessions_started", models.IntegerField(default=0)),
+                ("sessions_ended", models.IntegerField(default=0)),
+                ("total_duration", models.BigIntegerField(default=0)),
+                ("total_score", models.BigIntegerField(default=0)),
+                ("max_score", models.IntegerField(default=0)),
+                ("total_events", models.BigIntegerField(default=0)),
+                ("events_by_type", models.JSONField(blank=True, default=dict)),
+                ("players_hll", models.BinaryField(blank=True, default=bytes)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Analytics Rollup",
+                "verbose_name_plural": "Analytics Rollups",
+                "ordering": ["granularity", "bucket"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("granularity", "bucket"),
+                        name="analytics_rollup_bucket_uniq",
+                    )
+                ],
+            },
+        ),
+    ]
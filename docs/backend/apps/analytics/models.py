@@ -66,8 +66,42 @@ class GameEvent(models.Model):
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['timestamp'], name='analytics_event_ts_idx'),
+        ]
         verbose_name = 'Game Event'
         verbose_name_plural = 'Game Events'
     
     def __str__(self):
         return f"{self.event_type} - {self.session.player_id} at {self.timestamp}"
+
+
+class AnalyticsRollup(models.Model):
+    """Pre-aggregated analytics per hour or day bucket, updated at ingestion time"""
+    GRANULARITIES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+    
+    granularity = models.CharField(max_length=4, choices=GRANULARITIES)
+    bucket = models.DateTimeField()  # UTC start of the hour / day
+    sessions_started = models.IntegerField(default=0)
+    sessions_ended = models.IntegerField(default=0)
+    total_duration = models.BigIntegerField(default=0)  # in seconds, ended sessions
+    total_score = models.BigIntegerField(default=0)
+    max_score = models.IntegerField(default=0)
+    total_events = models.BigIntegerField(default=0)
+    events_by_type = models.JSONField(default=dict, blank=True)
+    players_hll = models.BinaryField(default=bytes, blank=True)  # HyperLogLog of active player ids
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['granularity', 'bucket']
+        constraints = [
+            models.UniqueConstraint(fields=['granularity', 'bucket'], name='analytics_rollup_bucket_uniq'),
+        ]
+        verbose_name = 'Analytics Rollup'
+        verbose_name_plural = 'Analytics Rollups'
+    
+    def __str__(self):
+        return f"{self.granularity} rollup {self.bucket.isoformat()}"
@@ -0,0 +1,33 @@
+"""
+Celery tasks pour les analytics de jeu
+Maintenance du stockage des événements (partitions journalières, rétention)
+"""
+from celery import shared_task
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(name='analytics.maintain_event_storage')
+def maintain_event_storage():
+    """
+    Maintenance du stockage des événements de jeu
+    
+    - Création anticipée des partitions journalières (si la table est partitionnée)
+    - Suppression des événements au-delà de RETENTION_DAYS
+    """
+    from . import event_storage
+    
+    results = {}
+    try:
+        if event_storage.is_partitioned():
+            results['partitions_created'] = event_storage.ensure_partitions()
+        
+        results['retention'] = event_storage.apply_retention()
+        
+        logger.info(f"✅ Maintenance du stockage des événements: {results}")
+        return results
+        
+    except Exception as e:
+        logger.error(f"❌ Erreur maintain_event_storage: {e}")
+        return {'error': str(e), **results}
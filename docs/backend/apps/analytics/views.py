@@ -3,9 +3,15 @@ from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
-from django.db.models import Avg, Max, Sum, Count
+from django.db import IntegrityError
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils.dateparse import parse_datetime
+from . import rollups
+from .ingestion import get_analytics_events_settings, ingest_events, queue_rollups
 from .models import GameSession, PlayerStats, GameEvent
 import json
+from datetime import timezone as dt_timezone
 
 
 @csrf_exempt
@@ -21,14 +27,21 @@ def start_session(request):
         
         session = GameSession.objects.create(player_id=player_id)
         
-        # Update or create player stats
-        player_stats, created = PlayerStats.objects.get_or_create(
-            player_id=player_id,
-            defaults={'first_played': timezone.now()}
+        # Update or create player stats (single UPDATE for returning players)
+        now = timezone.now()
+        updated = PlayerStats.objects.filter(player_id=player_id).update(
+            total_sessions=F('total_sessions') + 1, last_played=now, updated_at=now
         )
-        player_stats.total_sessions += 1
-        player_stats.last_played = timezone.now()
-        player_stats.save()
+        if not updated:
+            try:
+                PlayerStats.objects.create(player_id=player_id, total_sessions=1, first_played=now, last_played=now)
+            except IntegrityError:
+                # Created concurrently by another session start
+                PlayerStats.objects.filter(player_id=player_id).update(
+                    total_sessions=F('total_sessions') + 1, last_played=now, updated_at=now
+                )
+        
+        queue_rollups([rollups.session_started_row(session)])
         
         return JsonResponse({
             'session_id': str(session.id),
@@ -59,14 +72,15 @@ def end_session(request):
         session.level_reached = level_reached
         session.save()
         
-        # Update player stats
-        player_stats = PlayerStats.objects.get(player_id=session.player_id)
-        if score > player_stats.highest_score:
-            player_stats.highest_score = score
-        if level_reached > player_stats.highest_level:
-            player_stats.highest_level = level_reached
-        player_stats.total_playtime += session.duration_seconds or 0
-        player_stats.save()
+        # Update player stats in one atomic UPDATE (no lost updates between sessions)
+        PlayerStats.objects.filter(player_id=session.player_id).update(
+            highest_score=Greatest(F('highest_score'), score),
+            highest_level=Greatest(F('highest_level'), level_reached),
+            total_playtime=F('total_playtime') + (session.duration_seconds or 0),
+            updated_at=timezone.now(),
+        )
+        
+        queue_rollups([rollups.session_ended_row(session)])
         
         return JsonResponse({
             'session_id': str(session.id),
@@ -98,6 +112,7 @@ def log_event(request):
             event_type=event_type,
             data=event_data
         )
+        queue_rollups([rollups.event_row(session.player_id, event_type, event.timestamp)])
         
         return JsonResponse({
             'event_id': event.id,
@@ -108,6 +123,31 @@ def log_event(request):
         return JsonResponse({'error': str(e)}, status=500)
 
 
+@csrf_exempt
+@require_http_methods(["POST"])
+def log_events(request):
+    """Log a batch of game events (validated, written asynchronously)"""
+    try:
+        payload = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid JSON body'}, status=400)
+    
+    events = payload.get('events') if isinstance(payload, dict) else payload
+    if not isinstance(events, list) or not events:
+        return JsonResponse({'error': 'events must be a non-empty array'}, status=400)
+    
+    max_batch = get_analytics_events_settings()['MAX_BATCH']
+    if len(events) > max_batch:
+        return JsonResponse({'error': f'At most {max_batch} events per request'}, status=413)
+    
+    try:
+        result = ingest_events(events)
+    except Exception as e:
+        return JsonResponse({'error': str(e)}, status=500)
+    
+    return JsonResponse(result, status=202 if result['accepted'] else 400)
+
+
 @require_http_methods(["GET"])
 def player_stats(request, player_id):
     """Get player statistics"""
@@ -130,20 +170,33 @@ def player_stats(request, player_id):
 
 @require_http_methods(["GET"])
 def game_analytics(request):
-    """Get general game analytics"""
+    """Get general game analytics, summed from hourly/daily rollups (optional ?start=&end= ISO range)"""
     try:
-        total_sessions = GameSession.objects.count()
-        total_players = PlayerStats.objects.count()
-        avg_score = GameSession.objects.aggregate(Avg('score'))['score__avg'] or 0
-        max_score = GameSession.objects.aggregate(Max('score'))['score__max'] or 0
-        avg_playtime = PlayerStats.objects.aggregate(Avg('total_playtime'))['total_playtime__avg'] or 0
+        bounds = {}
+        for name in ('start', 'end'):
+            value = request.GET.get(name)
+            if value:
+                bounds[name] = parse_datetime(value)
+                if bounds[name] is None:
+                    return JsonResponse({'error': f'Invalid {name} datetime'}, status=400)
+                if timezone.is_naive(bounds[name]):
+                    bounds[name] = bounds[name].replace(tzinfo=dt_timezone.utc)
+        
+        summary = rollups.summarize(bounds.get('start'), bounds.get('end'))
+        ended = summary['sessions_ended']
+        players = summary['active_players']
         
         return JsonResponse({
-            'total_sessions': total_sessions,
-            'total_players': total_players,
-            'average_score': round(avg_score, 2),
-            'highest_score': max_score,
-            'average_playtime_seconds': round(avg_playtime, 2)
+            'total_sessions': summary['sessions_started'],
+            'total_players': players,
+            'average_score': round(summary['total_score'] / ended, 2) if ended else 0,
+            'highest_score': summary['max_score'],
+            'average_playtime_seconds': round(summary['total_duration'] / players, 2) if players else 0,
+            'average_session_seconds': round(summary['total_duration'] / ended, 2) if ended else 0,
+            'total_events': summary['total_events'],
+            'events_by_type': summary['events_by_type'],
+            'start': bounds['start'].isoformat() if 'start' in bounds else None,
+            'end': bounds['end'].isoformat() if 'end' in bounds else None,
         })
     
     except Exception as e:
@@ -123,6 +123,11 @@ PERFORMANCE_CONFIG = {
     'CACHE_TIMEOUT_LONG': 86400,    # 24 heures
     'PAGE_SIZE_DEFAULT': 20,
     'PAGE_SIZE_MAX': 100,
+    'PAGINATION_COUNT_CACHE_TIMEOUT': 60,          # total des listes paginées
+    'PAGINATION_ESTIMATE_THRESHOLD': 100000,       # au-delà : estimation PostgreSQL
+    'CACHE_EARLY_REFRESH_BETA': 1.0,               # XFetch : > 1 rafraîchit plus tôt
+    'CACHE_STALE_TIMEOUT': 60,                     # service de la valeur périmée pendant le recalcul
+    'CACHE_LOCK_TIMEOUT': 10,                      # verrou de recalcul (un seul calcul par clé)
     'API_RATE_LIMIT_PER_MINUTE': 100,
     'WEBSOCKET_HEARTBEAT_INTERVAL': 30,
     'FILE_UPLOAD_MAX_SIZE': 10485760,  # 10MB
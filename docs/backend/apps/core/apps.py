@@ -179,6 +179,13 @@ class CoreConfig(AppConfig):
         user_logged_in.connect(self.on_user_login, dispatch_uid='core_user_login')
         user_logged_out.connect(self.on_user_logout, dispatch_uid='core_user_logout')
         
+        # Durée des tâches Celery (métriques Prometheus)
+        try:
+            from .metrics import connect_celery_signals
+            connect_celery_signals()
+        except ImportError:
+            logger.debug("Celery indisponible, métriques de tâches désactivées")
+        
         logger.debug("Signaux de monitoring connectés")
     
     def on_user_login(self, sender, request, user, **kwargs):
@@ -0,0 +1,161 @@
+# apps/core/cache_stampede.py
+# =============================
+
+"""
+Remplissage du cache protégé contre les ruées (cache stampede).
+
+- Expiration anticipée probabiliste (XFetch) : plus l'échéance approche et
+  plus le calcul est long, plus un appelant a de chances de rafraîchir la
+  valeur avant qu'elle n'expire pour tout le monde.
+- Verrou de recalcul partagé (`cache.add`) : un seul appelant recalcule une
+  clé ; les autres servent la valeur périmée (stale-while-revalidate) ou, sur
+  un cache vide, attendent la nouvelle valeur.
+- Regroupement dans le processus : les appels simultanés d'une même clé dans
+  un worker partagent un seul calcul.
+"""
+
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from django.core.cache import cache
+
+from . import PERFORMANCE_CONFIG
+from .metrics import observe_cache
+
+logger = logging.getLogger(__name__)
+
+# Intervalle de relecture du cache en attendant le calcul d'un autre worker
+WAIT_INTERVAL = 0.05
+
+
+class CachedValue(NamedTuple):
+    """Valeur en cache avec sa durée de calcul et son échéance logique."""
+    value: Any
+    delta: float
+    expires_at: float
+
+
+class Uncached(NamedTuple):
+    """Résultat à retourner sans le mettre en cache (ex. réponse d'erreur)."""
+    value: Any
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+_flights: Dict[str, _Flight] = {}
+_flights_lock = threading.Lock()
+
+
+def _should_refresh(entry: CachedValue, beta: float, now: float) -> bool:
+    # XFetch : now - delta × beta × ln(rand) ≥ échéance
+    return now - entry.delta * beta * math.log(1.0 - random.random()) >= entry.expires_at
+
+
+def _compute_and_store(key: str, compute: Callable[[], Any], timeout: int, stale_timeout: int):
+    started = time.monotonic()
+    result = compute()
+    if isinstance(result, Uncached):
+        return result
+    delta = time.monotonic() - started
+    cache.set(key, CachedValue(result, delta, time.time() + timeout), timeout + stale_timeout)
+    return result
+
+
+def _fetch(key: str, compute: Callable[[], Any], timeout: int, beta: float,
+           stale_timeout: int, lock_timeout: int):
+    entry = cache.get(key)
+    if isinstance(entry, CachedValue) and not _should_refresh(entry, beta, time.time()):
+        observe_cache('hit')
+        return entry.value
+
+    lock_key = f'{key}:lock'
+    token = uuid.uuid4().hex
+    if cache.add(lock_key, token, lock_timeout):
+        observe_cache('miss')
+        try:
+            return _compute_and_store(key, compute, timeout, stale_timeout)
+        finally:
+            if cache.get(lock_key) == token:
+                cache.delete(lock_key)
+
+    # Un autre worker recalcule : servir la valeur périmée si elle existe
+    if isinstance(entry, CachedValue):
+        observe_cache('stale')
+        return entry.value
+
+    deadline = time.monotonic() + lock_timeout
+    while time.monotonic() < deadline:
+        time.sleep(WAIT_INTERVAL)
+        entry = cache.get(key)
+        if isinstance(entry, CachedValue):
+            observe_cache('hit')
+            return entry.value
+        if cache.get(lock_key) is None:
+            break
+
+    logger.warning(f"Recalcul de cache sans verrou après attente: {key}")
+    observe_cache('miss')
+    return _compute_and_store(key, compute, timeout, stale_timeout)
+
+
+def get_or_compute(key: str, compute: Callable[[], Any], timeout: int,
+                   beta: Optional[float] = None, stale_timeout: Optional[int] = None,
+                   lock_timeout: Optional[int] = None, coalesce: bool = True) -> Any:
+    """
+    Lire `key` ou la (re)calculer avec `compute`, un seul calcul à la fois.
+
+    Args:
+        key: Clé de cache
+        compute: Fonction sans argument ; retourner `Uncached(valeur)` pour
+            ne pas mettre le résultat en cache
+        timeout: Durée de fraîcheur en secondes
+        beta: Agressivité du rafraîchissement anticipé (0 = désactivé)
+        stale_timeout: Durée supplémentaire pendant laquelle la valeur périmée
+            peut être servie pendant un recalcul
+        lock_timeout: Durée maximale du verrou et de l'attente d'un autre worker
+        coalesce: Regrouper les appels simultanés du processus
+
+    Returns:
+        La valeur (déballée si `compute` a retourné `Uncached`)
+    """
+    beta = PERFORMANCE_CONFIG['CACHE_EARLY_REFRESH_BETA'] if beta is None else beta
+    stale_timeout = PERFORMANCE_CONFIG['CACHE_STALE_TIMEOUT'] if stale_timeout is None else stale_timeout
+    lock_timeout = PERFORMANCE_CONFIG['CACHE_LOCK_TIMEOUT'] if lock_timeout is None else lock_timeout
+
+    if not coalesce:
+        result = _fetch(key, compute, timeout, beta, stale_timeout, lock_timeout)
+        return result.value if isinstance(result, Uncached) else result
+
+    with _flights_lock:
+        flight = _flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _flights[key] = _Flight()
+
+    if not leader:
+        if flight.done.wait(lock_timeout) and flight.error is None and not isinstance(flight.result, Uncached):
+            return flight.result
+        # Calcul du meneur en échec, non mis en cache ou trop long : faire le nôtre
+        result = _fetch(key, compute, timeout, beta, stale_timeout, lock_timeout)
+        return result.value if isinstance(result, Uncached) else result
+
+    try:
+        flight.result = _fetch(key, compute, timeout, beta, stale_timeout, lock_timeout)
+    except BaseException as e:
+        flight.error = e
+        raise
+    finally:
+        with _flights_lock:
+            _flights.pop(key, None)
+        flight.done.set()
+    return flight.result.value if isinstance(flight.result, Uncached) else flight.result
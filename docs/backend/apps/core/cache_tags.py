@@ -0,0 +1,120 @@
+# apps/core/cache_tags.py
+# =========================
+
+"""
+Invalidation du cache par étiquettes et numéros de génération.
+
+Une entrée en cache est rangée sous une clé qui embarque la génération de
+chacune de ses étiquettes. Invalider une étiquette revient à incrémenter sa
+génération (un INCR) : les anciennes clés ne sont plus jamais lues et
+expirent d'elles-mêmes. Aucun KEYS ni SCAN, quel que soit le nombre de clés.
+
+Étiquettes :
+    tag('leaderboard')                  famille entière
+    tag('leaderboard', game_type=3)     portée d'une famille
+    tag('user_stats', user=42)
+
+Invalider une portée invalide aussi les entrées de la famille sans portée
+(un classement global dépend de chaque type de jeu) mais pas les autres
+portées. Invalider une famille invalide toutes ses entrées, portées comprises.
+"""
+
+import hashlib
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+VERSION_PREFIX = 'cachetag'
+# Génération lue par toutes les entrées d'une famille, portées comprises
+FAMILY_SCOPE = '*'
+
+
+def tag(name: str, **scope: Any) -> str:
+    """Nom d'étiquette, éventuellement restreint à une portée (user=…, game_type=…)."""
+    if not scope:
+        return name
+    return name + '@' + ','.join(f'{key}={value}' for key, value in sorted(scope.items()))
+
+
+def _family(tag_name: str) -> str:
+    return tag_name.split('@', 1)[0]
+
+
+def _version_key(tag_name: str) -> str:
+    return f'{VERSION_PREFIX}:{tag_name}'
+
+
+def _initial_version() -> int:
+    # Une génération évincée du cache repart d'une valeur jamais vue
+    return time.time_ns() // 1000
+
+
+def _dependencies(tags: Iterable[str]) -> List[str]:
+    """Générations dont dépend une entrée : ses étiquettes et le '*' de chaque famille."""
+    keys = set()
+    for tag_name in tags:
+        keys.add(tag_name)
+        keys.add(f'{_family(tag_name)}@{FAMILY_SCOPE}')
+    return sorted(keys)
+
+
+def tag_versions(tags: Iterable[str]) -> Dict[str, int]:
+    """Générations courantes des étiquettes (un seul aller-retour en régime établi)."""
+    names = _dependencies(tags)
+    found = cache.get_many([_version_key(name) for name in names])
+    versions = {}
+    for name in names:
+        key = _version_key(name)
+        if key not in found:
+            cache.add(key, _initial_version(), None)
+            found[key] = cache.get(key)
+        versions[name] = found[key]
+    return versions
+
+
+def tagged_cache_key(key: str, tags: Iterable[str]) -> str:
+    """Clé physique d'une entrée : change dès qu'une de ses étiquettes est invalidée."""
+    tags = list(tags)
+    if not tags:
+        return key
+    versions = tag_versions(tags)
+    signature = '|'.join(f'{name}={version}' for name, version in versions.items())
+    return f'{key}:g{hashlib.md5(signature.encode()).hexdigest()[:12]}'
+
+
+def get_tagged(key: str, tags: Iterable[str], default: Any = None) -> Any:
+    return cache.get(tagged_cache_key(key, tags), default)
+
+
+def set_tagged(key: str, value: Any, tags: Iterable[str], timeout: Optional[int] = 300):
+    cache.set(tagged_cache_key(key, tags), value, timeout)
+
+
+def _bump(name: str):
+    key = _version_key(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Génération absente (jamais lue ou évincée) : aucune entrée à invalider
+        cache.add(key, _initial_version(), None)
+
+
+def invalidate_tags(*tags: str):
+    """
+    Invalider des étiquettes en O(1) chacune.
+
+    Une portée ('leaderboard@game_type=3') invalide aussi sa famille sans
+    portée ; une famille ('leaderboard') invalide toutes ses portées.
+    """
+    for tag_name in tags:
+        family = _family(tag_name)
+        _bump(tag_name)
+        if tag_name == family:
+            _bump(f'{family}@{FAMILY_SCOPE}')
+        else:
+            _bump(family)
+    logger.debug(f"Étiquettes de cache invalidées: {', '.join(tags)}")
@@ -2,9 +2,10 @@
 # ===========================
 
 import functools
+import math
 import time
 import logging
-from typing import Any, Callable, Dict, Optional
+from typing import Any, Callable, Dict, Iterable, Optional, Union
 from django.http import JsonResponse, HttpRequest, HttpResponse
 from django.core.cache import cache
 from django.utils import timezone
@@ -13,7 +14,10 @@ from django.views.decorators.cache import cache_page
 from rest_framework import status
 from rest_framework.response import Response
 
+from .cache_stampede import get_or_compute
+from .cache_tags import tagged_cache_key
 from .exceptions import RateLimitExceededException, KYCRequiredException, MaintenanceModeException
+from .rate_limit import get_rate_limiter
 from .utils import get_client_ip, extract_client_info
 
 logger = logging.getLogger(__name__)
@@ -77,6 +81,7 @@ def rate_limit(max_requests: int = 60, window: int = 60, key_func: Optional[Call
     """
     
     def decorator(view_func: Callable) -> Callable:
+        limiter = get_rate_limiter(f'view:{view_func.__name__}', max_requests, window)
         
         @functools.wraps(view_func)
         def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
@@ -87,17 +92,13 @@ def rate_limit(max_requests: int = 60, window: int = 60, key_func: Optional[Call
             else:
                 user_id = request.user.id if request.user.is_authenticated else 'anonymous'
                 ip = get_client_ip(request)
-                cache_key = f"rate_limit:{user_id}:{ip}:{view_func.__name__}"
+                cache_key = f"{user_id}:{ip}"
             
-            # Vérifier et incrémenter
-            current_requests = cache.get(cache_key, 0)
-            
-            if current_requests >= max_requests:
-                logger.warning(f"Rate limit exceeded for {cache_key}")
-                raise RateLimitExceededException(retry_after=window)
-            
-            # Incrémenter le compteur
-            cache.set(cache_key, current_requests + 1, window)
+            # Vérifier et consommer un jeton (atomique, partagé entre processus)
+            result = limiter.hit(cache_key)
+            if not result.allowed:
+                logger.warning(f"Rate limit exceeded for {limiter.key(cache_key)}")
+                raise RateLimitExceededException(retry_after=max(1, math.ceil(result.retry_after)))
             
             return view_func(request, *args, **kwargs)
         
@@ -161,7 +162,8 @@ def log_performance(threshold: float = 1.0):
     return decorator
 
 
-def cache_result(timeout: int = 300, key_prefix: str = None, vary_on_user: bool = False):
+def cache_result(timeout: int = 300, key_prefix: str = None, vary_on_user: bool = False,
+                 tags: Union[Iterable[str], Callable[..., Iterable[str]]] = ()):
     """
     Décorateur pour mettre en cache les résultats de fonction.
     
@@ -169,6 +171,11 @@ def cache_result(timeout: int = 300, key_prefix: str = None, vary_on_user: bool
         timeout: Durée de cache en secondes
         key_prefix: Préfixe pour la clé de cache
         vary_on_user: Inclure l'ID utilisateur dans la clé
+        tags: Étiquettes d'invalidation (voir `apps.core.cache_tags`), ou
+            fonction recevant les arguments de l'appel et les retournant
+    
+    Protégé contre les ruées : rafraîchissement anticipé, un seul recalcul
+    par clé et valeur périmée servie pendant le recalcul (`apps.core.cache_stampede`).
     """
     
     def decorator(view_func: Callable) -> Callable:
@@ -193,18 +200,12 @@ def cache_result(timeout: int = 300, key_prefix: str = None, vary_on_user: bool
             
             cache_key = ":".join(cache_key_parts)
             
-            # Vérifier le cache
-            cached_result = cache.get(cache_key)
-            if cached_result is not None:
-                logger.debug(f"Cache hit for {cache_key}")
-                return cached_result
-            
-            # Exécuter et mettre en cache
-            result = view_func(*args, **kwargs)
-            cache.set(cache_key, result, timeout)
-            logger.debug(f"Cache set for {cache_key}")
+            # Embarquer la génération des étiquettes dans la clé
+            entry_tags = tags(*args, **kwargs) if callable(tags) else tags
+            cache_key = tagged_cache_key(cache_key, entry_tags)
             
-            return result
+            # Lire le cache ; un seul appelant recalcule une clé expirée
+            return get_or_compute(cache_key, lambda: view_func(*args, **kwargs), timeout)
         
         return wrapper
     
@@ -310,15 +311,10 @@ def transaction_required(transaction_type: str = None):
                     }, status=403)
             
             elif transaction_type == 'bet':
-                # Vérifier les limites de jeux simultanés
-                from apps.games.models import Game
-                active_games = Game.objects.filter(
-                    models.Q(player1=request.user) | models.Q(player2=request.user),
-                    status__in=['waiting', 'playing']
-                ).count()
-                
-                max_concurrent = getattr(settings, 'MAX_CONCURRENT_GAMES', 5)
-                if active_games >= max_concurrent:
+                # Vérifier les limites de jeux simultanés (ensemble Redis du joueur)
+                from apps.games.active_games import count_active_games, get_max_concurrent_games
+                max_concurrent = get_max_concurrent_games()
+                if count_active_games(request.user) >= max_concurrent:
                     return JsonResponse({
                         'error': f'Limite de {max_concurrent} jeux simultanés atteinte'
                     }, status=400)
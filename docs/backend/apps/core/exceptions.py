@@ -64,6 +64,18 @@ class InvalidGameStateException(RumoRushException):
     default_code = 'invalid_game_state'
 
 
+class ConcurrentGamesLimitException(RumoRushException):
+    """Exception quand le nombre maximal de parties simultanées est atteint."""
+
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = "Limite de parties simultanées atteinte"
+    default_code = 'concurrent_games_limit'
+
+    def __init__(self, limit: int = None):
+        detail = f"Limite de {limit} jeux simultanés atteinte" if limit else self.default_detail
+        super().__init__(detail)
+
+
 class RateLimitExceededException(RumoRushException):
     """Exception pour limite de taux dépassée."""
     
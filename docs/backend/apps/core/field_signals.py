@@ -0,0 +1,224 @@
+# apps/core/field_signals.py
+# ============================
+
+"""
+Dispatch des signaux de modèle par changement de champ.
+
+Les receivers déclarent les champs qui les concernent ; le modèle garde un
+instantané de ces seuls champs au chargement (`FieldTrackingMixin.from_db`)
+et un `save()` qui ne les modifie pas n'exécute aucun receiver ni aucune
+requête : plus de relecture `objects.get(pk=...)` en pre_save pour comparer.
+
+Les receivers `on_commit=True` sont regroupés par transaction : une partie
+sauvegardée dix fois dans la même transaction n'invalide son cache qu'une
+fois, après le commit, avec les changements fusionnés.
+
+Exemple :
+    @on_field_change(Game, fields=['status'], on_commit=True)
+    def notify_status(instance, changes, created):
+        old_status, new_status = changes['status']
+
+Les champs suivis doivent être scalaires (une mutation en place d'un
+JSONField n'est pas détectée).
+"""
+
+import logging
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, NamedTuple, Optional, Tuple
+
+from django.db import connections, transaction
+from django.db.models.signals import post_save, pre_save
+
+logger = logging.getLogger(__name__)
+
+Changes = Dict[str, Tuple[object, object]]
+
+
+class FieldReceiver(NamedTuple):
+    func: Callable
+    fields: Tuple[str, ...]
+    on_commit: bool
+    on_create: bool
+
+
+_receivers: Dict[str, list] = defaultdict(list)
+_tracked: Dict[str, Dict[str, str]] = {}
+
+
+def _label(sender) -> str:
+    return sender if isinstance(sender, str) else sender._meta.label
+
+
+def on_field_change(sender, fields: Iterable[str], on_commit: bool = False, on_create: bool = False):
+    """
+    Déclarer un receiver appelé quand l'un de `fields` change à la sauvegarde.
+
+    Le receiver reçoit `instance`, `changes` ({champ: (ancienne, nouvelle)},
+    limité à ses champs) et `created`. Les créations ne sont transmises
+    qu'avec `on_create=True` (anciennes valeurs à None).
+    """
+    label = _label(sender)
+    fields = tuple(fields)
+
+    def decorator(func):
+        if not _receivers[label]:
+            pre_save.connect(_track_changes, sender=sender, dispatch_uid=f'field_signals:pre:{label}')
+            post_save.connect(_dispatch, sender=sender, dispatch_uid=f'field_signals:post:{label}')
+        _receivers[label].append(FieldReceiver(func, fields, on_commit, on_create))
+        _tracked.pop(label, None)
+        return func
+
+    return decorator
+
+
+def remove_field_receiver(sender, func):
+    """Retirer un receiver déclaré par `on_field_change` (tests, benchmarks)."""
+    label = _label(sender)
+    _receivers[label] = [receiver for receiver in _receivers[label] if receiver.func is not func]
+    _tracked.pop(label, None)
+
+
+def tracked_fields(model) -> Dict[str, str]:
+    """Champs suivis du modèle : {nom: attname} (déclarés par les receivers et TRACKED_FIELDS)."""
+    label = model._meta.label
+    if label not in _tracked:
+        names = set(getattr(model, 'TRACKED_FIELDS', ()))
+        for receiver in _receivers.get(label, ()):
+            names.update(receiver.fields)
+        _tracked[label] = {name: model._meta.get_field(name).attname for name in sorted(names)}
+    return _tracked[label]
+
+
+class FieldTrackingMixin:
+    """Instantané des champs suivis au chargement, pour détecter les changements sans requête."""
+
+    TRACKED_FIELDS: Tuple[str, ...] = ()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.snapshot_fields()
+        return instance
+
+    def snapshot_fields(self, names: Optional[Iterable[str]] = None):
+        """Marquer les champs suivis (ou `names`) comme propres à leur valeur actuelle."""
+        fields = tracked_fields(type(self))
+        snapshot = self.__dict__.setdefault('_field_snapshot', {})
+        for name in fields if names is None else names:
+            attname = fields.get(name)
+            if attname is not None and attname in self.__dict__:
+                snapshot[attname] = self.__dict__[attname]
+
+    def get_field_changes(self, names: Optional[Iterable[str]] = None) -> Changes:
+        """Champs suivis modifiés depuis le chargement : {nom: (ancienne, nouvelle)}."""
+        return _changes(self, names)
+
+
+def _changes(instance, names=None) -> Changes:
+    fields = tracked_fields(type(instance))
+    if names is not None:
+        names = set(names)
+        fields = {name: attname for name, attname in fields.items() if name in names or attname in names}
+    # Champs différés non chargés : ni lus ni écrits par ce save()
+    fields = {name: attname for name, attname in fields.items() if attname in instance.__dict__}
+    if not fields:
+        return {}
+
+    snapshot = instance.__dict__.get('_field_snapshot', {})
+    missing = [attname for attname in fields.values() if attname not in snapshot]
+    if missing:
+        # Instance construite à la main (sans from_db) : relecture des seuls champs manquants
+        row = type(instance)._base_manager.filter(pk=instance.pk).values(*missing).first() or {}
+        snapshot = {**snapshot, **row}
+
+    return {
+        name: (snapshot.get(attname), instance.__dict__[attname])
+        for name, attname in fields.items()
+        if snapshot.get(attname) != instance.__dict__[attname]
+    }
+
+
+def _track_changes(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance._state.adding:
+        return
+    instance._field_changes = _changes(instance, update_fields)
+
+
+def _dispatch(sender, instance, created, raw=False, update_fields=None, using=None, **kwargs):
+    if raw:
+        return
+    if created:
+        changes = {
+            name: (None, instance.__dict__[attname])
+            for name, attname in tracked_fields(sender).items()
+            if attname in instance.__dict__
+        }
+    else:
+        changes = instance.__dict__.pop('_field_changes', None) or {}
+
+    if isinstance(instance, FieldTrackingMixin):
+        instance.snapshot_fields(None if update_fields is None else update_fields)
+    if not changes:
+        return  # Chemin rapide : aucun champ suivi modifié
+
+    for receiver in _receivers.get(sender._meta.label, ()):
+        if created and not receiver.on_create:
+            continue
+        matched = {name: changes[name] for name in receiver.fields if name in changes}
+        if not matched:
+            continue
+        if receiver.on_commit:
+            _defer(receiver, instance, matched, created, using)
+        else:
+            receiver.func(instance=instance, changes=matched, created=created)
+
+
+# ===== REGROUPEMENT APRÈS COMMIT =====
+
+class _Batch:
+    """Appels différés d'une transaction, un par (receiver, instance)."""
+
+    def __init__(self):
+        self.calls: Dict[tuple, list] = {}
+        self.flushed = False
+
+    def add(self, receiver: FieldReceiver, instance, changes: Changes, created: bool):
+        key = (receiver.func, instance._meta.label, instance.pk)
+        call = self.calls.get(key)
+        if call is None:
+            self.calls[key] = [receiver, instance, dict(changes), created]
+            return
+        # Fusion : ancienne valeur du premier changement, nouvelle du dernier
+        call[1] = instance
+        for name, (old, new) in changes.items():
+            call[2][name] = (call[2][name][0], new) if name in call[2] else (old, new)
+        call[3] = call[3] or created
+
+    def flush(self):
+        self.flushed = True
+        for receiver, instance, changes, created in self.calls.values():
+            if all(old == new for old, new in changes.values()):
+                continue  # Revenu à l'état initial dans la transaction
+            try:
+                receiver.func(instance=instance, changes=changes, created=created)
+            except Exception as e:
+                logger.error(f"❌ Receiver {receiver.func.__name__} après commit échoué: {e}")
+
+
+_local = threading.local()
+
+
+def _defer(receiver: FieldReceiver, instance, changes: Changes, created: bool, using: Optional[str]):
+    using = using or instance._state.db or 'default'
+    connection = connections[using]
+    batches = _local.__dict__.setdefault('batches', {})
+    batch = batches.get(using)
+    # Lot encore en attente du commit de la transaction courante ?
+    if (batch is not None and not batch.flushed and connection.in_atomic_block
+            and any(entry[1] == batch.flush for entry in connection.run_on_commit)):
+        batch.add(receiver, instance, changes, created)
+        return
+    batch = batches[using] = _Batch()
+    batch.add(receiver, instance, changes, created)
+    transaction.on_commit(batch.flush, using=using)  # Hors transaction : exécuté immédiatement
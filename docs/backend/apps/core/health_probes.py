@@ -0,0 +1,362 @@
+# apps/core/health_probes.py
+# ============================
+
+"""
+Sondes de vivacité (liveness) et de disponibilité (readiness) à état caché.
+
+Un thread de sondage par processus interroge périodiquement chaque
+dépendance (base de données, cache, Redis, couche de canaux WebSocket,
+files Celery, stockage), chacune dans un thread d'exécution avec un délai
+maximal : une dépendance bloquée est marquée `error` au bout de TIMEOUT
+secondes et n'est pas relancée tant que la sonde précédente n'est pas
+revenue. Les résultats sont publiés dans un instantané immuable ; les
+endpoints ne font que le lire, sans aucune entrée/sortie.
+
+- Vivacité : le processus répond et le thread de sondage avance.
+- Disponibilité : chaque sonde de READINESS_CHECKS est `ok` ou `degraded`
+  dans un instantané de moins de MAX_AGE secondes. Au-delà du seuil
+  CELERY_QUEUE_MAX_DEPTH ou sans aller-retour sur la couche de canaux, le
+  pod sort de la répartition de charge.
+
+Exemple :
+    prober = get_health_prober()
+    prober.ensure_started()
+    ready, payload = prober.readiness()
+"""
+
+import logging
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_HEALTH_PROBES = {
+    'ENABLED': True,
+    'INTERVAL': 5,  # secondes entre deux cycles de sondage
+    'TIMEOUT': 2,  # secondes accordées à chaque sonde
+    'MAX_AGE': 30,  # Instantané plus ancien : pod non disponible
+    'LIVENESS_MAX_AGE': 120,  # Thread de sondage figé depuis plus longtemps : processus à redémarrer
+    'CHECKS': ['database', 'cache', 'redis', 'channel_layer', 'celery', 'storage'],
+    'READINESS_CHECKS': ['database', 'cache', 'channel_layer', 'celery'],
+    'REDIS_URL': None,  # Défaut : LOCATION du cache s'il s'agit de Redis
+    'CHANNEL_LAYER_DEGRADED_MS': 100,
+    'CELERY_QUEUES': None,  # Défaut : files déclarées dans l'application Celery
+    'CELERY_QUEUE_DEGRADED_DEPTH': 1000,
+    'CELERY_QUEUE_MAX_DEPTH': 10000,
+}
+
+
+def get_health_probes_settings() -> Dict[str, Any]:
+    """Paramètres des sondes (défauts < HEALTH_PROBES)."""
+    return {**DEFAULT_HEALTH_PROBES, **getattr(settings, 'HEALTH_PROBES', {})}
+
+
+class ProbeResult(NamedTuple):
+    """Résultat d'une sonde."""
+    status: str  # 'ok', 'degraded' ou 'error'
+    latency_ms: Optional[float]
+    detail: Dict[str, Any]
+    checked_at: float  # time.time()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {'status': self.status, 'latency_ms': self.latency_ms, **self.detail}
+
+
+class HealthSnapshot(NamedTuple):
+    """Résultats du dernier cycle complet."""
+    results: Dict[str, ProbeResult]
+    completed_at: float  # time.monotonic()
+
+
+EMPTY_SNAPSHOT = HealthSnapshot({}, 0.0)
+
+
+# ===== SONDES =====
+# Chaque sonde lève une exception en cas d'échec ; le dictionnaire renvoyé
+# peut porter un 'status' ('degraded') et des détails.
+
+def check_database(config: Dict[str, Any]) -> Dict[str, Any]:
+    from django.db import connection
+
+    connection.close_if_unusable_or_obsolete()
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    return {'vendor': connection.vendor}
+
+
+def check_cache(config: Dict[str, Any]) -> Dict[str, Any]:
+    from django.core.cache import cache
+
+    token = uuid.uuid4().hex
+    cache.set('health_probe', token, 30)
+    if cache.get('health_probe') != token:
+        raise RuntimeError('cache read/write mismatch')
+    return {}
+
+
+def _redis_url(config: Dict[str, Any]) -> Optional[str]:
+    if config['REDIS_URL']:
+        return config['REDIS_URL']
+    location = settings.CACHES['default'].get('LOCATION')
+    if isinstance(location, (list, tuple)):
+        location = location[0] if location else None
+    if isinstance(location, str) and location.startswith(('redis://', 'rediss://')):
+        return location
+    return None
+
+
+def check_redis(config: Dict[str, Any]) -> Dict[str, Any]:
+    url = _redis_url(config)
+    if url is None:
+        return {'configured': False}
+
+    import redis
+
+    client = redis.from_url(url, socket_timeout=config['TIMEOUT'], socket_connect_timeout=config['TIMEOUT'])
+    try:
+        client.ping()
+    finally:
+        client.close()
+    return {}
+
+
+def check_channel_layer(config: Dict[str, Any]) -> Dict[str, Any]:
+    """Aller-retour d'un message sur un canal privé de la couche de canaux."""
+    import asyncio
+
+    from asgiref.sync import async_to_sync
+    from channels.layers import get_channel_layer
+
+    layer = get_channel_layer()
+    if layer is None:
+        return {'configured': False}
+
+    async def round_trip():
+        channel = await layer.new_channel('health_probe.')
+        started = time.perf_counter()
+        await layer.send(channel, {'type': 'health.ping'})
+        message = await asyncio.wait_for(layer.receive(channel), config['TIMEOUT'])
+        if message.get('type') != 'health.ping':
+            raise RuntimeError('unexpected channel layer message')
+        return (time.perf_counter() - started) * 1000
+
+    round_trip_ms = async_to_sync(round_trip)()
+    status = 'degraded' if round_trip_ms > config['CHANNEL_LAYER_DEGRADED_MS'] else 'ok'
+    return {'status': status, 'round_trip_ms': round(round_trip_ms, 2)}
+
+
+def _celery_queue_names(celery_app, config: Dict[str, Any]):
+    if config['CELERY_QUEUES']:
+        return list(config['CELERY_QUEUES'])
+    queues = celery_app.conf.task_queues
+    if queues:
+        return [queue.name for queue in queues]
+    return [celery_app.conf.task_default_queue]
+
+
+def check_celery(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Profondeur des files Celery lue sur le broker (`queue_declare` passif),
+    sans diffusion `inspect` aux workers.
+    """
+    from celery import current_app as celery_app
+
+    depths = {}
+    with celery_app.connection_for_read() as conn:
+        conn.ensure_connection(max_retries=1, timeout=config['TIMEOUT'])
+        channel = conn.default_channel
+        for name in _celery_queue_names(celery_app, config):
+            try:
+                depths[name] = channel.queue_declare(queue=name, passive=True).message_count
+            except Exception:
+                depths[name] = 0  # File pas encore déclarée : vide
+
+    deepest = max(depths.values(), default=0)
+    if deepest > config['CELERY_QUEUE_MAX_DEPTH']:
+        raise RuntimeError(f"queue backlog {deepest} > {config['CELERY_QUEUE_MAX_DEPTH']}: {depths}")
+    status = 'degraded' if deepest > config['CELERY_QUEUE_DEGRADED_DEPTH'] else 'ok'
+    return {'status': status, 'queues': depths}
+
+
+def check_storage(config: Dict[str, Any]) -> Dict[str, Any]:
+    from django.core.files.storage import default_storage
+
+    default_storage.exists('health_probe.txt')  # Métadonnées seulement, aucune écriture
+    return {'backend': type(default_storage._wrapped).__name__}
+
+
+PROBES: Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]] = {
+    'database': check_database,
+    'cache': check_cache,
+    'redis': check_redis,
+    'channel_layer': check_channel_layer,
+    'celery': check_celery,
+    'storage': check_storage,
+}
+
+
+# ===== SONDAGE EN ARRIÈRE-PLAN =====
+
+class HealthProber:
+    """
+    Exécute les sondes à intervalle régulier et publie le dernier instantané.
+
+    `probe_once()` peut être appelé directement (tests, commande) ; le
+    thread démon de `ensure_started()` l'appelle toutes les INTERVAL
+    secondes.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None,
+                 probes: Optional[Dict[str, Callable[[Dict[str, Any]], Dict[str, Any]]]] = None):
+        self.config = config or get_health_probes_settings()
+        probes = probes or PROBES
+        self.probes = {name: probes[name] for name in self.config['CHECKS'] if name in probes}
+        self.snapshot = EMPTY_SNAPSHOT
+        self.pid: Optional[int] = None
+        self.thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._running: Dict[str, Any] = {}  # Sondes en cours au-delà du délai
+        self._stopped = threading.Event()
+        self._start_lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Une sonde bloquée garde son thread : un thread par sonde suffit,
+        # elle n'est pas relancée avant d'être revenue
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, len(self.probes)), thread_name_prefix='health-probe'
+            )
+        return self._executor
+
+    def probe_once(self) -> HealthSnapshot:
+        """Exécuter un cycle de sondes (en parallèle, délai TIMEOUT commun)."""
+        executor = self._get_executor()
+        timeout = self.config['TIMEOUT']
+        results: Dict[str, ProbeResult] = {}
+        submitted = {}
+
+        for name, probe in self.probes.items():
+            running = self._running.get(name)
+            if running is not None and not running.done():
+                results[name] = ProbeResult('error', None, {'error': 'previous probe still running'}, time.time())
+                continue
+            self._running.pop(name, None)
+            submitted[name] = (time.perf_counter(), executor.submit(probe, self.config))
+
+        deadline = time.monotonic() + timeout
+        for name, (started, future) in submitted.items():
+            try:
+                detail = dict(future.result(timeout=max(0.0, deadline - time.monotonic())) or {})
+                status = detail.pop('status', 'ok')
+            except FutureTimeoutError:
+                self._running[name] = future
+                status, detail = 'error', {'error': f'timeout after {timeout}s'}
+            except Exception as e:
+                status, detail = 'error', {'error': str(e)}
+            results[name] = ProbeResult(status, round((time.perf_counter() - started) * 1000, 2), detail, time.time())
+
+        for name, result in results.items():
+            previous = self.snapshot.results.get(name)
+            if result.status == 'error' and (previous is None or previous.status != 'error'):
+                logger.warning(f"⚠️ Sonde {name} en échec: {result.detail.get('error')}")
+
+        self.snapshot = HealthSnapshot(results, time.monotonic())
+        return self.snapshot
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                self.probe_once()
+            except Exception as e:
+                logger.error(f"Erreur du cycle de sondage: {e}")
+            self._stopped.wait(self.config['INTERVAL'])
+
+    def ensure_started(self) -> Optional[threading.Thread]:
+        """Démarrer le thread de sondage (à nouveau après un fork du serveur)."""
+        if not self.config['ENABLED']:
+            return None
+        if self.thread is not None and self.pid == os.getpid():
+            return self.thread
+        with self._start_lock:
+            if self.thread is None or self.pid != os.getpid():
+                self.pid = os.getpid()
+                self._executor = None
+                self._running = {}
+                self._stopped.clear()
+                self.thread = threading.Thread(target=self._run, name='health-prober', daemon=True)
+                self.thread.start()
+            return self.thread
+
+    def stop(self):
+        self._stopped.set()
+
+    # ===== LECTURE (chemin des requêtes : aucune entrée/sortie) =====
+
+    def age(self) -> Optional[float]:
+        snapshot = self.snapshot
+        if not snapshot.completed_at:
+            return None
+        return time.monotonic() - snapshot.completed_at
+
+    def liveness(self) -> Tuple[bool, Dict[str, Any]]:
+        """Vivant tant que le thread de sondage (s'il a été démarré) continue d'avancer."""
+        age = self.age()
+        alive = True
+        if self.thread is not None and self.pid == os.getpid():
+            if not self.thread.is_alive():
+                alive = False
+            elif age is not None and age > self.config['LIVENESS_MAX_AGE']:
+                alive = False
+        return alive, {
+            'status': 'alive' if alive else 'stalled',
+            'pid': os.getpid(),
+            'probe_age_seconds': round(age, 3) if age is not None else None,
+        }
+
+    def readiness(self) -> Tuple[bool, Dict[str, Any]]:
+        """Disponible si l'instantané est frais et chaque sonde requise n'est pas en erreur."""
+        snapshot = self.snapshot
+        age = self.age()
+        checks = {name: result.as_dict() for name, result in snapshot.results.items()}
+
+        if not self.config['ENABLED']:
+            status, ready = 'disabled', True
+        elif age is None:
+            status, ready = 'starting', False
+        elif age > self.config['MAX_AGE']:
+            status, ready = 'stale', False
+        else:
+            required = [snapshot.results.get(name) for name in self.config['READINESS_CHECKS'] if name in self.probes]
+            if any(result is None or result.status == 'error' for result in required):
+                status, ready = 'unavailable', False
+            elif any(result.status != 'ok' for result in snapshot.results.values()):
+                status, ready = 'degraded', True
+            else:
+                status, ready = 'ready', True
+
+        return ready, {
+            'status': status,
+            'probe_age_seconds': round(age, 3) if age is not None else None,
+            'checks': checks,
+        }
+
+
+_prober: Optional[HealthProber] = None
+_prober_lock = threading.Lock()
+
+
+def get_health_prober() -> HealthProber:
+    """Sondeur partagé par le processus."""
+    global _prober
+    if _prober is None:
+        with _prober_lock:
+            if _prober is None:
+                _prober = HealthProber()
+    return _prober
@@ -0,0 +1,248 @@
+# apps/core/load_shedding.py
+# ============================
+
+"""
+Délestage de charge sans blocage du chemin de requête.
+
+Un thread d'échantillonnage par processus publie périodiquement la charge
+(CPU, mémoire, retard de planification) dans un instantané immuable ; le
+middleware ne fait que lire cet instantané et un compteur de requêtes en
+cours, sous un verrou tenu quelques microsecondes.
+
+La limite de concurrence s'adapte en AIMD : elle augmente d'une requête par
+« fenêtre » tant que les réponses restent sous la latence cible, et est
+multipliée par `BACKOFF` quand elles la dépassent ou que la machine sature.
+Chaque route a une priorité : les routes basses n'ont droit qu'à une part de
+la limite et sont refusées en premier ; les coups de jeu et les webhooks
+(`critical`) passent jusqu'au bout de la limite, même sous pression.
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from typing import Any, Dict, NamedTuple, Optional
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_LOAD_SHEDDING = {
+    'ENABLED': True,
+    'SAMPLE_INTERVAL': 0.5,  # secondes entre deux échantillons
+    'SNAPSHOT_MAX_AGE': 5,  # Au-delà, l'instantané est ignoré (échantillonneur arrêté)
+    'CPU_THRESHOLD': 90,
+    'MEMORY_THRESHOLD': 90,
+    'LAG_THRESHOLD': 0.2,  # secondes de retard de réveil de l'échantillonneur
+    'INITIAL_LIMIT': 200,
+    'MIN_LIMIT': 20,
+    'MAX_LIMIT': 1000,
+    'TARGET_LATENCY': 1.0,  # secondes
+    'BACKOFF': 0.9,
+    'DECREASE_INTERVAL': 1.0,  # Au plus une réduction par intervalle
+    'RETRY_AFTER': 5,
+    # Part de la limite accessible à chaque priorité
+    'PRIORITY_SHARES': {
+        'critical': 1.0,
+        'high': 0.9,
+        'normal': 0.75,
+        'low': 0.5,
+    },
+    # Priorités encore admises quand la machine est sous pression
+    'PRESSURE_PRIORITIES': ['critical', 'high'],
+    # (expression régulière sur le chemin, priorité), la première qui correspond gagne
+    'ROUTE_PRIORITIES': [
+        (r'^/api/v1/games/games/[^/]+/move/', 'critical'),
+        (r'^/api/v1/payments/(.+/)?webhooks?/', 'critical'),
+        (r'^/api/v1/(auth|payments)/', 'high'),
+        (r'^/api/v1/(analytics|docs|redoc|schema)/', 'low'),
+    ],
+    'DEFAULT_PRIORITY': 'normal',
+}
+
+
+def get_load_shedding_settings() -> Dict[str, Any]:
+    """Paramètres du délestage (défauts < LOAD_SHEDDING)."""
+    return {**DEFAULT_LOAD_SHEDDING, **getattr(settings, 'LOAD_SHEDDING', {})}
+
+
+class LoadSnapshot(NamedTuple):
+    """Charge du processus à un instant donné."""
+    cpu_percent: float
+    memory_percent: float
+    lag: float
+    sampled_at: float
+
+
+IDLE_SNAPSHOT = LoadSnapshot(0.0, 0.0, 0.0, 0.0)
+
+
+class LoadSampler(threading.Thread):
+    """
+    Thread démon qui échantillonne la charge sans jamais bloquer une requête.
+
+    `psutil.cpu_percent(interval=None)` mesure l'utilisation depuis l'appel
+    précédent ; le retard de réveil du thread (temps dormi au-delà de
+    l'intervalle) reflète la contention du GIL et de la boucle d'événements.
+    """
+
+    def __init__(self, interval: float):
+        super().__init__(name='load-sampler', daemon=True)
+        self.interval = interval
+        self.snapshot = IDLE_SNAPSHOT
+        self.pid = os.getpid()
+        self._stopped = threading.Event()
+
+    def run(self):
+        try:
+            import psutil
+        except ImportError:
+            logger.warning("⚠️ psutil indisponible: délestage limité à la concurrence adaptative")
+            return
+
+        psutil.cpu_percent(interval=None)
+        while not self._stopped.is_set():
+            started = time.monotonic()
+            self._stopped.wait(self.interval)
+            lag = max(0.0, time.monotonic() - started - self.interval)
+            try:
+                self.snapshot = LoadSnapshot(
+                    cpu_percent=psutil.cpu_percent(interval=None),
+                    memory_percent=psutil.virtual_memory().percent,
+                    lag=lag,
+                    sampled_at=time.monotonic(),
+                )
+            except Exception as e:
+                logger.error(f"Erreur d'échantillonnage de charge: {e}")
+
+    def stop(self):
+        self._stopped.set()
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Limite de requêtes simultanées ajustée en AIMD sur la latence observée.
+    """
+
+    def __init__(self, initial: int, minimum: int, maximum: int, target_latency: float,
+                 backoff: float, decrease_interval: float):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.decrease_interval = decrease_interval
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def try_acquire(self, share: float = 1.0) -> bool:
+        """Réserver une place si moins de `share` × limite requêtes sont en cours."""
+        with self._lock:
+            if self.in_flight >= self.limit * share:
+                return False
+            self.in_flight += 1
+            return True
+
+    def release(self, latency: float, overloaded: bool = False):
+        """Libérer une place et ajuster la limite sur la latence de la requête."""
+        with self._lock:
+            self.in_flight -= 1
+            if overloaded or latency > self.target_latency:
+                now = time.monotonic()
+                # Une rafale de réponses lentes ne compte que pour une réduction
+                if now - self._last_decrease >= self.decrease_interval:
+                    self.limit = max(self.minimum, self.limit * self.backoff)
+                    self._last_decrease = now
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+
+class LoadShedder:
+    """Décision d'admission en O(1) à partir de l'instantané et du limiteur."""
+
+    def __init__(self, config: Optional[Dict[str, Any]] = None):
+        self.config = config or get_load_shedding_settings()
+        self.limiter = AdaptiveConcurrencyLimiter(
+            initial=self.config['INITIAL_LIMIT'],
+            minimum=self.config['MIN_LIMIT'],
+            maximum=self.config['MAX_LIMIT'],
+            target_latency=self.config['TARGET_LATENCY'],
+            backoff=self.config['BACKOFF'],
+            decrease_interval=self.config['DECREASE_INTERVAL'],
+        )
+        self.routes = [(re.compile(pattern), priority) for pattern, priority in self.config['ROUTE_PRIORITIES']]
+        self.shares = self.config['PRIORITY_SHARES']
+        self.pressure_priorities = frozenset(self.config['PRESSURE_PRIORITIES'])
+        self.sampler: Optional[LoadSampler] = None
+        self._start_lock = threading.Lock()
+
+    def ensure_sampler(self) -> LoadSampler:
+        """Démarrer l'échantillonneur (à nouveau après un fork du serveur)."""
+        sampler = self.sampler
+        if sampler is not None and sampler.pid == os.getpid():
+            return sampler
+        with self._start_lock:
+            if self.sampler is None or self.sampler.pid != os.getpid():
+                self.sampler = LoadSampler(self.config['SAMPLE_INTERVAL'])
+                self.sampler.start()
+            return self.sampler
+
+    def snapshot(self) -> LoadSnapshot:
+        sampler = self.sampler
+        if sampler is None:
+            return IDLE_SNAPSHOT
+        snapshot = sampler.snapshot
+        if time.monotonic() - snapshot.sampled_at > self.config['SNAPSHOT_MAX_AGE']:
+            return IDLE_SNAPSHOT
+        return snapshot
+
+    def is_under_pressure(self, snapshot: Optional[LoadSnapshot] = None) -> bool:
+        snapshot = snapshot or self.snapshot()
+        return (
+            snapshot.cpu_percent > self.config['CPU_THRESHOLD']
+            or snapshot.memory_percent > self.config['MEMORY_THRESHOLD']
+            or snapshot.lag > self.config['LAG_THRESHOLD']
+        )
+
+    def priority_for(self, path: str) -> str:
+        for pattern, priority in self.routes:
+            if pattern.match(path):
+                return priority
+        return self.config['DEFAULT_PRIORITY']
+
+    def admit(self, priority: str) -> bool:
+        """Admettre (et compter) une requête de cette priorité, ou la délester."""
+        if priority not in self.pressure_priorities and self.is_under_pressure():
+            return False
+        return self.limiter.try_acquire(self.shares.get(priority, 1.0))
+
+    def release(self, latency: float):
+        self.limiter.release(latency, overloaded=self.is_under_pressure())
+
+    def stats(self) -> Dict[str, Any]:
+        snapshot = self.snapshot()
+        return {
+            'cpu_percent': snapshot.cpu_percent,
+            'memory_percent': snapshot.memory_percent,
+            'lag_seconds': round(snapshot.lag, 4),
+            'in_flight': self.limiter.in_flight,
+            'concurrency_limit': round(self.limiter.limit, 1),
+            'under_pressure': self.is_under_pressure(snapshot),
+        }
+
+
+_shedder: Optional[LoadShedder] = None
+_shedder_lock = threading.Lock()
+
+
+def get_load_shedder() -> LoadShedder:
+    """Délesteur partagé par le processus."""
+    global _shedder
+    if _shedder is None:
+        with _shedder_lock:
+            if _shedder is None:
+                _shedder = LoadShedder()
+    return _shedder
@@ -0,0 +1,87 @@
+"""
+Benchmark du coût d'admission de LoadBalancingMiddleware.
+
+Fait passer des requêtes factices (sans vue) par `process_request` puis
+`process_response`, depuis un ou plusieurs threads, et affiche la latence
+ajoutée par requête (moyenne, p50, p99) en microsecondes.
+
+Exemples :
+    python manage.py benchmark_load_shedding
+    python manage.py benchmark_load_shedding --requests 200000 --threads 8
+"""
+import statistics
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from apps.core.middleware import LoadBalancingMiddleware
+
+PATHS = [
+    '/api/v1/games/games/3f2a9c1e-6b1d-4d3e-9f0a-2c7e5b8d1a44/move/',
+    '/api/v1/payments/webhooks/feexpay/',
+    '/api/v1/auth/login/',
+    '/api/v1/referrals/dashboard/',
+    '/api/v1/analytics/overview/',
+]
+
+
+class Command(BaseCommand):
+    help = 'Mesurer la latence ajoutée par le délestage de charge'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=50000,
+            help='Requêtes par thread (défaut: 50000)'
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=4,
+            help='Threads concurrents (défaut: 4)'
+        )
+
+    def handle(self, *args, **options):
+        middleware = LoadBalancingMiddleware(lambda request: HttpResponse())
+        factory = RequestFactory()
+        requests = [factory.get(path) for path in PATHS]
+        response = HttpResponse()
+        timings = []
+        shed = 0
+        lock = threading.Lock()
+
+        def worker():
+            nonlocal shed
+            local, local_shed = [], 0
+            for i in range(options['requests']):
+                request = requests[i % len(requests)]
+                started = time.perf_counter()
+                if middleware.process_request(request) is None:
+                    middleware.process_response(request, response)
+                else:
+                    local_shed += 1
+                local.append(time.perf_counter() - started)
+            with lock:
+                timings.extend(local)
+                shed += local_shed
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        timings.sort()
+        micro = [t * 1e6 for t in timings]
+        self.stdout.write(
+            f"⏱️ {len(timings)} requêtes sur {options['threads']} threads en {elapsed:.2f}s: "
+            f"moyenne {statistics.fmean(micro):.1f} µs, p50 {micro[len(micro) // 2]:.1f} µs, "
+            f"p99 {micro[int(len(micro) * 0.99)]:.1f} µs, {shed} délestées"
+        )
+        self.stdout.write(f"📊 {middleware.shedder.stats()}")
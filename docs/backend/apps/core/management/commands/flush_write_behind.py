@@ -0,0 +1,40 @@
+"""
+Réinsérer les journaux d'audit et d'activité spoolés sur disque.
+
+Les workers spoolent leurs entrées dans WRITE_BEHIND['SPOOL_DIR'] quand la
+file est pleine ou la base indisponible, et les rejouent eux-mêmes. Cette
+commande rejoue les fichiers laissés par les workers arrêtés.
+
+Exemples :
+    python manage.py flush_write_behind
+    python manage.py flush_write_behind --dry-run
+"""
+from django.core.management.base import BaseCommand
+
+from apps.core.write_behind import get_write_behind
+
+
+class Command(BaseCommand):
+    help = 'Réinsérer les journaux spoolés par l\'écriture différée'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Lister les fichiers sans les rejouer'
+        )
+
+    def handle(self, *args, **options):
+        write_behind = get_write_behind()
+        spool_dir = write_behind.spool_dir
+
+        if options['dry_run']:
+            files = sorted(spool_dir.glob('*.jsonl')) if spool_dir and spool_dir.is_dir() else []
+            for path in files:
+                with open(path, encoding='utf-8') as spool:
+                    self.stdout.write(f'{path.name}: {sum(1 for _ in spool)} entrées')
+            self.stdout.write(f'{len(files)} fichier(s) en attente dans {spool_dir}')
+            return
+
+        replayed = write_behind.replay_spool()
+        self.stdout.write(self.style.SUCCESS(f'✅ {replayed} entrées réinsérées'))
@@ -0,0 +1,264 @@
+# apps/core/metrics.py
+# ======================
+
+"""
+Métriques Prometheus de RUMO RUSH, exposées sur `/metrics`.
+
+Enregistrer une mesure ne coûte que quelques microsecondes (incrément d'un
+compteur en mémoire partagée), sans ligne de log ni aller-retour réseau.
+
+Multi-processus (Gunicorn, plusieurs Daphne) : définir la variable
+d'environnement `PROMETHEUS_MULTIPROC_DIR` (répertoire vide, vidé au
+démarrage) avant de lancer les workers ; chaque processus écrit ses
+valeurs dans ce répertoire et `/metrics` les agrège. Sous Gunicorn, appeler
+`mark_process_dead(worker.pid)` depuis le hook `child_exit`.
+
+Sans `prometheus_client` installé, les mesures sont ignorées.
+"""
+
+import ipaddress
+import os
+import time
+from functools import wraps
+from typing import Callable
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+try:
+    import prometheus_client
+    from prometheus_client import Counter, Gauge, Histogram
+except ImportError:
+    prometheus_client = None
+
+
+DEFAULT_METRICS_SETTINGS = {
+    'ENABLED': True,
+    # Réseaux autorisés à lire /metrics (Prometheus tourne dans le réseau Docker)
+    'ALLOWED_NETWORKS': ['127.0.0.0/8', '10.0.0.0/8', '172.16.0.0/12', '192.168.0.0/16', '::1/128'],
+}
+
+
+def get_metrics_settings():
+    """Paramètres des métriques (défauts < METRICS)."""
+    return {**DEFAULT_METRICS_SETTINGS, **getattr(settings, 'METRICS', {})}
+
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+if prometheus_client is not None:
+    REQUEST_LATENCY = Histogram(
+        'rumo_http_request_duration_seconds', 'Durée des requêtes HTTP par route',
+        ['method', 'route', 'status'], buckets=LATENCY_BUCKETS,
+    )
+    REQUEST_DB_QUERIES = Histogram(
+        'rumo_http_request_db_queries', 'Requêtes SQL par requête HTTP',
+        ['route'], buckets=QUERY_COUNT_BUCKETS,
+    )
+    DB_QUERY_DURATION = Histogram(
+        'rumo_db_query_duration_seconds', 'Durée des requêtes SQL',
+        ['alias'], buckets=LATENCY_BUCKETS,
+    )
+    WEBSOCKET_CONNECTIONS = Gauge(
+        'rumo_websocket_connections', 'Connexions WebSocket ouvertes',
+        ['consumer'], multiprocess_mode='livesum',
+    )
+    WEBSOCKET_MESSAGES = Counter(
+        'rumo_websocket_messages_total', 'Messages WebSocket',
+        ['consumer', 'direction'],
+    )
+    MOVE_LATENCY = Histogram(
+        'rumo_game_move_duration_seconds', 'Durée de traitement des coups par type de jeu',
+        ['game_type', 'result'], buckets=LATENCY_BUCKETS,
+    )
+    TASK_DURATION = Histogram(
+        'rumo_celery_task_duration_seconds', 'Durée des tâches Celery',
+        ['task', 'state'], buckets=LATENCY_BUCKETS + (30, 60, 300),
+    )
+    CACHE_REQUESTS = Counter(
+        'rumo_cache_requests_total', 'Lectures du cache applicatif',
+        ['result'],
+    )
+
+
+# ===== ENREGISTREMENT =====
+
+def observe_cache(result: str):
+    """Lecture de cache : 'hit', 'stale' (servie périmée) ou 'miss' (recalculée)."""
+    if prometheus_client is not None:
+        CACHE_REQUESTS.labels(result).inc()
+
+
+def websocket_connected(consumer: str):
+    if prometheus_client is not None:
+        WEBSOCKET_CONNECTIONS.labels(consumer).inc()
+
+
+def websocket_disconnected(consumer: str):
+    if prometheus_client is not None:
+        WEBSOCKET_CONNECTIONS.labels(consumer).dec()
+
+
+def websocket_message(consumer: str, direction: str):
+    if prometheus_client is not None:
+        WEBSOCKET_MESSAGES.labels(consumer, direction).inc()
+
+
+def timed_move(make_move: Callable) -> Callable:
+    """Décorateur de `Game.make_move` : durée par type de jeu et par issue (ok, rejected, error)."""
+
+    @wraps(make_move)
+    def wrapper(game, *args, **kwargs):
+        if prometheus_client is None:
+            return make_move(game, *args, **kwargs)
+        started = time.perf_counter()
+        result = 'error'
+        try:
+            outcome = make_move(game, *args, **kwargs)
+            result = 'ok'
+            return outcome
+        except ValidationError:
+            result = 'rejected'
+            raise
+        finally:
+            game_type = getattr(game.game_type, 'name', None) or 'unknown'
+            MOVE_LATENCY.labels(game_type, result).observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+class ConsumerMetricsMixin:
+    """
+    Mixin des consumers WebSocket : connexions ouvertes et messages reçus et
+    envoyés, étiquetés par nom de consumer.
+    """
+
+    async def websocket_connect(self, message):
+        websocket_connected(type(self).__name__)
+        self._metrics_connected = True
+        await super().websocket_connect(message)
+
+    async def websocket_receive(self, message):
+        websocket_message(type(self).__name__, 'in')
+        await super().websocket_receive(message)
+
+    async def websocket_disconnect(self, message):
+        if getattr(self, '_metrics_connected', False):
+            self._metrics_connected = False
+            websocket_disconnected(type(self).__name__)
+        await super().websocket_disconnect(message)
+
+    async def send(self, *args, **kwargs):
+        websocket_message(type(self).__name__, 'out')
+        await super().send(*args, **kwargs)
+
+
+_task_started = {}
+
+
+def task_prerun(task_id=None, **kwargs):
+    _task_started[task_id] = time.perf_counter()
+
+
+def task_postrun(task_id=None, task=None, state=None, **kwargs):
+    started = _task_started.pop(task_id, None)
+    if started is not None and prometheus_client is not None:
+        TASK_DURATION.labels(getattr(task, 'name', 'unknown'), state or 'UNKNOWN').observe(
+            time.perf_counter() - started
+        )
+
+
+def connect_celery_signals():
+    """Mesurer la durée des tâches Celery (appelé au chargement de l'application)."""
+    from celery.signals import task_postrun as postrun_signal, task_prerun as prerun_signal
+
+    prerun_signal.connect(task_prerun, weak=False, dispatch_uid='metrics_task_prerun')
+    postrun_signal.connect(task_postrun, weak=False, dispatch_uid='metrics_task_postrun')
+
+
+# ===== MIDDLEWARE ET EXPOSITION =====
+
+class MetricsMiddleware:
+    """
+    Latence des requêtes par route résolue (nom d'URL), nombre et durée des
+    requêtes SQL exécutées pendant la requête.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.enabled = prometheus_client is not None and get_metrics_settings()['ENABLED']
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        if not self.enabled:
+            return self.get_response(request)
+
+        queries = 0
+
+        def record_query(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                DB_QUERY_DURATION.labels(context['connection'].alias).observe(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        wrappers = [connection.execute_wrapper(record_query) for connection in connections.all()]
+        for wrapper in wrappers:
+            wrapper.__enter__()
+        try:
+            response = self.get_response(request)
+        finally:
+            for wrapper in reversed(wrappers):
+                wrapper.__exit__(None, None, None)
+
+        route = self.route_name(request)
+        REQUEST_LATENCY.labels(request.method, route, str(response.status_code)).observe(
+            time.perf_counter() - started
+        )
+        REQUEST_DB_QUERIES.labels(route).observe(queries)
+        return response
+
+    @staticmethod
+    def route_name(request: HttpRequest) -> str:
+        """Nom d'URL résolu (cardinalité bornée, contrairement au chemin)."""
+        match = getattr(request, 'resolver_match', None)
+        if match is None:
+            return 'unresolved'
+        return match.view_name or match.route or 'unnamed'
+
+
+def _client_allowed(request: HttpRequest) -> bool:
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network) for network in get_metrics_settings()['ALLOWED_NETWORKS'])
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    """Exposition Prometheus (agrégée sur tous les processus en mode multi-processus)."""
+    if prometheus_client is None or not get_metrics_settings()['ENABLED']:
+        return HttpResponse('prometheus_client non installé\n', status=503, content_type='text/plain')
+    if not _client_allowed(request):
+        return HttpResponse(status=403)
+
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import CollectorRegistry, multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = prometheus_client.REGISTRY
+    return HttpResponse(prometheus_client.generate_latest(registry), content_type=prometheus_client.CONTENT_TYPE_LATEST)
+
+
+def mark_process_dead(pid: int):
+    """Hook `child_exit` de Gunicorn : retirer les jauges du worker arrêté."""
+    if prometheus_client is not None and os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid)
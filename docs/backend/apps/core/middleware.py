@@ -1,14 +1,15 @@
 # apps/core/middleware.py
 # ==========================
 
+import math
 import time
 import json
 import logging
-from django.db import models  # Ajoutez cet import en haut du fichier
 from typing import Callable, Optional
 from django.http import HttpRequest, HttpResponse, JsonResponse
 from django.utils import timezone
 from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import SimpleLazyObject, empty
 from django.contrib.auth.models import AnonymousUser
 from django.core.cache import cache
 from django.conf import settings
@@ -17,6 +18,11 @@ from decimal import Decimal
 import uuid
 
 from .exceptions import RateLimitExceededException, MaintenanceModeException
+from .health_probes import get_health_prober
+from .load_shedding import get_load_shedder
+from .query_profiler import QueryProfile, budget_for_view, report as report_queries, should_sample
+from .rate_limit import RateLimiter
+from .write_behind import enqueue
 from . import AUDIT_EVENT_TYPES, PERFORMANCE_CONFIG
 
 logger = logging.getLogger(__name__)
@@ -189,12 +195,20 @@ class DeviceDetectionMiddleware(MiddlewareMixin):
 class PerformanceMiddleware(MiddlewareMixin):
     """
     Middleware pour optimiser les performances et ajouter des métriques.
+    
+    Une fraction des requêtes (toutes en DEBUG) est profilée par
+    `apps.core.query_profiler` : nombre de requêtes SQL, N+1 probables et
+    dépassement du budget de la vue.
     """
     
     def process_request(self, request: HttpRequest) -> None:
         """Initialiser les métriques de performance."""
         request.perf_start = time.time()
-        request.perf_queries_start = self.get_db_queries_count()
+        request.query_profile = QueryProfile().start() if should_sample() else None
+    
+    def process_view(self, request: HttpRequest, view_func, view_args, view_kwargs) -> None:
+        """Retenir la vue résolue pour appliquer son budget de requêtes."""
+        request.perf_view = view_func
     
     def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
         """Ajouter les métriques de performance."""
@@ -204,10 +218,12 @@ class PerformanceMiddleware(MiddlewareMixin):
             total_time = time.time() - request.perf_start
             response['X-Processing-Time'] = f"{total_time:.3f}s"
             
-            # Nombre de requêtes DB
-            if hasattr(request, 'perf_queries_start'):
-                queries_count = self.get_db_queries_count() - request.perf_queries_start
-                response['X-DB-Queries'] = str(queries_count)
+            # Requêtes DB (requêtes échantillonnées uniquement)
+            profile = getattr(request, 'query_profile', None)
+            if profile is not None:
+                profile.stop()
+                response['X-DB-Queries'] = str(profile.count)
+                self.check_queries(request, profile)
             
             # Avertissement pour les requêtes lentes
             if total_time > 2.0:  # Plus de 2 secondes
@@ -217,153 +233,143 @@ class PerformanceMiddleware(MiddlewareMixin):
                 )
         
         # Compression pour les réponses JSON volumineuses
-        if (response.get('Content-Type', '').startswith('application/json') and 
+        if (not response.streaming and
+            response.get('Content-Type', '').startswith('application/json') and 
             len(response.content) > 1000):  # Plus de 1KB
             response['Vary'] = 'Accept-Encoding'
         
         return response
     
-    def get_db_queries_count(self) -> int:
-        """Obtenir le nombre de requêtes DB exécutées."""
-        try:
-            from django.db import connection
-            return len(connection.queries)
-        except:
-            return 0
+    def check_queries(self, request: HttpRequest, profile: QueryProfile):
+        """Signaler les N+1 probables et le dépassement du budget de la vue."""
+        view_func = getattr(request, 'perf_view', None)
+        if view_func is None:
+            return
+        match = getattr(request, 'resolver_match', None)
+        label = f"{request.method} {match.view_name if match and match.view_name else request.path}"
+        report_queries(profile, budget_for_view(view_func, request), label)
 
 
 class LoadBalancingMiddleware(MiddlewareMixin):
     """
     Middleware pour gérer la répartition de charge et la santé des serveurs.
+    
+    La décision d'admission lit l'instantané publié par le thread
+    d'échantillonnage (voir `apps.core.load_shedding`) et les endpoints de
+    santé celui du sondeur (voir `apps.core.health_probes`) : aucune mesure
+    système ni sonde n'est faite dans le chemin de la requête.
     """
     
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        self.shedder = get_load_shedder()
+        self.enabled = self.shedder.config['ENABLED']
+        if self.enabled:
+            self.shedder.ensure_sampler()
+        self.prober = get_health_prober()
+        self.prober.ensure_started()
+    
     def process_request(self, request: HttpRequest) -> Optional[HttpResponse]:
         """Vérifier la santé du serveur."""
         
-        # Endpoint de santé
+        # Endpoints de santé : jamais délestés, servis depuis l'instantané
         if request.path == '/health/':
             return self.health_check_response()
-        
-        # Vérifier la charge du serveur
-        if self.is_server_overloaded():
-            if not (hasattr(request, 'user') and request.user.is_staff):
-                return JsonResponse({
-                    'error': 'Server temporarily overloaded',
-                    'message': 'Le serveur est temporairement surchargé',
-                    'code': 'SERVER_OVERLOADED',
-                    'retry_after': 30
-                }, status=503)
-        
+        if request.path == '/health/live/':
+            alive, payload = self.prober.liveness()
+            return JsonResponse(payload, status=200 if alive else 503)
+        if request.path == '/health/ready/':
+            ready, payload = self.prober.readiness()
+            return JsonResponse(payload, status=200 if ready else 503)
+        
+        if not self.enabled or (hasattr(request, 'user') and request.user.is_staff):
+            return None
+        
+        priority = self.shedder.priority_for(request.path)
+        if not self.shedder.admit(priority):
+            retry_after = self.shedder.config['RETRY_AFTER']
+            response = JsonResponse({
+                'error': 'Server temporarily overloaded',
+                'message': 'Le serveur est temporairement surchargé',
+                'code': 'SERVER_OVERLOADED',
+                'retry_after': retry_after
+            }, status=503)
+            response['Retry-After'] = str(retry_after)
+            return response
+        
+        request._load_admitted_at = time.perf_counter()
         return None
     
+    def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
+        """Libérer la place de la requête et ajuster la limite de concurrence."""
+        admitted_at = getattr(request, '_load_admitted_at', None)
+        if admitted_at is not None:
+            del request._load_admitted_at
+            self.shedder.release(time.perf_counter() - admitted_at)
+        return response
+    
     def health_check_response(self) -> JsonResponse:
-        """Réponse du health check."""
-        from django.db import connections
-        
+        """Réponse du health check (instantané du sondeur, aucune sonde synchrone)."""
+        ready, payload = self.prober.readiness()
         health_status = {
-            'status': 'healthy',
+            'status': 'healthy' if ready else 'unhealthy',
             'timestamp': timezone.now().isoformat(),
             'version': getattr(settings, 'VERSION', '1.0.0'),
-            'checks': {}
+            'checks': {name: check['status'] for name, check in payload['checks'].items()},
+            'probe_age_seconds': payload['probe_age_seconds'],
         }
         
-        try:
-            # Vérifier la base de données
-            db_conn = connections['default']
-            db_conn.ensure_connection()
-            health_status['checks']['database'] = 'ok'
-        except Exception as e:
-            health_status['status'] = 'unhealthy'
-            health_status['checks']['database'] = f'error: {str(e)}'
-        
-        try:
-            # Vérifier Redis/Cache
-            cache.get('health_check')
-            health_status['checks']['cache'] = 'ok'
-        except Exception as e:
-            health_status['checks']['cache'] = f'error: {str(e)}'
-        
-        # Métriques système
+        # Métriques système (instantané de l'échantillonneur)
+        health_status['metrics'] = self.shedder.stats()
         try:
             import psutil
-            health_status['metrics'] = {
-                'cpu_percent': psutil.cpu_percent(),
-                'memory_percent': psutil.virtual_memory().percent,
-                'disk_percent': psutil.disk_usage('/').percent
-            }
+            health_status['metrics']['disk_percent'] = psutil.disk_usage('/').percent
         except ImportError:
             pass
-        
-        status_code = 200 if health_status['status'] == 'healthy' else 503
+
+        status_code = 200 if ready else 503
         return JsonResponse(health_status, status=status_code)
     
     def is_server_overloaded(self) -> bool:
-        """Vérifier si le serveur est surchargé."""
-        try:
-            import psutil
-            
-            # Vérifier CPU et mémoire
-            cpu_percent = psutil.cpu_percent(interval=1)
-            memory_percent = psutil.virtual_memory().percent
-            
-            # Seuils de charge
-            if cpu_percent > 90 or memory_percent > 90:
-                return True
-            
-            # Vérifier les connexions actives
-            active_connections = cache.get('active_connections', 0)
-            if active_connections > 1000:  # Plus de 1000 connexions actives
-                return True
-            
-            return False
-        except ImportError:
-            # psutil non disponible, ne pas bloquer
-            return False
+        """Vérifier si le serveur est surchargé (sans bloquer)."""
+        return self.shedder.is_under_pressure()
 
 
 class GameSessionMiddleware(MiddlewareMixin):
     """
     Middleware spécialisé pour gérer les sessions de jeu.
+
+    `request.active_games` est paresseux : l'ensemble Redis du joueur
+    (apps.games.active_games) n'est lu que si la vue y accède. La limite de
+    parties simultanées est appliquée atomiquement à la création
+    (`reserve_game_slot`), pas ici.
     """
     
     def process_request(self, request: HttpRequest) -> None:
-        """Gérer les sessions de jeu actives."""
+        """Exposer les parties actives de l'utilisateur sans les lire."""
         
         # Seulement pour les endpoints de jeu
-        if not request.path.startswith('/api/games/'):
+        if not request.path.startswith(('/api/games/', '/api/v1/games/')):
             return
         
-        # Vérifier si l'utilisateur a des jeux actifs
         if hasattr(request, 'user') and request.user.is_authenticated:
-            active_games = self.get_active_games(request.user)
-            request.active_games = active_games
-            request.active_games_count = len(active_games)
-            
-            # Limiter le nombre de jeux simultanés
-            if request.method == 'POST' and 'create' in request.path:
-                max_games = getattr(settings, 'MAX_CONCURRENT_GAMES', 5)
-                if request.active_games_count >= max_games:
-                    logger.warning(
-                        f"User {request.user.username} tried to exceed game limit "
-                        f"({request.active_games_count}/{max_games})"
-                    )
+            user = request.user
+            request.active_games = SimpleLazyObject(lambda: self.get_active_games(user))
     
     def get_active_games(self, user) -> list:
         """Obtenir les jeux actifs de l'utilisateur."""
         try:
-            from apps.games.models import Game
-            return list(Game.objects.filter(
-                models.Q(player1=user) | models.Q(player2=user),
-                status__in=['waiting', 'playing']
-            ).values_list('id', flat=True))
+            from apps.games.active_games import get_active_games
+            return get_active_games(user)
         except Exception:
             return []
     
     def process_response(self, request: HttpRequest, response: HttpResponse) -> HttpResponse:
-        """Ajouter les informations de session de jeu."""
+        """Ajouter les informations de session de jeu (si la vue les a lues)."""
         
-        if hasattr(request, 'active_games_count'):
-            response['X-Active-Games'] = str(request.active_games_count)
+        active_games = getattr(request, 'active_games', None)
+        if isinstance(active_games, SimpleLazyObject) and active_games._wrapped is not empty:
+            response['X-Active-Games'] = str(len(active_games))
         
         return response
 
@@ -394,6 +400,10 @@ class RateLimitMiddleware(MiddlewareMixin):
                 'burst': 50
             }
         }
+        self.limiters = {
+            user_type: RateLimiter(f'api:{user_type}', config['requests'], config['window'])
+            for user_type, config in self.rate_limits.items()
+        }
     
     def process_request(self, request: HttpRequest) -> Optional[HttpResponse]:
         """Vérifier les limites de taux."""
@@ -407,43 +417,23 @@ class RateLimitMiddleware(MiddlewareMixin):
             identifier = f"ip:{self.get_client_ip(request)}"
         
         # Vérifier les limites
-        if self.is_rate_limited(identifier, user_type):
+        result = self.limiters[user_type].hit(identifier)
+        if not result.allowed:
             logger.warning(f"Rate limit exceeded for {identifier}")
-            return JsonResponse({
+            retry_after = max(1, math.ceil(result.retry_after))
+            response = JsonResponse({
                 'error': 'Limite de taux dépassée',
                 'code': 'RATE_LIMIT_EXCEEDED',
-                'retry_after': 60
+                'retry_after': retry_after
             }, status=429)
+            response['Retry-After'] = str(retry_after)
+            return response
         
         return None
     
     def is_rate_limited(self, identifier: str, user_type: str) -> bool:
-        """Vérifier si l'utilisateur a dépassé les limites."""
-        config = self.rate_limits[user_type]
-        
-        # Clés de cache pour sliding window
-        current_window = int(time.time()) // config['window']
-        prev_window = current_window - 1
-        
-        current_key = f"rate_limit:{identifier}:{current_window}"
-        prev_key = f"rate_limit:{identifier}:{prev_window}"
-        
-        # Compter les requêtes
-        current_count = cache.get(current_key, 0)
-        prev_count = cache.get(prev_key, 0)
-        
-        # Calcul sliding window
-        window_start = time.time() - config['window']
-        weight = (time.time() - window_start) / config['window']
-        estimated_count = prev_count * (1 - weight) + current_count
-        
-        if estimated_count >= config['requests']:
-            return True
-        
-        # Incrémenter le compteur
-        cache.set(current_key, current_count + 1, config['window'] * 2)
-        
-        return False
+        """Vérifier si l'utilisateur a dépassé les limites (seau à jetons partagé)."""
+        return not self.limiters[user_type].hit(identifier).allowed
     
     def is_premium_user(self, user) -> bool:
         """Vérifier si l'utilisateur est premium."""
@@ -580,23 +570,22 @@ class AuditTrailMiddleware(MiddlewareMixin):
         return None
     
     def create_audit_entry(self, request: HttpRequest, response: HttpResponse, event_type: str) -> None:
-        """Créer une entrée d'audit."""
+        """Créer une entrée d'audit (écriture différée, hors du chemin de la réponse)."""
         try:
-            # Import tardif pour éviter les dépendances circulaires
-            from apps.analytics.models import UserActivity
-            
-            UserActivity.objects.create(
-                user=request.user,
+            enqueue(
+                'accounts.UserActivity',
+                user_id=request.user.pk,
                 activity_type=event_type,
+                description=f"{request.method} {request.path}"[:500],
                 ip_address=self.get_client_ip(request),
                 user_agent=request.META.get('HTTP_USER_AGENT', ''),
-                endpoint=request.path,
-                method=request.method,
-                status_code=response.status_code,
-                request_id=getattr(request, 'request_id', ''),
+                session_id=(request.session.session_key or '') if hasattr(request, 'session') else '',
                 metadata={
+                    'endpoint': request.path,
+                    'method': request.method,
+                    'status_code': response.status_code,
+                    'request_id': getattr(request, 'request_id', ''),
                     'timestamp': timezone.now().isoformat(),
-                    'session_key': request.session.session_key if hasattr(request, 'session') else None,
                     'language': get_language(),
                 }
             )
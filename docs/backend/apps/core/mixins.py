@@ -1,17 +1,37 @@
 # apps/core/mixins.py
-from django.core.cache import cache
-from django.utils.cache import get_cache_key
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from django.conf import settings
 import hashlib
 
+from .cache_stampede import Uncached, get_or_compute
+from .cache_tags import tag, tagged_cache_key
+
 
 class CacheResponseMixin:
     """
     Mixin pour mettre en cache les réponses des API.
+    
+    Les réponses sont étiquetées (voir `apps.core.cache_tags`) : par défaut
+    `api@view=<NomDeLaVue>`, plus `cache_tags`. `invalidate_tags(...)` sur
+    l'une de ces étiquettes invalide les réponses sans parcourir les clés.
     """
     cache_timeout = getattr(settings, 'CACHE_TIMEOUT', 300)  # 5 minutes par défaut
     cache_key_prefix = 'api_cache'
+    cache_tags = ()
+    
+    def get_cache_tags(self, request):
+        """Étiquettes d'invalidation de la réponse (surcharger pour ajouter une portée)."""
+        return [tag('api', view=self.__class__.__name__), *self.cache_tags]
+    
+    def get_tagged_cache_key(self, request, *args, **kwargs):
+        """Clé de cache courante, générations des étiquettes comprises (calculée une fois par requête)."""
+        if getattr(self, '_tagged_cache_key', None) is None:
+            self._tagged_cache_key = tagged_cache_key(
+                self.get_cache_key(request, self.__class__.__name__, *args, **kwargs),
+                self.get_cache_tags(request)
+            )
+        return self._tagged_cache_key
     
     def get_cache_key(self, request, view_name, *args, **kwargs):
         """Générer une clé de cache unique."""
@@ -27,51 +47,39 @@ class CacheResponseMixin:
         
         return f"{self.cache_key_prefix}_{view_name}_{key_hash}"
     
-    def get_cached_response(self, request, *args, **kwargs):
-        """Récupérer la réponse depuis le cache."""
-        if not getattr(settings, 'USE_CACHE', False):
-            return None
-            
-        cache_key = self.get_cache_key(
-            request, 
-            self.__class__.__name__, 
-            *args, 
-            **kwargs
-        )
-        
-        return cache.get(cache_key)
-    
-    def cache_response(self, request, response, *args, **kwargs):
-        """Mettre la réponse en cache."""
-        if not getattr(settings, 'USE_CACHE', False):
-            return response
-            
-        # Ne mettre en cache que les réponses réussies
-        if response.status_code == 200:
-            cache_key = self.get_cache_key(
-                request, 
-                self.__class__.__name__, 
-                *args, 
-                **kwargs
-            )
-            
-            cache.set(cache_key, response.data, self.cache_timeout)
-        
+    def cached_response(self, data):
+        """Réponse construite depuis les données en cache (hors négociation de contenu)."""
+        response = Response(data)
+        response.accepted_renderer = JSONRenderer()
+        response.accepted_media_type = JSONRenderer.media_type
+        response.renderer_context = {'view': self}
         return response
     
     def dispatch(self, request, *args, **kwargs):
-        """Override dispatch pour intégrer le cache."""
-        # Vérifier le cache pour les requêtes GET
-        if request.method == 'GET':
-            cached_response = self.get_cached_response(request, *args, **kwargs)
-            if cached_response is not None:
-                return Response(cached_response)
+        """
+        Override dispatch pour intégrer le cache.
         
-        # Traitement normal
-        response = super().dispatch(request, *args, **kwargs)
+        Les requêtes GET passent par `get_or_compute` : une réponse expirée
+        n'est recalculée que par une seule requête à la fois, les autres
+        reçoivent la réponse périmée ou attendent la nouvelle.
+        """
+        if request.method != 'GET' or not getattr(settings, 'USE_CACHE', False):
+            return super().dispatch(request, *args, **kwargs)
         
-        # Mettre en cache la réponse si applicable
-        if hasattr(response, 'data') and request.method == 'GET':
-            response = self.cache_response(request, response, *args, **kwargs)
+        rendered = {}
         
-        return response
+        def render():
+            response = super(CacheResponseMixin, self).dispatch(request, *args, **kwargs)
+            rendered['response'] = response
+            # Ne mettre en cache que les réponses réussies
+            if response.status_code == 200 and hasattr(response, 'data'):
+                return response.data
+            return Uncached(response)
+        
+        result = get_or_compute(
+            self.get_tagged_cache_key(request, *args, **kwargs), render, self.cache_timeout
+        )
+        # Réponse calculée par cette requête : la renvoyer telle quelle
+        if 'response' in rendered:
+            return rendered['response']
+        return self.cached_response(result)
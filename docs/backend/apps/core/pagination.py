@@ -1,15 +1,84 @@
 # apps/core/pagination.py
 # ============================
 
-from rest_framework.pagination import PageNumberPagination, LimitOffsetPagination
+import hashlib
+import json
+from datetime import date, datetime
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination, LimitOffsetPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from collections import OrderedDict
 from typing import Dict, Any, Optional
-from django.core.paginator import Paginator, InvalidPage
-from django.db.models import QuerySet
+from django.core import signing
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ValidationError
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.db.models import Q, QuerySet
+from django.utils.functional import cached_property
+from django.utils.translation import gettext_lazy as _
 from . import PERFORMANCE_CONFIG
 
 
+class CachedCountPaginator(Paginator):
+    """
+    Paginator Django dont le COUNT(*) est mis en cache quelques secondes.
+
+    Sur PostgreSQL, au-delà de `PAGINATION_ESTIMATE_THRESHOLD` lignes, le total
+    est l'estimation du planificateur plutôt qu'un comptage exact.
+    """
+
+    @cached_property
+    def count(self) -> int:
+        return get_cached_count(self.object_list)
+
+
+def estimate_count(queryset: QuerySet) -> Optional[int]:
+    """Nombre de lignes estimé par le planificateur PostgreSQL (None ailleurs)."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+    except (DatabaseError, EmptyResultSet):
+        return None
+
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def get_cached_count(queryset) -> int:
+    """Total d'un queryset, mis en cache par requête SQL pour limiter les COUNT(*)."""
+    if not isinstance(queryset, QuerySet):
+        return len(queryset)
+
+    try:
+        sql, params = queryset.order_by().query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+
+    cache_key = 'pagination_count_' + hashlib.md5(
+        f'{queryset.db}:{sql}:{params}'.encode('utf-8')
+    ).hexdigest()
+    count = cache.get(cache_key)
+    if count is not None:
+        return count
+
+    count = estimate_count(queryset)
+    if count is None or count < PERFORMANCE_CONFIG['PAGINATION_ESTIMATE_THRESHOLD']:
+        count = queryset.count()
+
+    cache.set(cache_key, count, PERFORMANCE_CONFIG['PAGINATION_COUNT_CACHE_TIMEOUT'])
+    return count
+
+
 class StandardResultsSetPagination(PageNumberPagination):
     """
     Pagination standard pour l'API RUMO RUSH.
@@ -19,6 +88,7 @@ class StandardResultsSetPagination(PageNumberPagination):
     page_size = PERFORMANCE_CONFIG['PAGE_SIZE_DEFAULT']
     page_size_query_param = 'page_size'
     max_page_size = PERFORMANCE_CONFIG['PAGE_SIZE_MAX']
+    django_paginator_class = CachedCountPaginator
     
     def get_paginated_response(self, data: list) -> Response:
         """Response avec métadonnées étendues."""
@@ -38,87 +108,175 @@ class StandardResultsSetPagination(PageNumberPagination):
         ]))
 
 
-class CursorPagination(PageNumberPagination):
+class CursorPagination(BasePagination):
     """
-    Pagination par curseur pour les flux en temps réel.
-    Optimisée pour les grandes collections et les mises à jour fréquentes.
+    Pagination par clé (keyset) pour les flux et historiques volumineux.
+
+    Le tri se fait sur (`created_at`, `id`) par défaut, ou sur
+    `view.cursor_ordering`. Le curseur est opaque et signé, il contient les
+    valeurs de tri du dernier élément servi : la page suivante est un simple
+    `WHERE (created_at, id) < (...)` indexé, sans COUNT(*) ni OFFSET, et coûte
+    donc la même chose quelle que soit sa profondeur. Le dernier champ de tri
+    doit être unique et aucun champ de tri ne doit être nullable.
     """
-    
+
     page_size = 20
     page_size_query_param = 'page_size'
     max_page_size = 100
     cursor_query_param = 'cursor'
     cursor_query_description = 'The pagination cursor value.'
-    
+    ordering = ('-created_at', '-id')
+    cursor_salt = 'apps.core.pagination.CursorPagination'
+
     def paginate_queryset(self, queryset: QuerySet, request, view=None) -> Optional[list]:
-        """Paginer avec un système de curseur."""
-        
+        """Paginer par clé à partir du curseur de la requête."""
+
         self.request = request
         self.view = view
-        
-        # Obtenir le curseur depuis les paramètres
-        cursor = request.query_params.get(self.cursor_query_param)
-        
-        if cursor:
-            try:
-                # Décoder le curseur (timestamp ou ID)
-                cursor_value = self.decode_cursor(cursor)
-                queryset = queryset.filter(created_at__lt=cursor_value)
-            except ValueError:
-                # Curseur invalide, ignorer
-                pass
-        
-        # Ordonner par date décroissante
-        queryset = queryset.order_by('-created_at')
-        
-        # Obtenir la page
-        page_size = self.get_page_size(request)
-        paginator = Paginator(queryset, page_size + 1)  # +1 pour détecter s'il y a une page suivante
-        
-        try:
-            page = paginator.page(1)
-        except InvalidPage:
+        self.queryset = queryset
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
             return None
-        
-        # Séparer les résultats et vérifier s'il y a une page suivante
-        results = list(page.object_list)
-        if len(results) > page_size:
+
+        self.ordering_fields = self.get_ordering(view)
+        cursor = self.decode_cursor(request, queryset.model)
+        reverse = bool(cursor and cursor['reverse'])
+
+        if cursor:
+            queryset = queryset.filter(self.get_keyset_filter(cursor['values'], reverse))
+
+        ordering = [self._invert(field) for field in self.ordering_fields] if reverse else self.ordering_fields
+        results = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
             self.has_next = True
-            results = results[:-1]  # Supprimer le dernier élément
+            self.has_previous = has_more
         else:
-            self.has_next = False
-        
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+
         self.results = results
         return results
-    
+
     def get_paginated_response(self, data: list) -> Response:
-        """Response avec curseur pour pagination continue."""
-        
-        next_cursor = None
-        if self.has_next and self.results:
-            # Le curseur suivant est la date du dernier élément
-            last_item = self.results[-1]
-            if hasattr(last_item, 'created_at'):
-                next_cursor = self.encode_cursor(last_item.created_at)
-        
+        """Response avec curseurs pour pagination continue."""
+
         return Response(OrderedDict([
-            ('next_cursor', next_cursor),
+            ('next_cursor', self.get_next_cursor()),
+            ('previous_cursor', self.get_previous_cursor()),
             ('has_next', self.has_next),
-            ('page_size', self.get_page_size(self.request)),
+            ('has_previous', self.has_previous),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('page_size', self.page_size),
             ('results', data),
         ]))
-    
-    def encode_cursor(self, timestamp) -> str:
-        """Encoder le timestamp en curseur."""
-        import base64
-        return base64.b64encode(str(timestamp.timestamp()).encode()).decode()
-    
-    def decode_cursor(self, cursor: str):
-        """Décoder le curseur en timestamp."""
-        import base64
-        from datetime import datetime
-        timestamp = float(base64.b64decode(cursor.encode()).decode())
-        return datetime.fromtimestamp(timestamp)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next_cursor': {'type': 'string', 'nullable': True},
+                'previous_cursor': {'type': 'string', 'nullable': True},
+                'has_next': {'type': 'boolean'},
+                'has_previous': {'type': 'boolean'},
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'page_size': {'type': 'integer'},
+                'results': schema,
+            },
+        }
+
+    def get_page_size(self, request) -> int:
+        if self.page_size_query_param:
+            try:
+                size = int(request.query_params[self.page_size_query_param])
+                if size > 0:
+                    return min(size, self.max_page_size) if self.max_page_size else size
+            except (KeyError, ValueError):
+                pass
+        return self.__class__.page_size
+
+    def get_ordering(self, view) -> list:
+        """Champs de tri : `view.cursor_ordering` ou `self.ordering`."""
+        ordering = getattr(view, 'cursor_ordering', None) or self.ordering
+        return [field.replace('pk', 'id') if field.lstrip('-') == 'pk' else field for field in ordering]
+
+    def get_keyset_filter(self, values: list, reverse: bool = False) -> Q:
+        """
+        Condition « strictement après » le curseur, pour un tri composite :
+        (a > x) OU (a = x ET b > y) OU ... avec le sens de chaque champ.
+        """
+        condition = Q()
+        equal = Q()
+        for field, value in zip(self.ordering_fields, values):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            condition |= equal & Q(**{f'{name}__{"lt" if descending else "gt"}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def get_next_cursor(self) -> Optional[str]:
+        if self.has_next and self.results:
+            return self.encode_cursor(self.results[-1])
+        return None
+
+    def get_previous_cursor(self) -> Optional[str]:
+        if self.has_previous and self.results:
+            return self.encode_cursor(self.results[0], reverse=True)
+        return None
+
+    def get_next_link(self) -> Optional[str]:
+        cursor = self.get_next_cursor()
+        if cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_previous_link(self) -> Optional[str]:
+        cursor = self.get_previous_cursor()
+        if cursor is None:
+            return None
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def encode_cursor(self, item, reverse: bool = False) -> str:
+        """Encoder les valeurs de tri d'un élément en curseur signé."""
+        values = []
+        for field in self.ordering_fields:
+            value = getattr(item, field.lstrip('-'))
+            if isinstance(value, (datetime, date)):
+                # isoformat conserve le fuseau horaire et les microsecondes
+                value = value.isoformat()
+            elif not isinstance(value, (int, float, bool, type(None))):
+                value = str(value)
+            values.append(value)
+        return signing.dumps({'v': values, 'r': reverse}, salt=self.cursor_salt, compress=True)
+
+    def decode_cursor(self, request, model) -> Optional[Dict[str, Any]]:
+        """Décoder et vérifier le curseur de la requête."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            payload = signing.loads(encoded, salt=self.cursor_salt)
+            raw_values = payload['v']
+            if len(raw_values) != len(self.ordering_fields):
+                raise ValueError('cursor/ordering mismatch')
+            values = [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering_fields, raw_values)
+            ]
+        except (signing.BadSignature, KeyError, TypeError, ValueError, ValidationError):
+            raise NotFound(_('Curseur de pagination invalide'))
+
+        return {'values': values, 'reverse': bool(payload.get('r'))}
+
+    @staticmethod
+    def _invert(field: str) -> str:
+        return field[1:] if field.startswith('-') else f'-{field}'
 
 
 class GameHistoryPagination(StandardResultsSetPagination):
@@ -326,6 +484,10 @@ class SmartPagination(LimitOffsetPagination):
         
         return default_limit
     
+    def get_count(self, queryset):
+        """Total mis en cache pour éviter un COUNT(*) à chaque page."""
+        return get_cached_count(queryset)
+    
     def get_paginated_response(self, data: list) -> Response:
         """Response adaptée au contexte."""
         
@@ -365,20 +527,13 @@ class InfiniteScrollPagination(CursorPagination):
             ('load_more_url', self.get_next_link()),
         ]))
     
-    def get_next_cursor(self) -> Optional[str]:
-        """Obtenir le curseur suivant pour le défilement."""
-        if self.has_next and self.results:
-            last_item = self.results[-1]
-            if hasattr(last_item, 'created_at'):
-                return self.encode_cursor(last_item.created_at)
-        return None
-    
     def get_count_estimate(self) -> str:
         """Estimation du nombre total d'éléments."""
-        # Pour le défilement infini, on évite de compter tous les éléments
-        # pour des raisons de performance
-        if hasattr(self, 'paginator') and self.paginator.count < 1000:
-            return f"{self.paginator.count} éléments"
+        # Pour le défilement infini, on évite de compter tous les éléments :
+        # au plus 1001 lignes sont lues pour savoir si on dépasse le seuil
+        count = self.queryset.order_by()[:1001].count()
+        if count <= 1000:
+            return f"{count} éléments"
         else:
             return "1000+ éléments"
 
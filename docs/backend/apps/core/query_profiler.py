@@ -0,0 +1,234 @@
+# apps/core/query_profiler.py
+# =============================
+
+"""
+Profilage des requêtes SQL par requête HTTP, utilisable en production.
+
+Le profileur s'installe via `connection.execute_wrapper` : il ne dépend pas
+de `connection.queries` (alimenté seulement avec DEBUG=True). En production
+seule une fraction des requêtes est échantillonnée.
+
+- Empreinte SQL : littéraux, paramètres et listes IN normalisés ; la même
+  empreinte répétée N fois dans une requête signale un N+1 probable, avec
+  le site d'appel applicatif qui l'a déclenché.
+- Budget de requêtes par vue : `query_budget` sur la classe (entier ou
+  dictionnaire par action), décorateur `@query_budget(n)` sur une action ou
+  une vue fonction, ou `QUERY_PROFILER['BUDGETS']` par nom d'URL.
+- `assert_query_budget` : échoue un test quand une vue dépasse son budget
+  ou répète une requête.
+"""
+
+import logging
+import random
+import re
+import time
+import traceback
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_QUERY_PROFILER = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 0.05,  # Fraction des requêtes profilées (toutes avec DEBUG=True)
+    'DEFAULT_BUDGET': 50,
+    'N_PLUS_ONE_THRESHOLD': 5,  # Répétitions d'une même empreinte signalées
+    'BUDGETS': {},  # {nom d'URL: budget}
+}
+
+
+def get_query_profiler_settings():
+    """Paramètres du profileur (défauts < QUERY_PROFILER)."""
+    return {**DEFAULT_QUERY_PROFILER, **getattr(settings, 'QUERY_PROFILER', {})}
+
+
+# ===== EMPREINTES SQL =====
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%s|\?')
+_IN_LIST = re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)')
+_WHITESPACE = re.compile(r'\s+')
+
+# Frames ignorées pour désigner le site d'appel d'une requête
+_FRAMEWORK_PATHS = ('/django/', '/rest_framework/', '/site-packages/', '/channels/', __file__)
+
+
+def fingerprint(sql: str) -> str:
+    """Forme normalisée d'une requête : identique pour toutes ses valeurs de paramètres."""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _IN_LIST.sub('(...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def call_site(depth: int = 3) -> List[str]:
+    """Frames applicatives (hors Django/DRF) à l'origine de la requête courante."""
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if not any(path in frame.filename for path in _FRAMEWORK_PATHS)
+    ]
+    return [f'{frame.filename}:{frame.lineno} in {frame.name}' for frame in frames[-depth:]]
+
+
+class QueryProfile:
+    """Compteurs de requêtes d'une requête HTTP (ou d'un bloc de test)."""
+
+    def __init__(self, n_plus_one_threshold: Optional[int] = None):
+        if n_plus_one_threshold is None:
+            n_plus_one_threshold = get_query_profiler_settings()['N_PLUS_ONE_THRESHOLD']
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints: Counter = Counter()
+        self.sites: Dict[str, List[str]] = {}
+        self._connections = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            key = fingerprint(sql)
+            self.fingerprints[key] += 1
+            # La pile n'est capturée qu'une fois, au seuil de répétition
+            if self.fingerprints[key] == self.n_plus_one_threshold:
+                self.sites[key] = call_site()
+
+    def start(self) -> 'QueryProfile':
+        self._connections = list(connections.all())
+        for connection in self._connections:
+            connection.execute_wrappers.append(self)
+        return self
+
+    def stop(self):
+        for connection in self._connections:
+            if self in connection.execute_wrappers:
+                connection.execute_wrappers.remove(self)
+        self._connections = []
+
+    def repeated(self) -> List[Tuple[str, int, List[str]]]:
+        """Empreintes répétées au moins `n_plus_one_threshold` fois (N+1 probables)."""
+        return [
+            (key, count, self.sites.get(key, []))
+            for key, count in self.fingerprints.most_common()
+            if count >= self.n_plus_one_threshold
+        ]
+
+
+@contextmanager
+def profile_queries(n_plus_one_threshold: Optional[int] = None):
+    """Profiler les requêtes exécutées dans le bloc."""
+    profile = QueryProfile(n_plus_one_threshold).start()
+    try:
+        yield profile
+    finally:
+        profile.stop()
+
+
+def should_sample() -> bool:
+    config = get_query_profiler_settings()
+    if not config['ENABLED']:
+        return False
+    return settings.DEBUG or random.random() < config['SAMPLE_RATE']
+
+
+# ===== BUDGETS =====
+
+def query_budget(budget: int):
+    """Décorateur : budget de requêtes d'une action de ViewSet ou d'une vue fonction."""
+
+    def decorator(view):
+        view.query_budget = budget
+        return view
+
+    return decorator
+
+
+def view_budget(view_class=None, action: Optional[str] = None, view_name: Optional[str] = None) -> int:
+    """Budget applicable : action décorée, puis classe, puis QUERY_PROFILER['BUDGETS'], puis défaut."""
+    config = get_query_profiler_settings()
+    if view_class is not None:
+        handler = getattr(view_class, action, None) if action else None
+        if getattr(handler, 'query_budget', None) is not None:
+            return handler.query_budget
+        class_budget = getattr(view_class, 'query_budget', None)
+        if isinstance(class_budget, dict):
+            class_budget = class_budget.get(action)
+        if class_budget is not None:
+            return class_budget
+    if view_name and view_name in config['BUDGETS']:
+        return config['BUDGETS'][view_name]
+    return config['DEFAULT_BUDGET']
+
+
+def budget_for_view(view_func, request) -> int:
+    """Budget de la vue résolue pour `request` (vue fonction, APIView ou ViewSet)."""
+    view_class = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(request.method.lower())
+    match = getattr(request, 'resolver_match', None)
+    view_name = match.view_name if match else None
+
+    if view_class is None:
+        budget = getattr(view_func, 'query_budget', None)
+        if budget is not None:
+            return budget
+    elif action is None and request.method.lower() in ('get', 'post', 'put', 'patch', 'delete'):
+        action = request.method.lower()
+    return view_budget(view_class, action, view_name)
+
+
+def report(profile: QueryProfile, budget: int, label: str):
+    """Journaliser les N+1 probables et le dépassement de budget d'une requête profilée."""
+    for key, count, site in profile.repeated():
+        logger.warning(
+            f"🔁 N+1 probable sur {label}: {count}× {key[:200]} "
+            f"(depuis {' <- '.join(reversed(site)) or 'inconnu'})"
+        )
+    if profile.count > budget:
+        logger.warning(
+            f"🐢 Budget de requêtes dépassé sur {label}: {profile.count} > {budget} "
+            f"({profile.duration * 1000:.1f} ms)"
+        )
+
+
+# ===== TESTS =====
+
+class QueryBudgetExceeded(AssertionError):
+    """Une vue a dépassé son budget de requêtes ou répété une requête."""
+
+
+@contextmanager
+def assert_query_budget(budget: Optional[int] = None, view=None, action: Optional[str] = None,
+                        n_plus_one_threshold: Optional[int] = None):
+    """
+    Échouer si le bloc dépasse le budget ou répète une même requête.
+
+    Exemples :
+        with assert_query_budget(view=GameViewSet, action='list'):
+            client.get('/api/v1/games/')
+        with assert_query_budget(5):
+            ...
+    """
+    if budget is None:
+        budget = view_budget(view, action)
+    with profile_queries(n_plus_one_threshold) as profile:
+        yield profile
+
+    problems = []
+    if profile.count > budget:
+        problems.append(f'{profile.count} requêtes pour un budget de {budget}')
+    for key, count, site in profile.repeated():
+        problems.append(f'{count}× {key}\n    depuis {" <- ".join(reversed(site)) or "inconnu"}')
+    if problems:
+        queries = '\n'.join(f'  {count}× {key}' for key, count in profile.fingerprints.most_common())
+        raise QueryBudgetExceeded('\n'.join(problems) + f'\nRequêtes exécutées :\n{queries}')
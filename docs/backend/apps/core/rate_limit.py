@@ -0,0 +1,317 @@
+# apps/core/rate_limit.py
+# =========================
+
+"""
+Limitation de taux partagée par les couches HTTP et WebSocket.
+
+Chaque limite est un seau à jetons stocké dans Redis et mis à jour par un
+script Lua : lecture, recharge et consommation sont atomiques, et l'horloge
+est celle de Redis, donc la limite tient quel que soit le nombre de
+processus. Sans Redis (cache local), un équivalent en mémoire est utilisé.
+
+Pré-contrôle local : un identifiant refusé reste refusé localement jusqu'à
+son `retry_after`, et un limiteur peut réserver plusieurs jetons d'un coup
+(`lease`) pour les consommer sans aller-retour réseau. Les jetons réservés
+sont déjà retirés du seau partagé : la limite globale n'est jamais dépassée.
+"""
+
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_RATE_LIMIT_SETTINGS = {
+    'KEY_PREFIX': 'ratelimit',
+    'LEASE_TTL': 1.0,  # secondes de validité des jetons réservés localement
+    'FAIL_OPEN': True,  # Laisser passer si Redis est injoignable
+    'SLOT_TTL': 3600,  # Durée de vie des compteurs de connexions (workers arrêtés brutalement)
+}
+
+
+def get_rate_limit_settings() -> Dict[str, Any]:
+    """Paramètres de limitation (défauts < RATE_LIMIT)."""
+    return {**DEFAULT_RATE_LIMIT_SETTINGS, **getattr(settings, 'RATE_LIMIT', {})}
+
+
+class RateLimitResult(NamedTuple):
+    allowed: bool
+    remaining: int
+    retry_after: float
+
+
+RATE_PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate: str) -> Tuple[int, int]:
+    """'10/h' → (10, 3600) ; accepte aussi '10/5m'."""
+    match = re.fullmatch(r'(\d+)/(\d*)([smhd])', rate)
+    if not match:
+        raise ValueError(f"Taux invalide: {rate}")
+    count, multiplier, period = match.groups()
+    return int(count), int(multiplier or 1) * RATE_PERIODS[period]
+
+
+# ===== STOCKAGE DES SEAUX =====
+
+# KEYS[1] = seau ; ARGV = capacité, jetons par seconde, jetons demandés (minimum), jetons souhaités
+TOKEN_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local wanted = tonumber(ARGV[4])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local granted = 0
+local retry_after = 0
+if tokens >= cost then
+    granted = math.max(cost, math.min(wanted, math.floor(tokens)))
+    tokens = tokens - granted
+else
+    retry_after = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+return {granted, tostring(tokens), tostring(retry_after)}
+"""
+
+# KEYS[1] = compteur ; ARGV = maximum, durée de vie
+ACQUIRE_SLOT_SCRIPT = """
+local current = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+if current > tonumber(ARGV[1]) then
+    redis.call('DECR', KEYS[1])
+    return 0
+end
+return 1
+"""
+
+RELEASE_SLOT_SCRIPT = """
+local current = redis.call('DECR', KEYS[1])
+if current <= 0 then
+    redis.call('DEL', KEYS[1])
+end
+return current
+"""
+
+
+class RedisRateLimitStore:
+    """Seaux à jetons et compteurs de connexions dans Redis (scripts Lua)."""
+
+    def __init__(self, client):
+        self.client = client
+        self._take = client.register_script(TOKEN_BUCKET_SCRIPT)
+        self._acquire_slot = client.register_script(ACQUIRE_SLOT_SCRIPT)
+        self._release_slot = client.register_script(RELEASE_SLOT_SCRIPT)
+        # Précharger les scripts : pas d'aller-retour NOSCRIPT au premier appel
+        for script in (self._take, self._acquire_slot, self._release_slot):
+            client.script_load(script.script)
+
+    def take(self, key: str, capacity: int, rate: float, cost: int, wanted: int) -> Tuple[int, float, float]:
+        """Prendre entre `cost` et `wanted` jetons : (accordés, restants, attente)."""
+        granted, tokens, retry_after = self._take(keys=[key], args=[capacity, rate, cost, wanted])
+        return int(granted), float(tokens), float(retry_after)
+
+    def acquire_slot(self, key: str, limit: int, ttl: int) -> bool:
+        return bool(self._acquire_slot(keys=[key], args=[limit, ttl]))
+
+    def release_slot(self, key: str):
+        self._release_slot(keys=[key])
+
+
+class MemoryRateLimitStore:
+    """Équivalent en mémoire de `RedisRateLimitStore` (tests, cache local)."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._slots = {}
+        self._lock = threading.Lock()
+
+    def take(self, key, capacity, rate, cost, wanted):
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+            if tokens >= cost:
+                granted = max(cost, min(wanted, int(tokens)))
+                tokens -= granted
+                retry_after = 0.0
+            else:
+                granted = 0
+                retry_after = (cost - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            return granted, tokens, retry_after
+
+    def acquire_slot(self, key, limit, ttl):
+        with self._lock:
+            if self._slots.get(key, 0) >= limit:
+                return False
+            self._slots[key] = self._slots.get(key, 0) + 1
+            return True
+
+    def release_slot(self, key):
+        with self._lock:
+            current = self._slots.get(key, 0) - 1
+            if current <= 0:
+                self._slots.pop(key, None)
+            else:
+                self._slots[key] = current
+
+
+_local_store = MemoryRateLimitStore()
+_redis_store = None
+
+
+def get_rate_limit_store():
+    """Store Redis si le cache Django est sur Redis, sinon store local au processus."""
+    global _redis_store
+    if 'redis' in settings.CACHES['default']['BACKEND'].lower():
+        if _redis_store is None:
+            from django_redis import get_redis_connection
+            _redis_store = RedisRateLimitStore(get_redis_connection('default'))
+        return _redis_store
+    return _local_store
+
+
+# ===== LIMITEURS =====
+
+class RateLimiter:
+    """
+    `limit` requêtes par `window` secondes et par identifiant.
+
+    Args:
+        name: Espace de noms des clés (une limite = un nom)
+        lease: Jetons réservés par aller-retour Redis (1 = aucun pré-contrôle optimiste)
+        store: Store explicite (par défaut selon le cache configuré)
+    """
+
+    # Au-delà, les entrées locales expirées sont purgées
+    MAX_LOCAL_ENTRIES = 10000
+
+    def __init__(self, name: str, limit: int, window: int, lease: int = 1, store=None):
+        self.name = name
+        self.limit = limit
+        self.window = window
+        self.rate = limit / window
+        self.lease = max(1, min(lease, limit))
+        self._store = store
+        self._local: Dict[str, list] = {}  # identifiant → [jetons réservés, expiration, refus jusqu'à]
+        self._lock = threading.Lock()
+
+    @property
+    def store(self):
+        return self._store or get_rate_limit_store()
+
+    def key(self, identifier: str) -> str:
+        return f"{get_rate_limit_settings()['KEY_PREFIX']}:{self.name}:{identifier}"
+
+    def check_local(self, identifier: str, cost: int = 1) -> Optional[RateLimitResult]:
+        """Décider sans Redis si possible (refus en cours ou jetons réservés)."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._local.get(identifier)
+            if entry is None:
+                return None
+            leased, expires_at, denied_until = entry
+            if denied_until > now:
+                return RateLimitResult(False, 0, denied_until - now)
+            if leased >= cost and expires_at > now:
+                entry[0] = leased - cost
+                return RateLimitResult(True, entry[0], 0.0)
+        return None
+
+    def hit(self, identifier: str, cost: int = 1) -> RateLimitResult:
+        """Consommer `cost` jetons pour cet identifiant."""
+        return self.check_local(identifier, cost) or self._hit_store(identifier, cost)
+
+    async def ahit(self, identifier: str, cost: int = 1) -> RateLimitResult:
+        """Variante asynchrone : pas de changement de thread si le pré-contrôle suffit."""
+        from asgiref.sync import sync_to_async
+
+        local = self.check_local(identifier, cost)
+        if local is not None:
+            return local
+        return await sync_to_async(self._hit_store, thread_sensitive=False)(identifier, cost)
+
+    def _hit_store(self, identifier: str, cost: int) -> RateLimitResult:
+        config = get_rate_limit_settings()
+        try:
+            granted, tokens, retry_after = self.store.take(
+                self.key(identifier), self.limit, self.rate, cost, max(cost, self.lease)
+            )
+        except Exception as e:
+            logger.error(f"Erreur de limitation de taux ({self.name}): {e}")
+            return RateLimitResult(bool(config['FAIL_OPEN']), 0, 0.0)
+
+        now = time.monotonic()
+        with self._lock:
+            if len(self._local) > self.MAX_LOCAL_ENTRIES:
+                self._local = {
+                    ident: entry for ident, entry in self._local.items()
+                    if entry[1] > now or entry[2] > now
+                }
+            if granted:
+                self._local[identifier] = [granted - cost, now + config['LEASE_TTL'], 0.0]
+            else:
+                self._local[identifier] = [0, 0.0, now + retry_after]
+
+        if not granted:
+            return RateLimitResult(False, 0, retry_after)
+        return RateLimitResult(True, int(tokens) + granted - cost, 0.0)
+
+
+_limiters: Dict[Tuple[str, int, int, int], RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str, limit: int, window: int, lease: int = 1) -> RateLimiter:
+    """
+    Limiteur partagé par le processus pour (nom, taux) : son état local (refus
+    mémorisés, jetons réservés) survit aux décorateurs réappliqués à chaque
+    appel (`method_decorator`).
+    """
+    key = (name, limit, window, lease)
+    limiter = _limiters.get(key)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.setdefault(key, RateLimiter(name, limit, window, lease=lease))
+    return limiter
+
+
+class ConcurrencyLimiter:
+    """Nombre maximal d'éléments simultanés (ex. connexions WebSocket) par identifiant."""
+
+    def __init__(self, name: str, limit: int, store=None):
+        self.name = name
+        self.limit = limit
+        self._store = store
+
+    @property
+    def store(self):
+        return self._store or get_rate_limit_store()
+
+    def key(self, identifier: str) -> str:
+        return f"{get_rate_limit_settings()['KEY_PREFIX']}:{self.name}:{identifier}"
+
+    def acquire(self, identifier: str) -> bool:
+        config = get_rate_limit_settings()
+        try:
+            return self.store.acquire_slot(self.key(identifier), self.limit, config['SLOT_TTL'])
+        except Exception as e:
+            logger.error(f"Erreur de limitation de concurrence ({self.name}): {e}")
+            return bool(config['FAIL_OPEN'])
+
+    def release(self, identifier: str):
+        try:
+            self.store.release_slot(self.key(identifier))
+        except Exception as e:
+            logger.error(f"Erreur de libération de concurrence ({self.name}): {e}")
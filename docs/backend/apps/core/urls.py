@@ -5,7 +5,7 @@ from django.urls import path, include
 from django.views.decorators.csrf import csrf_exempt
 from django.conf import settings
 
-from . import views
+from . import health_check, views
 
 app_name = 'core'
 
@@ -14,6 +14,9 @@ urlpatterns = [
     
     # ===== ENDPOINTS DE SANTÉ ET MONITORING =====
     path('health/', views.health_check, name='health_check'),
+    path('health/live/', health_check.liveness_probe, name='liveness_probe'),
+    path('health/ready/', health_check.readiness_probe, name='readiness_probe'),
+    path('health/detailed/', health_check.detailed_health_check, name='detailed_health_check'),
     path('status/', views.status_check, name='status_check'),
     path('ping/', views.status_check, name='ping'),  # Alias pour ping
     
@@ -60,6 +63,8 @@ internal_api_patterns = [
 # URLs versionnées de l'API
 v1_patterns = [
     path('health/', views.health_check, name='v1_health_check'),
+    path('health/live/', health_check.liveness_probe, name='v1_liveness_probe'),
+    path('health/ready/', health_check.readiness_probe, name='v1_readiness_probe'),
     path('config/', views.ConfigurationView.as_view(), name='v1_configuration'),
     path('currency/', include([
         path('convert/', views.CurrencyConversionView.as_view(), name='v1_currency_convert'),
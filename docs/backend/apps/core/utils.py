@@ -412,24 +412,16 @@ def get_cache_key(*parts: str) -> str:
     return ":".join(str(part) for part in parts)
 
 
-def invalidate_cache_pattern(pattern: str) -> int:
-    """Invalider les clés de cache correspondant à un pattern."""
+def invalidate_cache_tags(*tags: str) -> None:
+    """
+    Invalider les entrées de cache portant ces étiquettes.
     
-    # Note: Cette fonction nécessite Redis pour fonctionner pleinement
-    try:
-        from django.core.cache import cache
-        from django.core.cache.backends.redis import RedisCache
-        
-        if isinstance(cache, RedisCache):
-            redis_client = cache._cache.get_client(1)
-            keys = redis_client.keys(pattern)
-            if keys:
-                return redis_client.delete(*keys)
-        
-        return 0
-    except:
-        logger.warning("Impossible d'invalider le cache par pattern")
-        return 0
+    Remplace l'ancienne invalidation par motif (KEYS) : une incrémentation de
+    génération par étiquette, voir `apps.core.cache_tags`.
+    """
+    
+    from .cache_tags import invalidate_tags
+    invalidate_tags(*tags)
 
 
 # ===== UTILITAIRES DIVERS =====
@@ -487,16 +479,20 @@ def get_app_version() -> str:
     return getattr(settings, 'APP_VERSION', '1.0.0')
 
 
-def log_user_activity(user, activity_type: str, description: str, metadata: dict = None):
-    """Logger une activité utilisateur."""
+def log_user_activity(user, activity_type: str, description: str, metadata: dict = None,
+                      ip_address: str = None, user_agent: str = ''):
+    """Logger une activité utilisateur (écriture différée, par lots)."""
     
     try:
-        from apps.accounts.models import UserActivity
+        from .write_behind import enqueue
         
-        UserActivity.objects.create(
-            user=user,
+        enqueue(
+            'accounts.UserActivity',
+            user_id=user.pk,
             activity_type=activity_type,
-            description=description,
+            description=str(description)[:500],
+            ip_address=ip_address,
+            user_agent=user_agent or '',
             metadata=metadata or {}
         )
     except Exception as e:
@@ -513,6 +509,8 @@ def log_user_activity_with_ip(user, activity_type, description, ip_address=None,
         user=user,
         activity_type=activity_type,
         description=description,
-        metadata=metadata or {}
+        metadata=metadata or {},
+        ip_address=ip_address,
+        user_agent=user_agent
     )
         
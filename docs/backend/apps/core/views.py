@@ -28,6 +28,7 @@ from .decorators import (
     api_endpoint, check_maintenance_mode
 )
 from .permissions import IsVerifiedUser, MaintenanceModePermission
+from .health_probes import get_health_prober
 from .pagination import StandardResultsSetPagination
 from .utils import (
     get_exchange_rate, convert_currency, format_currency,
@@ -67,38 +68,15 @@ def health_check(request):
     }
     
     try:
-        # 1. Vérifier la base de données
-        try:
-            from django.db import connections
-            db_conn = connections['default']
-            db_conn.ensure_connection()
-            
-            # Test simple de requête
-            user_count = User.objects.count()
-            health_status['checks']['database'] = {
-                'status': 'ok',
-                'users_count': user_count
-            }
-        except Exception as e:
+        # 1-2. Base de données, cache, Redis, Celery... : instantané du sondeur
+        # (apps.core.health_probes), aucune sonde dans le chemin de la requête
+        prober = get_health_prober()
+        prober.ensure_started()
+        ready, probes = prober.readiness()
+        if not ready:
             health_status['status'] = 'unhealthy'
-            health_status['checks']['database'] = {
-                'status': 'error',
-                'error': str(e)
-            }
-        
-        # 2. Vérifier Redis/Cache
-        try:
-            cache.set('health_check_key', 'ok', 10)
-            if cache.get('health_check_key') == 'ok':
-                health_status['checks']['cache'] = {'status': 'ok'}
-                cache.delete('health_check_key')
-            else:
-                raise Exception("Cache read/write failed")
-        except Exception as e:
-            health_status['checks']['cache'] = {
-                'status': 'error',
-                'error': str(e)
-            }
+        health_status['checks'].update(probes['checks'])
+        health_status['probe_age_seconds'] = probes['probe_age_seconds']
         
         # 3. Vérifier les services externes (optionnel)
         health_status['checks']['external_services'] = _check_external_services()
@@ -0,0 +1,374 @@
+# apps/core/write_behind.py
+# ===========================
+
+"""
+Écriture différée (write-behind) des journaux d'audit et d'activité.
+
+Les entrées sont déposées dans une file bornée en mémoire ; un thread
+d'écriture les insère par lots (`bulk_create`) dès que BATCH_SIZE entrées
+sont prêtes ou que FLUSH_INTERVAL secondes se sont écoulées. La requête ne
+paie plus qu'un `put_nowait`.
+
+File pleine ou base indisponible : les entrées sont écrites dans un fichier
+JSONL de SPOOL_DIR (OVERFLOW='spool'), rejouées au démarrage suivant ou par
+`manage.py flush_write_behind`, ou comptées puis abandonnées (OVERFLOW='drop').
+
+Perte maximale sur arrêt brutal du processus : les entrées encore en file
+et le lot en cours d'écriture, soit au plus MAX_QUEUE + BATCH_SIZE entrées
+(en régime établi, environ FLUSH_INTERVAL secondes d'événements). À l'arrêt
+normal, la file est vidée (atexit).
+
+Exemple :
+    enqueue('accounts.UserActivity', user_id=user.pk, activity_type='login', description='...')
+
+Un modèle peut avoir son propre écrivain de lots (`writers`), par exemple
+un COPY PostgreSQL pour les événements d'analytics (apps.analytics.ingestion).
+
+Les journaux fichiers suivent le même principe avec `queued_handler` (LOGGING).
+"""
+
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+Entry = Tuple[str, Dict[str, Any]]
+Writer = Callable[[List[Dict[str, Any]]], None]
+
+# Intervalle de relecture du spool par le thread d'écriture
+REPLAY_INTERVAL = 60.0
+
+
+DEFAULT_WRITE_BEHIND = {
+    'ENABLED': True,
+    'MAX_QUEUE': 10000,
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 1.0,  # secondes
+    'OVERFLOW': 'spool',  # 'spool' (fichier JSONL rejoué plus tard) ou 'drop'
+    'SPOOL_DIR': None,  # Défaut : <BASE_DIR>/logs/write_behind
+}
+
+
+def get_write_behind_settings():
+    """Paramètres de l'écriture différée (défauts < WRITE_BEHIND)."""
+    config = {**DEFAULT_WRITE_BEHIND, **getattr(settings, 'WRITE_BEHIND', {})}
+    if config['SPOOL_DIR'] is None:
+        config['SPOOL_DIR'] = Path(settings.BASE_DIR) / 'logs' / 'write_behind'
+    return config
+
+
+class WriteBehindQueue:
+    """File bornée d'insertions, vidée par lots par un thread d'écriture."""
+
+    def __init__(self, max_queue: int, batch_size: int, flush_interval: float,
+                 overflow: str = 'spool', spool_dir: Optional[Path] = None,
+                 writers: Optional[Dict[str, Writer]] = None, name: str = 'write-behind'):
+        self.name = name
+        self.writers = writers or {}
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.spool_dir = Path(spool_dir) if spool_dir else None
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self.counters: Counter = Counter()
+        self._counters_lock = threading.Lock()
+        self._spool_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+
+    # ===== PRODUCTEURS =====
+
+    def put(self, model_label: str, **values) -> bool:
+        """Déposer une insertion ; False si elle a débordé (spoolée ou abandonnée)."""
+        self.ensure_flusher()
+        try:
+            self.queue.put_nowait((model_label, values))
+        except queue.Full:
+            self._overflow([(model_label, values)])
+            return False
+        self._count('queued')
+        return True
+
+    def put_many(self, model_label: str, rows: List[Dict[str, Any]]) -> int:
+        """Déposer un lot d'insertions ; retourne le nombre mis en file (le reste déborde)."""
+        self.ensure_flusher()
+        queued = 0
+        for values in rows:
+            try:
+                self.queue.put_nowait((model_label, values))
+            except queue.Full:
+                break
+            queued += 1
+        if queued < len(rows):
+            self._overflow([(model_label, values) for values in rows[queued:]])
+        self._count('queued', queued)
+        return queued
+
+    # ===== ÉCRITURE =====
+
+    def ensure_flusher(self):
+        """Démarrer le thread d'écriture (à nouveau après un fork)."""
+        if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid() and self._thread is not None and self._thread.is_alive():
+                return
+            if self._pid is None:
+                atexit.register(self.close)
+            self._pid = os.getpid()
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        next_replay = time.monotonic()
+        while not self._stop.is_set():
+            if time.monotonic() >= next_replay:
+                next_replay = time.monotonic() + REPLAY_INTERVAL
+                try:
+                    self.replay_spool()
+                except Exception as e:
+                    logger.error(f"❌ Relecture du spool d'écriture différée échouée: {e}")
+            batch = self._collect()
+            if batch:
+                close_old_connections()  # Connexion propre au thread, jamais recyclée sinon
+                self.write(batch)
+
+    def _collect(self) -> List[Entry]:
+        """Attendre un lot complet ou la fin de l'intervalle."""
+        batch: List[Entry] = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or self._stop.is_set():
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def drain(self, limit: int) -> List[Entry]:
+        batch: List[Entry] = []
+        while len(batch) < limit:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def write(self, entries: List[Entry], spool_failures: bool = True) -> int:
+        """Insérer des entrées par modèle ; les lignes en échec sont isolées puis débordées."""
+        by_model: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+        for model_label, values in entries:
+            by_model[model_label].append(values)
+
+        written = 0
+        failed: List[Entry] = []
+        for model_label, rows in by_model.items():
+            model = apps.get_model(model_label)
+            writer = self.writers.get(model_label)
+            try:
+                if writer is not None:
+                    writer(rows)
+                else:
+                    model.objects.bulk_create([model(**values) for values in rows], batch_size=self.batch_size)
+                written += len(rows)
+                continue
+            except Exception as e:
+                logger.error(f"❌ Écriture différée en lot échouée ({model_label}): {e}")
+            # Une ligne invalide ne doit pas faire perdre tout le lot ; l'écrivain
+            # du modèle reste seul responsable de ses effets (ex. rollups)
+            for values in rows:
+                try:
+                    if writer is not None:
+                        writer([values])
+                    else:
+                        model.objects.create(**values)
+                    written += 1
+                except Exception:
+                    failed.append((model_label, values))
+
+        self._count('written', written)
+        if failed:
+            if spool_failures:
+                self._overflow(failed)
+            else:
+                self._count('dropped', len(failed))
+        return written
+
+    def flush(self) -> int:
+        """Vider la file dans le thread courant."""
+        written = 0
+        while True:
+            batch = self.drain(self.batch_size)
+            if not batch:
+                return written
+            written += self.write(batch)
+
+    def close(self, timeout: float = 5.0):
+        """Arrêter le thread d'écriture et vider la file (arrêt normal)."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.flush()
+
+    # ===== DÉBORDEMENT =====
+
+    def _overflow(self, entries: List[Entry]):
+        if self.overflow == 'spool' and self._spool(entries):
+            self._count('spooled', len(entries))
+            return
+        dropped = self._count('dropped', len(entries))
+        if dropped == len(entries) or dropped // 1000 != (dropped - len(entries)) // 1000:
+            logger.warning(f"⚠️ Écriture différée saturée : {dropped} entrées abandonnées")
+
+    def _spool_path(self) -> Path:
+        return self.spool_dir / f'{os.getpid()}.jsonl'
+
+    def _spool(self, entries: List[Entry]) -> bool:
+        if self.spool_dir is None:
+            return False
+        try:
+            with self._spool_lock:
+                self.spool_dir.mkdir(parents=True, exist_ok=True)
+                with open(self._spool_path(), 'a', encoding='utf-8') as spool:
+                    for model_label, values in entries:
+                        spool.write(json.dumps({'model': model_label, 'values': values}, cls=DjangoJSONEncoder) + '\n')
+            return True
+        except (OSError, TypeError) as e:
+            logger.error(f"❌ Spool d'écriture différée impossible: {e}")
+            return False
+
+    def replay_spool(self) -> int:
+        """Réinsérer les entrées spoolées ; les lignes encore invalides sont abandonnées."""
+        if self.spool_dir is None or not self.spool_dir.is_dir():
+            return 0
+        replayed = 0
+        for path in sorted(self.spool_dir.glob('*.jsonl')):
+            if path.stem != str(os.getpid()) and _process_alive(path.stem):
+                continue  # Spool d'un autre worker en vie : il le rejoue lui-même
+            claimed = path.with_suffix(f'.replay-{os.getpid()}')
+            try:
+                with self._spool_lock:
+                    path.rename(claimed)  # Un seul processus rejoue chaque fichier
+            except OSError:
+                continue
+            entries = []
+            with open(claimed, encoding='utf-8') as spool:
+                for line in spool:
+                    try:
+                        item = json.loads(line)
+                        entries.append((item['model'], item['values']))
+                    except (ValueError, KeyError):
+                        self._count('dropped')
+            for start in range(0, len(entries), self.batch_size):
+                replayed += self.write(entries[start:start + self.batch_size], spool_failures=False)
+            claimed.unlink()
+        if replayed:
+            logger.info(f"✅ {replayed} entrées spoolées réinsérées")
+        return replayed
+
+    # ===== STATISTIQUES =====
+
+    def _count(self, name: str, amount: int = 1) -> int:
+        with self._counters_lock:
+            self.counters[name] += amount
+            return self.counters[name]
+
+    def stats(self) -> Dict[str, int]:
+        with self._counters_lock:
+            return {
+                'pending': self.queue.qsize(),
+                **{name: self.counters[name] for name in ('queued', 'written', 'spooled', 'dropped')},
+            }
+
+
+def _process_alive(pid: str) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+_write_behind: Optional[WriteBehindQueue] = None
+_write_behind_lock = threading.Lock()
+
+
+def get_write_behind() -> WriteBehindQueue:
+    """File d'écriture différée du processus."""
+    global _write_behind
+    if _write_behind is None:
+        with _write_behind_lock:
+            if _write_behind is None:
+                config = get_write_behind_settings()
+                _write_behind = WriteBehindQueue(
+                    max_queue=config['MAX_QUEUE'],
+                    batch_size=config['BATCH_SIZE'],
+                    flush_interval=config['FLUSH_INTERVAL'],
+                    overflow=config['OVERFLOW'],
+                    spool_dir=config['SPOOL_DIR'],
+                )
+    return _write_behind
+
+
+def enqueue(model_label: str, **values) -> bool:
+    """Insérer une ligne de journal sans bloquer la requête (synchrone si désactivé)."""
+    if not get_write_behind_settings()['ENABLED']:
+        apps.get_model(model_label).objects.create(**values)
+        return True
+    return get_write_behind().put(model_label, **values)
+
+
+# ===== JOURNAUX FICHIERS =====
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler borné : file pleine, l'enregistrement est compté puis abandonné."""
+
+    def __init__(self, log_queue: queue.Queue, target: logging.Handler):
+        super().__init__(log_queue)
+        self.dropped = 0
+        self.target = target
+        self.listener = logging.handlers.QueueListener(log_queue, target)
+        self.listener.start()
+        atexit.register(self.close)
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        if self.listener._thread is not None:
+            self.listener.stop()
+            self.target.close()
+        super().close()
+
+
+def queued_handler(target: str = 'logging.FileHandler', max_queue: int = 10000, **kwargs) -> logging.Handler:
+    """
+    Fabrique LOGGING ('()') : le handler `target` écrit depuis un thread dédié,
+    la requête ne fait qu'un `put_nowait`.
+    """
+    return DroppingQueueHandler(queue.Queue(maxsize=max_queue), import_string(target)(**kwargs))
@@ -0,0 +1,299 @@
+# apps/games/active_games.py
+# ============================
+
+"""
+Parties actives par joueur, tenues à jour dans Redis.
+
+Un ensemble Redis par utilisateur contient les identifiants de ses parties
+non terminées. Il est construit depuis la base au premier accès puis
+maintenu par les changements de statut et de joueurs de `Game`
+(apps.core.field_signals, après commit) : créer, rejoindre, terminer ou
+annuler une partie met l'ensemble à jour sans relire la table des parties.
+
+La limite MAX_CONCURRENT_GAMES est réservée atomiquement (script Lua) avant
+la création : deux requêtes « créer une partie » parallèles ne peuvent pas
+la dépasser. Sans Redis (cache local), un équivalent en mémoire est utilisé.
+
+Exemple :
+    with reserve_game_slot(request.user) as game_id:
+        game = Game.objects.create(id=game_id, player1=request.user, ...)
+"""
+
+import logging
+import threading
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+
+from apps.core import BUSINESS_LIMITS
+from apps.core.exceptions import ConcurrentGamesLimitException
+from apps.core.field_signals import on_field_change
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_ACTIVE_GAMES = {
+    'KEY_PREFIX': 'active_games',
+    'TTL': 3600,  # Reconstruction périodique depuis la base (écarts éventuels)
+    'FAIL_OPEN': True,  # Autoriser la création si Redis est injoignable
+}
+
+# Statuts d'une partie qui occupe encore le joueur (mise engagée)
+ACTIVE_STATUSES = ('waiting', 'ready', 'playing', 'paused')
+
+# Membre toujours présent : distingue « aucune partie » de « pas encore chargé »
+LOADED_MARKER = '-'
+
+
+def get_active_games_settings() -> Dict[str, Any]:
+    """Paramètres du suivi des parties actives (défauts < ACTIVE_GAMES)."""
+    return {**DEFAULT_ACTIVE_GAMES, **getattr(settings, 'ACTIVE_GAMES', {})}
+
+
+def get_max_concurrent_games() -> int:
+    """Nombre maximal de parties simultanées par joueur (GAME_SETTINGS)."""
+    return getattr(settings, 'GAME_SETTINGS', {}).get(
+        'MAX_CONCURRENT_GAMES', BUSINESS_LIMITS['MAX_CONCURRENT_GAMES']
+    )
+
+
+# ===== STOCKAGE =====
+
+# KEYS[1] = ensemble ; ARGV = durée de vie, marqueur, identifiants lus en base
+LOAD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    redis.call('SADD', KEYS[1], unpack(ARGV, 2))
+    redis.call('EXPIRE', KEYS[1], tonumber(ARGV[1]))
+end
+return redis.call('SMEMBERS', KEYS[1])
+"""
+
+# KEYS[1] = ensemble ; ARGV = partie, durée de vie
+ADD_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('SADD', KEYS[1], ARGV[1])
+    redis.call('EXPIRE', KEYS[1], tonumber(ARGV[2]))
+end
+return 1
+"""
+
+# KEYS[1] = ensemble ; ARGV = partie, maximum, durée de vie
+# Retour : -1 ensemble non chargé, 0 limite atteinte, 1 place réservée
+RESERVE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+if redis.call('SISMEMBER', KEYS[1], ARGV[1]) == 0 then
+    if redis.call('SCARD', KEYS[1]) - 1 >= tonumber(ARGV[2]) then
+        return 0
+    end
+    redis.call('SADD', KEYS[1], ARGV[1])
+end
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[3]))
+return 1
+"""
+
+
+def _decode(member) -> str:
+    return member.decode() if isinstance(member, bytes) else str(member)
+
+
+class RedisActiveGamesStore:
+    """Ensembles de parties actives dans Redis (scripts Lua)."""
+
+    def __init__(self, client):
+        self.client = client
+        self._load = client.register_script(LOAD_SCRIPT)
+        self._add = client.register_script(ADD_SCRIPT)
+        self._reserve = client.register_script(RESERVE_SCRIPT)
+        for script in (self._load, self._add, self._reserve):
+            client.script_load(script.script)
+
+    def members(self, key: str) -> Optional[set]:
+        members = {_decode(member) for member in self.client.smembers(key)}
+        return members - {LOADED_MARKER} if members else None
+
+    def load(self, key: str, game_ids: Iterable[str], ttl: int) -> set:
+        members = self._load(keys=[key], args=[ttl, LOADED_MARKER, *game_ids])
+        return {_decode(member) for member in members} - {LOADED_MARKER}
+
+    def add(self, key: str, game_id: str, ttl: int):
+        self._add(keys=[key], args=[game_id, ttl])
+
+    def remove(self, key: str, game_id: str):
+        self.client.srem(key, game_id)
+
+    def reserve(self, key: str, game_id: str, limit: int, ttl: int) -> int:
+        return int(self._reserve(keys=[key], args=[game_id, limit, ttl]))
+
+
+class MemoryActiveGamesStore:
+    """Équivalent en mémoire de `RedisActiveGamesStore` (tests, cache local)."""
+
+    def __init__(self):
+        self._sets = {}
+        self._lock = threading.Lock()
+
+    def members(self, key):
+        with self._lock:
+            members = self._sets.get(key)
+            return set(members) if members is not None else None
+
+    def load(self, key, game_ids, ttl):
+        with self._lock:
+            return set(self._sets.setdefault(key, set(game_ids)))
+
+    def add(self, key, game_id, ttl):
+        with self._lock:
+            if key in self._sets:
+                self._sets[key].add(game_id)
+
+    def remove(self, key, game_id):
+        with self._lock:
+            if key in self._sets:
+                self._sets[key].discard(game_id)
+
+    def reserve(self, key, game_id, limit, ttl):
+        with self._lock:
+            members = self._sets.get(key)
+            if members is None:
+                return -1
+            if game_id not in members and len(members) >= limit:
+                return 0
+            members.add(game_id)
+            return 1
+
+    def clear(self):
+        with self._lock:
+            self._sets.clear()
+
+
+_local_store = MemoryActiveGamesStore()
+_redis_store = None
+
+
+def get_active_games_store():
+    """Store Redis si le cache Django est sur Redis, sinon store local au processus."""
+    global _redis_store
+    if 'redis' in settings.CACHES['default']['BACKEND'].lower():
+        if _redis_store is None:
+            from django_redis import get_redis_connection
+            _redis_store = RedisActiveGamesStore(get_redis_connection('default'))
+        return _redis_store
+    return _local_store
+
+
+# ===== LECTURE =====
+
+def _key(user_id) -> str:
+    return f"{get_active_games_settings()['KEY_PREFIX']}:{user_id}"
+
+
+def _db_active_game_ids(user_id) -> List[str]:
+    from django.db.models import Q
+
+    from .models import Game
+
+    return [str(game_id) for game_id in Game.objects.filter(
+        Q(player1_id=user_id) | Q(player2_id=user_id),
+        status__in=ACTIVE_STATUSES,
+    ).values_list('id', flat=True)]
+
+
+def _load_from_db(user_id) -> set:
+    """Reconstruire l'ensemble d'un joueur depuis la base (premier accès, expiration)."""
+    return get_active_games_store().load(
+        _key(user_id), _db_active_game_ids(user_id), get_active_games_settings()['TTL']
+    )
+
+
+def get_active_games(user) -> List[str]:
+    """Identifiants des parties actives du joueur (Redis, base au premier accès)."""
+    user_id = getattr(user, 'pk', user)
+    try:
+        members = get_active_games_store().members(_key(user_id))
+        if members is None:
+            members = _load_from_db(user_id)
+        return sorted(members)
+    except Exception as e:
+        logger.error(f"❌ Lecture des parties actives impossible ({user_id}): {e}")
+        return sorted(_db_active_game_ids(user_id))
+
+
+def count_active_games(user) -> int:
+    """Nombre de parties actives du joueur."""
+    return len(get_active_games(user))
+
+
+# ===== RÉSERVATION =====
+
+@contextmanager
+def reserve_game_slot(user, game_id=None):
+    """
+    Réserver une place de partie pour `user` avant de créer la partie.
+
+    Produit l'identifiant à donner à la partie créée ; la place est libérée
+    si le bloc lève une exception.
+
+    Raises:
+        ConcurrentGamesLimitException: Limite MAX_CONCURRENT_GAMES atteinte
+    """
+    config = get_active_games_settings()
+    limit = get_max_concurrent_games()
+    game_id = game_id or uuid.uuid4()
+    store = get_active_games_store()
+    key = _key(user.pk)
+
+    try:
+        reserved = store.reserve(key, str(game_id), limit, config['TTL'])
+        if reserved < 0:
+            _load_from_db(user.pk)
+            reserved = store.reserve(key, str(game_id), limit, config['TTL'])
+    except Exception as e:
+        logger.error(f"❌ Réservation de partie impossible ({user.pk}): {e}")
+        if not config['FAIL_OPEN']:
+            raise ConcurrentGamesLimitException(limit)
+        reserved = 1
+
+    if reserved <= 0:
+        logger.warning(f"⚠️ {user.username} a atteint la limite de {limit} parties simultanées")
+        raise ConcurrentGamesLimitException(limit)
+
+    try:
+        yield game_id
+    except BaseException:
+        release_game(user.pk, game_id)
+        raise
+
+
+def release_game(user_id, game_id):
+    """Retirer une partie de l'ensemble d'un joueur."""
+    try:
+        get_active_games_store().remove(_key(user_id), str(game_id))
+    except Exception as e:
+        logger.error(f"❌ Mise à jour des parties actives impossible ({user_id}): {e}")
+
+
+def track_game(user_id, game_id):
+    """Ajouter une partie à l'ensemble d'un joueur (s'il est déjà chargé)."""
+    try:
+        get_active_games_store().add(_key(user_id), str(game_id), get_active_games_settings()['TTL'])
+    except Exception as e:
+        logger.error(f"❌ Mise à jour des parties actives impossible ({user_id}): {e}")
+
+
+# ===== MISE À JOUR =====
+
+@on_field_change('games.Game', ['status', 'player1', 'player2'], on_commit=True, on_create=True)
+def update_active_games(instance, changes, created):
+    """Partie créée, rejointe, terminée ou annulée : mettre à jour les ensembles des joueurs."""
+    players = {instance.player1_id, instance.player2_id} - {None}
+    for name in ('player1', 'player2'):
+        if name in changes and changes[name][0] not in (None, *players):
+            release_game(changes[name][0], instance.pk)  # Joueur remplacé
+
+    update = track_game if instance.status in ACTIVE_STATUSES else release_game
+    for player_id in players:
+        update(player_id, instance.pk)
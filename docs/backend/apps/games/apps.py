@@ -0,0 +1,16 @@
+# apps/games/apps.py
+# ==================
+
+from django.apps import AppConfig
+from django.utils.translation import gettext_lazy as _
+
+
+class GamesConfig(AppConfig):
+    """Configuration de l'application Games pour RUMO RUSH."""
+
+    name = 'apps.games'
+    verbose_name = _('Jeux')
+
+    def ready(self):
+        """Connecter le suivi des parties actives par joueur."""
+        import apps.games.active_games  # noqa: F401
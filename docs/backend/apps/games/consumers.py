@@ -16,9 +16,10 @@ logger = logging.getLogger(__name__)
 from .models import Game, GameType
 from apps.accounts.models import User
 from apps.core.utils import log_user_activity
+from apps.core.metrics import ConsumerMetricsMixin
 
 
-class GameConsumer(AsyncWebsocketConsumer):
+class GameConsumer(ConsumerMetricsMixin, AsyncWebsocketConsumer):
     """Consumer WebSocket pour les parties en temps réel."""
     
     async def connect(self):
@@ -1156,7 +1157,7 @@ class GameConsumer(AsyncWebsocketConsumer):
         return result
 
 
-class MatchmakingConsumer(AsyncWebsocketConsumer):
+class MatchmakingConsumer(ConsumerMetricsMixin, AsyncWebsocketConsumer):
     """Consumer WebSocket pour le matchmaking."""
     
     async def connect(self):
@@ -1426,7 +1427,7 @@ class MatchmakingConsumer(AsyncWebsocketConsumer):
         return self.cancel_user_searches(self.user)
 
 
-class SpectatorConsumer(AsyncWebsocketConsumer):
+class SpectatorConsumer(ConsumerMetricsMixin, AsyncWebsocketConsumer):
     """Consumer WebSocket pour les spectateurs."""
     
     async def connect(self):
@@ -1550,7 +1551,7 @@ class SpectatorConsumer(AsyncWebsocketConsumer):
 
 
 # Consumer pour les jeux de cartes spécifiquement
-class CardGameConsumer(AsyncWebsocketConsumer):
+class CardGameConsumer(ConsumerMetricsMixin, AsyncWebsocketConsumer):
     """Consumer WebSocket spécialisé pour les jeux de cartes."""
     
     async def connect(self):
@@ -0,0 +1,141 @@
+"""
+Benchmark du coût des signaux sur la sauvegarde d'un coup de jeu.
+
+Sauvegarde N fois une partie en cours (game_data, historique et joueur
+courant modifiés, comme `make_move`) dans une transaction annulée à la fin,
+et compare le temps et les requêtes par sauvegarde :
+- avant : receivers post_save classiques (relecture du statut précédent,
+  invalidation du cache à chaque sauvegarde) ;
+- après : receivers de apps.games.signals déclarés par champ
+  (apps.core.field_signals), qu'un coup ne déclenche pas.
+
+Exemples :
+    python manage.py benchmark_game_saves
+    python manage.py benchmark_game_saves --saves 5000
+"""
+import statistics
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models.signals import post_save
+
+from apps.core import field_signals
+from apps.core.cache_tags import invalidate_tags, tag
+from apps.core.field_signals import on_field_change, remove_field_receiver
+from apps.games.models import Game, GameType
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    """Annuler les données du benchmark."""
+
+
+def legacy_save_previous_status(sender, instance, **kwargs):
+    """Ancien receiver : relecture de la partie à chaque sauvegarde."""
+    if instance.pk:
+        try:
+            instance._previous_status = sender.objects.get(pk=instance.pk).status
+        except sender.DoesNotExist:
+            pass
+
+
+def legacy_invalidate_game_cache(sender, instance, **kwargs):
+    """Ancien receiver : invalidation du cache à chaque sauvegarde."""
+    tags = [
+        tag('game_stats', game_type=instance.game_type_id),
+        tag('leaderboard', game_type=instance.game_type_id),
+    ]
+    tags.extend(tag('user_stats', user=player_id) for player_id in (instance.player1_id, instance.player2_id) if player_id)
+    invalidate_tags(*tags)
+    cache.delete('waiting_games')
+
+
+class Command(BaseCommand):
+    help = 'Mesurer le surcoût des signaux par sauvegarde de coup (données annulées)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--saves',
+            type=int,
+            default=2000,
+            help='Sauvegardes mesurées par variante (défaut: 2000)'
+        )
+
+    def handle(self, *args, **options):
+        # Import pour son effet de bord : les receivers par champ de Game doivent
+        # être enregistrés avant `measure`, qui les retire pour la mesure « avant »
+        # et les fait tourner pour la mesure « après »
+        import apps.games.signals  # noqa: F401
+
+        try:
+            with transaction.atomic():
+                game = self.create_game()
+                self.measure('Avant (post_save classiques)', game, options['saves'], legacy=True)
+                self.measure('Après (dispatch par champ)', game, options['saves'], legacy=False)
+                raise Rollback()
+        except Rollback:
+            self.stdout.write('↩️ Données du benchmark annulées')
+
+    def create_game(self):
+        suffix = uuid.uuid4().hex[:6]
+        User.objects.bulk_create([
+            User(username=f'bench_{suffix}_{i}', email=f'bench_{suffix}_{i}@bench.local', referral_code=f'g{suffix}{i}')
+            for i in range(2)
+        ])
+        player1, player2 = User.objects.filter(username__startswith=f'bench_{suffix}_').order_by('username')
+        game_type = GameType.objects.create(
+            name=f'bench_{suffix}', display_name='Benchmark', description='Benchmark', category='board'
+        )
+        game = Game.objects.create(
+            game_type=game_type, player1=player1, player2=player2, current_player=player1,
+            bet_amount=Decimal('500'), status='playing', is_private=True,
+        )
+        return Game.objects.get(pk=game.pk)
+
+    def measure(self, label, game, saves, legacy):
+        receivers = list(field_signals._receivers[Game._meta.label])
+        if legacy:
+            for receiver in receivers:
+                remove_field_receiver(Game, receiver.func)
+            post_save.connect(legacy_save_previous_status, sender=Game)
+            post_save.connect(legacy_invalidate_game_cache, sender=Game)
+
+        players = [game.player1_id, game.player2_id]
+        timings = []
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        try:
+            with connection.execute_wrapper(count_queries):
+                for i in range(saves):
+                    # Un coup : état du plateau, historique et tour modifiés
+                    game.game_data = {**game.game_data, 'move': i}
+                    game.move_history = game.move_history[-20:] + [{'move': i}]
+                    game.current_player_id = players[i % 2]
+                    started = time.perf_counter()
+                    game.save()
+                    timings.append(time.perf_counter() - started)
+        finally:
+            if legacy:
+                post_save.disconnect(legacy_save_previous_status, sender=Game)
+                post_save.disconnect(legacy_invalidate_game_cache, sender=Game)
+                for receiver in receivers:
+                    on_field_change(Game, receiver.fields, receiver.on_commit, receiver.on_create)(receiver.func)
+
+        timings.sort()
+        self.stdout.write(
+            f"⏱️ {label}: moyenne {statistics.mean(timings) * 1e6:.0f} µs, "
+            f"p50 {timings[len(timings) // 2] * 1e6:.0f} µs, "
+            f"p99 {timings[int(len(timings) * 0.99)] * 1e6:.0f} µs, "
+            f"{queries / saves:.1f} requêtes/sauvegarde"
+        )
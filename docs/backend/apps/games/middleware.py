@@ -6,11 +6,14 @@ from urllib.parse import parse_qs
 from channels.middleware import BaseMiddleware
 from channels.auth import AuthMiddlewareStack
 from channels.db import database_sync_to_async
+from asgiref.sync import sync_to_async
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.auth import get_user_model
 from django.contrib.sessions.models import Session
 from django.utils import timezone
 
+from apps.core.rate_limit import ConcurrencyLimiter, RateLimiter
+
 User = get_user_model()
 
 
@@ -184,14 +187,21 @@ class WebSocketRateLimitMiddleware(BaseMiddleware):
     """
     Middleware de limitation du taux pour WebSocket.
     Prévient les abus et spam de connexions.
+    
+    Connexions simultanées et messages par minute sont comptés dans le store
+    partagé de `apps.core.rate_limit` : les limites valent pour l'ensemble des
+    workers, pas pour chaque processus.
     """
     
+    # Jetons de messages réservés par aller-retour Redis
+    MESSAGE_LEASE = 5
+    
     def __init__(self, inner, max_connections_per_user=10, max_messages_per_minute=60):
         super().__init__(inner)
         self.max_connections_per_user = max_connections_per_user
         self.max_messages_per_minute = max_messages_per_minute
-        self.connections = {}  # user_id -> count
-        self.message_counts = {}  # user_id -> {minute: count}
+        self.connections = ConcurrencyLimiter('ws:connections', max_connections_per_user)
+        self.messages = RateLimiter('ws:messages', max_messages_per_minute, 60, lease=self.MESSAGE_LEASE)
     
     async def __call__(self, scope, receive, send):
         """Appliquer la limitation du taux."""
@@ -206,60 +216,36 @@ class WebSocketRateLimitMiddleware(BaseMiddleware):
         
         user_id = str(user.id)
         
-        # Vérifier le nombre de connexions
-        current_connections = self.connections.get(user_id, 0)
-        if current_connections >= self.max_connections_per_user:
+        # Vérifier et réserver une connexion
+        if not await sync_to_async(self.connections.acquire, thread_sensitive=False)(user_id):
             await send({
                 'type': 'websocket.close',
                 'code': 4008  # Policy violation
             })
             return
         
-        # Incrémenter le compteur de connexions
-        self.connections[user_id] = current_connections + 1
-        
         try:
             # Wrapper pour surveiller les messages
             async def rate_limited_receive():
                 message = await receive()
                 
                 # Compter les messages reçus
-                if message['type'] == 'websocket.receive':
-                    await self.track_message(user_id)
+                if message['type'] == 'websocket.receive' and not await self.track_message(user_id):
+                    await send({'type': 'websocket.close', 'code': 4008})
+                    return {'type': 'websocket.disconnect', 'code': 4008}
                 
                 return message
             
             return await self.inner(scope, rate_limited_receive, send)
             
         finally:
-            # Décrémenter le compteur à la déconnexion
-            if user_id in self.connections:
-                self.connections[user_id] = max(0, self.connections[user_id] - 1)
-                if self.connections[user_id] == 0:
-                    del self.connections[user_id]
+            # Libérer la connexion à la déconnexion
+            await sync_to_async(self.connections.release, thread_sensitive=False)(user_id)
     
-    async def track_message(self, user_id):
-        """Suivre les messages par minute."""
-        current_minute = int(timezone.now().timestamp() // 60)
-        
-        if user_id not in self.message_counts:
-            self.message_counts[user_id] = {}
-        
-        # Nettoyer les anciens compteurs (plus de 2 minutes)
-        old_minutes = [
-            minute for minute in self.message_counts[user_id].keys()
-            if minute < current_minute - 2
-        ]
-        for old_minute in old_minutes:
-            del self.message_counts[user_id][old_minute]
-        
-        # Incrémenter le compteur pour la minute actuelle
-        self.message_counts[user_id][current_minute] = \
-            self.message_counts[user_id].get(current_minute, 0) + 1
-        
-        # Vérifier la limite
-        if self.message_counts[user_id][current_minute] > self.max_messages_per_minute:
-            raise Exception(f"Limite de messages dépassée pour l'utilisateur {user_id}")
+    async def track_message(self, user_id) -> bool:
+        """Compter un message ; False si la limite par minute est dépassée."""
+        result = await self.messages.ahit(user_id)
+        return result.allowed
 
 
 class WebSocketLoggingMiddleware(BaseMiddleware):
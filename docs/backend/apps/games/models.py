@@ -10,6 +10,9 @@ from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from django.core.exceptions import ValidationError
 import logging
+
+from apps.core.field_signals import FieldTrackingMixin
+from apps.core.metrics import timed_move
 logger = logging.getLogger(__name__)
 
 class GameType(models.Model):
@@ -54,7 +57,7 @@ class GameType(models.Model):
         return self.display_name
 
 
-class Game(models.Model):
+class Game(FieldTrackingMixin, models.Model):
     """Modèle principal pour les parties de jeu."""
     
     GAME_STATUS_CHOICES = [
@@ -563,6 +566,7 @@ class Game(models.Model):
         
         return board
     
+    @timed_move
     def make_move(self, player, move_data):
         """Effectuer un mouvement dans la partie."""
         logger.info(f"🎲 === MAKE_MOVE MODEL === Player: {player.username}, move_data: {move_data}")
@@ -1,6 +1,7 @@
 # apps/games/serializers.py - Updated version with icon field handling
 
 from rest_framework import serializers
+from .active_games import reserve_game_slot
 from .models import GameType, Game, GameInvitation, GameReport, Tournament, Leaderboard
 from apps.accounts.serializers import UserSerializer
 
@@ -207,19 +208,22 @@ class GameCreateSerializer(serializers.ModelSerializer):
         if balance < validated_data['bet_amount']:
             raise serializers.ValidationError("Solde insuffisant")
         
-        # Débiter la mise
-        user.update_balance(
-            validated_data['currency'],
-            validated_data['bet_amount'],
-            'subtract'
-        )
-        
-        # Créer la partie
-        game = Game.objects.create(
-            game_type=game_type,
-            player1=user,
-            **validated_data
-        )
+        # Réserver une place parmi les parties simultanées (atomique)
+        with reserve_game_slot(user) as game_id:
+            # Débiter la mise
+            user.update_balance(
+                validated_data['currency'],
+                validated_data['bet_amount'],
+                'subtract'
+            )
+            
+            # Créer la partie
+            game = Game.objects.create(
+                id=game_id,
+                game_type=game_type,
+                player1=user,
+                **validated_data
+            )
         
         return game
 
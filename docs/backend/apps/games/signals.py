@@ -11,6 +11,8 @@ from asgiref.sync import async_to_sync
 import logging
 
 from .models import Game, GameInvitation, GameReport, Tournament, TournamentParticipant
+from apps.core.cache_tags import invalidate_tags, tag
+from apps.core.field_signals import on_field_change
 from apps.core.utils import log_user_activity
 from .tasks import calculate_user_statistics
 
@@ -21,7 +23,7 @@ channel_layer = get_channel_layer()
 
 @receiver(post_save, sender=Game)
 def game_post_save_handler(sender, instance, created, **kwargs):
-    """Gestionnaire pour les modifications de parties."""
+    """Gestionnaire pour les créations de parties."""
     
     if created:
         # Nouvelle partie créée
@@ -56,23 +58,31 @@ def game_post_save_handler(sender, instance, created, **kwargs):
                     'currency': instance.currency
                 }
             )
-    
-    else:
-        # Partie mise à jour
-        if hasattr(instance, '_previous_status'):
-            old_status = instance._previous_status
-            new_status = instance.status
-            
-            if old_status != new_status:
-                _handle_game_status_change(instance, old_status, new_status)
-        
-        # Vérifier si un second joueur a rejoint
-        if instance.player2 and not hasattr(instance, '_had_player2'):
-            _handle_player_joined(instance)
-        
-        # Vérifier si la partie est terminée
-        if instance.status == 'finished' and instance.winner:
-            _handle_game_finished(instance)
+
+
+# Les mises à jour ne passent par les receivers que si les champs déclarés
+# ont changé : un coup joué (game_data, current_player) n'en déclenche aucun.
+
+@on_field_change(Game, fields=['status'])
+def game_status_handler(instance, changes, created):
+    """Gérer les changements de statut de partie."""
+    old_status, new_status = changes['status']
+    _handle_game_status_change(instance, old_status, new_status)
+
+
+@on_field_change(Game, fields=['player2'])
+def game_player_joined_handler(instance, changes, created):
+    """Détecter l'arrivée d'un second joueur."""
+    had_player2, player2 = changes['player2']
+    if had_player2 is None and player2 is not None:
+        _handle_player_joined(instance)
+
+
+@on_field_change(Game, fields=['status', 'winner'])
+def game_finished_handler(instance, changes, created):
+    """Détecter la fin d'une partie avec un gagnant."""
+    if instance.status == 'finished' and instance.winner_id:
+        _handle_game_finished(instance)
 
 
 def _handle_game_status_change(game, old_status, new_status):
@@ -209,7 +219,7 @@ def _handle_game_finished(game):
         calculate_user_statistics.delay(game.player2.id)
     
     # Invalider le cache des classements
-    cache.delete_pattern('leaderboard_*')
+    invalidate_tags(tag('leaderboard', game_type=game.game_type_id))
 
 
 def _handle_game_cancelled(game):
@@ -273,18 +283,6 @@ def _handle_game_disputed(game):
     )
 
 
-@receiver(post_save, sender=Game)
-def save_previous_status(sender, instance, **kwargs):
-    """Sauvegarder le statut précédent pour détecter les changements."""
-    if instance.pk:
-        # Récupérer l'instance depuis la DB pour avoir l'ancien statut
-        try:
-            old_instance = sender.objects.get(pk=instance.pk)
-            instance._previous_status = old_instance.status
-        except sender.DoesNotExist:
-            pass
-
-
 @receiver(pre_delete, sender=Game)
 def game_pre_delete_handler(sender, instance, **kwargs):
     """Gestionnaire avant suppression d'une partie."""
@@ -630,14 +628,27 @@ def tournament_participant_handler(sender, instance, created, **kwargs):
 
 
 # Signal pour nettoyer le cache quand nécessaire
-@receiver([post_save, post_delete], sender=Game)
-def invalidate_game_cache(sender, **kwargs):
-    """Invalider le cache relatif aux jeux."""
+@on_field_change(Game, fields=['status', 'winner', 'player1', 'player2'], on_commit=True, on_create=True)
+def invalidate_game_cache_on_change(instance, changes, created):
+    """Invalider le cache des jeux une fois par transaction, si la partie a changé d'état."""
+    invalidate_game_cache(sender=Game, instance=instance)
+
+
+@receiver(post_delete, sender=Game)
+def invalidate_game_cache(sender, instance, **kwargs):
+    """Invalider le cache relatif aux jeux (seulement les joueurs et le type de jeu concernés)."""
     
     # Invalider les caches de statistiques
-    cache.delete_pattern('game_stats_*')
-    cache.delete_pattern('user_stats_*')
-    cache.delete_pattern('leaderboard_*')
+    tags = [
+        tag('game_stats', game_type=instance.game_type_id),
+        tag('leaderboard', game_type=instance.game_type_id),
+    ]
+    tags.extend(
+        tag('user_stats', user=player_id)
+        for player_id in (instance.player1_id, instance.player2_id)
+        if player_id
+    )
+    invalidate_tags(*tags)
     
     # Invalider le cache des parties en attente
     cache.delete('waiting_games')
@@ -647,7 +658,7 @@ def invalidate_game_cache(sender, **kwargs):
 def invalidate_tournament_cache(sender, **kwargs):
     """Invalider le cache relatif aux tournois."""
     
-    cache.delete_pattern('tournament_*')
+    invalidate_tags('tournament')
     cache.delete('active_tournaments')
 
 
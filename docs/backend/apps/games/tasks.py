@@ -641,7 +641,7 @@ def calculate_user_statistics(self, user_id: int):
                 }
         
         # Sauvegarder les statistiques (cache ou modèle dédié)
-        from django.core.cache import cache
+        from apps.core.cache_tags import set_tagged, tag
         cache_key = f'user_stats_{user_id}'
         
         stats = {
@@ -656,7 +656,7 @@ def calculate_user_statistics(self, user_id: int):
             'last_updated': timezone.now().isoformat()
         }
         
-        cache.set(cache_key, stats, 3600)  # Cache 1 heure
+        set_tagged(cache_key, stats, [tag('user_stats', user=user_id)], 3600)  # Cache 1 heure
         
         logger.info(f"Statistiques calculées pour l'utilisateur {user.username}")
         return stats
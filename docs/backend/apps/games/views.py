@@ -10,10 +10,9 @@ from django.shortcuts import get_object_or_404
 from django.utils.translation import gettext_lazy as _
 from django.utils import timezone
 from django.db import transaction, models
-from django.db.models import Q, Count, Sum, Avg
+from django.db.models import Q, Count, Sum, Avg, Prefetch
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
-from django.core.cache import cache
 from django.conf import settings
 from django.contrib.auth import get_user_model  # <-- AJOUT DE CET IMPORT
 from rest_framework.serializers import ValidationError  # <-- AJOUT DE CET IMPORT
@@ -23,14 +22,19 @@ from .models import (
     GameType, Game, GameInvitation, GameReport,
     Tournament, TournamentParticipant, Leaderboard
 )
+from .active_games import release_game, reserve_game_slot
 from .serializers import (
     GameTypeSerializer, GameListSerializer, GameDetailSerializer,
     GameCreateSerializer, GameMoveSerializer, GameInvitationSerializer,
     GameReportSerializer, TournamentListSerializer, TournamentDetailSerializer,
     LeaderboardSerializer, GameStatisticsSerializer
 )
+from apps.core.cache_tags import get_tagged, set_tagged, tag
+from apps.core.exceptions import ConcurrentGamesLimitException
+from apps.accounts.serializers import UserSerializer
 from apps.core.permissions import IsOwnerOrReadOnly
 from apps.core.utils import log_user_activity
+from apps.core.pagination import CursorPagination
 
 logger = logging.getLogger(__name__)
 
@@ -159,25 +163,26 @@ class GameViewSet(viewsets.ModelViewSet):
     search_fields = ['room_code', 'player1__username', 'player2__username']
     ordering_fields = ['created_at', 'bet_amount', 'started_at']
     ordering = ['-created_at']
+    query_budget = {'list': 8, 'retrieve': 8}
     
     def get_queryset(self):
         """Obtenir les parties selon le contexte."""
         user = self.request.user
         
-        if self.action == 'list':
-            # Parties publiques ou parties de l'utilisateur
-            return Game.objects.filter(
-                Q(is_private=False) | Q(player1=user) | Q(player2=user)
-            ).select_related(
-                'game_type', 'player1', 'player2', 'current_player', 'winner'
-            ).prefetch_related('invitations', 'reports')
-        
-        # Pour les autres actions, toutes les parties accessibles
-        return Game.objects.filter(
+        # Parties publiques ou parties de l'utilisateur
+        queryset = Game.objects.filter(
             Q(is_private=False) | Q(player1=user) | Q(player2=user)
-        ).select_related(
-            'game_type', 'player1', 'player2', 'current_player', 'winner'
-        )
+        ).select_related('game_type')
+        
+        if self.action in ('list', 'retrieve'):
+            # Joueurs sérialisés avec profil et statistiques : une requête par rôle
+            players = UserSerializer.optimize_queryset()
+            return queryset.prefetch_related(*(
+                Prefetch(role, queryset=players)
+                for role in ('player1', 'player2', 'current_player', 'winner')
+            ))
+        
+        return queryset.select_related('player1', 'player2', 'current_player', 'winner')
     
     def get_serializer_class(self):
         """Choisir le serializer selon l'action."""
@@ -582,17 +587,19 @@ class GameViewSet(viewsets.ModelViewSet):
         """Obtenir les parties de l'utilisateur."""
         games = self.get_queryset().filter(
             Q(player1=request.user) | Q(player2=request.user)
-        ).order_by('-created_at')
+        ).order_by('-created_at', '-id')
         
         # Filtrer par statut si spécifié
         status_filter = request.query_params.get('status')
         if status_filter:
             games = games.filter(status=status_filter)
         
-        page = self.paginate_queryset(games)
+        # Historique des parties : pagination par clé (created_at, id)
+        paginator = CursorPagination()
+        page = paginator.paginate_queryset(games, request, view=self)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            return paginator.get_paginated_response(serializer.data)
         
         serializer = self.get_serializer(games, many=True)
         return Response(serializer.data)
@@ -777,7 +784,8 @@ class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
     
     serializer_class = LeaderboardSerializer
     permission_classes = [permissions.AllowAny]
-    pagination_class = StandardPagination
+    pagination_class = CursorPagination
+    cursor_ordering = ('rank', 'id')
     
     def get_queryset(self):
         """Obtenir les classements selon le type."""
@@ -791,7 +799,8 @@ class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
         if game_type_id and leaderboard_type == 'game_type':
             queryset = queryset.filter(game_type_id=game_type_id)
         
-        return queryset[:100]  # Top 100
+        # Top 100 filtré (et non découpé) pour rester paginable et filtrable
+        return queryset.filter(rank__lte=100)
     
     @action(detail=False, methods=['get'])
     def my_position(self, request):
@@ -829,7 +838,8 @@ class GameStatisticsView(APIView):
         """Obtenir les statistiques de l'utilisateur."""
         # Utiliser le cache pour éviter les recalculs fréquents
         cache_key = f"user_stats_{request.user.id}"
-        cached_stats = cache.get(cache_key)
+        cache_tags = [tag('user_stats', user=request.user.id)]
+        cached_stats = get_tagged(cache_key, cache_tags)
         
         if cached_stats:
             return Response(cached_stats)
@@ -839,7 +849,7 @@ class GameStatisticsView(APIView):
         stats = serializer.to_representation(request.user)
         
         # Mettre en cache pour 10 minutes
-        cache.set(cache_key, stats, 600)
+        set_tagged(cache_key, stats, cache_tags, 600)
         
         return Response(stats)
     
@@ -1030,12 +1040,13 @@ class QuickMatchView(APIView):
                         'game': serializer.data
                     })
             else:
-                # Créer une nouvelle partie
-                with transaction.atomic():
+                # Créer une nouvelle partie (place réservée atomiquement)
+                with reserve_game_slot(request.user) as game_id, transaction.atomic():
                     # Débiter la mise
                     try:
                         request.user.update_balance(currency, bet_amount, 'subtract')
                     except Exception as e:
+                        release_game(request.user.pk, game_id)
                         return Response({
                             'error': _('Erreur lors du débit de la mise'),
                             'details': str(e)
@@ -1043,6 +1054,7 @@ class QuickMatchView(APIView):
                     
                     # Créer la partie
                     game = Game.objects.create(
+                        id=game_id,
                         game_type=game_type_obj,
                         player1=request.user,
                         bet_amount=bet_amount,
@@ -1068,6 +1080,8 @@ class QuickMatchView(APIView):
                         'message': _('Partie créée, en attente d\'un adversaire')
                     })
                     
+        except ConcurrentGamesLimitException as e:
+            return Response({'error': str(e.detail)}, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             logger.error(f"Erreur quick match pour {request.user.username}: {e}", exc_info=True)
             return Response({
@@ -0,0 +1,193 @@
+# apps/payments/crypto_rates.py
+# ==============================
+
+"""
+Flux de taux crypto mis en cache.
+
+Une tâche Celery rafraîchit périodiquement les prix CoinGecko. Les processeurs
+lisent un instantané local (mémoire du processus puis cache Django/Redis) sans
+jamais appeler l'API pendant une requête. Si le rafraîchissement échoue, le
+dernier instantané valide reste servi tant qu'il ne dépasse pas `MAX_STALE_AGE`.
+"""
+
+import logging
+import threading
+import time
+from decimal import Decimal
+from typing import Any, Dict, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .processors.base import PaymentProcessingError, get_http_client
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATES_SETTINGS = {
+    'REFRESH_INTERVAL': 60,  # secondes entre deux rafraîchissements
+    'MAX_AGE': 300,  # au-delà, l'instantané est marqué « stale »
+    'MAX_STALE_AGE': 3600,  # au-delà, il n'est plus servi du tout
+}
+
+# Le franc CFA (XOF) a une parité fixe avec l'euro
+XOF_PER_EUR = Decimal('655.957')
+
+COINGECKO_IDS = {
+    'BTC': 'bitcoin',
+    'ETH': 'ethereum',
+    'USDT': 'tether',
+    'USDC': 'usd-coin',
+}
+
+SNAPSHOT_CACHE_KEY = 'crypto_rates:snapshot'
+LAST_GOOD_CACHE_KEY = 'crypto_rates:last_good'
+REFRESH_SCHEDULED_KEY = 'crypto_rates:refresh_scheduled'
+
+# Copie locale au processus : évite un aller-retour Redis à chaque paiement
+_local_snapshot: Optional[Dict[str, Any]] = None
+_local_lock = threading.Lock()
+
+
+class CryptoRatesUnavailable(PaymentProcessingError):
+    """Aucun taux crypto suffisamment récent n'est disponible."""
+    pass
+
+
+def get_rates_setting(key: str):
+    """Lire un paramètre de CRYPTO_RATES avec sa valeur par défaut."""
+    return getattr(settings, 'CRYPTO_RATES', {}).get(key, DEFAULT_RATES_SETTINGS[key])
+
+
+def fetch_rates() -> Dict[str, Any]:
+    """Interroger CoinGecko et construire un instantané de taux."""
+    response = get_http_client('coingecko').get(
+        'https://api.coingecko.com/api/v3/simple/price',
+        params={
+            'ids': ','.join(COINGECKO_IDS.values()),
+            'vs_currencies': 'usd,eur',
+            'include_24hr_change': 'true'
+        }
+    )
+    if response.status_code != 200:
+        raise PaymentProcessingError(f"CoinGecko a répondu {response.status_code}")
+
+    data = response.json()
+    rates = {}
+    for crypto, crypto_id in COINGECKO_IDS.items():
+        if crypto_id in data:
+            rates[crypto] = {
+                'usd': str(data[crypto_id]['usd']),
+                'eur': str(data[crypto_id]['eur']),
+                'change_24h': data[crypto_id].get('usd_24h_change', 0)
+            }
+    if not rates:
+        raise PaymentProcessingError("Réponse CoinGecko sans taux exploitable")
+
+    # Taux XOF/USD déduit de la parité fixe XOF/EUR et du ratio EUR/USD observé
+    reference = rates.get('USDT') or next(iter(rates.values()))
+    xof_per_usd = XOF_PER_EUR * Decimal(reference['eur']) / Decimal(reference['usd'])
+
+    return {
+        'rates': rates,
+        'xof_per_usd': str(xof_per_usd.quantize(Decimal('0.001'))),
+        'fetched_at': time.time(),
+    }
+
+
+def store_snapshot(snapshot: Dict[str, Any]):
+    """Publier un instantané dans le cache partagé et dans le processus."""
+    global _local_snapshot
+    cache.set(SNAPSHOT_CACHE_KEY, snapshot, get_rates_setting('MAX_STALE_AGE'))
+    # Dernier instantané valide, conservé sans expiration
+    cache.set(LAST_GOOD_CACHE_KEY, snapshot, None)
+    with _local_lock:
+        _local_snapshot = snapshot
+
+
+def refresh_crypto_rates() -> Dict[str, Any]:
+    """Rafraîchir les taux (appelé par la tâche périodique)."""
+    snapshot = fetch_rates()
+    store_snapshot(snapshot)
+    logger.info(f"💱 Taux crypto rafraîchis: {', '.join(snapshot['rates'])}")
+    return snapshot
+
+
+def _age(snapshot: Optional[Dict[str, Any]]) -> float:
+    return time.time() - snapshot['fetched_at'] if snapshot else float('inf')
+
+
+def get_rate_snapshot() -> Dict[str, Any]:
+    """
+    Obtenir l'instantané de taux courant, sans appel réseau.
+
+    Returns:
+        Dict avec `rates`, `xof_per_usd`, `fetched_at`, `age` et `stale`
+
+    Raises:
+        CryptoRatesUnavailable: Si aucun instantané n'a moins de `MAX_STALE_AGE`
+    """
+    global _local_snapshot
+    refresh_interval = get_rates_setting('REFRESH_INTERVAL')
+    max_stale_age = get_rates_setting('MAX_STALE_AGE')
+
+    snapshot = _local_snapshot
+    if _age(snapshot) > refresh_interval:
+        # Un autre processus a peut-être déjà rafraîchi
+        shared = cache.get(SNAPSHOT_CACHE_KEY) or cache.get(LAST_GOOD_CACHE_KEY)
+        if shared and _age(shared) < _age(snapshot):
+            snapshot = shared
+            with _local_lock:
+                _local_snapshot = shared
+
+    age = _age(snapshot)
+    if age > max_stale_age:
+        _schedule_refresh()
+        raise CryptoRatesUnavailable("Taux crypto indisponibles, réessayez dans quelques instants")
+
+    stale = age > get_rates_setting('MAX_AGE')
+    if stale:
+        logger.warning(f"⚠️ Taux crypto périmés ({int(age)}s), dernier instantané valide utilisé")
+        _schedule_refresh()
+
+    return {**snapshot, 'age': age, 'stale': stale}
+
+
+def _schedule_refresh():
+    """
+    Demander un rafraîchissement en arrière-plan, sans bloquer la requête.
+    Au plus une tâche par REFRESH_INTERVAL, tous processus confondus.
+    """
+    if not cache.add(REFRESH_SCHEDULED_KEY, 1, timeout=get_rates_setting('REFRESH_INTERVAL')):
+        return
+    try:
+        from .tasks import refresh_crypto_rates_task
+        refresh_crypto_rates_task.delay()
+    except Exception as e:
+        logger.error(f"❌ Impossible de planifier le rafraîchissement des taux crypto: {e}")
+
+
+def get_crypto_price(crypto_currency: str, fiat_currency: str = 'USD') -> Decimal:
+    """
+    Prix d'une crypto dans une devise fiat (USD, EUR, XOF/FCFA).
+
+    Raises:
+        CryptoRatesUnavailable: Si les taux ne sont pas disponibles
+    """
+    snapshot = get_rate_snapshot()
+    rate = snapshot['rates'].get(crypto_currency)
+    if rate is None:
+        raise CryptoRatesUnavailable(f"Pas de taux pour {crypto_currency}")
+
+    fiat_currency = fiat_currency.upper()
+    if fiat_currency == 'EUR':
+        return Decimal(rate['eur'])
+    if fiat_currency in ('XOF', 'FCFA'):
+        return Decimal(rate['usd']) * Decimal(snapshot['xof_per_usd'])
+    return Decimal(rate['usd'])
+
+
+def reset_local_snapshot():
+    """Oublier l'instantané du processus (tests)."""
+    global _local_snapshot
+    with _local_lock:
+        _local_snapshot = None
@@ -26,6 +26,8 @@ from django.core.cache import cache
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 
+from .processors.base import get_http_client
+
 logger = logging.getLogger('feexpay')
 
 
@@ -69,8 +71,8 @@ class FeexPayClient:
     PROVIDERS_ENDPOINT = "/api/v1/providers"
     EXCHANGE_RATE_ENDPOINT = "/api/v1/exchange-rates"
     
-    # Timeout par défaut
-    DEFAULT_TIMEOUT = 30
+    # Timeout par défaut : celui de PAYMENT_HTTP, borné par le budget global
+    DEFAULT_TIMEOUT = None
     
     # Codes d'erreur FeexPay mappés
     ERROR_CODES = {
@@ -102,17 +104,14 @@ class FeexPayClient:
                 'FEEXPAY_API_KEY et FEEXPAY_SHOP_ID doivent être configurés'
             )
         
-        self.session = requests.Session()
-        self._setup_session()
-    
-    def _setup_session(self):
-        """Configurer la session HTTP avec les headers par défaut."""
-        self.session.headers.update({
+        # Session poolée partagée (keep-alive, retries, circuit breaker)
+        self.session = get_http_client('feexpay')
+        self.headers = {
             'Authorization': f'Bearer {self.api_key}',
             'Content-Type': 'application/json',
             'User-Agent': 'RumoRush/1.0 (FeexPay Client)',
             'X-Shop-ID': self.shop_id,
-        })
+        }
     
     def _make_request(
         self,
@@ -148,6 +147,7 @@ class FeexPayClient:
                 response = self.session.get(
                     url,
                     params=params,
+                    headers=self.headers,
                     timeout=timeout
                 )
             elif method.upper() == 'POST':
@@ -155,12 +155,14 @@ class FeexPayClient:
                     url,
                     json=data,
                     params=params,
+                    headers=self.headers,
                     timeout=timeout
                 )
             elif method.upper() == 'PUT':
                 response = self.session.put(
                     url,
                     json=data,
+                    headers=self.headers,
                     timeout=timeout
                 )
             else:
@@ -593,8 +595,8 @@ class FeexPayClient:
         return provider_countries.get(provider_code, [])
     
     def close(self):
-        """Fermer la session HTTP."""
-        self.session.close()
+        """Libérer le client (la session poolée est partagée et reste ouverte)."""
+        pass
     
     def __enter__(self):
         """Context manager entry."""
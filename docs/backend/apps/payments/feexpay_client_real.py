@@ -12,6 +12,8 @@ import logging
 from typing import Dict, Optional, Any
 from django.conf import settings
 
+from .processors.base import get_http_client
+
 logger = logging.getLogger('feexpay')
 
 
@@ -53,7 +55,7 @@ class FeexPayClientReal:
             'Accept': 'application/json',
         }
         
-        self.timeout = 30
+        self.timeout = None  # Timeouts par défaut de PAYMENT_HTTP
         
         # Validation de configuration
         if not self.api_key:
@@ -70,7 +72,7 @@ class FeexPayClientReal:
             if data:
                 logger.info(f"FeexPay Data: {json.dumps(data, indent=2)}")
             
-            response = requests.request(
+            response = get_http_client('feexpay').request(
                 method=method,
                 url=url,
                 headers=self.headers,
@@ -10,6 +10,8 @@ from decimal import Decimal
 from django.conf import settings
 import os
 
+from .processors.base import get_http_client
+
 logger = logging.getLogger(__name__)
 
 class FeexPayPayout:
@@ -87,11 +89,11 @@ class FeexPayPayout:
             logger.info(f"💸 Appel API FeexPay Payout: {json.dumps(payout_data, indent=2)}")
             logger.info(f"🔑 Headers: Authorization: Bearer {self.api_key[:20]}...")
             
-            response = requests.post(
+            # Pas de retry sur un payout (voir PAYMENT_HTTP['PROVIDERS'])
+            response = get_http_client('feexpay_payout').post(
                 f"{self.base_url}{endpoint}",
                 headers=self.headers,
-                json=payout_data,
-                timeout=30
+                json=payout_data
             )
             
             logger.info(f"📤 Réponse FeexPay Payout: Status {response.status_code}")
@@ -159,10 +161,9 @@ class FeexPayPayout:
             
             logger.info(f"🔍 Vérification status payout: {reference}")
             
-            response = requests.get(
+            response = get_http_client('feexpay_payout').get(
                 f"{self.base_url}{endpoint}",
-                headers=self.headers,
-                timeout=15
+                headers=self.headers
             )
             
             logger.info(f"📤 Status payout {reference}: {response.status_code} - {response.text}")
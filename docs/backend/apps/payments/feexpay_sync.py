@@ -10,6 +10,7 @@ from django.utils import timezone as django_timezone
 from decimal import Decimal
 
 from .models import Transaction
+from .processors.base import get_http_client
 
 logger = logging.getLogger(__name__)
 
@@ -38,7 +39,7 @@ class FeexPayStatusSync:
         url = f"{self.base_url}/api/transactions/public/single/status/{feexpay_reference}"
         
         try:
-            response = requests.get(url, headers=self.headers, timeout=30)
+            response = get_http_client('feexpay').get(url, headers=self.headers)
             
             if response.status_code == 200:
                 data = response.json()
@@ -124,7 +125,8 @@ class FeexPayStatusSync:
             }
             
             # Vérifier si les métadonnées ont changé
-            if metadata.get('feexpay_sync') != feexpay_metadata:
+            # (valeur complète : la clé peut avoir été déportée dans TransactionPayload)
+            if transaction.get_metadata_value('feexpay_sync') != feexpay_metadata:
                 metadata['feexpay_sync'] = feexpay_metadata
                 updates['metadata'] = metadata
                 needs_update = True
@@ -197,10 +199,16 @@ class FeexPayStatusSync:
         Returns:
             Dict avec les statistiques de synchronisation
         """
+        # Fenêtre bornée sur created_at : seules les partitions récentes sont lues
+        from datetime import timedelta
+        from .transaction_storage import get_storage_setting
+        lookback = django_timezone.now() - timedelta(days=get_storage_setting('SYNC_LOOKBACK_DAYS'))
+        
         pending_transactions = Transaction.objects.filter(
             status='pending',
             transaction_type='deposit',
-            external_reference__isnull=False
+            external_reference__isnull=False,
+            created_at__gte=lookback
         ).exclude(external_reference='')
         
         stats = {
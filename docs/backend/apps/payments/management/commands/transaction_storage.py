@@ -0,0 +1,113 @@
+"""
+Commande Django de maintenance du stockage des transactions.
+
+Exemples :
+    python manage.py transaction_storage --convert
+    python manage.py transaction_storage --ensure-partitions --months-ahead 6
+    python manage.py transaction_storage --offload-payloads --archive --older-than 12
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.payments import transaction_storage
+from apps.payments.transaction_storage import TransactionStorageError
+
+
+class Command(BaseCommand):
+    help = 'Partitionner, archiver et alléger la table des transactions'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--convert',
+            action='store_true',
+            help='Convertir la table transactions en table partitionnée par mois (PostgreSQL)'
+        )
+        parser.add_argument(
+            '--ensure-partitions',
+            action='store_true',
+            help='Créer les partitions du mois courant et des mois suivants'
+        )
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=None,
+            help='Nombre de mois futurs à partitionner à l\'avance'
+        )
+        parser.add_argument(
+            '--offload-payloads',
+            action='store_true',
+            help='Déporter les payloads volumineux de metadata vers transaction_payloads'
+        )
+        parser.add_argument(
+            '--archive',
+            action='store_true',
+            help='Archiver les transactions terminées anciennes (stockage compressé)'
+        )
+        parser.add_argument(
+            '--older-than',
+            type=int,
+            default=None,
+            help='Âge minimum en mois des transactions à archiver'
+        )
+        parser.add_argument(
+            '--drop-empty',
+            action='store_true',
+            help='Supprimer les partitions vides plus anciennes que le seuil d\'archivage'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Afficher ce qui serait fait sans rien modifier'
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        actions = ('convert', 'ensure_partitions', 'offload_payloads', 'archive', 'drop_empty')
+        if not any(options[name] for name in actions):
+            raise CommandError('Aucune action demandée (voir --help)')
+
+        try:
+            if options['convert']:
+                if dry_run:
+                    self.stdout.write('🗂️ [dry-run] Conversion de la table transactions en table partitionnée')
+                else:
+                    result = transaction_storage.convert_to_partitioned(options['months_ahead'])
+                    self.stdout.write(self.style.SUCCESS(
+                        f"✅ Table partitionnée: {result['rows']} lignes, "
+                        f"{len(result['partitions'])} partitions"
+                    ))
+                    for constraint in result['dropped_foreign_keys']:
+                        self.stdout.write(f"   FK supprimée: {constraint}")
+
+            if options['ensure_partitions']:
+                created = transaction_storage.ensure_partitions(options['months_ahead'], dry_run=dry_run)
+                if created:
+                    for name in created:
+                        self.stdout.write(self.style.SUCCESS(f"✅ Partition créée: {name}"))
+                else:
+                    self.stdout.write('ℹ️ Toutes les partitions existent déjà')
+
+            if options['offload_payloads']:
+                stats = transaction_storage.offload_metadata_payloads(dry_run=dry_run)
+                self.stdout.write(self.style.SUCCESS(
+                    f"📦 Payloads déportés: {stats['payloads']} "
+                    f"({stats['transactions']} transactions)"
+                ))
+
+            if options['archive']:
+                stats = transaction_storage.archive_completed_transactions(
+                    older_than_months=options['older_than'],
+                    dry_run=dry_run
+                )
+                self.stdout.write(self.style.SUCCESS(
+                    f"🧊 Transactions archivées: {stats['archived']} "
+                    f"en {stats['batches']} lots (avant {stats['cutoff']})"
+                ))
+
+            if options['drop_empty']:
+                cutoff_month = transaction_storage.archive_cutoff_month(options['older_than'])
+                dropped = transaction_storage.drop_empty_partitions(cutoff_month, dry_run=dry_run)
+                for name in dropped:
+                    self.stdout.write(self.style.WARNING(f"🗑️ Partition vide supprimée: {name}"))
+
+        except TransactionStorageError as e:
+            raise CommandError(str(e))
@@ -0,0 +1,57 @@
+# apps/payments/migrations/0008_transaction_payload_archive.py
+
+from decimal import Decimal
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('payments', '0007_merge_20251118_1056'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransactionPayload',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('key', models.CharField(max_length=100, verbose_name='Clé de métadonnée')),
+                ('payload', models.JSONField(verbose_name='Payload')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Créé le')),
+                ('transaction', models.ForeignKey(
+                    db_constraint=False,
+                    on_delete=django.db.models.deletion.DO_NOTHING,
+                    related_name='payloads',
+                    to='payments.transaction',
+                    verbose_name='Transaction')),
+            ],
+            options={
+                'verbose_name': 'Payload de transaction',
+                'verbose_name_plural': 'Payloads de transaction',
+                'db_table': 'transaction_payloads',
+                'unique_together': {('transaction', 'key')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TransactionArchive',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('period', models.DateField(verbose_name='Mois archivé')),
+                ('row_count', models.PositiveIntegerField(verbose_name='Nombre de transactions')),
+                ('total_amount', models.DecimalField(decimal_places=2, default=Decimal('0.00'), max_digits=16, verbose_name='Montant total')),
+                ('first_created_at', models.DateTimeField(verbose_name='Première transaction')),
+                ('last_created_at', models.DateTimeField(verbose_name='Dernière transaction')),
+                ('data', models.BinaryField(verbose_name='Données compressées')),
+                ('checksum', models.CharField(max_length=64, verbose_name='Empreinte SHA-256')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Archivé le')),
+            ],
+            options={
+                'verbose_name': 'Archive de transactions',
+                'verbose_name_plural': 'Archives de transactions',
+                'db_table': 'transaction_archives',
+                'ordering': ['-period', '-id'],
+                'indexes': [models.Index(fields=['period'], name='transaction_period_196b0c_idx')],
+            },
+        ),
+    ]
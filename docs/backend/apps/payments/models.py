@@ -393,10 +393,118 @@ class Transaction(models.Model):
         }
         
         subject = subject_map.get(notification_type, _('Notification de transaction'))
-        
+
         # Ici on enverrait l'email de notification
         # send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [self.user.email])
 
+    def get_full_metadata(self):
+        """
+        Métadonnées complètes, y compris les payloads déportés dans
+        TransactionPayload. Une clé réécrite dans la ligne après le déport
+        prime sur le payload (listes fusionnées, voir `merge_metadata_value`).
+        """
+        metadata = dict(self.metadata or {})
+        if metadata.get('offloaded_keys'):
+            for payload in self.payloads.all():
+                metadata[payload.key] = merge_metadata_value(payload.payload, metadata.get(payload.key))
+        return metadata
+
+    def get_metadata_value(self, key, default=None):
+        """Valeur complète d'une clé de métadonnée, qu'elle soit dans la ligne ou déportée."""
+        metadata = self.metadata or {}
+        if key not in metadata.get('offloaded_keys', []):
+            return metadata.get(key, default)
+        payload = self.payloads.filter(key=key).values_list('payload', flat=True).first()
+        if payload is None:
+            return metadata.get(key, default)
+        return merge_metadata_value(payload, metadata.get(key))
+
+
+def merge_metadata_value(offloaded, current):
+    """
+    Fusionner un payload déporté et la valeur présente dans la ligne.
+
+    Listes (ex. `status_history`) : payload suivi des entrées de la ligne qui
+    n'y figurent pas encore. Autres valeurs : la ligne, plus récente, l'emporte.
+    """
+    if current is None:
+        return offloaded
+    if isinstance(offloaded, list) and isinstance(current, list):
+        return offloaded + [entry for entry in current if entry not in offloaded]
+    return current
+
+
+class TransactionPayload(models.Model):
+    """
+    Payloads volumineux des processeurs déportés hors de `Transaction.metadata`.
+
+    Pas de contrainte FK en base : la table `transactions` peut être partitionnée,
+    et PostgreSQL n'autorise une FK vers une table partitionnée que si la clé
+    référencée inclut la clé de partition.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    transaction = models.ForeignKey(
+        Transaction,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='payloads',
+        verbose_name=_('Transaction')
+    )
+    key = models.CharField(_('Clé de métadonnée'), max_length=100)
+    payload = models.JSONField(_('Payload'))
+    created_at = models.DateTimeField(_('Créé le'), auto_now_add=True)
+
+    class Meta:
+        db_table = 'transaction_payloads'
+        verbose_name = _('Payload de transaction')
+        verbose_name_plural = _('Payloads de transaction')
+        unique_together = ['transaction', 'key']
+
+    def __str__(self):
+        return f"{self.transaction_id} - {self.key}"
+
+
+class TransactionArchive(models.Model):
+    """
+    Lot de transactions archivées (stockage froid compressé).
+
+    Chaque lot contient les lignes sérialisées en JSON puis compressées avec zlib,
+    regroupées par mois de création.
+    """
+
+    id = models.BigAutoField(primary_key=True)
+    period = models.DateField(_('Mois archivé'))
+    row_count = models.PositiveIntegerField(_('Nombre de transactions'))
+    total_amount = models.DecimalField(
+        _('Montant total'),
+        max_digits=16,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+    first_created_at = models.DateTimeField(_('Première transaction'))
+    last_created_at = models.DateTimeField(_('Dernière transaction'))
+    data = models.BinaryField(_('Données compressées'))
+    checksum = models.CharField(_('Empreinte SHA-256'), max_length=64)
+    archived_at = models.DateTimeField(_('Archivé le'), auto_now_add=True)
+
+    class Meta:
+        db_table = 'transaction_archives'
+        verbose_name = _('Archive de transactions')
+        verbose_name_plural = _('Archives de transactions')
+        ordering = ['-period', '-id']
+        indexes = [
+            models.Index(fields=['period']),
+        ]
+
+    def __str__(self):
+        return f"Archive {self.period:%Y-%m} ({self.row_count} transactions)"
+
+    def get_rows(self):
+        """Décompresser et retourner les transactions sérialisées du lot."""
+        from .transaction_storage import decode_archive_data
+        return decode_archive_data(bytes(self.data))
+
 
 class Wallet(models.Model):
     """Portefeuille utilisateur pour chaque devise."""
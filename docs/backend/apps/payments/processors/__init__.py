@@ -6,9 +6,12 @@ from .base import (
     PaymentProcessorError,
     PaymentProcessorConfigurationError,
     PaymentProcessingError,
+    ProviderUnavailableError,
     PaymentResponse,
     WebhookResponse,
     handle_processor_errors,
+    get_http_client,
+    get_provider_metrics,
 )
 
 
@@ -41,8 +44,11 @@ __all__ = [
     'PaymentProcessorError',
     'PaymentProcessorConfigurationError',
     'PaymentProcessingError',
+    'ProviderUnavailableError',
     'PaymentResponse',
     'WebhookResponse',
     'handle_processor_errors',
+    'get_http_client',
+    'get_provider_metrics',
     'get_payment_processor'
 ]
@@ -4,10 +4,19 @@
 from abc import ABC, abstractmethod
 from decimal import Decimal
 from typing import Dict, Any, Optional
+from urllib.parse import urlsplit
+from django.conf import settings
 from django.utils.translation import gettext_lazy as _
 import logging
+import os
+import random
+import threading
+import time
 from functools import wraps
 
+import requests
+from requests.adapters import HTTPAdapter
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,6 +35,282 @@ class PaymentProcessingError(PaymentProcessorError):
     pass
 
 
+class ProviderUnavailableError(PaymentProcessingError, requests.RequestException):
+    """
+    Circuit ouvert : le fournisseur est considéré indisponible.
+    
+    Hérite aussi de `requests.RequestException` pour que les appelants qui
+    gèrent déjà les erreurs réseau la traitent de la même façon.
+    """
+    pass
+
+
+# ===== COUCHE HTTP SORTANTE =====
+
+DEFAULT_HTTP_SETTINGS = {
+    'CONNECT_TIMEOUT': 3.05,
+    'READ_TIMEOUT': 15,
+    'TOTAL_TIMEOUT': 25,
+    'MAX_RETRIES': 2,
+    'BACKOFF_BASE': 0.25,
+    'BACKOFF_MAX': 4,
+    'RETRY_STATUSES': [429, 502, 503, 504],
+    'POOL_CONNECTIONS': 4,
+    'POOL_MAXSIZE': 20,
+    'FAILURE_THRESHOLD': 5,
+    'RECOVERY_TIMEOUT': 30,
+}
+
+# Méthodes rejouables sans risque de double débit
+IDEMPOTENT_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'})
+
+
+def get_http_settings(provider: str) -> Dict[str, Any]:
+    """Paramètres HTTP d'un fournisseur (défauts < PAYMENT_HTTP < PROVIDERS)."""
+    configured = getattr(settings, 'PAYMENT_HTTP', {})
+    config = {**DEFAULT_HTTP_SETTINGS, **{k: v for k, v in configured.items() if k != 'PROVIDERS'}}
+    config.update(configured.get('PROVIDERS', {}).get(provider, {}))
+    return config
+
+
+class CircuitBreaker:
+    """
+    Disjoncteur par fournisseur : après `failure_threshold` échecs consécutifs,
+    les appels échouent immédiatement pendant `recovery_timeout` secondes,
+    puis un seul appel d'essai décide de la réouverture ou de la fermeture.
+    """
+    
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+    
+    def __init__(self, failure_threshold: int = 5, recovery_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+    
+    def allow_request(self) -> bool:
+        """Indiquer si un appel peut partir maintenant."""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_timeout:
+                # Un seul appel d'essai à la fois
+                self.state = self.HALF_OPEN
+                return True
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+    
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+
+class ProviderMetrics:
+    """Compteurs de latence et d'erreurs d'un fournisseur (par processus)."""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.short_circuited = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.last_error = None
+    
+    def record(self, latency: float, error: str = None):
+        with self._lock:
+            self.requests += 1
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            if error:
+                self.errors += 1
+                self.last_error = error
+    
+    def record_retry(self):
+        with self._lock:
+            self.retries += 1
+    
+    def record_short_circuit(self):
+        with self._lock:
+            self.short_circuited += 1
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'errors': self.errors,
+                'retries': self.retries,
+                'short_circuited': self.short_circuited,
+                'avg_latency_ms': round(self.total_latency / self.requests * 1000, 1) if self.requests else 0,
+                'max_latency_ms': round(self.max_latency * 1000, 1),
+                'last_error': self.last_error,
+            }
+
+
+class ProviderHTTPClient:
+    """
+    Client HTTP partagé d'un fournisseur de paiement.
+    
+    Session poolée avec keep-alive, timeouts (connexion, lecture) courts,
+    retries avec backoff exponentiel et jitter dans un budget de temps global,
+    circuit breaker et métriques. Les POST ne sont rejoués que si la connexion
+    n'a jamais été établie, pour ne jamais dupliquer un paiement.
+    """
+    
+    def __init__(self, provider: str, config: Dict[str, Any] = None):
+        self.provider = provider
+        self.config = config or get_http_settings(provider)
+        self.breaker = CircuitBreaker(self.config['FAILURE_THRESHOLD'], self.config['RECOVERY_TIMEOUT'])
+        self.metrics = ProviderMetrics()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.config['POOL_CONNECTIONS'],
+            pool_maxsize=self.config['POOL_MAXSIZE'],
+            max_retries=0
+        )
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+    
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+    
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+    
+    def put(self, url: str, **kwargs) -> requests.Response:
+        return self.request('PUT', url, **kwargs)
+    
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Effectuer un appel HTTP protégé.
+        
+        Accepte les mêmes arguments que `requests.request`. Un `timeout` explicite
+        reste borné par le budget global du fournisseur.
+        
+        Raises:
+            ProviderUnavailableError: Si le circuit du fournisseur est ouvert
+            requests.RequestException: Si l'appel échoue après les retries
+        """
+        method = method.upper()
+        config = self.config
+        deadline = time.monotonic() + config['TOTAL_TIMEOUT']
+        requested_timeout = kwargs.pop('timeout', None)
+        retryable = method in IDEMPOTENT_METHODS
+        attempt = 0
+        
+        while True:
+            if not self.breaker.allow_request():
+                self.metrics.record_short_circuit()
+                raise ProviderUnavailableError(
+                    f"{self.provider} temporairement indisponible (circuit ouvert)"
+                )
+            
+            remaining = deadline - time.monotonic()
+            read_timeout = config['READ_TIMEOUT']
+            if isinstance(requested_timeout, (int, float)):
+                read_timeout = requested_timeout
+            timeout = (max(0.1, min(config['CONNECT_TIMEOUT'], remaining)), max(0.1, min(read_timeout, remaining)))
+            
+            started = time.monotonic()
+            try:
+                response = self.session.request(method, url, timeout=timeout, **kwargs)
+            except requests.RequestException as e:
+                self.metrics.record(time.monotonic() - started, error=e.__class__.__name__)
+                self.breaker.record_failure()
+                # Une connexion jamais établie peut être rejouée même en POST
+                can_retry = retryable or isinstance(e, requests.ConnectTimeout)
+                if not (can_retry and self._should_retry(attempt, deadline)):
+                    raise
+            else:
+                latency = time.monotonic() - started
+                if response.status_code >= 500:
+                    self.metrics.record(latency, error=f'HTTP {response.status_code}')
+                    self.breaker.record_failure()
+                else:
+                    self.metrics.record(latency)
+                    self.breaker.record_success()
+                
+                if not (
+                    retryable
+                    and response.status_code in config['RETRY_STATUSES']
+                    and self._should_retry(attempt, deadline)
+                ):
+                    return response
+                response.close()
+            
+            attempt += 1
+            self.metrics.record_retry()
+            logger.warning(f"🔁 {self.provider}: nouvel essai {attempt}/{config['MAX_RETRIES']} ({method} {urlsplit(url).path})")
+    
+    def _should_retry(self, attempt: int, deadline: float) -> bool:
+        """Attendre avant un nouvel essai si le budget le permet."""
+        if attempt >= self.config['MAX_RETRIES']:
+            return False
+        # Backoff exponentiel avec jitter complet
+        delay = random.uniform(0, min(self.config['BACKOFF_MAX'], self.config['BACKOFF_BASE'] * 2 ** attempt))
+        if time.monotonic() + delay >= deadline:
+            return False
+        time.sleep(delay)
+        return True
+    
+    def close(self):
+        self.session.close()
+
+
+_http_clients: Dict[str, ProviderHTTPClient] = {}
+_http_clients_lock = threading.Lock()
+_http_clients_pid = os.getpid()
+
+
+def get_http_client(provider: str) -> ProviderHTTPClient:
+    """
+    Obtenir le client HTTP poolé d'un fournisseur (un par processus).
+    
+    Les clients sont recréés après un fork pour ne pas partager de sockets
+    entre workers Gunicorn.
+    """
+    global _http_clients_pid
+    client = _http_clients.get(provider)
+    if client is not None and _http_clients_pid == os.getpid():
+        return client
+    
+    with _http_clients_lock:
+        if _http_clients_pid != os.getpid():
+            _http_clients.clear()
+            _http_clients_pid = os.getpid()
+        if provider not in _http_clients:
+            _http_clients[provider] = ProviderHTTPClient(provider)
+        return _http_clients[provider]
+
+
+def get_provider_metrics() -> Dict[str, Dict[str, Any]]:
+    """Métriques et état des circuits de tous les fournisseurs du processus."""
+    return {
+        provider: {**client.metrics.snapshot(), 'circuit': client.breaker.state}
+        for provider, client in list(_http_clients.items())
+    }
+
+
+def reset_http_clients():
+    """Fermer et oublier tous les clients (tests, rechargement de configuration)."""
+    with _http_clients_lock:
+        for client in _http_clients.values():
+            client.close()
+        _http_clients.clear()
+
+
 class PaymentResponse:
     """Réponse standardisée des processeurs de paiement."""
     
@@ -107,6 +392,14 @@ class BasePaymentProcessor(ABC):
         self.name = self.__class__.__name__
         self.logger = logging.getLogger(f"payments.{self.name.lower()}")
     
+    def http(self, provider: str) -> ProviderHTTPClient:
+        """Client HTTP poolé (retries, circuit breaker, métriques) d'un fournisseur.
+        
+        Args:
+            provider: Nom du fournisseur (clé de `PAYMENT_HTTP['PROVIDERS']`)
+        """
+        return get_http_client(provider)
+    
     @abstractmethod
     def validate_configuration(self):
         """Valider la configuration du processeur.
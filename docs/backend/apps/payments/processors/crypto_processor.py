@@ -13,6 +13,7 @@ from . import (
     PaymentProcessorConfigurationError, PaymentProcessingError,
     PaymentResponse, WebhookResponse, handle_processor_errors
 )
+from ..crypto_rates import CryptoRatesUnavailable, get_crypto_price, get_rate_snapshot
 
 
 class CryptoProcessor(BasePaymentProcessor):
@@ -80,10 +81,9 @@ class CryptoProcessor(BasePaymentProcessor):
     def _test_api_connection(self):
         """Tester la connexion à l'API crypto."""
         if self.primary_provider == 'nowpayments':
-            response = requests.get(
+            response = self.http('nowpayments').get(
                 'https://api.nowpayments.io/v1/status',
                 headers={'x-api-key': self.nowpayments_config.get('api_key', '')},
-                timeout=10
             )
             if response.status_code != 200:
                 raise Exception("Connexion NOWPayments échouée")
@@ -134,11 +134,10 @@ class CryptoProcessor(BasePaymentProcessor):
         }
         
         try:
-            response = requests.post(
+            response = self.http('nowpayments').post(
                 'https://api.nowpayments.io/v1/payment',
                 json=payment_payload,
                 headers=headers,
-                timeout=30
             )
             
             if response.status_code == 201:
@@ -191,11 +190,10 @@ class CryptoProcessor(BasePaymentProcessor):
         }
         
         try:
-            response = requests.post(
+            response = self.http('coinbase').post(
                 'https://api.commerce.coinbase.com/charges',
                 json=payment_payload,
                 headers=headers,
-                timeout=30
             )
             
             if response.status_code == 201:
@@ -218,36 +216,13 @@ class CryptoProcessor(BasePaymentProcessor):
             raise PaymentProcessingError(f"Erreur réseau Coinbase: {str(e)}")
     
     def _convert_fiat_to_crypto(self, fiat_amount, fiat_currency, crypto_currency):
-        """Convertir un montant fiat en crypto."""
-        try:
-            # Utiliser l'API CoinGecko pour les taux de change
-            response = requests.get(
-                f'https://api.coingecko.com/api/v3/simple/price',
-                params={
-                    'ids': self._get_coingecko_id(crypto_currency),
-                    'vs_currencies': 'usd',
-                    'include_24hr_change': 'false'
-                },
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                crypto_id = self._get_coingecko_id(crypto_currency)
-                usd_price = data[crypto_id]['usd']
-                
-                # Convertir FCFA en USD puis en crypto
-                fiat_to_usd = fiat_amount / 560  # Taux approximatif FCFA/USD
-                crypto_amount = fiat_to_usd / usd_price
-                
-                return Decimal(str(crypto_amount)).quantize(
-                    Decimal('0.' + '0' * self.SUPPORTED_CRYPTOS[crypto_currency]['decimals'])
-                )
-            else:
-                raise PaymentProcessingError("Impossible d'obtenir le taux de change crypto")
-                
-        except requests.RequestException as e:
-            raise PaymentProcessingError(f"Erreur API taux de change: {str(e)}")
+        """Convertir un montant fiat en crypto (taux en cache, sans appel réseau)."""
+        price = get_crypto_price(crypto_currency, fiat_currency)
+        crypto_amount = Decimal(str(fiat_amount)) / price
+        
+        return crypto_amount.quantize(
+            Decimal('0.' + '0' * self.SUPPORTED_CRYPTOS[crypto_currency]['decimals'])
+        )
     
     def _get_coingecko_id(self, crypto_currency):
         """Obtenir l'ID CoinGecko pour une crypto."""
@@ -276,10 +251,9 @@ class CryptoProcessor(BasePaymentProcessor):
         }
         
         try:
-            response = requests.get(
+            response = self.http('nowpayments').get(
                 f'https://api.nowpayments.io/v1/payment/{payment_id}',
                 headers=headers,
-                timeout=30
             )
             
             if response.status_code == 200:
@@ -310,10 +284,9 @@ class CryptoProcessor(BasePaymentProcessor):
         }
         
         try:
-            response = requests.get(
+            response = self.http('coinbase').get(
                 f'https://api.commerce.coinbase.com/charges/{charge_id}',
                 headers=headers,
-                timeout=30
             )
             
             if response.status_code == 200:
@@ -563,9 +536,12 @@ class CryptoProcessor(BasePaymentProcessor):
         
         # Convertir les frais réseau en devise fiat si nécessaire
         if crypto_currency in ['BTC', 'ETH']:
-            # Approximation: convertir en USD puis en devise locale
-            network_fee_usd = base_network_fee * 30000  # Prix approximatif
-            network_fee_local = network_fee_usd * 560   # USD to FCFA
+            try:
+                network_fee_local = base_network_fee * get_crypto_price(crypto_currency, 'XOF')
+            except CryptoRatesUnavailable:
+                # Approximation: convertir en USD puis en devise locale
+                network_fee_usd = base_network_fee * 30000  # Prix approximatif
+                network_fee_local = network_fee_usd * 560   # USD to FCFA
         else:
             network_fee_local = base_network_fee
         
@@ -585,38 +561,17 @@ class CryptoProcessor(BasePaymentProcessor):
         }
     
     def get_crypto_rates(self):
-        """Obtenir les taux de change crypto en temps réel."""
-        try:
-            crypto_ids = [self._get_coingecko_id(crypto) for crypto in self.SUPPORTED_CRYPTOS.keys()]
-            
-            response = requests.get(
-                'https://api.coingecko.com/api/v3/simple/price',
-                params={
-                    'ids': ','.join(crypto_ids),
-                    'vs_currencies': 'usd,eur',
-                    'include_24hr_change': 'true'
-                },
-                timeout=10
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                rates = {}
-                
-                for crypto, crypto_id in zip(self.SUPPORTED_CRYPTOS.keys(), crypto_ids):
-                    if crypto_id in data:
-                        rates[crypto] = {
-                            'usd': data[crypto_id]['usd'],
-                            'eur': data[crypto_id]['eur'],
-                            'change_24h': data[crypto_id].get('usd_24h_change', 0)
-                        }
-                
-                return rates
-            else:
-                raise PaymentProcessingError("Impossible d'obtenir les taux crypto")
-                
-        except requests.RequestException as e:
-            raise PaymentProcessingError(f"Erreur API taux crypto: {str(e)}")
+        """Obtenir les derniers taux de change crypto connus (rafraîchis en tâche de fond)."""
+        snapshot = get_rate_snapshot()
+        return {
+            crypto: {
+                'usd': float(rate['usd']),
+                'eur': float(rate['eur']),
+                'change_24h': rate['change_24h']
+            }
+            for crypto, rate in snapshot['rates'].items()
+            if crypto in self.SUPPORTED_CRYPTOS
+        }
     
     def estimate_transaction_time(self, crypto_currency):
         """Estimer le temps de transaction pour une crypto."""
@@ -153,11 +153,10 @@ class MobileMoneyProcessor(BasePaymentProcessor):
         }
         
         try:
-            response = requests.post(
+            response = self.http('orange_money').post(
                 f"{self.OPERATORS['orange']['api_base']}/webpayment",
                 json=payment_payload,
                 headers=headers,
-                timeout=30
             )
             
             if response.status_code == 201:
@@ -193,11 +192,10 @@ class MobileMoneyProcessor(BasePaymentProcessor):
         }
         
         try:
-            response = requests.post(
+            response = self.http('orange_money').post(
                 auth_url,
                 data=auth_data,
                 headers=auth_headers,
-                timeout=30
             )
             
             if response.status_code == 200:
@@ -245,11 +243,10 @@ class MobileMoneyProcessor(BasePaymentProcessor):
         }
         
         try:
-            response = requests.post(
+            response = self.http('mtn_momo').post(
                 f"{self.OPERATORS['mtn']['api_base']}/collection/v1_0/requesttopay",
                 json=payment_payload,
                 headers=headers,
-                timeout=30
             )
             
             if response.status_code == 202:
@@ -299,11 +296,10 @@ class MobileMoneyProcessor(BasePaymentProcessor):
         }
         
         try:
-            response = requests.post(
+            response = self.http('moov_money').post(
                 f"{self.OPERATORS['moov']['api_base']}/payments/request",
                 json=payment_payload,
                 headers=headers,
-                timeout=30
             )
             
             if response.status_code == 200:
@@ -362,10 +358,9 @@ class MobileMoneyProcessor(BasePaymentProcessor):
         }
         
         try:
-            response = requests.get(
+            response = self.http('orange_money').get(
                 f"{self.OPERATORS['orange']['api_base']}/webpayment/{payment_token}",
                 headers=headers,
-                timeout=30
             )
             
             if response.status_code == 200:
@@ -394,10 +389,9 @@ class MobileMoneyProcessor(BasePaymentProcessor):
         }
         
         try:
-            response = requests.get(
+            response = self.http('mtn_momo').get(
                 f"{self.OPERATORS['mtn']['api_base']}/collection/v1_0/requesttopay/{reference_id}",
                 headers=headers,
-                timeout=30
             )
             
             if response.status_code == 200:
@@ -425,10 +419,9 @@ class MobileMoneyProcessor(BasePaymentProcessor):
         }
         
         try:
-            response = requests.get(
+            response = self.http('moov_money').get(
                 f"{self.OPERATORS['moov']['api_base']}/payments/status/{payment_id}",
                 headers=headers,
-                timeout=30
             )
             
             if response.status_code == 200:
@@ -497,11 +490,10 @@ class MobileMoneyProcessor(BasePaymentProcessor):
         }
         
         try:
-            response = requests.post(
+            response = self.http('orange_money').post(
                 f"{self.OPERATORS['orange']['api_base']}/transfer",
                 json=transfer_payload,
                 headers=headers,
-                timeout=30
             )
             
             if response.status_code == 201:
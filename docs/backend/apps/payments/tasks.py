@@ -116,3 +116,53 @@ def check_all_pending_payouts():
         
     except Exception as e:
         logger.error(f"❌ Erreur check_all_pending_payouts: {e}")
+
+
+@shared_task(name='payments.maintain_transaction_storage')
+def maintain_transaction_storage():
+    """
+    Maintenance du stockage des transactions
+    
+    - Création anticipée des partitions mensuelles (si la table est partitionnée)
+    - Déport des payloads volumineux de metadata
+    - Archivage froid des transactions terminées anciennes
+    """
+    from . import transaction_storage
+    
+    results = {}
+    try:
+        if transaction_storage.is_partitioned():
+            results['partitions_created'] = transaction_storage.ensure_partitions()
+        
+        results['offload'] = transaction_storage.offload_metadata_payloads()
+        results['archive'] = transaction_storage.archive_completed_transactions()
+        
+        if transaction_storage.is_partitioned():
+            results['partitions_dropped'] = transaction_storage.drop_empty_partitions(
+                transaction_storage.archive_cutoff_month()
+            )
+        
+        logger.info(f"✅ Maintenance du stockage des transactions: {results}")
+        return results
+        
+    except Exception as e:
+        logger.error(f"❌ Erreur maintain_transaction_storage: {e}")
+        return {'error': str(e), **results}
+
+
+@shared_task(name='payments.refresh_crypto_rates')
+def refresh_crypto_rates_task():
+    """
+    Rafraîchir l'instantané des taux crypto servi aux processeurs
+    
+    En cas d'échec, le dernier instantané valide reste servi jusqu'à
+    CRYPTO_RATES['MAX_STALE_AGE'].
+    """
+    from .crypto_rates import refresh_crypto_rates
+    
+    try:
+        snapshot = refresh_crypto_rates()
+        return {'currencies': list(snapshot['rates']), 'xof_per_usd': snapshot['xof_per_usd']}
+    except Exception as e:
+        logger.error(f"❌ Erreur refresh_crypto_rates: {e}")
+        return {'error': str(e)}
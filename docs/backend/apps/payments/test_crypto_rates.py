@@ -0,0 +1,97 @@
+# apps/payments/test_crypto_rates.py
+# ==================================
+
+"""
+Tests du flux de taux crypto en cache.
+"""
+
+import time
+import pytest
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import cache
+
+from apps.payments import crypto_rates
+from apps.payments.crypto_rates import CryptoRatesUnavailable
+from apps.payments.processors.crypto_processor import CryptoProcessor
+
+
+@pytest.fixture(autouse=True)
+def clean_rates():
+    cache.delete_many([
+        crypto_rates.SNAPSHOT_CACHE_KEY, crypto_rates.LAST_GOOD_CACHE_KEY, crypto_rates.REFRESH_SCHEDULED_KEY,
+    ])
+    crypto_rates.reset_local_snapshot()
+    yield
+    crypto_rates.reset_local_snapshot()
+
+
+def make_snapshot(age=0):
+    return {
+        'rates': {
+            'BTC': {'usd': '50000', 'eur': '46000', 'change_24h': 1.2},
+            'USDT': {'usd': '1', 'eur': '0.92', 'change_24h': 0},
+        },
+        'xof_per_usd': '603.480',
+        'fetched_at': time.time() - age,
+    }
+
+
+def test_conversion_uses_cached_rates_without_network():
+    crypto_rates.store_snapshot(make_snapshot())
+
+    with mock.patch.object(crypto_rates, 'get_http_client') as http:
+        amount = CryptoProcessor()._convert_fiat_to_crypto(Decimal('603480'), 'XOF', 'BTC')
+
+    http.assert_not_called()
+    assert amount == Decimal('0.02000000')
+
+
+def test_other_processes_read_the_shared_snapshot():
+    crypto_rates.store_snapshot(make_snapshot())
+    crypto_rates.reset_local_snapshot()
+
+    assert crypto_rates.get_crypto_price('USDT', 'EUR') == Decimal('0.92')
+
+
+def test_stale_snapshot_is_served_and_refresh_scheduled():
+    crypto_rates.store_snapshot(make_snapshot(age=600))
+
+    with mock.patch.object(crypto_rates, '_schedule_refresh') as schedule:
+        snapshot = crypto_rates.get_rate_snapshot()
+
+    assert snapshot['stale']
+    schedule.assert_called_once()
+
+
+def test_refresh_is_published_once_per_interval():
+    crypto_rates.store_snapshot(make_snapshot(age=7200))
+
+    with mock.patch('apps.payments.tasks.refresh_crypto_rates_task') as task:
+        for _ in range(20):
+            with pytest.raises(CryptoRatesUnavailable):
+                crypto_rates.get_rate_snapshot()
+
+    task.delay.assert_called_once()
+
+
+def test_too_old_snapshot_is_refused():
+    crypto_rates.store_snapshot(make_snapshot(age=7200))
+
+    with mock.patch.object(crypto_rates, '_schedule_refresh'):
+        with pytest.raises(CryptoRatesUnavailable):
+            crypto_rates.get_rate_snapshot()
+
+
+def test_refresh_derives_xof_rate_from_euro_peg():
+    response = mock.Mock(status_code=200)
+    response.json.return_value = {
+        'bitcoin': {'usd': 50000, 'eur': 46000, 'usd_24h_change': 1.2},
+        'tether': {'usd': 1, 'eur': 0.92},
+    }
+    with mock.patch.object(crypto_rates, 'get_http_client') as http:
+        http.return_value.get.return_value = response
+        snapshot = crypto_rates.refresh_crypto_rates()
+
+    assert snapshot['xof_per_usd'] == '603.480'
+    assert cache.get(crypto_rates.LAST_GOOD_CACHE_KEY)['rates']['BTC']['usd'] == '50000'
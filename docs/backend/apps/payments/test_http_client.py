@@ -0,0 +1,92 @@
+# apps/payments/test_http_client.py
+# =================================
+
+"""
+Tests de la couche HTTP sortante des processeurs : retries, circuit breaker
+et métriques par fournisseur.
+"""
+
+import io
+
+import pytest
+import requests
+from unittest import mock
+
+from apps.payments.processors.base import (
+    DEFAULT_HTTP_SETTINGS, CircuitBreaker, ProviderHTTPClient, ProviderUnavailableError,
+    get_http_client, reset_http_clients,
+)
+
+
+def make_client(**overrides):
+    config = {**DEFAULT_HTTP_SETTINGS, 'BACKOFF_BASE': 0, 'FAILURE_THRESHOLD': 3, **overrides}
+    return ProviderHTTPClient('test_provider', config)
+
+
+def make_response(status_code):
+    response = requests.Response()
+    response.status_code = status_code
+    response.raw = io.BytesIO(b'')
+    return response
+
+
+def test_get_is_retried_on_retryable_status():
+    client = make_client()
+    with mock.patch.object(client.session, 'request', side_effect=[make_response(503), make_response(200)]) as request:
+        response = client.get('https://provider.test/status')
+
+    assert response.status_code == 200
+    assert request.call_count == 2
+    assert client.metrics.snapshot()['retries'] == 1
+
+
+def test_post_is_not_replayed_after_read_timeout():
+    client = make_client()
+    with mock.patch.object(client.session, 'request', side_effect=requests.ReadTimeout()) as request:
+        with pytest.raises(requests.ReadTimeout):
+            client.post('https://provider.test/payment', json={})
+
+    assert request.call_count == 1
+
+
+def test_post_is_replayed_when_connection_never_opened():
+    client = make_client()
+    side_effect = [requests.ConnectTimeout(), make_response(201)]
+    with mock.patch.object(client.session, 'request', side_effect=side_effect) as request:
+        response = client.post('https://provider.test/payment', json={})
+
+    assert response.status_code == 201
+    assert request.call_count == 2
+
+
+def test_circuit_opens_and_short_circuits():
+    client = make_client(MAX_RETRIES=0)
+    with mock.patch.object(client.session, 'request', side_effect=requests.ConnectionError()) as request:
+        for _ in range(3):
+            with pytest.raises(requests.ConnectionError):
+                client.get('https://provider.test/status')
+        with pytest.raises(ProviderUnavailableError):
+            client.get('https://provider.test/status')
+
+    assert request.call_count == 3
+    metrics = client.metrics.snapshot()
+    assert metrics['errors'] == 3
+    assert metrics['short_circuited'] == 1
+
+
+def test_half_open_circuit_closes_after_success():
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    assert breaker.allow_request()
+    assert not breaker.allow_request()  # un seul appel d'essai
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_clients_are_shared_per_provider():
+    reset_http_clients()
+    assert get_http_client('feexpay') is get_http_client('feexpay')
+    assert get_http_client('feexpay') is not get_http_client('coingecko')
+    reset_http_clients()
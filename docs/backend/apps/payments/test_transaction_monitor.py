@@ -0,0 +1,96 @@
+# apps/payments/test_transaction_monitor.py
+# =========================================
+
+"""
+Tests de l'auto-completion ensembliste des dépôts pending.
+"""
+
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.payments.models import Transaction
+from apps.payments.transaction_monitor import TransactionMonitorService
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def users():
+    """Utilisateurs créés sans déclencher les signaux de compte."""
+    alice = User(username='alice', email='alice@test.com', referral_code='ALICE001', balance_fcfa=Decimal('500.00'))
+    bob = User(username='bob', email='bob@test.com', referral_code='BOB00001')
+    User.objects.bulk_create([alice, bob])
+    return alice, bob
+
+
+def make_deposit(user, amount, age_minutes, status='pending', transaction_type='deposit'):
+    txn = Transaction.objects.create(
+        user=user,
+        transaction_type=transaction_type,
+        amount=Decimal(amount),
+        currency='FCFA',
+        status=status,
+        metadata={'source': 'feexpay_deposit'}
+    )
+    Transaction.objects.filter(pk=txn.pk).update(created_at=timezone.now() - timedelta(minutes=age_minutes))
+    return txn
+
+
+def test_completes_stale_deposits_and_credits_per_user(users):
+    alice, bob = users
+    stale = [make_deposit(alice, '1000', 90), make_deposit(alice, '250', 120), make_deposit(bob, '300', 61)]
+    recent = make_deposit(alice, '700', 5)
+    withdrawal = make_deposit(bob, '100', 90, transaction_type='withdrawal')
+
+    result = TransactionMonitorService.auto_complete_pending_transactions(max_age_minutes=60)
+
+    assert result['success']
+    assert result['completed_count'] == 3
+    assert result['affected_users'] == 2
+    assert result['updated_balances']['alice'] == {
+        'old_balance': 500.0, 'new_balance': 1750.0, 'amount_added': 1250.0, 'transactions': 2
+    }
+
+    alice.refresh_from_db()
+    bob.refresh_from_db()
+    assert alice.balance_fcfa == Decimal('1750.00')
+    assert bob.balance_fcfa == Decimal('300.00')
+
+    for txn in stale:
+        txn.refresh_from_db()
+        assert txn.status == 'completed'
+        assert txn.completed_at is not None
+        assert txn.metadata['source'] == 'feexpay_deposit'
+        assert txn.metadata['auto_completed'] is True
+    assert Transaction.objects.get(pk=recent.pk).status == 'pending'
+    assert Transaction.objects.get(pk=withdrawal.pk).status == 'pending'
+
+
+def test_second_run_does_not_credit_twice(users):
+    alice, _ = users
+    make_deposit(alice, '1000', 90)
+
+    TransactionMonitorService.auto_complete_pending_transactions(user=alice)
+    result = TransactionMonitorService.auto_complete_pending_transactions(user=alice)
+
+    assert result['completed_count'] == 0
+    alice.refresh_from_db()
+    assert alice.balance_fcfa == Decimal('1500.00')
+
+
+def test_dry_run_changes_nothing(users):
+    alice, _ = users
+    txn = make_deposit(alice, '1000', 90)
+
+    result = TransactionMonitorService.auto_complete_pending_transactions(dry_run=True)
+
+    assert result['dry_run']
+    assert result['completed_count'] == 1
+    assert result['updated_balances']['alice']['new_balance'] == 1500.0
+    txn.refresh_from_db()
+    alice.refresh_from_db()
+    assert txn.status == 'pending'
+    assert alice.balance_fcfa == Decimal('500.00')
@@ -0,0 +1,168 @@
+# apps/payments/test_transaction_storage.py
+# ==========================================
+
+"""
+Tests du stockage des transactions : partitions mensuelles, déport des payloads
+et archivage froid.
+"""
+
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.payments.models import Transaction, TransactionArchive, TransactionPayload, PaymentWebhook
+from apps.payments import transaction_storage
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def user():
+    """Utilisateur créé sans déclencher les signaux de compte."""
+    user = User(username='storage_user', email='storage@test.com')
+    User.objects.bulk_create([user])
+    return user
+
+
+def make_transaction(user, status='completed', age_days=0, **kwargs):
+    txn = Transaction.objects.create(
+        user=user,
+        transaction_type='deposit',
+        amount=Decimal('1000.00'),
+        currency='FCFA',
+        status=status,
+        **kwargs
+    )
+    if age_days:
+        Transaction.objects.filter(pk=txn.pk).update(created_at=timezone.now() - timedelta(days=age_days))
+        txn.refresh_from_db()
+    return txn
+
+
+class TestPartitionHelpers:
+    """Tests des utilitaires de partitionnement mensuel."""
+
+    def test_add_months_crosses_years(self):
+        assert transaction_storage.add_months(date(2025, 11, 1), 3) == date(2026, 2, 1)
+        assert transaction_storage.add_months(date(2025, 1, 1), -1) == date(2024, 12, 1)
+
+    def test_partition_name(self):
+        assert transaction_storage.partition_name(date(2025, 3, 1)) == 'transactions_y2025m03'
+
+    def test_month_bounds_are_half_open(self):
+        start, end = transaction_storage.month_bounds(date(2025, 12, 1))
+        assert start.isoformat() == '2025-12-01T00:00:00+00:00'
+        assert end.isoformat() == '2026-01-01T00:00:00+00:00'
+
+    def test_partitioning_requires_postgresql(self):
+        with pytest.raises(transaction_storage.TransactionStorageError):
+            transaction_storage.ensure_partitions()
+
+
+class TestPayloadOffload:
+    """Tests du déport des payloads volumineux de metadata."""
+
+    def test_offload_moves_keys_and_keeps_full_metadata(self, user):
+        txn = make_transaction(user, age_days=10, metadata={
+            'source': 'feexpay_deposit',
+            'feexpay_sync': {'feexpay_status': 'SUCCESSFUL', 'feexpay_reason': 'ok'},
+        })
+
+        stats = transaction_storage.offload_metadata_payloads()
+
+        assert stats == {'transactions': 1, 'payloads': 1}
+        txn.refresh_from_db()
+        assert txn.metadata == {'source': 'feexpay_deposit', 'offloaded_keys': ['feexpay_sync']}
+        assert txn.get_full_metadata()['feexpay_sync']['feexpay_status'] == 'SUCCESSFUL'
+
+    def test_offload_skips_in_flight_and_recent_transactions(self, user):
+        make_transaction(user, status='pending', age_days=10, metadata={'status_history': [{'to': 'pending'}]})
+        make_transaction(user, metadata={'status_history': [{'to': 'completed'}]})
+
+        assert transaction_storage.offload_metadata_payloads() == {'transactions': 0, 'payloads': 0}
+        assert not TransactionPayload.objects.exists()
+
+    def test_offload_updates_existing_payload(self, user):
+        txn = make_transaction(user, age_days=10, metadata={'feexpay_sync': {'feexpay_status': 'PENDING'}})
+        transaction_storage.offload_metadata_payloads()
+
+        txn.refresh_from_db()
+        txn.metadata['feexpay_sync'] = {'feexpay_status': 'SUCCESSFUL'}
+        txn.save()
+        assert txn.get_metadata_value('feexpay_sync') == {'feexpay_status': 'SUCCESSFUL'}
+        transaction_storage.offload_metadata_payloads()
+
+        payload = TransactionPayload.objects.get(transaction=txn, key='feexpay_sync')
+        assert payload.payload == {'feexpay_status': 'SUCCESSFUL'}
+
+    def test_history_written_after_offload_is_merged_not_lost(self, user):
+        first = {'from': 'pending', 'to': 'completed'}
+        txn = make_transaction(user, age_days=10, metadata={'status_history': [first]})
+        transaction_storage.offload_metadata_payloads()
+
+        txn.refresh_from_db()
+        second = {'from': 'completed', 'to': 'refunded'}
+        txn.metadata['status_history'] = txn.get_metadata_value('status_history', []) + [second]
+        txn.save()
+        assert txn.get_full_metadata()['status_history'] == [first, second]
+
+        transaction_storage.offload_metadata_payloads()
+        txn.refresh_from_db()
+        assert 'status_history' not in txn.metadata
+        assert txn.get_full_metadata()['status_history'] == [first, second]
+
+
+class TestColdArchive:
+    """Tests de l'archivage froid des transactions terminées."""
+
+    def test_archives_only_old_completed_transactions(self, user):
+        old = make_transaction(user, age_days=500, metadata={'feexpay_sync': {'status': 'ok'}})
+        transaction_storage.offload_metadata_payloads()
+        recent = make_transaction(user)
+        old_pending = make_transaction(user, status='pending', age_days=500)
+
+        stats = transaction_storage.archive_completed_transactions(older_than_months=12)
+
+        assert stats['archived'] == 1
+        assert set(Transaction.objects.values_list('pk', flat=True)) == {recent.pk, old_pending.pk}
+        assert not TransactionPayload.objects.exists()
+
+        archive = TransactionArchive.objects.get()
+        assert archive.row_count == 1
+        assert archive.total_amount == Decimal('1000.00')
+        rows = archive.get_rows()
+        assert [type(row.object) for row in rows] == [Transaction, TransactionPayload]
+        assert rows[0].object.pk == old.pk
+
+    def test_keeps_transactions_with_related_objects(self, user):
+        txn = make_transaction(user, age_days=500)
+        PaymentWebhook.objects.create(provider='stripe', event_type='test', payload={}, transaction=txn)
+
+        stats = transaction_storage.archive_completed_transactions(older_than_months=12)
+
+        assert stats['archived'] == 0
+        assert Transaction.objects.filter(pk=txn.pk).exists()
+
+    def test_restore_archive_roundtrip(self, user):
+        txn = make_transaction(user, age_days=500, metadata={'feexpay_sync': {'status': 'ok'}})
+        transaction_storage.offload_metadata_payloads()
+        transaction_storage.archive_completed_transactions(older_than_months=12)
+
+        restored = transaction_storage.restore_archive(TransactionArchive.objects.get())
+
+        assert restored == 1
+        restored_txn = Transaction.objects.get(pk=txn.pk)
+        assert restored_txn.created_at == txn.created_at
+        assert restored_txn.get_full_metadata()['feexpay_sync'] == {'status': 'ok'}
+        assert not TransactionArchive.objects.exists()
+
+    def test_dry_run_changes_nothing(self, user):
+        make_transaction(user, age_days=500)
+
+        stats = transaction_storage.archive_completed_transactions(older_than_months=12, dry_run=True)
+
+        assert stats['archived'] == 1
+        assert Transaction.objects.count() == 1
+        assert not TransactionArchive.objects.exists()
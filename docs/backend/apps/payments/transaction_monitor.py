@@ -1,11 +1,15 @@
 """
 Service de monitoring automatique des transactions FeexPay
 """
+import json
 import logging
+import uuid
 from datetime import datetime, timedelta
 from decimal import Decimal
 from django.utils import timezone
-from django.db import transaction as db_transaction
+from django.db import connection, transaction as db_transaction
+from django.db.models import Case, DecimalField, F, Value, When
+from django.db.models.functions import Coalesce
 from django.contrib.auth import get_user_model
 from .models import Transaction
 
@@ -17,20 +21,29 @@ class TransactionMonitorService:
     Service pour le monitoring automatique des transactions
     """
     
+    # Taille des lots pour le chemin générique (hors PostgreSQL)
+    BATCH_SIZE = 500
+    
     @staticmethod
-    def auto_complete_pending_transactions(user=None, max_age_minutes=60):
+    def auto_complete_pending_transactions(user=None, max_age_minutes=60, dry_run=False):
         """
         Complète automatiquement les transactions pending anciennes
         
+        Traitement ensembliste dans une seule transaction : un UPDATE ... RETURNING
+        bascule les statuts et fusionne la métadonnée d'auto-completion, puis un
+        seul UPDATE crédite chaque utilisateur du total de ses dépôts.
+        
         Args:
             user: Utilisateur spécifique (optionnel)
             max_age_minutes: Âge maximum des transactions à traiter (défaut: 60 minutes)
+            dry_run: Calculer le résultat sans rien modifier
         
         Returns:
             dict: Résultats de l'opération
         """
         try:
-            cutoff_time = timezone.now() - timedelta(minutes=max_age_minutes)
+            now = timezone.now()
+            cutoff_time = now - timedelta(minutes=max_age_minutes)
             
             # Filtrer les transactions pending anciennes
             query = Transaction.objects.filter(
@@ -42,56 +55,39 @@ class TransactionMonitorService:
             if user:
                 query = query.filter(user=user)
             
-            pending_transactions = query.order_by('-created_at')
+            marker = {
+                'auto_completed': True,
+                'auto_completed_at': now.isoformat(),
+                'auto_completion_reason': f'Transaction pending depuis plus de {max_age_minutes} minutes'
+            }
             
-            completed_count = 0
-            updated_balances = {}
+            with db_transaction.atomic():
+                if dry_run:
+                    rows = list(query.values_list('id', 'transaction_id', 'user_id', 'amount'))
+                elif connection.vendor == 'postgresql':
+                    rows = TransactionMonitorService._complete_postgresql(query, marker, now)
+                else:
+                    rows = TransactionMonitorService._complete_batched(query, marker, now)
+                
+                credits = {}
+                for _, _, user_id, amount in rows:
+                    total, count = credits.get(user_id, (Decimal('0'), 0))
+                    credits[user_id] = (total + amount, count + 1)
+                
+                updated_balances = TransactionMonitorService._credit_balances(credits, dry_run)
             
-            for txn in pending_transactions:
-                try:
-                    with db_transaction.atomic():
-                        # Marquer la transaction comme complétée
-                        txn.status = 'completed'
-                        txn.completed_at = timezone.now()
-                        txn.processed_at = timezone.now()
-                        
-                        # Ajouter métadonnée d'auto-completion
-                        metadata = txn.metadata or {}
-                        metadata.update({
-                            'auto_completed': True,
-                            'auto_completed_at': timezone.now().isoformat(),
-                            'auto_completion_reason': f'Transaction pending depuis plus de {max_age_minutes} minutes'
-                        })
-                        txn.metadata = metadata
-                        txn.save()
-                        
-                        # Mettre à jour le solde utilisateur
-                        user_obj = txn.user
-                        old_balance = user_obj.balance_fcfa or Decimal('0')
-                        new_balance = old_balance + txn.amount
-                        user_obj.balance_fcfa = new_balance
-                        user_obj.save()
-                        
-                        updated_balances[user_obj.username] = {
-                            'old_balance': float(old_balance),
-                            'new_balance': float(new_balance),
-                            'amount_added': float(txn.amount)
-                        }
-                        
-                        completed_count += 1
-                        
-                        logger.info(
-                            f"✅ Auto-complété transaction {txn.transaction_id} "
-                            f"pour {user_obj.username}: +{txn.amount} FCFA"
-                        )
-                        
-                except Exception as e:
-                    logger.error(f"❌ Erreur lors de l'auto-completion de {txn.transaction_id}: {e}")
-                    continue
+            total_amount = sum((total for total, _ in credits.values()), Decimal('0'))
+            logger.info(
+                f"{'🔍 [dry-run] ' if dry_run else '✅ '}Auto-completion: {len(rows)} transactions, "
+                f"{len(credits)} utilisateurs, +{total_amount} FCFA"
+            )
             
             return {
                 'success': True,
-                'completed_count': completed_count,
+                'dry_run': dry_run,
+                'completed_count': len(rows),
+                'affected_users': len(credits),
+                'total_amount': float(total_amount),
                 'updated_balances': updated_balances,
                 'processed_at': timezone.now().isoformat()
             }
@@ -104,6 +100,99 @@ class TransactionMonitorService:
                 'completed_count': 0
             }
     
+    @staticmethod
+    def _complete_postgresql(query, marker, now):
+        """Basculer les statuts en un seul UPDATE ... RETURNING (PostgreSQL)."""
+        qn = connection.ops.quote_name
+        subquery, params = query.values('pk').query.sql_with_params()
+        
+        # Le statut est revérifié par l'UPDATE : une transaction complétée entre-temps
+        # par un webhook n'est ni rebasculée ni recréditée
+        sql = (
+            f"UPDATE {qn(Transaction._meta.db_table)} "
+            f"SET status = 'completed', completed_at = %s, processed_at = %s, "
+            f"metadata = COALESCE(metadata, '{{}}'::jsonb) || %s::jsonb "
+            f"WHERE status = 'pending' AND id IN ({subquery}) "
+            f"RETURNING id, transaction_id, user_id, amount"
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [now, now, json.dumps(marker), *params])
+            return cursor.fetchall()
+    
+    @staticmethod
+    def _complete_batched(query, marker, now):
+        """Basculer les statuts par lots de bulk_update (autres bases)."""
+        transactions = list(
+            query.select_for_update().only('id', 'transaction_id', 'user_id', 'amount', 'metadata')
+        )
+        for txn in transactions:
+            txn.status = 'completed'
+            txn.completed_at = now
+            txn.processed_at = now
+            txn.metadata = {**(txn.metadata or {}), **marker}
+        
+        Transaction.objects.bulk_update(
+            transactions,
+            ['status', 'completed_at', 'processed_at', 'metadata'],
+            batch_size=TransactionMonitorService.BATCH_SIZE
+        )
+        return [(txn.id, txn.transaction_id, txn.user_id, txn.amount) for txn in transactions]
+    
+    @staticmethod
+    def _credit_balances(credits, dry_run=False):
+        """
+        Créditer chaque utilisateur du total de ses dépôts auto-complétés.
+        
+        Returns:
+            dict: Soldes avant/après par nom d'utilisateur
+        """
+        if not credits:
+            return {}
+        
+        if dry_run:
+            balances = User.objects.filter(pk__in=credits).values_list('id', 'username', 'balance_fcfa')
+            balances = [
+                (user_id, username, (balance or Decimal('0')) + credits[user_id][0])
+                for user_id, username, balance in balances
+            ]
+        elif connection.vendor == 'postgresql':
+            qn = connection.ops.quote_name
+            user_ids = [str(user_id) for user_id in credits]
+            amounts = [credits[user_id][0] for user_id in credits]
+            sql = (
+                f"UPDATE {qn(User._meta.db_table)} AS u "
+                f"SET balance_fcfa = COALESCE(u.balance_fcfa, 0) + c.total "
+                f"FROM unnest(%s::uuid[], %s::numeric[]) AS c(user_id, total) "
+                f"WHERE u.id = c.user_id "
+                f"RETURNING u.id, u.username, u.balance_fcfa"
+            )
+            with connection.cursor() as cursor:
+                cursor.execute(sql, [user_ids, amounts])
+                balances = [(uuid.UUID(str(row[0])), row[1], row[2]) for row in cursor.fetchall()]
+        else:
+            user_ids = list(credits)
+            for start in range(0, len(user_ids), TransactionMonitorService.BATCH_SIZE):
+                chunk = user_ids[start:start + TransactionMonitorService.BATCH_SIZE]
+                increment = Case(
+                    *[When(pk=user_id, then=Value(credits[user_id][0])) for user_id in chunk],
+                    output_field=DecimalField(max_digits=12, decimal_places=2)
+                )
+                User.objects.filter(pk__in=chunk).update(
+                    balance_fcfa=Coalesce(F('balance_fcfa'), Value(Decimal('0'))) + increment
+                )
+            balances = User.objects.filter(pk__in=user_ids).values_list('id', 'username', 'balance_fcfa')
+        
+        updated_balances = {}
+        for user_id, username, new_balance in balances:
+            amount, count = credits[user_id]
+            updated_balances[username] = {
+                'old_balance': float(new_balance - amount),
+                'new_balance': float(new_balance),
+                'amount_added': float(amount),
+                'transactions': count
+            }
+        return updated_balances
+    
     @staticmethod
     def get_user_pending_transactions(user):
         """
@@ -0,0 +1,506 @@
+"""
+Stockage de la table `transactions`.
+
+- Partitionnement mensuel PostgreSQL (RANGE sur `created_at`) et création
+  anticipée des partitions des mois à venir.
+- Archivage froid : les transactions terminées plus anciennes que N mois sont
+  sérialisées, compressées (zlib) dans `TransactionArchive` puis supprimées.
+- Déport des payloads volumineux de `metadata` vers `TransactionPayload`.
+"""
+import hashlib
+import json
+import logging
+import re
+import zlib
+from datetime import date, datetime, time, timedelta, timezone as dt_timezone
+from decimal import Decimal
+
+from django.conf import settings
+from django.core import serializers
+from django.db import connection, transaction as db_transaction
+from django.utils import timezone
+
+from .models import Transaction, TransactionArchive, TransactionPayload, merge_metadata_value
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STORAGE_SETTINGS = {
+    'PARTITIONS_AHEAD': 3,
+    'ARCHIVE_AFTER_MONTHS': 12,
+    'ARCHIVE_BATCH_SIZE': 5000,
+    'OFFLOAD_BATCH_SIZE': 1000,
+    'OFFLOAD_AFTER_DAYS': 7,
+    'OFFLOAD_STATUSES': ['completed', 'failed', 'cancelled', 'expired', 'refunded'],
+    'SYNC_LOOKBACK_DAYS': 30,
+    'OFFLOADED_METADATA_KEYS': [
+        'feexpay_sync',
+        'status_history',
+        'api_response',
+        'provider_response',
+        'webhook_data',
+        'raw_payload',
+    ],
+}
+
+PARTITION_NAME_RE = re.compile(r'_y(?P<year>\d{4})m(?P<month>\d{2})$')
+
+
+class TransactionStorageError(Exception):
+    """Erreur de maintenance du stockage des transactions."""
+
+
+def get_storage_setting(name):
+    """Lire un paramètre de `settings.TRANSACTION_STORAGE` avec sa valeur par défaut."""
+    return getattr(settings, 'TRANSACTION_STORAGE', {}).get(name, DEFAULT_STORAGE_SETTINGS[name])
+
+
+# ============= PARTITIONS MENSUELLES =============
+
+def month_start(value):
+    """Premier jour du mois de `value` (date ou datetime)."""
+    if isinstance(value, datetime):
+        value = value.astimezone(dt_timezone.utc).date() if timezone.is_aware(value) else value.date()
+    return date(value.year, value.month, 1)
+
+
+def add_months(month, count):
+    """Décaler un premier jour de mois de `count` mois."""
+    index = month.year * 12 + (month.month - 1) + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def archive_cutoff_month(older_than_months=None):
+    """Premier mois non archivable : les mois antérieurs partent en stockage froid."""
+    if older_than_months is None:
+        older_than_months = get_storage_setting('ARCHIVE_AFTER_MONTHS')
+    return add_months(month_start(timezone.now()), -older_than_months)
+
+
+def month_bounds(month):
+    """Bornes [début, fin) d'un mois en datetimes UTC."""
+    start = datetime.combine(month, time.min, tzinfo=dt_timezone.utc)
+    end = datetime.combine(add_months(month, 1), time.min, tzinfo=dt_timezone.utc)
+    return start, end
+
+
+def partition_name(month):
+    """Nom de la partition d'un mois, ex. `transactions_y2025m01`."""
+    return f"{Transaction._meta.db_table}_y{month.year}m{month.month:02d}"
+
+
+def _require_postgresql():
+    if connection.vendor != 'postgresql':
+        raise TransactionStorageError(
+            f"Le partitionnement nécessite PostgreSQL (base actuelle : {connection.vendor})"
+        )
+
+
+def is_partitioned():
+    """La table `transactions` est-elle déjà une table partitionnée ?"""
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)",
+            [Transaction._meta.db_table]
+        )
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """Partitions mensuelles existantes, sous forme {mois: nom}."""
+    _require_postgresql()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT c.relname
+            FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass(%s)
+            """,
+            [Transaction._meta.db_table]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+
+    partitions = {}
+    for name in names:
+        match = PARTITION_NAME_RE.search(name)
+        if match:
+            partitions[date(int(match['year']), int(match['month']), 1)] = name
+    return dict(sorted(partitions.items()))
+
+
+def create_month_partition(month, cursor=None):
+    """Créer (si besoin) la partition d'un mois. Retourne son nom."""
+    _require_postgresql()
+    start, end = month_bounds(month)
+    name = partition_name(month)
+    qn = connection.ops.quote_name
+    sql = (
+        f"CREATE TABLE IF NOT EXISTS {qn(name)} PARTITION OF {qn(Transaction._meta.db_table)} "
+        f"FOR VALUES FROM (%s) TO (%s)"
+    )
+    if cursor is not None:
+        cursor.execute(sql, [start, end])
+    else:
+        with connection.cursor() as new_cursor:
+            new_cursor.execute(sql, [start, end])
+    return name
+
+
+def ensure_partitions(months_ahead=None, dry_run=False):
+    """
+    Garantir l'existence des partitions du mois courant et des `months_ahead`
+    mois suivants, pour que la partition par défaut reste vide.
+    """
+    _require_postgresql()
+    if not is_partitioned():
+        raise TransactionStorageError(
+            "La table des transactions n'est pas partitionnée (lancer d'abord --convert)"
+        )
+    if months_ahead is None:
+        months_ahead = get_storage_setting('PARTITIONS_AHEAD')
+
+    existing = list_partitions()
+    current = month_start(timezone.now())
+    created = []
+    for offset in range(months_ahead + 1):
+        month = add_months(current, offset)
+        if month in existing:
+            continue
+        if not dry_run:
+            create_month_partition(month)
+        created.append(partition_name(month))
+
+    if created:
+        logger.info(f"🗂️ Partitions de transactions créées: {', '.join(created)}")
+    return created
+
+
+def convert_to_partitioned(months_ahead=None):
+    """
+    Convertir la table `transactions` existante en table partitionnée par mois.
+
+    Opération de maintenance, exécutée dans une seule transaction sous verrou
+    exclusif : renommage de l'ancienne table, création de la table parente,
+    des partitions couvrant l'historique, copie des lignes puis création des
+    index. Les FK qui référencent `transactions` sont supprimées car PostgreSQL
+    ne les accepte pas vers une table partitionnée sans la clé de partition ;
+    les suppressions en cascade restent gérées par l'ORM.
+
+    Pour la même raison, une contrainte UNIQUE sur la table partitionnée doit
+    inclure `created_at` : l'unicité globale de `transaction_id` est donc
+    garantie par la table non partitionnée `transactions_refs`, tenue à jour
+    par trigger (insertion, changement de référence, suppression). Un doublon
+    lève toujours une IntegrityError à l'insertion.
+    """
+    _require_postgresql()
+    if is_partitioned():
+        raise TransactionStorageError("La table des transactions est déjà partitionnée")
+    if months_ahead is None:
+        months_ahead = get_storage_setting('PARTITIONS_AHEAD')
+
+    table = Transaction._meta.db_table
+    legacy = f"{table}_legacy"
+    qn = connection.ops.quote_name
+
+    with db_transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(f"LOCK TABLE {qn(table)} IN ACCESS EXCLUSIVE MODE")
+
+            cursor.execute(
+                """
+                SELECT conrelid::regclass::text, conname
+                FROM pg_constraint
+                WHERE contype = 'f' AND confrelid = to_regclass(%s)
+                """,
+                [table]
+            )
+            dropped_fks = cursor.fetchall()
+            for relation, constraint in dropped_fks:
+                cursor.execute(f"ALTER TABLE {relation} DROP CONSTRAINT {qn(constraint)}")
+
+            cursor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}")
+            cursor.execute(
+                f"CREATE TABLE {qn(table)} "
+                f"(LIKE {qn(legacy)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE) "
+                f"PARTITION BY RANGE ({qn('created_at')})"
+            )
+
+            cursor.execute(f"SELECT MIN(created_at), MAX(created_at), COUNT(*) FROM {qn(legacy)}")
+            oldest, newest, row_count = cursor.fetchone()
+
+            current = month_start(timezone.now())
+            first = month_start(oldest) if oldest else current
+            last = max(month_start(newest) if newest else current, add_months(current, months_ahead))
+            month = first
+            while month <= last:
+                create_month_partition(month, cursor=cursor)
+                month = add_months(month, 1)
+            cursor.execute(f"CREATE TABLE {qn(table + '_default')} PARTITION OF {qn(table)} DEFAULT")
+
+            cursor.execute(f"INSERT INTO {qn(table)} SELECT * FROM {qn(legacy)}")
+            cursor.execute(f"DROP TABLE {qn(legacy)}")
+
+            # Les contraintes d'unicité doivent inclure la clé de partition ;
+            # l'unicité globale de transaction_id passe par `transactions_refs`
+            cursor.execute(f"ALTER TABLE {qn(table)} ADD PRIMARY KEY (id, created_at)")
+            cursor.execute(
+                f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(table + '_transaction_id_created_at_uniq')} "
+                f"UNIQUE (transaction_id, created_at)"
+            )
+            _create_reference_table(cursor, table)
+            for field in Transaction._meta.concrete_fields:
+                if field.is_relation:
+                    cursor.execute(
+                        f"CREATE INDEX {qn(f'{table}_{field.column}_idx')} "
+                        f"ON {qn(table)} ({qn(field.column)})"
+                    )
+
+        with connection.schema_editor(atomic=False) as editor:
+            for index in Transaction._meta.indexes:
+                editor.add_index(Transaction, index)
+
+    logger.info(
+        f"🗂️ Table {table} partitionnée: {row_count} lignes copiées, "
+        f"{len(dropped_fks)} FK supprimées"
+    )
+    return {
+        'rows': row_count,
+        'dropped_foreign_keys': [constraint for _, constraint in dropped_fks],
+        'partitions': list(list_partitions().values()),
+    }
+
+
+def _create_reference_table(cursor, table):
+    """Table d'unicité globale de `transaction_id`, synchronisée par trigger."""
+    qn = connection.ops.quote_name
+    refs = qn(f"{table}_refs")
+    function = qn(f"{table}_refs_sync")
+    cursor.execute(f"CREATE TABLE {refs} (transaction_id varchar(100) PRIMARY KEY)")
+    cursor.execute(f"INSERT INTO {refs} SELECT transaction_id FROM {qn(table)}")
+    cursor.execute(
+        f"""
+        CREATE FUNCTION {function}() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'INSERT' THEN
+                INSERT INTO {refs} (transaction_id) VALUES (NEW.transaction_id);
+                RETURN NEW;
+            ELSIF TG_OP = 'UPDATE' THEN
+                IF NEW.transaction_id IS DISTINCT FROM OLD.transaction_id THEN
+                    UPDATE {refs} SET transaction_id = NEW.transaction_id
+                    WHERE transaction_id = OLD.transaction_id;
+                END IF;
+                RETURN NEW;
+            END IF;
+            DELETE FROM {refs} WHERE transaction_id = OLD.transaction_id;
+            RETURN OLD;
+        END
+        $$ LANGUAGE plpgsql
+        """
+    )
+    cursor.execute(
+        f"CREATE TRIGGER {qn(f'{table}_refs_sync')} "
+        f"BEFORE INSERT OR UPDATE OF transaction_id OR DELETE ON {qn(table)} "
+        f"FOR EACH ROW EXECUTE FUNCTION {function}()"
+    )
+
+
+def drop_empty_partitions(before_month, dry_run=False):
+    """Détacher et supprimer les partitions vides antérieures à `before_month`."""
+    _require_postgresql()
+    qn = connection.ops.quote_name
+    table = Transaction._meta.db_table
+    dropped = []
+    with connection.cursor() as cursor:
+        for month, name in list_partitions().items():
+            if month >= before_month:
+                continue
+            cursor.execute(f"SELECT EXISTS (SELECT 1 FROM {qn(name)})")
+            if cursor.fetchone()[0]:
+                continue
+            if not dry_run:
+                cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}")
+                cursor.execute(f"DROP TABLE {qn(name)}")
+            dropped.append(name)
+    return dropped
+
+
+# ============= ARCHIVAGE FROID =============
+
+def _json_default(value):
+    # Contrairement à DjangoJSONEncoder, on garde les microsecondes des dates
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    return str(value)
+
+
+def encode_archive_data(objects):
+    """Sérialiser des instances en JSON puis compresser avec zlib."""
+    raw = json.dumps(
+        serializers.serialize('python', objects),
+        default=_json_default,
+        separators=(',', ':')
+    ).encode('utf-8')
+    return zlib.compress(raw, 9), hashlib.sha256(raw).hexdigest()
+
+
+def decode_archive_data(data):
+    """Décompresser un lot d'archive et retourner les objets désérialisés."""
+    raw = json.loads(zlib.decompress(data).decode('utf-8'))
+    return list(serializers.deserialize('python', raw))
+
+
+def archivable_transactions(cutoff):
+    """
+    Transactions terminées créées avant `cutoff` et sans objet lié (retrait,
+    webhook, commission...) : celles-ci restent dans la table chaude.
+    """
+    queryset = Transaction.objects.filter(status='completed', created_at__lt=cutoff)
+    for relation in Transaction._meta.related_objects:
+        if relation.related_model is TransactionPayload:
+            continue
+        queryset = queryset.filter(**{f'{relation.name}__isnull': True})
+    return queryset
+
+
+def archive_completed_transactions(older_than_months=None, batch_size=None, dry_run=False):
+    """
+    Déplacer les transactions terminées de plus de `older_than_months` mois vers
+    `TransactionArchive`, par lots compressés regroupés par mois.
+    """
+    if batch_size is None:
+        batch_size = get_storage_setting('ARCHIVE_BATCH_SIZE')
+
+    cutoff, _ = month_bounds(archive_cutoff_month(older_than_months))
+    candidates = archivable_transactions(cutoff)
+
+    stats = {'cutoff': cutoff.isoformat(), 'archived': 0, 'batches': 0, 'months': []}
+    if dry_run:
+        stats['archived'] = candidates.count()
+        return stats
+
+    while True:
+        with db_transaction.atomic():
+            batch = list(
+                candidates.select_for_update(skip_locked=True, of=('self',))
+                .order_by('created_at', 'id')[:batch_size]
+            )
+            if not batch:
+                break
+
+            # Un lot d'archive ne couvre qu'un seul mois
+            period = month_start(batch[0].created_at)
+            _, period_end = month_bounds(period)
+            batch = [txn for txn in batch if txn.created_at < period_end]
+            ids = [txn.pk for txn in batch]
+            payloads = list(TransactionPayload.objects.filter(transaction_id__in=ids))
+
+            data, checksum = encode_archive_data(batch + payloads)
+            TransactionArchive.objects.create(
+                period=period,
+                row_count=len(batch),
+                total_amount=sum((txn.amount for txn in batch), Decimal('0.00')),
+                first_created_at=batch[0].created_at,
+                last_created_at=batch[-1].created_at,
+                data=data,
+                checksum=checksum,
+            )
+            TransactionPayload.objects.filter(transaction_id__in=ids).delete()
+            Transaction.objects.filter(pk__in=ids).delete()
+
+        stats['archived'] += len(batch)
+        stats['batches'] += 1
+        if period.isoformat() not in stats['months']:
+            stats['months'].append(period.isoformat())
+
+    if stats['archived']:
+        logger.info(
+            f"🧊 {stats['archived']} transactions archivées en {stats['batches']} lots "
+            f"(avant {cutoff:%Y-%m})"
+        )
+    return stats
+
+
+def restore_archive(archive):
+    """Réinsérer dans la table chaude les transactions d'un lot d'archive."""
+    with db_transaction.atomic():
+        objects = decode_archive_data(bytes(archive.data))
+        for obj in objects:
+            obj.save()
+        archive.delete()
+    return sum(1 for obj in objects if isinstance(obj.object, Transaction))
+
+
+# ============= DÉPORT DES PAYLOADS =============
+
+def offload_metadata_payloads(keys=None, batch_size=None, older_than_days=None, dry_run=False):
+    """
+    Déplacer les clés volumineuses de `Transaction.metadata` vers
+    `TransactionPayload`. La métadonnée garde la liste `offloaded_keys`, que
+    `Transaction.get_full_metadata()` utilise pour recomposer l'ensemble.
+
+    Seules les transactions dans un statut final (OFFLOAD_STATUSES) et créées
+    il y a plus de `older_than_days` jours sont concernées : les transactions
+    en cours restent modifiées par les webhooks et la synchronisation FeexPay.
+    Un payload déjà déporté est fusionné avec la valeur réécrite dans la ligne.
+    """
+    keys = list(keys or get_storage_setting('OFFLOADED_METADATA_KEYS'))
+    if batch_size is None:
+        batch_size = get_storage_setting('OFFLOAD_BATCH_SIZE')
+    if older_than_days is None:
+        older_than_days = get_storage_setting('OFFLOAD_AFTER_DAYS')
+
+    queryset = Transaction.objects.filter(
+        metadata__has_any_keys=keys,
+        status__in=get_storage_setting('OFFLOAD_STATUSES'),
+        created_at__lt=timezone.now() - timedelta(days=older_than_days),
+    ).only('id', 'metadata')
+    stats = {'transactions': 0, 'payloads': 0}
+    if dry_run:
+        stats['transactions'] = queryset.count()
+        return stats
+
+    last_pk = None
+    while True:
+        page = queryset.order_by('pk')
+        if last_pk is not None:
+            page = page.filter(pk__gt=last_pk)
+        batch = list(page[:batch_size])
+        if not batch:
+            break
+        last_pk = batch[-1].pk
+
+        existing = {
+            (payload.transaction_id, payload.key): payload.payload
+            for payload in TransactionPayload.objects.filter(transaction__in=batch, key__in=keys)
+        }
+        payloads = []
+        for txn in batch:
+            metadata = dict(txn.metadata or {})
+            moved = [key for key in keys if key in metadata]
+            for key in moved:
+                value = metadata.pop(key)
+                if (txn.pk, key) in existing:
+                    value = merge_metadata_value(existing[(txn.pk, key)], value)
+                payloads.append(TransactionPayload(transaction_id=txn.pk, key=key, payload=value))
+            metadata['offloaded_keys'] = sorted(set(metadata.get('offloaded_keys', [])) | set(moved))
+            txn.metadata = metadata
+
+        with db_transaction.atomic():
+            TransactionPayload.objects.bulk_create(
+                payloads,
+                update_conflicts=True,
+                unique_fields=['transaction', 'key'],
+                update_fields=['payload'],
+            )
+            Transaction.objects.bulk_update(batch, ['metadata'])
+
+        stats['transactions'] += len(batch)
+        stats['payloads'] += len(payloads)
+
+    if stats['payloads']:
+        logger.info(
+            f"📦 {stats['payloads']} payloads déportés depuis {stats['transactions']} transactions"
+        )
+    return stats
@@ -30,7 +30,7 @@ from apps.accounts.permissions import (
 )
 from apps.core.permissions import IsOwnerOrReadOnly
 from apps.core.utils import log_user_activity, get_client_ip
-from apps.core.pagination import StandardResultsSetPagination
+from apps.core.pagination import CursorPagination, StandardResultsSetPagination
 
 from .processors import get_payment_processor
 
@@ -61,7 +61,8 @@ class TransactionListView(generics.ListAPIView):
     
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
-    pagination_class = StandardResultsSetPagination
+    # Historique potentiellement très long : pagination par clé, sans COUNT(*) ni OFFSET
+    pagination_class = CursorPagination
     
     def get_queryset(self):
         """Retourner les transactions de l'utilisateur connecté."""
@@ -80,7 +81,7 @@ class TransactionListView(generics.ListAPIView):
         if currency:
             queryset = queryset.filter(currency=currency)
         
-        return queryset.order_by('-created_at')
+        return queryset.order_by('-created_at', '-id')
 
 
 class TransactionDetailView(generics.RetrieveAPIView):
@@ -428,7 +429,7 @@ class DepositConfirmView(APIView):
                         'feexpay_status': feexpay_status,
                         'feexpay_amount': feexpay_amount,
                         'last_feexpay_update': timezone.now().isoformat(),
-                        'status_history': metadata.get('status_history', []) + [{
+                        'status_history': existing_transaction.get_metadata_value('status_history', []) + [{
                             'from': old_status,
                             'to': our_status,
                             'timestamp': timezone.now().isoformat(),
@@ -890,10 +891,12 @@ class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = TransactionSerializer
     permission_classes = [permissions.IsAuthenticated, IsOwnerOrReadOnly]
     pagination_class = StandardResultsSetPagination
+    query_budget = {'list': 4, 'retrieve': 3, 'summary': 2}
     
     def get_queryset(self):
         """Retourner les transactions de l'utilisateur."""
-        return Transaction.objects.filter(user=self.request.user)
+        # payment_method est lu par fees_breakdown pour chaque transaction
+        return Transaction.objects.filter(user=self.request.user).select_related('payment_method')
     
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
@@ -916,15 +919,21 @@ class TransactionViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['get'])
     def summary(self, request):
         """Résumé des transactions."""
-        queryset = self.get_queryset().filter(status='completed')
+        tx_types = ['deposit', 'withdrawal', 'bet', 'win']
+        # Une seule agrégation conditionnelle au lieu de deux requêtes par type
+        totals = self.get_queryset().filter(status='completed').aggregate(**{
+            f'{tx_type}_{name}': function(field, filter=Q(transaction_type=tx_type))
+            for tx_type in tx_types
+            for name, function, field in (('count', Count, 'id'), ('total', Sum, 'amount'))
+        })
         
-        summary = {}
-        for tx_type in ['deposit', 'withdrawal', 'bet', 'win']:
-            transactions = queryset.filter(transaction_type=tx_type)
-            summary[tx_type] = {
-                'count': transactions.count(),
-                'total': transactions.aggregate(Sum('amount'))['amount__sum'] or 0
+        summary = {
+            tx_type: {
+                'count': totals[f'{tx_type}_count'],
+                'total': totals[f'{tx_type}_total'] or 0
             }
+            for tx_type in tx_types
+        }
         
         return Response(summary)
 
@@ -10,7 +10,7 @@ from decimal import Decimal
 
 from .models import (
     ReferralProgram, Referral, ReferralCommission,
-    PremiumSubscription, ReferralStatistics, ReferralBonus
+    PremiumSubscription, ReferralStatistics, ReferralBonus, ReferralFraudFlag
 )
 from .tasks import recalculate_user_statistics
 
@@ -442,7 +442,7 @@ class ReferralStatisticsAdmin(admin.ModelAdmin):
     readonly_fields = [
         'total_referrals', 'active_referrals', 'new_referrals',
         'total_games_played', 'commission_games', 'total_commission_earned',
-        'total_bet_volume', 'average_commission_per_game',
+        'total_bet_volume', 'average_commission_per_game', 'total_bonus_earned',
         'created_at', 'updated_at'
     ]
     
@@ -464,6 +464,29 @@ class ReferralStatisticsAdmin(admin.ModelAdmin):
     conversion_rate.short_description = 'Taux conversion'
 
 
+@admin.register(ReferralFraudFlag)
+class ReferralFraudFlagAdmin(admin.ModelAdmin):
+    """Administration des signalements de fraude."""
+    
+    list_display = ['rule', 'user', 'severity', 'status', 'created_at']
+    list_filter = ['rule', 'severity', 'status', 'created_at']
+    search_fields = ['user__username']
+    readonly_fields = ['user', 'referral', 'rule', 'severity', 'details', 'created_at']
+    actions = ['confirm_flags', 'dismiss_flags']
+    
+    def confirm_flags(self, request, queryset):
+        """Confirmer les signalements sélectionnés."""
+        updated = queryset.update(status='confirmed', reviewed_at=timezone.now())
+        self.message_user(request, f'{updated} signalements confirmés.')
+    confirm_flags.short_description = "Confirmer les signalements"
+    
+    def dismiss_flags(self, request, queryset):
+        """Écarter les signalements sélectionnés."""
+        updated = queryset.update(status='dismissed', reviewed_at=timezone.now())
+        self.message_user(request, f'{updated} signalements écartés.')
+    dismiss_flags.short_description = "Écarter les signalements"
+
+
 # Configuration globale de l'admin
 admin.site.site_header = "RUMO RUSH - Administration"
 admin.site.site_title = "RUMO RUSH Admin"
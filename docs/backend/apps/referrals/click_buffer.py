@@ -0,0 +1,293 @@
+# apps/referrals/click_buffer.py
+# ===============================
+
+"""
+Tracking différé des clics et partages de codes de parrainage.
+
+Un clic ne touche plus la base : il incrémente un compteur par code et ajoute
+sa ligne brute dans un tampon (Redis si le cache Django est sur Redis, sinon
+en mémoire du processus). Une tâche planifiée à la fin de la fenêtre vide le
+tampon avec un seul `UPDATE ... SET total_clicks = total_clicks + n` par code
+et un `bulk_create` des lignes brutes. Au-delà d'un seuil de clics par code et
+par fenêtre, seule une fraction des lignes brutes est conservée ; les
+compteurs restent exacts.
+"""
+
+import json
+import logging
+import random
+import threading
+import uuid
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .fraud import FraudEvent, device_fingerprint, publish_on_commit
+from .models import ReferralCode, ReferralCodeClick, ReferralCodeShare
+
+logger = logging.getLogger(__name__)
+
+CLICK_FLUSH_SCHEDULED_KEY = 'referrals:click_flush_scheduled'
+
+DEFAULT_CLICK_SETTINGS = {
+    'CLICK_FLUSH_SECONDS': 5,
+    'CLICK_SAMPLE_THRESHOLD': 1000,  # Lignes brutes conservées intégralement par code et par fenêtre
+    'CLICK_SAMPLE_RATE': 0.1,  # Fraction conservée au-delà du seuil
+}
+
+COUNTERS = {
+    'clicks': 'total_clicks',
+    'shares': 'total_shares',
+}
+
+
+def get_click_setting(key: str):
+    """Lire un paramètre de tracking dans REFERRAL_SETTINGS."""
+    return getattr(settings, 'REFERRAL_SETTINGS', {}).get(key, DEFAULT_CLICK_SETTINGS[key])
+
+
+# ===== TAMPONS =====
+
+class RedisClickBuffer:
+    """Compteurs dans un hash Redis, lignes brutes dans une liste."""
+
+    COUNTS_KEY = 'referrals:clicks:counts'
+    ROWS_KEY = 'referrals:clicks:rows'
+
+    def __init__(self, client):
+        self.client = client
+
+    def incr(self, code_id: str, kind: str) -> int:
+        """Incrémenter le compteur `kind` d'un code et retourner sa valeur dans la fenêtre."""
+        return self.client.hincrby(self.COUNTS_KEY, f'{code_id}:{kind}', 1)
+
+    def push(self, row: str):
+        self.client.rpush(self.ROWS_KEY, row)
+
+    def drain(self) -> Tuple[Dict[str, int], List[str]]:
+        """Vider le tampon atomiquement (MULTI/EXEC)."""
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hgetall(self.COUNTS_KEY)
+        pipe.lrange(self.ROWS_KEY, 0, -1)
+        pipe.delete(self.COUNTS_KEY, self.ROWS_KEY)
+        counts, rows, _ = pipe.execute()
+        return (
+            {key.decode(): int(value) for key, value in counts.items()},
+            [row.decode() for row in rows],
+        )
+
+    def restore(self, counts: Dict[str, int], rows: List[str]):
+        """Remettre dans le tampon un lot dont l'écriture a échoué."""
+        pipe = self.client.pipeline()
+        for key, value in counts.items():
+            pipe.hincrby(self.COUNTS_KEY, key, value)
+        if rows:
+            pipe.rpush(self.ROWS_KEY, *rows)
+        pipe.execute()
+
+
+class MemoryClickBuffer:
+    """Équivalent en mémoire de `RedisClickBuffer` (tests, cache local)."""
+
+    def __init__(self):
+        self._counts = defaultdict(int)
+        self._rows = []
+        self._lock = threading.Lock()
+
+    def incr(self, code_id, kind):
+        with self._lock:
+            key = f'{code_id}:{kind}'
+            self._counts[key] += 1
+            return self._counts[key]
+
+    def push(self, row):
+        with self._lock:
+            self._rows.append(row)
+
+    def drain(self):
+        with self._lock:
+            counts, rows = dict(self._counts), self._rows
+            self._counts, self._rows = defaultdict(int), []
+            return counts, rows
+
+    def restore(self, counts, rows):
+        with self._lock:
+            for key, value in counts.items():
+                self._counts[key] += value
+            self._rows.extend(rows)
+
+
+_local_buffer = MemoryClickBuffer()
+
+
+def get_click_buffer():
+    """Tampon Redis si le cache Django est sur Redis, sinon tampon local au processus."""
+    if 'redis' in settings.CACHES['default']['BACKEND'].lower():
+        from django_redis import get_redis_connection
+        return RedisClickBuffer(get_redis_connection('default'))
+    return _local_buffer
+
+
+def schedule_flush():
+    """Planifier un vidage du tampon à la fin de la fenêtre courante."""
+    window = get_click_setting('CLICK_FLUSH_SECONDS')
+    if cache.add(CLICK_FLUSH_SCHEDULED_KEY, 1, timeout=window + 5):
+        from .tasks import flush_referral_clicks
+        flush_referral_clicks.apply_async(countdown=window)
+
+
+# ===== ENREGISTREMENT =====
+
+def record_click(code: ReferralCode, ip: str = '', user_agent: str = '', referrer: str = '',
+                 buffer=None) -> Optional[str]:
+    """
+    Enregistrer un clic sur un code sans écrire en base.
+
+    Returns:
+        str: Identifiant de la ligne brute, ou None si elle a été écartée par l'échantillonnage
+    """
+    buffer = buffer or get_click_buffer()
+    click_id = str(uuid.uuid4())
+    row = json.dumps({
+        'kind': 'click',
+        'id': click_id,
+        'code_id': str(code.pk),
+        'at': timezone.now().isoformat(),
+        'ip': ip or None,
+        'user_agent': user_agent,
+        'referrer': referrer[:500],
+    })
+    try:
+        rank = buffer.incr(code.pk, 'clicks')
+        if rank <= get_click_setting('CLICK_SAMPLE_THRESHOLD') or random.random() < get_click_setting('CLICK_SAMPLE_RATE'):
+            buffer.push(row)
+        else:
+            click_id = None
+        schedule_flush()
+    except Exception as e:
+        # Le tracking ne doit jamais bloquer l'accès au lien
+        logger.error(f"❌ Clic non enregistré pour {code.code}: {e}")
+        return None
+
+    publish_on_commit(FraudEvent(
+        kind='click',
+        user_id='',
+        referrer_id=str(code.user_id),
+        ip=ip or '',
+        device=device_fingerprint(user_agent),
+    ))
+    return click_id
+
+
+def record_share(code: ReferralCode, channel: str, ip: str = '', user_agent: str = '',
+                 buffer=None) -> Optional[str]:
+    """
+    Enregistrer un partage de code sans écrire en base.
+
+    Returns:
+        str: Identifiant de la ligne de partage créée au prochain vidage
+    """
+    buffer = buffer or get_click_buffer()
+    share_id = str(uuid.uuid4())
+    row = json.dumps({
+        'kind': 'share',
+        'id': share_id,
+        'code_id': str(code.pk),
+        'at': timezone.now().isoformat(),
+        'channel': channel,
+        'ip': ip or None,
+        'user_agent': user_agent,
+    })
+    try:
+        buffer.incr(code.pk, 'shares')
+        buffer.push(row)
+        schedule_flush()
+    except Exception as e:
+        logger.error(f"❌ Partage non enregistré pour {code.code}: {e}")
+        return None
+    return share_id
+
+
+# ===== VIDAGE =====
+
+def flush_click_buffer(buffer=None) -> Dict:
+    """
+    Écrire en base les compteurs et lignes brutes accumulés.
+
+    Une mise à jour `F()` par code (dans un ordre stable pour éviter les
+    interblocages) et un `bulk_create` par type de ligne, dans une seule
+    transaction. En cas d'échec, le lot est remis dans le tampon.
+
+    Returns:
+        dict: Nombre de codes mis à jour et de lignes de clics et de partages écrites
+    """
+    # Les clics reçus à partir de maintenant déclenchent un nouveau vidage
+    cache.delete(CLICK_FLUSH_SCHEDULED_KEY)
+    buffer = buffer or get_click_buffer()
+    counts, rows = buffer.drain()
+    stats = {'codes': 0, 'clicks': 0, 'shares': 0}
+    if not counts and not rows:
+        return stats
+
+    increments = defaultdict(dict)
+    for key, value in counts.items():
+        code_id, kind = key.rsplit(':', 1)
+        increments[code_id][COUNTERS[kind]] = value
+
+    try:
+        with transaction.atomic():
+            existing = {
+                str(pk) for pk in ReferralCode.objects.filter(pk__in=list(increments)).values_list('pk', flat=True)
+            }
+            for code_id in sorted(existing):
+                ReferralCode.objects.filter(pk=code_id).update(
+                    **{field: F(field) + value for field, value in increments[code_id].items()}
+                )
+
+            clicks, shares = _build_rows(rows, existing)
+            ReferralCodeClick.objects.bulk_create(clicks, batch_size=1000, ignore_conflicts=True)
+            ReferralCodeShare.objects.bulk_create(shares, batch_size=1000, ignore_conflicts=True)
+    except Exception:
+        buffer.restore(counts, rows)
+        raise
+
+    stats.update(codes=len(existing), clicks=len(clicks), shares=len(shares))
+    logger.info(
+        f"🔗 Tracking de parrainage: {stats['codes']} codes, "
+        f"{stats['clicks']} clics et {stats['shares']} partages écrits"
+    )
+    return stats
+
+
+def _build_rows(rows: List[str], code_ids) -> Tuple[List[ReferralCodeClick], List[ReferralCodeShare]]:
+    """Instancier les lignes brutes, en ignorant celles des codes supprimés entre-temps."""
+    clicks, shares = [], []
+    for raw in rows:
+        data = json.loads(raw)
+        if data['code_id'] not in code_ids:
+            continue
+        if data['kind'] == 'click':
+            clicks.append(ReferralCodeClick(
+                id=data['id'],
+                code_id=data['code_id'],
+                clicked_at=parse_datetime(data['at']),
+                visitor_ip=data['ip'],
+                user_agent=data['user_agent'],
+                referrer=data['referrer'],
+            ))
+        else:
+            shares.append(ReferralCodeShare(
+                id=data['id'],
+                code_id=data['code_id'],
+                channel=data['channel'],
+                shared_at=parse_datetime(data['at']),
+                shared_by_ip=data['ip'],
+                user_agent=data['user_agent'],
+            ))
+    return clicks, shares
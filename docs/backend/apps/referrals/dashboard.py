@@ -0,0 +1,308 @@
+# apps/referrals/dashboard.py
+# ============================
+
+"""
+Tableaux de bord précalculés des parrains.
+
+Chaque parrain a une ligne `ReferrerDashboardSnapshot` servie telle quelle par
+l'endpoint du tableau de bord (une lecture par clé primaire, ETag = version).
+Le règlement des commissions met à jour ses compteurs par `F()` dans sa propre
+transaction ; les listes affichées (commissions récentes, meilleurs filleuls,
+bonus) sont recalculées en différé par une tâche planifiée à la fin d'une
+courte fenêtre. Les autres écritures (parrainage, bonus, abonnement, code)
+marquent la ligne comme à recalculer. `check_dashboards` compare les
+compteurs à un recalcul complet depuis les tables sources.
+"""
+
+import logging
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import (
+    PremiumSubscription, Referral, ReferralBonus, ReferralCode, ReferralCommission,
+    ReferralProgram, ReferrerDashboardSnapshot,
+)
+
+logger = logging.getLogger(__name__)
+
+DASHBOARD_REFRESH_SCHEDULED_KEY = 'referrals:dashboard_refresh_scheduled'
+
+DEFAULT_DASHBOARD_SETTINGS = {
+    'DASHBOARD_REFRESH_SECONDS': 2,
+    'DASHBOARD_REFRESH_BATCH_SIZE': 500,
+}
+
+# Compteurs maintenus incrémentalement et vérifiés par `check_dashboards`
+COUNTER_FIELDS = (
+    'total_referrals',
+    'active_referrals',
+    'total_games_played',
+    'total_commission_earned',
+    'commission_this_month',
+    'pending_commissions',
+)
+
+
+def get_dashboard_setting(key: str):
+    """Lire un paramètre de tableau de bord dans REFERRAL_SETTINGS."""
+    return getattr(settings, 'REFERRAL_SETTINGS', {}).get(key, DEFAULT_DASHBOARD_SETTINGS[key])
+
+
+def current_month() -> date:
+    return timezone.localdate().replace(day=1)
+
+
+# ===== CALCUL COMPLET =====
+
+def compute_dashboard(user_id, month: Optional[date] = None) -> Dict:
+    """
+    Recalculer compteurs et sections d'un parrain depuis les tables sources.
+
+    Returns:
+        dict: Valeurs des champs de `ReferrerDashboardSnapshot`
+    """
+    from .serializers import ReferralBonusSerializer, ReferralCommissionSerializer, ReferralSerializer
+
+    month = month or current_month()
+    referrals = Referral.objects.filter(referrer_id=user_id)
+    totals = referrals.aggregate(
+        total_referrals=Count('id'),
+        active_referrals=Count('id', filter=Q(status='active')),
+        total_games_played=Sum('games_played'),
+        total_commission_earned=Sum('total_commission_earned'),
+    )
+    commissions = ReferralCommission.objects.filter(referral__referrer_id=user_id).aggregate(
+        commission_this_month=Sum('amount', filter=Q(status='completed', created_at__date__gte=month)),
+        pending_commissions=Sum('amount', filter=Q(status='pending')),
+    )
+
+    referral_code = ReferralCode.objects.filter(user_id=user_id).values_list('code', flat=True).first()
+    default_program = ReferralProgram.get_default_program()
+    top_referrals = referrals.select_related('referrer', 'referred', 'program').order_by(
+        '-total_commission_earned'
+    )[:5]
+    recent_commissions = ReferralCommission.objects.filter(
+        referral__referrer_id=user_id
+    ).select_related('referral__referrer', 'referral__referred', 'game').order_by('-created_at')[:10]
+    available_bonuses = ReferralBonus.objects.filter(
+        referral__referrer_id=user_id,
+        status='approved'
+    ).select_related('referral__referrer', 'referral__referred').order_by('-created_at')[:5]
+
+    return {
+        'month': month,
+        'total_referrals': totals['total_referrals'],
+        'active_referrals': totals['active_referrals'],
+        'total_games_played': totals['total_games_played'] or 0,
+        'total_commission_earned': totals['total_commission_earned'] or Decimal('0.00'),
+        'commission_this_month': commissions['commission_this_month'] or Decimal('0.00'),
+        'pending_commissions': commissions['pending_commissions'] or Decimal('0.00'),
+        'sections': {
+            'premium_status': PremiumSubscription.objects.filter(
+                user_id=user_id,
+                status='active',
+                end_date__gt=timezone.now()
+            ).exists(),
+            'referral_code': referral_code or f"USER_{user_id}",
+            'commission_rate': float(default_program.commission_rate) if default_program else 10.0,
+            'top_referrals': ReferralSerializer(top_referrals, many=True).data,
+            'recent_commissions': ReferralCommissionSerializer(recent_commissions, many=True).data,
+            'available_bonuses': ReferralBonusSerializer(available_bonuses, many=True).data,
+        },
+    }
+
+
+def dashboard_payload(snapshot: ReferrerDashboardSnapshot) -> Dict:
+    """Réponse de l'endpoint du tableau de bord à partir d'une ligne précalculée."""
+    stats = {
+        'conversion_rate': 0.0,
+        'average_games_per_referral': 0.0,
+        'total_games_played': snapshot.total_games_played,
+    }
+    if snapshot.active_referrals:
+        stats['conversion_rate'] = snapshot.active_referrals / snapshot.total_referrals * 100
+        stats['average_games_per_referral'] = snapshot.total_games_played / snapshot.active_referrals
+
+    sections = snapshot.sections
+    return {
+        # Statistiques principales
+        'total_referrals': snapshot.total_referrals,
+        'active_referrals': snapshot.active_referrals,
+        'total_commission_earned': float(snapshot.total_commission_earned),
+        'commission_this_month': float(snapshot.commission_this_month),
+        'pending_commissions': float(snapshot.pending_commissions),
+
+        # Informations utilisateur
+        'premium_status': sections.get('premium_status', False),
+        'referral_code': sections.get('referral_code'),
+        'commission_rate': sections.get('commission_rate', 10.0),
+
+        # Données détaillées
+        'stats': stats,
+        'recent_commissions': sections.get('recent_commissions', []),
+        'top_referrals': sections.get('top_referrals', []),
+        'available_bonuses': sections.get('available_bonuses', []),
+    }
+
+
+# ===== LECTURE ET RECALCUL =====
+
+def get_dashboard(user_id) -> ReferrerDashboardSnapshot:
+    """
+    Tableau de bord d'un parrain : une lecture par clé primaire.
+
+    La ligne n'est recalculée de façon synchrone qu'à la première consultation
+    et au changement de mois.
+    """
+    snapshot = ReferrerDashboardSnapshot.objects.filter(pk=user_id).first()
+    if snapshot is None or snapshot.month != current_month():
+        snapshot = refresh_dashboard(user_id)
+    return snapshot
+
+
+def refresh_dashboard(user_id) -> ReferrerDashboardSnapshot:
+    """
+    Recalculer entièrement la ligne d'un parrain.
+
+    La ligne est verrouillée avant la lecture des tables sources : un règlement
+    concurrent applique ses incréments avant ou après le recalcul, jamais pendant.
+    """
+    with transaction.atomic():
+        ReferrerDashboardSnapshot.objects.get_or_create(user_id=user_id, defaults={'month': current_month()})
+        snapshot = ReferrerDashboardSnapshot.objects.select_for_update().get(pk=user_id)
+        for field, value in compute_dashboard(user_id).items():
+            setattr(snapshot, field, value)
+        snapshot.version += 1
+        snapshot.is_stale = False
+        snapshot.updated_at = timezone.now()
+        snapshot.save()
+    return snapshot
+
+
+def refresh_stale_dashboards(batch_size: Optional[int] = None) -> int:
+    """
+    Recalculer les lignes marquées comme à recalculer.
+
+    Returns:
+        int: Nombre de tableaux de bord recalculés
+    """
+    # Les écritures à partir de maintenant déclenchent un nouveau recalcul
+    cache.delete(DASHBOARD_REFRESH_SCHEDULED_KEY)
+    batch_size = batch_size or get_dashboard_setting('DASHBOARD_REFRESH_BATCH_SIZE')
+    user_ids = list(
+        ReferrerDashboardSnapshot.objects.filter(is_stale=True).values_list('pk', flat=True)[:batch_size]
+    )
+    for user_id in user_ids:
+        refresh_dashboard(user_id)
+    if len(user_ids) == batch_size:
+        schedule_dashboard_refresh()
+    return len(user_ids)
+
+
+def schedule_dashboard_refresh():
+    """Planifier un recalcul des lignes périmées à la fin de la fenêtre courante."""
+    window = get_dashboard_setting('DASHBOARD_REFRESH_SECONDS')
+    if cache.add(DASHBOARD_REFRESH_SCHEDULED_KEY, 1, timeout=window + 5):
+        from .tasks import refresh_referral_dashboards
+        refresh_referral_dashboards.apply_async(countdown=window)
+
+
+# ===== MISES À JOUR INCRÉMENTALES =====
+
+def mark_stale(user_ids: Iterable):
+    """Marquer des tableaux de bord comme à recalculer (les lignes absentes seront créées à la lecture)."""
+    updated = ReferrerDashboardSnapshot.objects.filter(pk__in=list(user_ids)).update(
+        is_stale=True,
+        version=F('version') + 1,
+        updated_at=timezone.now()
+    )
+    if updated:
+        transaction.on_commit(schedule_dashboard_refresh)
+
+
+def record_commission_created(commission: ReferralCommission):
+    """Nouvelle commission en attente pour un parrain."""
+    if commission.status != 'pending':
+        return mark_stale([commission.referral.referrer_id])
+    updated = ReferrerDashboardSnapshot.objects.filter(pk=commission.referral.referrer_id).update(
+        pending_commissions=F('pending_commissions') + commission.amount,
+        is_stale=True,
+        version=F('version') + 1,
+        updated_at=timezone.now()
+    )
+    if updated:
+        transaction.on_commit(schedule_dashboard_refresh)
+
+
+def apply_settlement(settled: Dict, cancelled: Dict, now=None):
+    """
+    Appliquer un lot de règlement aux tableaux de bord, dans la transaction du lot.
+
+    Args:
+        settled: parrain -> commissions réglées
+        cancelled: parrain -> commissions annulées
+    """
+    referrer_ids = set(settled) | set(cancelled)
+    if not referrer_ids:
+        return
+    now = now or timezone.now()
+    month = current_month()
+    for referrer_id in sorted(referrer_ids, key=str):
+        done = settled.get(referrer_id, [])
+        released = done + cancelled.get(referrer_id, [])
+        ReferrerDashboardSnapshot.objects.filter(pk=referrer_id).update(
+            total_games_played=F('total_games_played') + len(done),
+            commission_this_month=F('commission_this_month') + sum(
+                (commission.amount for commission in done if timezone.localdate(commission.created_at) >= month),
+                Decimal('0.00')
+            ),
+            pending_commissions=F('pending_commissions') - sum(
+                (commission.amount for commission in released), Decimal('0.00')
+            ),
+            # Les listes (statuts des commissions récentes) suivent en différé
+            is_stale=True,
+            version=F('version') + 1,
+            updated_at=now
+        )
+    transaction.on_commit(schedule_dashboard_refresh)
+
+
+# ===== COHÉRENCE =====
+
+def check_dashboards(user_ids: Optional[Iterable] = None, fix: bool = False) -> List[Dict]:
+    """
+    Comparer les compteurs des tableaux de bord à un recalcul complet.
+
+    Chaque ligne est verrouillée pendant la comparaison pour qu'un règlement en
+    cours ne produise pas de faux écart.
+
+    Returns:
+        list: Un rapport par tableau de bord divergent ({'user_id', 'fields': {champ: (stocké, recalculé)}})
+    """
+    snapshots = ReferrerDashboardSnapshot.objects.filter(month=current_month())
+    if user_ids is not None:
+        snapshots = snapshots.filter(pk__in=list(user_ids))
+
+    drifts = []
+    for user_id in snapshots.values_list('pk', flat=True).iterator():
+        with transaction.atomic():
+            snapshot = ReferrerDashboardSnapshot.objects.select_for_update().get(pk=user_id)
+            live = compute_dashboard(user_id, snapshot.month)
+            fields = {
+                field: (getattr(snapshot, field), live[field])
+                for field in COUNTER_FIELDS
+                if getattr(snapshot, field) != live[field]
+            }
+        if fields:
+            drifts.append({'user_id': user_id, 'fields': fields})
+            logger.warning(f"⚠️ Tableau de bord du parrain {user_id} divergent: {fields}")
+            if fix:
+                refresh_dashboard(user_id)
+    return drifts
@@ -0,0 +1,453 @@
+# apps/referrals/fraud.py
+# ========================
+
+"""
+Détection en continu des abus de parrainage.
+
+Les événements (nouveau parrainage, commissions réglées, clic sur un code) sont
+publiés dans une file Redis puis consommés par une tâche planifiée à la fin
+d'une fenêtre d'environ une seconde. Chaque règle maintient ses compteurs à
+fenêtre glissante dans des sorted sets Redis (score = horodatage). Les
+signalements sont dédoublonnés puis persistés en une seule écriture groupée.
+
+Les règles sont des classes configurables via `REFERRAL_FRAUD['RULES']` et se
+testent sans Redis avec `MemoryWindowStore` et des flux d'événements synthétiques.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import asdict, dataclass, field
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+FRAUD_SCHEDULED_KEY = 'referrals:fraud_scheduled'
+
+DEFAULT_FRAUD_SETTINGS = {
+    'WINDOW_SECONDS': 1,  # Fenêtre de regroupement des événements
+    'BATCH_SIZE': 1000,
+    'FLAG_COOLDOWN': 3600,  # Un même signalement n'est répété qu'après ce délai
+    'RULES': {
+        'apps.referrals.fraud.SelfReferralRule': {},
+        'apps.referrals.fraud.ReferralVelocityRule': {'threshold': 10, 'window': 3600},
+        'apps.referrals.fraud.SharedIPRule': {'threshold': 3, 'window': 86400},
+        'apps.referrals.fraud.SharedDeviceRule': {'threshold': 5, 'window': 86400},
+        'apps.referrals.fraud.ClickVelocityRule': {'threshold': 30, 'window': 600},
+        'apps.referrals.fraud.EarningsRateRule': {'threshold': Decimal('50000'), 'window': 86400},
+    },
+}
+
+
+def get_fraud_setting(key: str):
+    """Lire un paramètre de REFERRAL_FRAUD avec sa valeur par défaut."""
+    return getattr(settings, 'REFERRAL_FRAUD', {}).get(key, DEFAULT_FRAUD_SETTINGS[key])
+
+
+def device_fingerprint(user_agent: str) -> str:
+    """Empreinte courte d'un User-Agent."""
+    if not user_agent:
+        return ''
+    return hashlib.sha1(user_agent.encode('utf-8')).hexdigest()[:16]
+
+
+def login_fingerprint(user_id):
+    """IP et empreinte d'appareil de la dernière connexion d'un utilisateur."""
+    from apps.accounts.models import LoginHistory
+
+    login = LoginHistory.objects.filter(user_id=user_id).values('ip_address', 'user_agent').first()
+    if not login:
+        return '', ''
+    return login['ip_address'] or '', device_fingerprint(login['user_agent'])
+
+
+@dataclass
+class FraudEvent:
+    """Événement de parrainage observé par le détecteur."""
+    kind: str  # 'referral', 'commission' ou 'click'
+    user_id: str  # Compte à l'origine de l'événement (filleul, visiteur converti...)
+    referrer_id: str = ''
+    referral_id: str = ''
+    ip: str = ''
+    device: str = ''
+    amount: Decimal = Decimal('0')
+    currency: str = ''
+    timestamp: float = field(default_factory=time.time)
+    event_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+    def to_json(self) -> str:
+        return json.dumps({**asdict(self), 'amount': str(self.amount)})
+
+    @classmethod
+    def from_json(cls, raw) -> 'FraudEvent':
+        data = json.loads(raw)
+        data['amount'] = Decimal(data['amount'])
+        return cls(**data)
+
+
+@dataclass
+class FraudFlag:
+    """Signalement émis par une règle."""
+    user_id: str
+    rule: str
+    severity: str
+    details: Dict
+    referral_id: str = ''
+
+
+# ===== STOCKAGE DES FENÊTRES GLISSANTES =====
+
+class RedisWindowStore:
+    """Fenêtres glissantes et file d'événements dans Redis."""
+
+    QUEUE_KEY = 'fraud:events'
+
+    def __init__(self, client):
+        self.client = client
+
+    def hit(self, key: str, member: str, timestamp: float, window: int) -> int:
+        """Ajouter un membre et retourner le nombre de membres distincts dans la fenêtre."""
+        pipe = self.client.pipeline()
+        pipe.zadd(key, {member: timestamp})
+        pipe.zremrangebyscore(key, '-inf', timestamp - window)
+        pipe.zcard(key)
+        pipe.expire(key, window)
+        return pipe.execute()[2]
+
+    def total(self, key: str, member: str, amount: Decimal, timestamp: float, window: int) -> Decimal:
+        """Ajouter un montant et retourner la somme des montants de la fenêtre."""
+        pipe = self.client.pipeline()
+        pipe.zadd(key, {f'{member}:{amount}': timestamp})
+        pipe.zremrangebyscore(key, '-inf', timestamp - window)
+        pipe.zrange(key, 0, -1)
+        pipe.expire(key, window)
+        members = pipe.execute()[2]
+        return sum((Decimal(m.decode().rsplit(':', 1)[1]) for m in members), Decimal('0'))
+
+    def claim(self, key: str, ttl: int) -> bool:
+        """Réserver une clé pour `ttl` secondes (dédoublonnage)."""
+        return bool(self.client.set(key, 1, nx=True, ex=ttl))
+
+    def push(self, payloads: List[str]):
+        if payloads:
+            self.client.rpush(self.QUEUE_KEY, *payloads)
+
+    def pop(self, limit: int) -> List[str]:
+        pipe = self.client.pipeline()
+        pipe.lrange(self.QUEUE_KEY, 0, limit - 1)
+        pipe.ltrim(self.QUEUE_KEY, limit, -1)
+        return pipe.execute()[0]
+
+
+class MemoryWindowStore:
+    """Équivalent en mémoire de `RedisWindowStore` (tests, cache local)."""
+
+    def __init__(self):
+        self._windows = defaultdict(dict)
+        self._claims = {}
+        self._queue = []
+        self._lock = threading.Lock()
+
+    def _trim(self, key, timestamp, window):
+        members = self._windows[key]
+        for member, score in list(members.items()):
+            if score <= timestamp - window:
+                del members[member]
+        return members
+
+    def hit(self, key, member, timestamp, window):
+        with self._lock:
+            self._windows[key][member] = timestamp
+            return len(self._trim(key, timestamp, window))
+
+    def total(self, key, member, amount, timestamp, window):
+        with self._lock:
+            self._windows[key][f'{member}:{amount}'] = timestamp
+            members = self._trim(key, timestamp, window)
+            return sum((Decimal(m.rsplit(':', 1)[1]) for m in members), Decimal('0'))
+
+    def claim(self, key, ttl):
+        now = time.time()
+        with self._lock:
+            if self._claims.get(key, 0) > now:
+                return False
+            self._claims[key] = now + ttl
+            return True
+
+    def push(self, payloads):
+        with self._lock:
+            self._queue.extend(payloads)
+
+    def pop(self, limit):
+        with self._lock:
+            batch, self._queue = self._queue[:limit], self._queue[limit:]
+            return batch
+
+
+_local_store = MemoryWindowStore()
+
+
+def get_window_store():
+    """Store Redis si le cache Django est sur Redis, sinon store local au processus."""
+    if 'redis' in settings.CACHES['default']['BACKEND'].lower():
+        from django_redis import get_redis_connection
+        return RedisWindowStore(get_redis_connection('default'))
+    return _local_store
+
+
+# ===== RÈGLES =====
+
+class FraudRule:
+    """
+    Règle de détection.
+
+    Les attributs de classe servent de valeurs par défaut et peuvent être
+    surchargés par les options de `REFERRAL_FRAUD['RULES']`.
+    """
+    name = ''
+    event_kinds = ()
+    severity = 'medium'
+    threshold = 0
+    window = 3600
+
+    def __init__(self, **options):
+        for key, value in options.items():
+            if not hasattr(self, key):
+                raise ValueError(f"Option inconnue pour {type(self).__name__}: {key}")
+            setattr(self, key, value)
+
+    def applies_to(self, event: FraudEvent) -> bool:
+        return event.kind in self.event_kinds
+
+    def evaluate(self, event: FraudEvent, store) -> Optional[FraudFlag]:
+        raise NotImplementedError
+
+    def flag(self, user_id, details: Dict, referral_id: str = '') -> FraudFlag:
+        return FraudFlag(
+            user_id=str(user_id), rule=self.name, severity=self.severity,
+            details=details, referral_id=referral_id
+        )
+
+
+class SelfReferralRule(FraudRule):
+    """Un compte qui se parraine lui-même : parrainage suspendu."""
+    name = 'self_referral'
+    event_kinds = ('referral',)
+    severity = 'high'
+
+    def evaluate(self, event, store):
+        if event.referrer_id and event.referrer_id == event.user_id:
+            return self.flag(event.referrer_id, {'referral_id': event.referral_id}, event.referral_id)
+        return None
+
+
+class ReferralVelocityRule(FraudRule):
+    """Trop de nouveaux filleuls pour un parrain dans la fenêtre."""
+    name = 'referral_velocity'
+    event_kinds = ('referral',)
+    threshold = 10
+
+    def evaluate(self, event, store):
+        count = store.hit(f'fraud:ref_velocity:{event.referrer_id}', event.event_id, event.timestamp, self.window)
+        if count >= self.threshold:
+            return self.flag(event.referrer_id, {'count': count, 'window': self.window})
+        return None
+
+
+class ClusterRule(FraudRule):
+    """Plusieurs filleuls distincts d'un même parrain partageant un attribut."""
+    event_kinds = ('referral',)
+    attribute = ''
+
+    def evaluate(self, event, store):
+        value = getattr(event, self.attribute)
+        if not value or not event.referrer_id:
+            return None
+        key = f'fraud:{self.attribute}:{event.referrer_id}:{value}'
+        accounts = store.hit(key, event.user_id, event.timestamp, self.window)
+        if accounts >= self.threshold:
+            return self.flag(event.referrer_id, {self.attribute: value, 'accounts': accounts, 'window': self.window})
+        return None
+
+
+class SharedIPRule(ClusterRule):
+    """Filleuls d'un même parrain inscrits depuis la même IP."""
+    name = 'shared_ip'
+    attribute = 'ip'
+    severity = 'high'
+    threshold = 3
+    window = 86400
+
+
+class SharedDeviceRule(ClusterRule):
+    """Filleuls d'un même parrain utilisant le même appareil."""
+    name = 'shared_device'
+    attribute = 'device'
+    threshold = 5
+    window = 86400
+
+
+class ClickVelocityRule(FraudRule):
+    """Clics répétés depuis une même IP sur les codes d'un parrain."""
+    name = 'click_velocity'
+    event_kinds = ('click',)
+    severity = 'low'
+    threshold = 30
+    window = 600
+
+    def evaluate(self, event, store):
+        if not event.ip:
+            return None
+        key = f'fraud:clicks:{event.referrer_id}:{event.ip}'
+        count = store.hit(key, event.event_id, event.timestamp, self.window)
+        if count >= self.threshold:
+            return self.flag(event.referrer_id, {'ip': event.ip, 'clicks': count, 'window': self.window})
+        return None
+
+
+class EarningsRateRule(FraudRule):
+    """Commissions encaissées trop vite par un parrain."""
+    name = 'earnings_rate'
+    event_kinds = ('commission',)
+    threshold = Decimal('50000')
+    currency = 'FCFA'
+    window = 86400
+
+    def evaluate(self, event, store):
+        if event.currency != self.currency:
+            return None
+        total = store.total(
+            f'fraud:earnings:{event.referrer_id}', event.event_id, event.amount, event.timestamp, self.window
+        )
+        if total >= Decimal(self.threshold):
+            return self.flag(event.referrer_id, {
+                'amount': str(total), 'currency': self.currency, 'window': self.window
+            })
+        return None
+
+
+def load_rules(config: Optional[Dict] = None) -> List[FraudRule]:
+    """Instancier les règles configurées (chemin pointé -> options)."""
+    config = config if config is not None else get_fraud_setting('RULES')
+    return [import_string(path)(**options) for path, options in config.items()]
+
+
+# ===== DÉTECTEUR =====
+
+class FraudDetector:
+    """Applique les règles à un flux d'événements et dédoublonne les signalements."""
+
+    def __init__(self, rules: Optional[List[FraudRule]] = None, store=None, cooldown: Optional[int] = None):
+        self.rules = rules if rules is not None else load_rules()
+        self.store = store or get_window_store()
+        self.cooldown = cooldown if cooldown is not None else get_fraud_setting('FLAG_COOLDOWN')
+
+    def process(self, events: Iterable[FraudEvent]) -> List[FraudFlag]:
+        flags = []
+        for event in sorted(events, key=lambda e: e.timestamp):
+            for rule in self.rules:
+                if not rule.applies_to(event):
+                    continue
+                try:
+                    flag = rule.evaluate(event, self.store)
+                except Exception as e:
+                    logger.error(f"❌ Règle de fraude {rule.name} en échec: {e}")
+                    continue
+                if flag and self.store.claim(f'fraud:flagged:{flag.rule}:{flag.user_id}', self.cooldown):
+                    flags.append(flag)
+        return flags
+
+
+# ===== PUBLICATION ET CONSOMMATION =====
+
+def publish_events(events: Iterable[FraudEvent]):
+    """
+    Publier des événements pour le détecteur et planifier leur analyse.
+
+    Appelé après commit : un événement n'est jamais publié pour une écriture annulée.
+    """
+    payloads = [event.to_json() for event in events]
+    if not payloads:
+        return
+    try:
+        get_window_store().push(payloads)
+        window = get_fraud_setting('WINDOW_SECONDS')
+        if cache.add(FRAUD_SCHEDULED_KEY, 1, timeout=window + 5):
+            from .tasks import process_fraud_events
+            process_fraud_events.apply_async(countdown=window)
+    except Exception as e:
+        # La détection ne doit jamais bloquer le parcours utilisateur
+        logger.error(f"❌ Publication d'événements de fraude impossible: {e}")
+
+
+def publish_on_commit(*events: FraudEvent):
+    transaction.on_commit(lambda: publish_events(events))
+
+
+def process_pending_events(detector: Optional[FraudDetector] = None) -> Dict:
+    """Consommer la file d'événements, appliquer les règles et persister les signalements."""
+    cache.delete(FRAUD_SCHEDULED_KEY)
+    detector = detector or FraudDetector()
+    batch_size = get_fraud_setting('BATCH_SIZE')
+    stats = {'events': 0, 'flags': 0}
+
+    while True:
+        payloads = detector.store.pop(batch_size)
+        if not payloads:
+            break
+        events = []
+        for payload in payloads:
+            try:
+                events.append(FraudEvent.from_json(payload))
+            except (ValueError, TypeError, KeyError) as e:
+                logger.warning(f"⚠️ Événement de fraude illisible ignoré: {e}")
+        flags = detector.process(events)
+        persist_flags(flags)
+        stats['events'] += len(events)
+        stats['flags'] += len(flags)
+
+    if stats['flags']:
+        logger.warning(f"🚨 {stats['flags']} signalements de fraude sur {stats['events']} événements")
+    return stats
+
+
+def persist_flags(flags: List[FraudFlag]) -> int:
+    """Enregistrer les signalements en bloc et appliquer les actions automatiques."""
+    if not flags:
+        return 0
+    from .models import Referral, ReferralCommission, ReferralFraudFlag
+    from .tasks import notify_admins_suspicious_activity
+
+    with transaction.atomic():
+        ReferralFraudFlag.objects.bulk_create([
+            ReferralFraudFlag(
+                user_id=flag.user_id,
+                referral_id=flag.referral_id or None,
+                rule=flag.rule,
+                severity=flag.severity,
+                details=flag.details,
+            )
+            for flag in flags
+        ])
+        # Auto-parrainages : suspension en une seule requête
+        self_referrals = [flag.referral_id for flag in flags if flag.rule == 'self_referral' and flag.referral_id]
+        if self_referrals:
+            Referral.objects.filter(pk__in=self_referrals).exclude(status='suspended').update(status='suspended')
+            # Équivalent de handle_referral_status_change, contourné par update()
+            ReferralCommission.objects.filter(referral_id__in=self_referrals, status='pending').update(
+                status='cancelled', failure_reason='Parrainage suspendu/inactif'
+            )
+
+    activities = [{'type': flag.rule, 'user': flag.user_id, **flag.details} for flag in flags]
+    transaction.on_commit(lambda: notify_admins_suspicious_activity.delay(activities))
+    return len(flags)
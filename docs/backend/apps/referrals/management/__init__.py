@@ -0,0 +1 @@
+# Management commands for referrals app
\ No newline at end of file
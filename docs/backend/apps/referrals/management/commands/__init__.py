@@ -0,0 +1 @@
+# Referral management commands
\ No newline at end of file
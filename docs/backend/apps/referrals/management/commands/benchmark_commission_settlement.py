@@ -0,0 +1,123 @@
+"""
+Benchmark du règlement groupé des commissions de parrainage.
+
+Crée des données synthétiques (parrains, filleuls, parties, commissions) dans
+une transaction annulée à la fin : la base n'est pas modifiée.
+
+Exemples :
+    python manage.py benchmark_commission_settlement
+    python manage.py benchmark_commission_settlement --commissions 100000 --referrers 2000
+"""
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.games.models import Game, GameType
+from apps.referrals.models import Referral, ReferralCommission, ReferralProgram
+from apps.referrals.settlement import settle_pending_commissions
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    """Annuler les données du benchmark."""
+
+
+class Command(BaseCommand):
+    help = 'Mesurer le règlement groupé de N commissions de parrainage (données annulées)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--commissions',
+            type=int,
+            default=100000,
+            help='Nombre de commissions à régler (défaut: 100000)'
+        )
+        parser.add_argument(
+            '--referrers',
+            type=int,
+            default=1000,
+            help='Nombre de parrains distincts (défaut: 1000)'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Taille des lots de règlement'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['commissions'], options['referrers'], options['batch_size'])
+                raise Rollback()
+        except Rollback:
+            self.stdout.write('↩️ Données du benchmark annulées')
+
+    def run(self, commission_count, referrer_count, batch_size):
+        self.stdout.write(f'🏗️ Préparation de {commission_count} commissions pour {referrer_count} parrains...')
+        tag = uuid.uuid4().hex[:6]
+
+        # bulk_create : pas de signaux (codes de parrainage, bonus d'inscription)
+        referrers = [
+            User(username=f'bench_{tag}_r{i}', email=f'bench_{tag}_r{i}@bench.local', referral_code=f'r{i:09d}')
+            for i in range(referrer_count)
+        ]
+        referred = [
+            User(username=f'bench_{tag}_f{i}', email=f'bench_{tag}_f{i}@bench.local', referral_code=f'f{i:09d}')
+            for i in range(referrer_count)
+        ]
+        User.objects.bulk_create(referrers + referred, batch_size=1000)
+
+        program = ReferralProgram.objects.create(
+            name=f'Benchmark {tag}', description='Benchmark', commission_type='percentage',
+            commission_rate=Decimal('10.00'), status='active'
+        )
+        referrals = Referral.objects.bulk_create([
+            Referral(referrer=referrer, referred=filleul, program=program, is_premium_referrer=True)
+            for referrer, filleul in zip(referrers, referred)
+        ], batch_size=1000)
+
+        game_type = GameType.objects.create(
+            name=f'bench_{tag}', display_name='Benchmark', description='Benchmark', category='strategy'
+        )
+        games = Game.objects.bulk_create([
+            Game(
+                # Codes en minuscules : jamais en conflit avec les codes réels (majuscules)
+                room_code=f'{i:08x}',
+                game_type=game_type, player1=referred[i % referrer_count],
+                bet_amount=Decimal('1000.00'), status='completed'
+            )
+            for i in range(commission_count)
+        ], batch_size=2000)
+
+        ReferralCommission.objects.bulk_create([
+            ReferralCommission(
+                referral=referrals[i % referrer_count], game=game,
+                amount=Decimal('14.00'), currency='FCFA'
+            )
+            for i, game in enumerate(games)
+        ], batch_size=2000)
+
+        self.stdout.write(f'⏱️ Règlement de {commission_count} commissions...')
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(count_queries):
+            result = settle_pending_commissions(batch_size=batch_size, notify=False)
+        elapsed = time.perf_counter() - started
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {result['processed']} commissions réglées en {elapsed:.2f}s "
+            f"({result['processed'] / elapsed:,.0f}/s), {queries} requêtes SQL, "
+            f"{result['referrers']} parrains crédités"
+        ))
@@ -0,0 +1,143 @@
+"""
+Benchmark de l'arbre de parrainage en table de fermeture.
+
+Crée un arbre synthétique de N joueurs (chaque parrain a `--branching`
+filleuls) dans une transaction annulée à la fin : la base n'est pas modifiée.
+Mesure la construction de la table, puis la ligne montante, la taille
+d'équipe, l'équipe par niveau, le revenu d'équipe et l'insertion d'un filleul
+(contrôle de cycle compris), comparés au parcours des parrains un niveau à la fois.
+
+Exemples :
+    python manage.py benchmark_referral_tree --nodes 100000
+    python manage.py benchmark_referral_tree --nodes 1000000 --branching 3
+"""
+import random
+import time
+import uuid
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from apps.referrals.models import Referral, ReferralProgram, ReferralTreePath
+from apps.referrals.tree import (
+    add_referral, creates_cycle, downline_by_level, downline_count, get_upline, rebuild_tree, team_revenue,
+)
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    """Annuler les données du benchmark."""
+
+
+class Command(BaseCommand):
+    help = 'Mesurer les requêtes de l\'arbre de parrainage sur N joueurs (données annulées)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--nodes',
+            type=int,
+            default=100000,
+            help='Nombre de joueurs dans l\'arbre (défaut: 100000)'
+        )
+        parser.add_argument(
+            '--branching',
+            type=int,
+            default=5,
+            help='Filleuls par parrain (défaut: 5)'
+        )
+        parser.add_argument(
+            '--samples',
+            type=int,
+            default=200,
+            help='Requêtes mesurées par opération (défaut: 200)'
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options['nodes'], options['branching'], options['samples'])
+                raise Rollback()
+        except Rollback:
+            self.stdout.write('↩️ Données du benchmark annulées')
+
+    def run(self, node_count, branching, samples):
+        self.stdout.write(f'🏗️ Préparation d\'un arbre de {node_count} joueurs ({branching} filleuls par parrain)...')
+        tag = uuid.uuid4().hex[:6]
+
+        # bulk_create : pas de signaux (codes de parrainage, chemins ajoutés un par un)
+        users = [
+            User(username=f'bench_{tag}_{i}', email=f'bench_{tag}_{i}@bench.local', referral_code=f't{i:09d}')
+            for i in range(node_count)
+        ]
+        User.objects.bulk_create(users, batch_size=2000)
+        program = ReferralProgram.objects.create(
+            name=f'Benchmark {tag}', description='Benchmark', commission_type='percentage',
+            commission_rate=Decimal('10.00'), status='active'
+        )
+        # Le parrain du joueur i est le joueur (i - 1) // branching
+        Referral.objects.bulk_create([
+            Referral(referrer=users[(i - 1) // branching], referred=users[i], program=program)
+            for i in range(1, node_count)
+        ], batch_size=2000)
+
+        started = time.perf_counter()
+        paths = rebuild_tree()
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Table de fermeture construite en {time.perf_counter() - started:.2f}s ({paths} chemins)"
+        ))
+
+        # Joueurs des niveaux profonds (lignes montantes longues) et du haut de l'arbre (grandes équipes)
+        deep_range = range(node_count // 2, node_count)
+        top_range = range(max(1, node_count // branching ** 2))
+        leaves = [users[i].pk for i in random.sample(deep_range, min(samples, len(deep_range)))]
+        inner = [users[i].pk for i in random.sample(top_range, min(samples, len(top_range)))]
+
+        self.measure('Ligne montante (fermeture)', leaves, get_upline)
+        self.measure('Ligne montante (parrain par parrain)', leaves, self.walk_upline)
+        self.measure('Taille d\'équipe', inner, downline_count)
+        self.measure('Équipe par niveau', inner, downline_by_level)
+        self.measure('Revenu d\'équipe', inner, team_revenue)
+        self.measure('Contrôle de cycle', list(zip(leaves, inner)), lambda pair: creates_cycle(*pair))
+
+        newcomers = [
+            User(username=f'bench_{tag}_n{i}', email=f'bench_{tag}_n{i}@bench.local', referral_code=f'n{i:09d}')
+            for i in range(len(leaves))
+        ]
+        User.objects.bulk_create(newcomers)
+        self.measure(
+            'Insertion d\'un filleul', list(zip(leaves, [user.pk for user in newcomers])),
+            lambda pair: add_referral(*pair)
+        )
+        self.stdout.write(f"🌳 {ReferralTreePath.objects.count()} chemins au total")
+
+    def measure(self, label, arguments, operation):
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        started = time.perf_counter()
+        with connection.execute_wrapper(count_queries):
+            for argument in arguments:
+                operation(argument)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"⏱️ {label}: {elapsed / len(arguments) * 1000:.2f} ms/op, "
+            f"{queries / len(arguments):.1f} requêtes/op"
+        )
+
+    @staticmethod
+    def walk_upline(user_id):
+        """Ancienne approche : remonter les parrains une requête par niveau."""
+        upline = []
+        while True:
+            referrer_id = Referral.objects.filter(referred_id=user_id).values_list('referrer_id', flat=True).first()
+            if referrer_id is None:
+                return upline
+            upline.append(referrer_id)
+            user_id = referrer_id
@@ -0,0 +1,58 @@
+"""
+Contrôle de cohérence des tableaux de bord précalculés des parrains.
+
+Les compteurs de chaque tableau de bord du mois courant sont comparés à un
+recalcul complet depuis les tables sources. Avec --fix, les tableaux de bord
+divergents sont recalculés.
+
+Exemples :
+    python manage.py check_referral_dashboards
+    python manage.py check_referral_dashboards --user alice --user bob
+    python manage.py check_referral_dashboards --fix
+"""
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.referrals.dashboard import check_dashboards
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Comparer les tableaux de bord des parrains à un recalcul complet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            action='append',
+            default=None,
+            help='Nom d\'utilisateur du parrain (option répétable)'
+        )
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Recalculer les tableaux de bord divergents'
+        )
+
+    def handle(self, *args, **options):
+        user_ids = None
+        if options['user']:
+            users = dict(User.objects.filter(username__in=options['user']).values_list('username', 'pk'))
+            missing = set(options['user']) - set(users)
+            if missing:
+                raise CommandError(f"Utilisateurs introuvables: {', '.join(sorted(missing))}")
+            user_ids = list(users.values())
+
+        drifts = check_dashboards(user_ids, fix=options['fix'])
+        for drift in drifts:
+            fields = ', '.join(
+                f"{field}: {stored} ≠ {live}" for field, (stored, live) in drift['fields'].items()
+            )
+            self.stdout.write(self.style.WARNING(f"⚠️ {drift['user_id']}: {fields}"))
+
+        if not drifts:
+            self.stdout.write(self.style.SUCCESS('✅ Tous les tableaux de bord sont cohérents'))
+        elif options['fix']:
+            self.stdout.write(self.style.SUCCESS(f"✅ {len(drifts)} tableaux de bord recalculés"))
+        else:
+            raise CommandError(f"{len(drifts)} tableaux de bord divergents (relancer avec --fix)")
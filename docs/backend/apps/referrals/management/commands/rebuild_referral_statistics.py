@@ -0,0 +1,75 @@
+"""
+Reconstruction des statistiques de parrainage depuis les tables sources.
+
+Les buckets quotidiens sont recalculés sur la plage demandée (étendue aux
+semaines et mois complets), puis les périodes hebdomadaires, mensuelles et
+annuelles qui la recouvrent sont resommées.
+
+Exemples :
+    python manage.py rebuild_referral_statistics --days 30
+    python manage.py rebuild_referral_statistics --start 2025-01-01 --end 2025-03-31
+    python manage.py rebuild_referral_statistics --days 365 --user alice
+"""
+from datetime import date, timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.referrals.rollups import rebuild_statistics
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = 'Reconstruire les buckets de statistiques de parrainage (réconciliation)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--start',
+            type=date.fromisoformat,
+            help='Premier jour à reconstruire (AAAA-MM-JJ)'
+        )
+        parser.add_argument(
+            '--end',
+            type=date.fromisoformat,
+            help='Dernier jour à reconstruire (AAAA-MM-JJ, défaut: aujourd\'hui)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Reconstruire les N derniers jours'
+        )
+        parser.add_argument(
+            '--user',
+            action='append',
+            default=None,
+            help='Nom d\'utilisateur du parrain (option répétable)'
+        )
+
+    def handle(self, *args, **options):
+        end = options['end'] or timezone.localdate()
+        if options['days'] is not None:
+            start = end - timedelta(days=options['days'] - 1)
+        elif options['start']:
+            start = options['start']
+        else:
+            raise CommandError('Indiquer --start ou --days')
+        if start > end:
+            raise CommandError('--start doit précéder --end')
+
+        user_ids = None
+        if options['user']:
+            users = dict(User.objects.filter(username__in=options['user']).values_list('username', 'pk'))
+            missing = set(options['user']) - set(users)
+            if missing:
+                raise CommandError(f"Utilisateurs introuvables: {', '.join(sorted(missing))}")
+            user_ids = list(users.values())
+
+        written = rebuild_statistics(start, end, user_ids)
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Statistiques reconstruites ({start} → {end}): "
+            f"{written['daily']} jours, {written['weekly']} semaines, "
+            f"{written['monthly']} mois, {written['yearly']} années"
+        ))
@@ -0,0 +1,29 @@
+"""
+Reconstruction de la table de fermeture de l'arbre de parrainage.
+
+À lancer après un import de parrainages par `bulk_create` (sans signaux) ou
+une correction manuelle des parrains.
+
+Exemples :
+    python manage.py rebuild_referral_tree
+    python manage.py rebuild_referral_tree --batch-size 20000
+"""
+from django.core.management.base import BaseCommand
+
+from apps.referrals.tree import rebuild_tree
+
+
+class Command(BaseCommand):
+    help = 'Reconstruire la table de fermeture de l\'arbre de parrainage'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=5000,
+            help='Chemins insérés par requête (défaut: 5000)'
+        )
+
+    def handle(self, *args, **options):
+        written = rebuild_tree(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"✅ Arbre de parrainage reconstruit: {written} chemins"))
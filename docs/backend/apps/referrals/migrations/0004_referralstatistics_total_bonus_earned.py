@@ -0,0 +1,23 @@
+# Generated by Django 4.2.8 on 2026-10-19 08:36
+
+from decimal import Decimal
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("referrals", "0003_merge_20251223_1309"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="referralstatistics",
+            name="total_bonus_earned",
+            field=models.DecimalField(
+                decimal_places=2,
+                default=Decimal("0.00"),
+                max_digits=12,
+                verbose_name="Bonus reçus",
+            ),
+        ),
+    ]
@@ -0,0 +1,103 @@
+# Generated by Django 4.2.8 on 2026-10-19 08:39
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("referrals", "0004_referralstatistics_total_bonus_earned"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReferralFraudFlag",
+            fields=[
+                (
+                    "id",
+                    models.UUIDField(
+                        default=uuid.uuid4,
+                        editable=False,
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("rule", models.CharField(max_length=50, verbose_name="Règle")),
+                (
+                    "severity",
+                    models.CharField(
+                        choices=[
+                            ("low", "Faible"),
+                            ("medium", "Moyenne"),
+                            ("high", "Élevée"),
+                        ],
+                        default="medium",
+                        max_length=10,
+                        verbose_name="Gravité",
+                    ),
+                ),
+                ("details", models.JSONField(default=dict, verbose_name="Détails")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("open", "Ouvert"),
+                            ("confirmed", "Confirmé"),
+                            ("dismissed", "Écarté"),
+                        ],
+                        default="open",
+                        max_length=20,
+                        verbose_name="Statut",
+                    ),
+                ),
+                (
+                    "created_at",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Créé le"),
+                ),
+                (
+                    "reviewed_at",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Examiné le"
+                    ),
+                ),
+                (
+                    "referral",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="fraud_flags",
+                        to="referrals.referral",
+                        verbose_name="Parrainage",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="referral_fraud_flags",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Utilisateur",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Signalement de fraude",
+                "verbose_name_plural": "Signalements de fraude",
+                "db_table": "referral_fraud_flags",
+                "ordering": ["-created_at"],
+                "indexes": [
+                    models.Index(
+                        fields=["status", "-created_at"],
+                        name="referral_fr_status_bd186a_idx",
+                    ),
+                    models.Index(
+                        fields=["user", "rule"], name="referral_fr_user_id_84b589_idx"
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 4.2.8 on 2026-10-19 08:44
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+import django.utils.timezone
+
+
+def backfill_counters(apps, schema_editor):
+    """Initialiser les compteurs depuis les lignes existantes."""
+    ReferralCode = apps.get_model("referrals", "ReferralCode")
+    ReferralCodeClick = apps.get_model("referrals", "ReferralCodeClick")
+    ReferralCodeShare = apps.get_model("referrals", "ReferralCodeShare")
+
+    def count(model):
+        return Coalesce(
+            Subquery(
+                model.objects.filter(code=OuterRef("pk"))
+                .order_by()
+                .values("code")
+                .annotate(n=Count("id"))
+                .values("n")
+            ),
+            0,
+        )
+
+    ReferralCode.objects.update(
+        total_clicks=count(ReferralCodeClick), total_shares=count(ReferralCodeShare)
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("referrals", "0005_referralfraudflag"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="referralcode",
+            name="total_clicks",
+            field=models.PositiveIntegerField(default=0, verbose_name="Clics"),
+        ),
+        migrations.AddField(
+            model_name="referralcode",
+            name="total_shares",
+            field=models.PositiveIntegerField(default=0, verbose_name="Partages"),
+        ),
+        migrations.AlterField(
+            model_name="referralcodeclick",
+            name="clicked_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="Cliqué le",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="referralcodeshare",
+            name="shared_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now,
+                editable=False,
+                verbose_name="Partagé le",
+            ),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,112 @@
+# Generated by Django 4.2.8 on 2026-10-19 08:49
+
+from decimal import Decimal
+from django.conf import settings
+import django.core.serializers.json
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("accounts", "0002_usersettings_kyc_banner_dismissed_at"),
+        ("referrals", "0006_referralcode_click_counters"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReferrerDashboardSnapshot",
+            fields=[
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="referral_dashboard",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Parrain",
+                    ),
+                ),
+                (
+                    "version",
+                    models.PositiveBigIntegerField(default=1, verbose_name="Version"),
+                ),
+                ("month", models.DateField(verbose_name="Mois de référence")),
+                (
+                    "total_referrals",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Total filleuls"
+                    ),
+                ),
+                (
+                    "active_referrals",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Filleuls actifs"
+                    ),
+                ),
+                (
+                    "total_games_played",
+                    models.PositiveIntegerField(
+                        default=0, verbose_name="Parties jouées"
+                    ),
+                ),
+                (
+                    "total_commission_earned",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        max_digits=12,
+                        verbose_name="Commission totale",
+                    ),
+                ),
+                (
+                    "commission_this_month",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        max_digits=12,
+                        verbose_name="Commission du mois",
+                    ),
+                ),
+                (
+                    "pending_commissions",
+                    models.DecimalField(
+                        decimal_places=2,
+                        default=Decimal("0.00"),
+                        max_digits=12,
+                        verbose_name="Commissions en attente",
+                    ),
+                ),
+                (
+                    "sections",
+                    models.JSONField(
+                        default=dict,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        verbose_name="Sections",
+                    ),
+                ),
+                (
+                    "is_stale",
+                    models.BooleanField(default=False, verbose_name="À recalculer"),
+                ),
+                (
+                    "updated_at",
+                    models.DateTimeField(
+                        default=django.utils.timezone.now, verbose_name="Modifié le"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Tableau de bord parrain",
+                "verbose_name_plural": "Tableaux de bord parrains",
+                "db_table": "referral_dashboard_snapshots",
+                "indexes": [
+                    models.Index(
+                        fields=["is_stale"], name="referral_da_is_stal_da98a0_idx"
+                    )
+                ],
+            },
+        ),
+    ]
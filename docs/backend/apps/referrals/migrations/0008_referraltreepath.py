@@ -0,0 +1,93 @@
+# Generated by Django 4.2.8 on 2026-10-19 08:52
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+from apps.referrals.tree import build_paths
+
+
+def build_tree(apps, schema_editor):
+    """Remplir la table de fermeture depuis les parrainages existants."""
+    Referral = apps.get_model("referrals", "Referral")
+    ReferralTreePath = apps.get_model("referrals", "ReferralTreePath")
+    edges = Referral.objects.values_list("referrer_id", "referred_id").iterator()
+    batch = []
+    for ancestor, descendant, depth in build_paths(edges):
+        batch.append(ReferralTreePath(ancestor_id=ancestor, descendant_id=descendant, depth=depth))
+        if len(batch) >= 5000:
+            ReferralTreePath.objects.bulk_create(batch)
+            batch = []
+    ReferralTreePath.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("referrals", "0007_referrerdashboardsnapshot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ReferralTreePath",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("depth", models.PositiveSmallIntegerField(verbose_name="Profondeur")),
+                (
+                    "ancestor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="referral_descendant_paths",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Ancêtre",
+                    ),
+                ),
+                (
+                    "descendant",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="referral_ancestor_paths",
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Descendant",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Chemin de parrainage",
+                "verbose_name_plural": "Chemins de parrainage",
+                "db_table": "referral_tree_paths",
+                "indexes": [
+                    models.Index(
+                        fields=["ancestor", "depth"],
+                        name="referral_tr_ancesto_ed1826_idx",
+                    ),
+                    models.Index(
+                        fields=["descendant", "depth"],
+                        name="referral_tr_descend_f7c6c9_idx",
+                    ),
+                ],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="referraltreepath",
+            constraint=models.UniqueConstraint(
+                fields=("ancestor", "descendant"), name="referral_tree_path_unique"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="referraltreepath",
+            constraint=models.CheckConstraint(
+                check=models.Q(("ancestor", models.F("descendant")), _negated=True),
+                name="referral_tree_path_no_loop",
+            ),
+        ),
+        migrations.RunPython(build_tree, migrations.RunPython.noop),
+    ]
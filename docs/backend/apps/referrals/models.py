@@ -11,6 +11,7 @@ from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
 from dateutil.relativedelta import relativedelta
 
 
@@ -344,6 +345,45 @@ class Referral(models.Model):
         self.save()
 
 
+class ReferralTreePath(models.Model):
+    """
+    Table de fermeture de l'arbre de parrainage (voir apps.referrals.tree).
+    
+    Une ligne par paire (ancêtre, descendant) : le parrain direct est à la
+    profondeur 1, le parrain du parrain à la profondeur 2, etc.
+    """
+    
+    ancestor = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='referral_descendant_paths',
+        verbose_name=_('Ancêtre')
+    )
+    descendant = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='referral_ancestor_paths',
+        verbose_name=_('Descendant')
+    )
+    depth = models.PositiveSmallIntegerField(_('Profondeur'))
+    
+    class Meta:
+        db_table = 'referral_tree_paths'
+        verbose_name = _('Chemin de parrainage')
+        verbose_name_plural = _('Chemins de parrainage')
+        constraints = [
+            models.UniqueConstraint(fields=['ancestor', 'descendant'], name='referral_tree_path_unique'),
+            models.CheckConstraint(check=~models.Q(ancestor=models.F('descendant')), name='referral_tree_path_no_loop'),
+        ]
+        indexes = [
+            models.Index(fields=['ancestor', 'depth']),
+            models.Index(fields=['descendant', 'depth']),
+        ]
+    
+    def __str__(self):
+        return f"{self.ancestor_id} → {self.descendant_id} ({self.depth})"
+
+
 class ReferralCommission(models.Model):
     """Commissions de parrainage."""
     
@@ -459,6 +499,20 @@ class ReferralCommission(models.Model):
             # Mettre à jour les statistiques du parrainage
             self.referral.update_stats(commission_amount=self.amount)
             
+            from .rollups import record_commissions_settled
+            record_commissions_settled(
+                self.referral.referrer_id, 1, self.amount, self.game.bet_amount
+            )
+            
+            from .fraud import FraudEvent, publish_on_commit
+            publish_on_commit(FraudEvent(
+                kind='commission',
+                user_id=str(self.referral.referrer_id),
+                referrer_id=str(self.referral.referrer_id),
+                amount=self.amount,
+                currency=self.currency,
+            ))
+            
             return True
             
         except Exception as e:
@@ -612,6 +666,60 @@ class PremiumSubscription(models.Model):
         return new_subscription
 
 
+class ReferralFraudFlag(models.Model):
+    """Signalements du détecteur de fraude au parrainage."""
+    
+    SEVERITY_CHOICES = [
+        ('low', _('Faible')),
+        ('medium', _('Moyenne')),
+        ('high', _('Élevée')),
+    ]
+    
+    STATUS_CHOICES = [
+        ('open', _('Ouvert')),
+        ('confirmed', _('Confirmé')),
+        ('dismissed', _('Écarté')),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='referral_fraud_flags',
+        verbose_name=_('Utilisateur')
+    )
+    referral = models.ForeignKey(
+        Referral,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='fraud_flags',
+        verbose_name=_('Parrainage')
+    )
+    
+    rule = models.CharField(_('Règle'), max_length=50)
+    severity = models.CharField(_('Gravité'), max_length=10, choices=SEVERITY_CHOICES, default='medium')
+    details = models.JSONField(_('Détails'), default=dict)
+    status = models.CharField(_('Statut'), max_length=20, choices=STATUS_CHOICES, default='open')
+    
+    created_at = models.DateTimeField(_('Créé le'), auto_now_add=True)
+    reviewed_at = models.DateTimeField(_('Examiné le'), null=True, blank=True)
+    
+    class Meta:
+        db_table = 'referral_fraud_flags'
+        verbose_name = _('Signalement de fraude')
+        verbose_name_plural = _('Signalements de fraude')
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', '-created_at']),
+            models.Index(fields=['user', 'rule']),
+        ]
+    
+    def __str__(self):
+        return f"{self.rule} - {self.user_id} ({self.get_severity_display()})"
+
+
 class ReferralStatistics(models.Model):
     """Statistiques agrégées de parrainage."""
     
@@ -663,6 +771,12 @@ class ReferralStatistics(models.Model):
         decimal_places=2,
         default=Decimal('0.00')
     )
+    total_bonus_earned = models.DecimalField(
+        _('Bonus reçus'),
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
     
     # Métadonnées
     created_at = models.DateTimeField(_('Créé le'), auto_now_add=True)
@@ -736,6 +850,68 @@ class ReferralStatistics(models.Model):
         return stats
 
 
+class ReferrerDashboardSnapshot(models.Model):
+    """
+    Tableau de bord précalculé d'un parrain (voir apps.referrals.dashboard).
+    
+    Les compteurs sont incrémentés par le règlement des commissions ; les
+    listes (`sections`) sont recalculées en différé quand `is_stale` est levé.
+    """
+    
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='referral_dashboard',
+        verbose_name=_('Parrain')
+    )
+    
+    # Version servie comme ETag, incrémentée à chaque modification
+    version = models.PositiveBigIntegerField(_('Version'), default=1)
+    month = models.DateField(_('Mois de référence'))
+    
+    total_referrals = models.PositiveIntegerField(_('Total filleuls'), default=0)
+    active_referrals = models.PositiveIntegerField(_('Filleuls actifs'), default=0)
+    total_games_played = models.PositiveIntegerField(_('Parties jouées'), default=0)
+    total_commission_earned = models.DecimalField(
+        _('Commission totale'),
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+    commission_this_month = models.DecimalField(
+        _('Commission du mois'),
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+    pending_commissions = models.DecimalField(
+        _('Commissions en attente'),
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00')
+    )
+    
+    sections = models.JSONField(_('Sections'), default=dict, encoder=DjangoJSONEncoder)
+    is_stale = models.BooleanField(_('À recalculer'), default=False)
+    updated_at = models.DateTimeField(_('Modifié le'), default=timezone.now)
+    
+    class Meta:
+        db_table = 'referral_dashboard_snapshots'
+        verbose_name = _('Tableau de bord parrain')
+        verbose_name_plural = _('Tableaux de bord parrains')
+        indexes = [
+            models.Index(fields=['is_stale']),
+        ]
+    
+    def __str__(self):
+        return f"Dashboard {self.user_id} v{self.version}"
+    
+    @property
+    def etag(self):
+        return f'"{self.user_id}-{self.version}"'
+
+
 class ReferralBonus(models.Model):
     """Bonus de parrainage."""
     
@@ -855,6 +1031,9 @@ class ReferralBonus(models.Model):
         self.claimed_at = timezone.now()
         self.save()
         
+        from .rollups import record_bonus_claimed
+        record_bonus_claimed(self)
+        
         return transaction
 
 
@@ -932,6 +1111,16 @@ class ReferralCode(models.Model):
         default=0
     )
     
+    # Compteurs (alimentés par apps.referrals.click_buffer)
+    total_clicks = models.PositiveIntegerField(
+        _('Clics'),
+        default=0
+    )
+    total_shares = models.PositiveIntegerField(
+        _('Partages'),
+        default=0
+    )
+    
     # Conditions d'activation
     min_first_deposit = models.DecimalField(
         _('Dépôt minimum pour activation'),
@@ -1087,6 +1276,8 @@ class ReferralCode(models.Model):
     
     def log_share(self, channel):
         """Enregistrer un partage sur un canal."""
+        from .click_buffer import record_share
+        
         if channel not in dict(self.SHARE_CHANNEL_CHOICES):
             channel = 'other'
         
@@ -1094,21 +1285,17 @@ class ReferralCode(models.Model):
         if channel not in channels:
             channels.append(channel)
             self.share_channels = ','.join(channels)
-            self.save()
+            self.save(update_fields=['share_channels', 'updated_at'])
         
-        # Créer un log de partage
-        ReferralCodeShare.objects.create(
-            code=self,
-            channel=channel
-        )
+        # Log de partage écrit en différé
+        return record_share(self, channel)
     
     def get_conversion_rate(self):
         """Calculer le taux de conversion (utilisations / partages)."""
-        total_shares = self.shares.count()
-        if total_shares == 0:
+        if self.total_shares == 0:
             return 0.0
         
-        return (self.current_uses / total_shares) * 100
+        return (self.current_uses / self.total_shares) * 100
 
 
 class ReferralCodeShare(models.Model):
@@ -1144,7 +1331,8 @@ class ReferralCodeShare(models.Model):
     
     shared_at = models.DateTimeField(
         _('Partagé le'),
-        auto_now_add=True
+        default=timezone.now,
+        editable=False
     )
     
     class Meta:
@@ -1175,7 +1363,8 @@ class ReferralCodeClick(models.Model):
     
     clicked_at = models.DateTimeField(
         _('Cliqué le'),
-        auto_now_add=True
+        default=timezone.now,
+        editable=False
     )
     
     visitor_ip = models.GenericIPAddressField(
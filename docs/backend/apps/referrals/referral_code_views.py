@@ -16,7 +16,8 @@ import uuid
 import logging
 from decimal import Decimal
 
-from .models import ReferralCode, ReferralCodeClick, ReferralCodeShare, Referral
+from .click_buffer import record_click, record_share
+from .models import ReferralCode, Referral
 from .serializers import (
     ReferralCodeListSerializer,
     ReferralCodeDetailSerializer,
@@ -72,7 +73,7 @@ class ReferralCodeViewSet(viewsets.ViewSet):
             code = ReferralCode.objects.get(id=pk, user=request.user)
             
             # Statistiques de clics
-            total_clicks = code.clicks.count()
+            total_clicks = code.total_clicks
             total_conversions = code.clicks.filter(converted_user__isnull=False).count()
             
             # Commissions générées
@@ -139,11 +140,8 @@ class ReferralCodeViewSet(viewsets.ViewSet):
             channel = serializer.validated_data['channel']
             message = serializer.validated_data.get('message', '')
             
-            # Créer un enregistrement de partage
-            share = ReferralCodeShare.objects.create(
-                code=code,
-                channel=channel
-            )
+            # Enregistrer le partage (écriture différée)
+            share_id = record_share(code, channel)
             
             # Préparer les données de partage selon le canal
             share_data = {
@@ -172,7 +170,7 @@ class ReferralCodeViewSet(viewsets.ViewSet):
                 'success': True,
                 'message': _('Lien partagé avec succès.'),
                 'share_data': share_data,
-                'share_id': str(share.id),
+                'share_id': share_id,
             })
         
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -305,7 +303,7 @@ class ReferralCodeViewSet(viewsets.ViewSet):
         """Obtenir les analytiques globales de parrainage."""
         user_codes = ReferralCode.objects.filter(user=request.user)
         
-        total_clicks = sum(code.clicks.count() for code in user_codes)
+        total_clicks = user_codes.aggregate(total=Sum('total_clicks'))['total'] or 0
         total_conversions = sum(
             code.clicks.filter(converted_user__isnull=False).count()
             for code in user_codes
@@ -341,10 +339,10 @@ class ReferralCodeClickTrackingView(viewsets.ViewSet):
         try:
             referral_code = ReferralCode.objects.get(code=code)
             
-            # Créer un enregistrement de clic
-            click = ReferralCodeClick.objects.create(
-                code=referral_code,
-                visitor_ip=self._get_client_ip(request),
+            # Enregistrer le clic (écriture différée, échantillonnée en rafale)
+            click_id = record_click(
+                referral_code,
+                ip=self._get_client_ip(request),
                 user_agent=request.META.get('HTTP_USER_AGENT', ''),
                 referrer=request.META.get('HTTP_REFERER', ''),
             )
@@ -352,7 +350,7 @@ class ReferralCodeClickTrackingView(viewsets.ViewSet):
             return Response({
                 'success': True,
                 'message': _('Clic enregistré.'),
-                'click_id': str(click.id),
+                'click_id': click_id,
                 'redirect_url': '/',  # Redirection vers la page d'accueil
             })
         except ReferralCode.DoesNotExist:
@@ -390,10 +388,10 @@ class ReferralLinkView(viewsets.ViewSet):
                     status=status.HTTP_404_NOT_FOUND
                 )
             
-            # Tracker le clic
-            click = ReferralCodeClick.objects.create(
-                code=code,
-                visitor_ip=self._get_client_ip(request),
+            # Tracker le clic (écriture différée)
+            record_click(
+                code,
+                ip=self._get_client_ip(request),
                 user_agent=request.META.get('HTTP_USER_AGENT', ''),
                 referrer=request.META.get('HTTP_REFERER', ''),
             )
@@ -404,7 +402,7 @@ class ReferralLinkView(viewsets.ViewSet):
                 'referrer_username': code.user.username,
                 'is_active': code.is_active,
                 'has_capacity': code.has_capacity,
-                'total_clicks': code.clicks.count(),
+                'total_clicks': code.total_clicks,
             }
             
             return Response(stats)
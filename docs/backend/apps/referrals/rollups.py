@@ -0,0 +1,311 @@
+# apps/referrals/rollups.py
+# ==========================
+
+"""
+Agrégats incrémentaux des statistiques de parrainage.
+
+Les événements (nouveau filleul, commissions réglées, bonus réclamé) incrémentent
+avec `F()` un bucket quotidien `ReferralStatistics` par parrain. Les vues
+hebdomadaires et mensuelles sont dérivées en sommant les buckets quotidiens, la
+vue annuelle en sommant les mois (les buckets quotidiens ne sont conservés que
+90 jours). `rebuild_daily_buckets` recalcule n'importe quel bucket depuis les
+tables sources.
+"""
+
+import logging
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+from django.db import IntegrityError, models, transaction
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, NullIf, TruncDate
+from django.utils import timezone
+
+from .models import Referral, ReferralBonus, ReferralCommission, ReferralStatistics
+
+logger = logging.getLogger(__name__)
+
+# Champs additifs d'un bucket : les périodes longues en sont la somme
+ADDITIVE_FIELDS = (
+    'new_referrals',
+    'total_games_played',
+    'commission_games',
+    'total_commission_earned',
+    'total_bet_volume',
+    'total_bonus_earned',
+)
+
+
+def period_bounds(period_type: str, day: date) -> Tuple[date, date]:
+    """Début et fin (inclus) de la période contenant `day`."""
+    if period_type == 'daily':
+        return day, day
+    if period_type == 'weekly':
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+    if period_type == 'monthly':
+        start = day.replace(day=1)
+        next_month = (start + timedelta(days=32)).replace(day=1)
+        return start, next_month - timedelta(days=1)
+    if period_type == 'yearly':
+        return day.replace(month=1, day=1), day.replace(month=12, day=31)
+    raise ValueError(f"Type de période inconnu: {period_type}")
+
+
+# ===== ÉVÉNEMENTS =====
+
+def record_event(user_id, day: Optional[date] = None, **increments):
+    """
+    Incrémenter le bucket quotidien d'un parrain.
+
+    Args:
+        user_id: Parrain concerné
+        day: Jour du bucket (aujourd'hui par défaut)
+        **increments: Valeurs à ajouter aux champs de `ADDITIVE_FIELDS`
+    """
+    day = day or timezone.localdate()
+    bucket = ReferralStatistics.objects.filter(user_id=user_id, period_type='daily', period_start=day)
+    updates = {field: F(field) + value for field, value in increments.items()}
+    if 'commission_games' in increments:
+        updates['average_commission_per_game'] = _average_expression(increments)
+    updates['updated_at'] = timezone.now()
+
+    if bucket.update(**updates):
+        return
+
+    try:
+        with transaction.atomic():
+            commission_games = increments.get('commission_games', 0)
+            commission_earned = increments.get('total_commission_earned', Decimal('0.00'))
+            ReferralStatistics.objects.create(
+                user_id=user_id,
+                period_type='daily',
+                period_start=day,
+                period_end=day,
+                average_commission_per_game=(
+                    commission_earned / commission_games if commission_games else Decimal('0.00')
+                ),
+                **increments
+            )
+    except IntegrityError:
+        # Créé entre-temps par un autre worker
+        bucket.update(**updates)
+
+
+def _average_expression(increments: Dict):
+    """Moyenne recalculée dans le même UPDATE à partir des anciennes valeurs."""
+    games = F('commission_games') + increments.get('commission_games', 0)
+    earned = F('total_commission_earned') + increments.get('total_commission_earned', Decimal('0.00'))
+    return Coalesce(
+        earned / NullIf(games, 0),
+        Value(Decimal('0.00')),
+        output_field=models.DecimalField(max_digits=10, decimal_places=2)
+    )
+
+
+def record_referral_created(referral: Referral):
+    """Un nouveau filleul pour le parrain."""
+    record_event(referral.referrer_id, timezone.localdate(referral.created_at), new_referrals=1)
+
+
+def record_commissions_settled(referrer_id, count: int, amount: Decimal, bet_volume: Decimal,
+                               day: Optional[date] = None):
+    """Commissions réglées pour un parrain (une ou plusieurs parties)."""
+    record_event(
+        referrer_id, day,
+        total_games_played=count,
+        commission_games=count,
+        total_commission_earned=amount,
+        total_bet_volume=bet_volume,
+    )
+
+
+def record_bonus_claimed(bonus: ReferralBonus):
+    """Bonus de parrainage réclamé par le parrain."""
+    record_event(bonus.referral.referrer_id, total_bonus_earned=bonus.amount)
+
+
+# ===== PÉRIODES DÉRIVÉES =====
+
+def rollup_periods(day: Optional[date] = None, user_ids: Optional[Iterable] = None) -> Dict[str, int]:
+    """
+    Dériver les statistiques hebdomadaires, mensuelles et annuelles contenant `day`.
+
+    Seuls les parrains ayant un bucket quotidien dans le mois sont traités : le
+    coût dépend de l'activité récente, pas de l'historique complet.
+
+    Returns:
+        dict: Nombre de lignes écrites par type de période
+    """
+    day = day or timezone.localdate()
+    month_start, month_end = period_bounds('monthly', day)
+    if user_ids is None:
+        user_ids = ReferralStatistics.objects.filter(
+            period_type='daily', period_start__range=(month_start, month_end)
+        ).values_list('user_id', flat=True).distinct()
+    user_ids = list(user_ids)
+
+    written = {}
+    for period_type, source in (('weekly', 'daily'), ('monthly', 'daily'), ('yearly', 'monthly')):
+        written[period_type] = _rollup(period_type, source, day, user_ids)
+    refresh_referral_counts(day, user_ids)
+    return written
+
+
+def _rollup(period_type: str, source: str, day: date, user_ids) -> int:
+    """Sommer les buckets `source` dans la période `period_type` contenant `day`."""
+    start, end = period_bounds(period_type, day)
+    totals = ReferralStatistics.objects.filter(
+        user_id__in=user_ids, period_type=source, period_start__range=(start, end)
+    ).values('user_id').annotate(**{field: Sum(field) for field in ADDITIVE_FIELDS})
+
+    written = set()
+    for row in totals:
+        values = {field: row[field] or 0 for field in ADDITIVE_FIELDS}
+        values['average_commission_per_game'] = (
+            values['total_commission_earned'] / values['commission_games']
+            if values['commission_games'] else Decimal('0.00')
+        )
+        ReferralStatistics.objects.update_or_create(
+            user_id=row['user_id'],
+            period_type=period_type,
+            period_start=start,
+            defaults={'period_end': end, **values}
+        )
+        written.add(row['user_id'])
+
+    # Périodes sans plus aucun bucket source (après reconstruction)
+    ReferralStatistics.objects.filter(
+        user_id__in=user_ids, period_type=period_type, period_start=start
+    ).exclude(user_id__in=written).delete()
+    return len(written)
+
+
+def refresh_referral_counts(day: date, user_ids) -> int:
+    """
+    Photographier le nombre total de filleuls et de filleuls actifs.
+
+    Ces deux champs ne sont pas additifs : ils sont fixés sur toutes les périodes
+    contenant `day`, à partir d'un seul comptage groupé.
+
+    Returns:
+        int: Nombre de parrains mis à jour
+    """
+    counts = Referral.objects.filter(referrer_id__in=user_ids).values('referrer_id').annotate(
+        total=Count('id'),
+        active=Count('id', filter=Q(status='active')),
+    )
+    periods = Q()
+    for period_type in ('daily', 'weekly', 'monthly', 'yearly'):
+        periods |= Q(period_type=period_type, period_start=period_bounds(period_type, day)[0])
+
+    updated = 0
+    for row in counts:
+        ReferralStatistics.objects.filter(periods, user_id=row['referrer_id']).update(
+            total_referrals=row['total'], active_referrals=row['active']
+        )
+        updated += 1
+    return updated
+
+
+# ===== RÉCONCILIATION =====
+
+def rebuild_daily_buckets(start: date, end: date, user_ids: Optional[Iterable] = None) -> int:
+    """
+    Recalculer les buckets quotidiens de `start` à `end` depuis les tables sources.
+
+    Les agrégats sont groupés par (parrain, jour) : une requête par source quelle
+    que soit la taille de la plage.
+
+    Returns:
+        int: Nombre de buckets écrits
+    """
+    referral_filter = Q(created_at__date__range=(start, end))
+    # Commissions comptées le jour du règlement, comme `record_commissions_settled`
+    commission_filter = Q(status='completed', processed_at__date__range=(start, end))
+    bonus_filter = Q(status='claimed', claimed_at__date__range=(start, end))
+    if user_ids is not None:
+        user_ids = list(user_ids)
+        referral_filter &= Q(referrer_id__in=user_ids)
+        commission_filter &= Q(referral__referrer_id__in=user_ids)
+        bonus_filter &= Q(referral__referrer_id__in=user_ids)
+
+    buckets = {}
+
+    def bucket(user_id, day):
+        return buckets.setdefault((user_id, day), {field: 0 for field in ADDITIVE_FIELDS})
+
+    for row in Referral.objects.filter(referral_filter).annotate(day=TruncDate('created_at')).values(
+        'referrer_id', 'day'
+    ).annotate(count=Count('id')):
+        bucket(row['referrer_id'], row['day'])['new_referrals'] = row['count']
+
+    for row in ReferralCommission.objects.filter(commission_filter).annotate(
+        day=TruncDate('processed_at')
+    ).values('referral__referrer_id', 'day').annotate(
+        count=Count('id'), amount=Sum('amount'), volume=Sum('game__bet_amount')
+    ):
+        values = bucket(row['referral__referrer_id'], row['day'])
+        values['total_games_played'] = values['commission_games'] = row['count']
+        values['total_commission_earned'] = row['amount'] or Decimal('0.00')
+        values['total_bet_volume'] = row['volume'] or Decimal('0.00')
+
+    for row in ReferralBonus.objects.filter(bonus_filter).annotate(day=TruncDate('claimed_at')).values(
+        'referral__referrer_id', 'day'
+    ).annotate(amount=Sum('amount')):
+        bucket(row['referral__referrer_id'], row['day'])['total_bonus_earned'] = row['amount'] or Decimal('0.00')
+
+    with transaction.atomic():
+        stale = ReferralStatistics.objects.filter(period_type='daily', period_start__range=(start, end))
+        if user_ids is not None:
+            stale = stale.filter(user_id__in=user_ids)
+        stale.delete()
+
+        ReferralStatistics.objects.bulk_create([
+            ReferralStatistics(
+                user_id=user_id,
+                period_type='daily',
+                period_start=day,
+                period_end=day,
+                average_commission_per_game=(
+                    values['total_commission_earned'] / values['commission_games']
+                    if values['commission_games'] else Decimal('0.00')
+                ),
+                **values
+            )
+            for (user_id, day), values in buckets.items()
+        ], batch_size=1000)
+
+    logger.info(f"📊 {len(buckets)} buckets quotidiens de parrainage reconstruits ({start} → {end})")
+    return len(buckets)
+
+
+def rebuild_statistics(start: date, end: date, user_ids: Optional[Iterable] = None) -> Dict[str, int]:
+    """
+    Reconstruire les buckets quotidiens puis toutes les périodes touchées par [start, end].
+
+    Returns:
+        dict: Nombre de lignes écrites par type de période
+    """
+    # Étendre aux périodes complètes : les buckets quotidiens anciens ont pu être purgés
+    start = min(period_bounds('monthly', start)[0], period_bounds('weekly', start)[0])
+    end = max(period_bounds('monthly', end)[1], period_bounds('weekly', end)[1])
+    end = min(end, timezone.localdate())
+    if user_ids is not None:
+        user_ids = list(user_ids)
+    written = {'daily': rebuild_daily_buckets(start, end, user_ids), 'weekly': 0, 'monthly': 0, 'yearly': 0}
+    if user_ids is None:
+        user_ids = list(ReferralStatistics.objects.filter(
+            period_type='daily', period_start__range=(start, end)
+        ).values_list('user_id', flat=True).distinct())
+
+    # Un jour représentatif par période : lundi, premier du mois, premier de l'an
+    weeks = sorted({period_bounds('weekly', start + timedelta(days=n))[0] for n in range((end - start).days + 1)})
+    months = sorted({period_bounds('monthly', start + timedelta(days=n))[0] for n in range((end - start).days + 1)})
+    years = sorted({month.replace(month=1) for month in months})
+    for period_type, source, days in (('weekly', 'daily', weeks), ('monthly', 'daily', months), ('yearly', 'monthly', years)):
+        for day in days:
+            written[period_type] += _rollup(period_type, source, day, user_ids)
+    refresh_referral_counts(end, user_ids)
+    return written
@@ -112,6 +112,9 @@ class ReferralSerializer(serializers.ModelSerializer):
     referred = UserBasicSerializer(read_only=True)
     program = ReferralProgramSerializer(read_only=True)
     
+    # Ancien nom du compteur de parties avec commission
+    commission_games_count = serializers.IntegerField(source='winning_games_count', read_only=True)
+    
     # Champs calculés
     commission_rate_effective = serializers.SerializerMethodField()
     games_played_this_month = serializers.SerializerMethodField()
@@ -168,7 +171,7 @@ class ReferralSerializer(serializers.ModelSerializer):
     
     def get_next_milestone(self, obj):
         """Prochain palier à atteindre."""
-        current_games = obj.commission_games_count
+        current_games = obj.winning_games_count
         milestones = [10, 25, 50, 100, 250, 500, 1000]
         
         for milestone in milestones:
@@ -187,7 +190,7 @@ class ReferralSerializer(serializers.ModelSerializer):
         return {
             'status': can_earn,
             'message': str(message),
-            'remaining_free_games': max(0, obj.program.free_games_limit - obj.commission_games_count) if not obj.is_premium_referrer else None
+            'remaining_free_games': max(0, obj.program.free_games_limit - obj.winning_games_count) if not obj.is_premium_referrer else None
         }
 
 
@@ -369,7 +372,7 @@ class ReferralStatisticsSerializer(serializers.ModelSerializer):
             'id', 'period_type', 'period_start', 'period_end',
             'total_referrals', 'active_referrals', 'new_referrals',
             'total_games_played', 'commission_games', 'total_commission_earned',
-            'total_bet_volume', 'average_commission_per_game',
+            'total_bet_volume', 'average_commission_per_game', 'total_bonus_earned',
             'conversion_rate', 'average_games_per_referral', 'performance_trend',
             'created_at', 'updated_at'
         ]
@@ -545,7 +548,7 @@ class ReferralCodeListSerializer(serializers.ModelSerializer):
     
     def get_total_clicks(self, obj):
         """Obtenir le nombre total de clics."""
-        return obj.clicks.count()
+        return obj.total_clicks
     
     def get_total_conversions(self, obj):
         """Obtenir le nombre total de conversions."""
@@ -553,7 +556,7 @@ class ReferralCodeListSerializer(serializers.ModelSerializer):
     
     def get_conversion_rate(self, obj):
         """Obtenir le taux de conversion."""
-        total_clicks = obj.clicks.count()
+        total_clicks = obj.total_clicks
         if total_clicks == 0:
             return 0
         conversions = obj.clicks.filter(converted_user__isnull=False).count()
@@ -615,7 +618,7 @@ class ReferralCodeDetailSerializer(serializers.ModelSerializer):
     
     def get_total_clicks(self, obj):
         """Obtenir le nombre total de clics."""
-        return obj.clicks.count()
+        return obj.total_clicks
     
     def get_total_conversions(self, obj):
         """Obtenir le nombre total de conversions."""
@@ -623,7 +626,7 @@ class ReferralCodeDetailSerializer(serializers.ModelSerializer):
     
     def get_conversion_rate(self, obj):
         """Obtenir le taux de conversion."""
-        total_clicks = obj.clicks.count()
+        total_clicks = obj.total_clicks
         if total_clicks == 0:
             return 0.0
         
@@ -11,6 +11,7 @@ from decimal import Decimal
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.db import transaction
+from django.db.models import Count, Q, Sum
 import logging
 
 from apps.referrals.models import Referral, ReferralCommission
@@ -194,12 +195,15 @@ class ReferralCommissionService:
             status='active'
         ).select_related('referred', 'program')
         
-        total_commission = sum(
-            ref.total_commission_earned for ref in referrals
+        # Un seul agrégat pour les totaux
+        totals = referrals.aggregate(
+            total=Count('id'),
+            premium=Count('id', filter=Q(is_premium_referrer=True)),
+            commission=Sum('total_commission_earned'),
         )
-        
-        premium_count = referrals.filter(is_premium_referrer=True).count()
-        non_premium_count = referrals.filter(is_premium_referrer=False).count()
+        total_commission = totals['commission'] or Decimal('0.00')
+        premium_count = totals['premium']
+        non_premium_count = totals['total'] - premium_count
         
         referrals_list = []
         for ref in referrals[:10]:  # Top 10
@@ -212,7 +216,7 @@ class ReferralCommissionService:
             })
         
         return {
-            'total_referrals': referrals.count(),
+            'total_referrals': totals['total'],
             'premium_referrals': premium_count,
             'non_premium_referrals': non_premium_count,
             'total_commission_earned': float(total_commission),
@@ -0,0 +1,315 @@
+# apps/referrals/settlement.py
+# =============================
+
+"""
+Moteur de règlement groupé des commissions de parrainage.
+
+Les commissions créées pendant une courte fenêtre (~1 s) sont réglées ensemble,
+groupées par parrain. Chaque lot est appliqué dans une seule transaction :
+un crédit de solde et une transaction de paiement par parrain et par devise,
+des mises à jour ensemblistes des commissions et une notification
+récapitulative par parrain.
+"""
+
+import logging
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, List
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, Q, Value, When
+from django.utils import timezone
+
+from .dashboard import apply_settlement, mark_stale
+from .fraud import FraudEvent, publish_on_commit
+from .models import Referral, ReferralCommission
+from .rollups import record_commissions_settled
+
+User = get_user_model()
+logger = logging.getLogger(__name__)
+
+SETTLEMENT_SCHEDULED_KEY = 'referrals:settlement_scheduled'
+
+DEFAULT_SETTLEMENT_SETTINGS = {
+    'SETTLEMENT_WINDOW_SECONDS': 1,
+    'SETTLEMENT_BATCH_SIZE': 5000,
+}
+
+BALANCE_FIELDS = {
+    'FCFA': 'balance_fcfa',
+    'EUR': 'balance_eur',
+    'USD': 'balance_usd',
+}
+
+
+def get_settlement_setting(key: str):
+    """Lire un paramètre de règlement dans REFERRAL_SETTINGS."""
+    return getattr(settings, 'REFERRAL_SETTINGS', {}).get(key, DEFAULT_SETTLEMENT_SETTINGS[key])
+
+
+def schedule_settlement():
+    """
+    Planifier un règlement à la fin de la fenêtre courante.
+
+    Tous les appels reçus pendant la fenêtre aboutissent à une seule tâche.
+    """
+    window = get_settlement_setting('SETTLEMENT_WINDOW_SECONDS')
+    if cache.add(SETTLEMENT_SCHEDULED_KEY, 1, timeout=window + 5):
+        from .tasks import settle_referral_commissions
+        settle_referral_commissions.apply_async(countdown=window)
+
+
+def settle_pending_commissions(batch_size: int = None, notify: bool = True) -> Dict:
+    """
+    Régler toutes les commissions en attente, par lots groupés par parrain.
+
+    Args:
+        batch_size: Nombre de commissions lues par lot
+        notify: Envoyer les notifications récapitulatives
+
+    Returns:
+        dict: Nombre de commissions réglées, annulées, échouées et montant total
+    """
+    # Les commissions créées à partir de maintenant déclenchent un nouveau règlement
+    cache.delete(SETTLEMENT_SCHEDULED_KEY)
+    batch_size = batch_size or get_settlement_setting('SETTLEMENT_BATCH_SIZE')
+    stats = {'processed': 0, 'cancelled': 0, 'failed': 0, 'referrers': 0, 'total_amount': Decimal('0.00')}
+    pending = ReferralCommission.objects.filter(status='pending').annotate(
+        bet_amount=F('game__bet_amount')
+    ).order_by('created_at', 'id').values_list(
+        'pk', 'created_at', 'referral_id', 'amount', 'currency', 'bet_amount', named=True
+    )
+    referrers = set()
+    cursor = None
+
+    while True:
+        # Parcours par clé : les commissions verrouillées par un autre worker
+        # ne sont pas relues indéfiniment
+        batch = pending
+        if cursor:
+            batch = batch.filter(
+                Q(created_at__gt=cursor[0]) | Q(created_at=cursor[0], id__gt=cursor[1])
+            )
+        # Lignes légères plutôt que des instances : le lot peut compter des milliers de commissions
+        commissions = list(batch[:batch_size])
+        if not commissions:
+            break
+        cursor = (commissions[-1].created_at, commissions[-1].pk)
+
+        referrals = Referral.objects.select_related('program').in_bulk(
+            {commission.referral_id for commission in commissions}
+        )
+        by_referrer = defaultdict(list)
+        for commission in commissions:
+            by_referrer[referrals[commission.referral_id].referrer_id].append(commission)
+
+        try:
+            results = [_settle_batch(by_referrer, referrals, notify)]
+        except Exception as e:
+            # Isoler le parrain fautif : on rejoue le lot parrain par parrain
+            logger.warning(f"⚠️ Règlement groupé échoué ({e}), reprise parrain par parrain")
+            results = []
+            for referrer_id, group in by_referrer.items():
+                try:
+                    results.append(_settle_batch({referrer_id: group}, referrals, notify))
+                except Exception as e:
+                    logger.error(f"❌ Règlement des commissions du parrain {referrer_id} échoué: {e}")
+                    _mark_failed(group, str(e))
+                    stats['failed'] += len(group)
+
+        for result in results:
+            stats['processed'] += result['processed']
+            stats['cancelled'] += result['cancelled']
+            stats['total_amount'] += result['total_amount']
+            referrers.update(result['referrers'])
+
+    stats['referrers'] = len(referrers)
+
+    logger.info(
+        f"💸 Règlement des commissions: {stats['processed']} réglées, {stats['cancelled']} annulées, "
+        f"{stats['failed']} échouées, {stats['total_amount']} au total pour {stats['referrers']} parrains"
+    )
+    return {**stats, 'total_amount': float(stats['total_amount'])}
+
+
+def _settle_batch(by_referrer: Dict, referrals: Dict, notify: bool) -> Dict:
+    """
+    Régler un lot de commissions groupées par parrain, dans une seule transaction.
+
+    Chaque parrain reçoit un seul crédit et une seule transaction de paiement par
+    devise ; les soldes sont crédités par un seul UPDATE par devise.
+    """
+    from apps.payments.models import Transaction
+
+    now = timezone.now()
+    group = [commission for commissions in by_referrer.values() for commission in commissions]
+
+    with transaction.atomic():
+        # Ignorer les commissions réglées entre-temps par un autre worker
+        pending_ids = set(
+            ReferralCommission.objects.select_for_update(skip_locked=True)
+            .filter(pk__in=[commission.pk for commission in group], status='pending')
+            .values_list('pk', flat=True)
+        )
+
+        # (parrain, devise) -> commissions éligibles
+        settled = defaultdict(list)
+        cancelled = defaultdict(list)
+        cancelled_by_referrer = defaultdict(list)
+        for commission in group:
+            if commission.pk not in pending_ids:
+                continue
+            referral = referrals[commission.referral_id]
+            can_earn, message = referral.can_earn_commission(commission.bet_amount)
+            currency = commission.currency.upper()
+            if can_earn and currency in BALANCE_FIELDS:
+                settled[(referral.referrer_id, currency)].append(commission)
+            else:
+                reason = str(message) if not can_earn else f"Devise non supportée: {commission.currency}"
+                cancelled[reason].append(commission.pk)
+                cancelled_by_referrer[referral.referrer_id].append(commission)
+
+        for reason, pks in cancelled.items():
+            ReferralCommission.objects.filter(pk__in=pks).update(
+                status='cancelled', failure_reason=reason, processed_at=now
+            )
+
+        if settled:
+            referrer_ids = {referrer_id for referrer_id, _ in settled}
+            fields = sorted({BALANCE_FIELDS[currency] for _, currency in settled})
+            balances = {
+                row['pk']: row
+                for row in User.objects.select_for_update().filter(pk__in=referrer_ids).values('pk', *fields)
+            }
+
+            ledgers = {}
+            credits = defaultdict(dict)
+            for (referrer_id, currency), commissions in settled.items():
+                total = sum((commission.amount for commission in commissions), Decimal('0.00'))
+                ledger = Transaction(
+                    user_id=referrer_id,
+                    transaction_type='referral',
+                    amount=total,
+                    net_amount=total,
+                    currency=currency,
+                    status='completed',
+                    processed_at=now,
+                    completed_at=now,
+                    metadata={'settlement': 'batch', 'commission_count': len(commissions)}
+                )
+                # bulk_create contourne Transaction.save()
+                ledger.transaction_id = ledger.generate_transaction_id()
+                ledgers[(referrer_id, currency)] = ledger
+                credits[BALANCE_FIELDS[currency]][referrer_id] = total
+            Transaction.objects.bulk_create(ledgers.values())
+
+            # Un seul UPDATE par devise pour créditer tous les parrains du lot
+            for field, amounts in credits.items():
+                User.objects.filter(pk__in=amounts.keys()).update(**{
+                    field: F(field) + Case(
+                        *[When(pk=referrer_id, then=Value(total)) for referrer_id, total in amounts.items()],
+                        output_field=DecimalField(max_digits=15, decimal_places=2)
+                    )
+                })
+
+            # Les commissions d'un même crédit partagent les mêmes valeurs
+            for key, ledger in ledgers.items():
+                before = balances[key[0]][BALANCE_FIELDS[key[1]]] or Decimal('0.00')
+                ReferralCommission.objects.filter(pk__in=[commission.pk for commission in settled[key]]).update(
+                    status='completed',
+                    processed_at=now,
+                    transaction=ledger,
+                    referrer_balance_before=before,
+                    referrer_balance_after=before + ledger.amount
+                )
+
+        # Statistiques des parrainages (équivalent de Referral.update_stats par commission),
+        # un UPDATE par incrément distinct
+        games_by_referral = defaultdict(int)
+        for commissions in settled.values():
+            for commission in commissions:
+                games_by_referral[commission.referral_id] += 1
+        referrals_by_count = defaultdict(list)
+        for referral_id, count in games_by_referral.items():
+            referrals_by_count[count].append(referral_id)
+        for count, referral_ids in referrals_by_count.items():
+            Referral.objects.filter(pk__in=referral_ids).update(
+                games_played=F('games_played') + count,
+                updated_at=now
+            )
+
+        # Buckets quotidiens des statistiques, un par parrain
+        for referrer_id, commissions in _by_referrer(settled).items():
+            record_commissions_settled(
+                referrer_id,
+                len(commissions),
+                sum((commission.amount for commission in commissions), Decimal('0.00')),
+                sum((commission.bet_amount or Decimal('0.00') for commission in commissions), Decimal('0.00')),
+            )
+
+        # Compteurs des tableaux de bord, un UPDATE par parrain
+        apply_settlement(_by_referrer(settled), cancelled_by_referrer, now)
+
+        publish_on_commit(*[
+            FraudEvent(
+                kind='commission',
+                user_id=str(referrer_id),
+                referrer_id=str(referrer_id),
+                amount=ledgers[(referrer_id, currency)].amount,
+                currency=currency,
+            )
+            for referrer_id, currency in settled
+        ])
+
+        if notify and settled:
+            digests = {
+                referrer_id: {
+                    'commissions': [str(commission.pk) for commission in commissions],
+                    'referrals': {str(commission.referral_id) for commission in commissions},
+                }
+                for referrer_id, commissions in _by_referrer(settled).items()
+            }
+            transaction.on_commit(lambda: _dispatch_notifications(digests))
+
+    return {
+        'processed': sum(len(commissions) for commissions in settled.values()),
+        'cancelled': sum(len(pks) for pks in cancelled.values()),
+        'total_amount': sum(
+            (commission.amount for commissions in settled.values() for commission in commissions),
+            Decimal('0.00')
+        ),
+        'referrers': {referrer_id for referrer_id, _ in settled},
+    }
+
+
+def _by_referrer(settled: Dict) -> Dict:
+    """Regrouper les commissions réglées par parrain, toutes devises confondues."""
+    by_referrer = defaultdict(list)
+    for (referrer_id, _), commissions in settled.items():
+        by_referrer[referrer_id].extend(commissions)
+    return by_referrer
+
+
+def _dispatch_notifications(digests: Dict):
+    """Une notification récapitulative par parrain, puis les contrôles de bonus."""
+    from .signals import check_first_deposit_bonus
+    from .tasks import send_commission_digest_notification
+
+    for referrer_id, digest in digests.items():
+        send_commission_digest_notification.delay(str(referrer_id), digest['commissions'])
+        for referral_id in digest['referrals']:
+            check_first_deposit_bonus.delay(referral_id)
+
+
+def _mark_failed(group: List, reason: str):
+    """Marquer un groupe de commissions comme échoué."""
+    ReferralCommission.objects.filter(
+        pk__in=[commission.pk for commission in group],
+        status='pending'
+    ).update(status='failed', failure_reason=reason, processed_at=timezone.now())
+    mark_stale(Referral.objects.filter(
+        pk__in={commission.referral_id for commission in group}
+    ).values_list('referrer_id', flat=True))
@@ -3,12 +3,22 @@
 
 import logging
 from decimal import Decimal
+from django.db.models import F
 from django.db.models.signals import post_save, post_delete, pre_save
 from django.dispatch import receiver
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
-from .models import Referral, ReferralCommission, PremiumSubscription, ReferralBonus, ReferralCode
+from apps.core.field_signals import on_field_change
+
+from .models import (
+    Referral, ReferralCommission, PremiumSubscription, ReferralBonus, ReferralCode, ReferralCodeClick,
+    ReferralCodeShare
+)
+from .dashboard import mark_stale, record_commission_created
+from .fraud import FraudEvent, device_fingerprint, login_fingerprint, publish_on_commit
+from .rollups import record_referral_created
+from .tree import add_referral, creates_cycle, remove_referral
 from .tasks import (
     process_single_commission, send_new_referral_notification,
     send_commission_notification, create_milestone_bonuses
@@ -43,6 +53,20 @@ def handle_new_referral(sender, instance, created, **kwargs):
     if created:
         logger.info(f"Nouveau parrainage créé: {instance.referrer.username} → {instance.referred.username}")
         
+        # Bucket quotidien des statistiques du parrain
+        record_referral_created(instance)
+        
+        # Détection de fraude en continu
+        ip, device = login_fingerprint(instance.referred_id)
+        publish_on_commit(FraudEvent(
+            kind='referral',
+            user_id=str(instance.referred_id),
+            referrer_id=str(instance.referrer_id),
+            referral_id=str(instance.id),
+            ip=ip,
+            device=device,
+        ))
+        
         # Envoyer notification au parrain
         send_new_referral_notification.delay(str(instance.id))
         
@@ -88,13 +112,16 @@ def handle_referral_status_change(sender, instance, **kwargs):
 
 # ===== SIGNAUX POUR LES JEUX =====
 
-@receiver(post_save, sender='games.Game')
-def handle_game_completion(sender, instance, created, **kwargs):
+@on_field_change('games.Game', fields=['status'], on_commit=True)
+def handle_game_completion(instance, changes, created):
     """
     Traitement automatique après completion d'une partie.
     Créer les commissions de parrainage si applicable.
+    
+    Appelé seulement quand le statut change, après le commit (les coups
+    joués ne passent plus par ce receiver).
     """
-    if not created and instance.status == 'completed':
+    if changes['status'][1] == 'completed':
         # Vérifier si le joueur a un parrain
         try:
             referral = Referral.objects.get(
@@ -387,6 +414,29 @@ def validate_referral_security(sender, instance, **kwargs):
         
         if existing_referral:
             raise ValueError("Cet utilisateur a déjà un parrain")
+    
+    # Empêcher les cycles (parrainer l'un de ses propres parrains)
+    if instance._state.adding and creates_cycle(instance.referrer_id, instance.referred_id):
+        raise ValueError("Ce parrainage créerait un cycle dans l'arbre de parrainage")
+
+
+# ===== ARBRE DE PARRAINAGE =====
+
+@receiver(post_save, sender=Referral)
+def add_referral_to_tree(sender, instance, created, **kwargs):
+    """
+    Ajouter les chemins du nouveau filleul à la table de fermeture.
+    """
+    if created:
+        add_referral(instance.referrer_id, instance.referred_id)
+
+
+@receiver(post_delete, sender=Referral)
+def remove_referral_from_tree(sender, instance, **kwargs):
+    """
+    Retirer les chemins passant par le parrainage supprimé.
+    """
+    remove_referral(instance.referrer_id, instance.referred_id)
 
 
 @receiver(pre_save, sender=ReferralCommission)
@@ -419,6 +469,66 @@ def validate_commission_security(sender, instance, **kwargs):
             )
 
 
+@receiver(post_save, sender=ReferralCodeClick)
+def publish_click_event(sender, instance, created, **kwargs):
+    """
+    Compter et transmettre au détecteur de fraude les clics créés directement.
+    
+    Les clics tamponnés par `click_buffer` sont écrits par `bulk_create`, sans
+    signal : compteur et événement ont déjà été produits à l'enregistrement.
+    """
+    if created:
+        ReferralCode.objects.filter(pk=instance.code_id).update(total_clicks=F('total_clicks') + 1)
+        publish_on_commit(FraudEvent(
+            kind='click',
+            user_id=str(instance.converted_user_id or ''),
+            referrer_id=str(instance.code.user_id),
+            ip=instance.visitor_ip or '',
+            device=device_fingerprint(instance.user_agent),
+        ))
+
+
+@receiver(post_save, sender=ReferralCodeShare)
+def count_direct_share(sender, instance, created, **kwargs):
+    """
+    Compter les partages créés directement (hors tampon de tracking).
+    """
+    if created:
+        ReferralCode.objects.filter(pk=instance.code_id).update(total_shares=F('total_shares') + 1)
+
+
+# ===== TABLEAUX DE BORD DES PARRAINS =====
+
+@receiver(post_save, sender=ReferralCommission)
+def update_dashboard_on_commission(sender, instance, created, **kwargs):
+    """
+    Compter la nouvelle commission en attente, ou faire recalculer le tableau de bord.
+    """
+    if created:
+        record_commission_created(instance)
+    else:
+        mark_stale([instance.referral.referrer_id])
+
+
+@receiver(post_save, sender=Referral)
+@receiver(post_save, sender=ReferralBonus)
+def refresh_dashboard_on_referral(sender, instance, **kwargs):
+    """
+    Parrainage ou bonus modifié : tableau de bord du parrain à recalculer.
+    """
+    referrer_id = instance.referrer_id if sender is Referral else instance.referral.referrer_id
+    mark_stale([referrer_id])
+
+
+@receiver(post_save, sender=PremiumSubscription)
+@receiver(post_save, sender=ReferralCode)
+def refresh_dashboard_on_account(sender, instance, **kwargs):
+    """
+    Abonnement ou code de parrainage modifié : tableau de bord à recalculer.
+    """
+    mark_stale([instance.user_id])
+
+
 # ===== SIGNAUX POUR LES NOTIFICATIONS TEMPS RÉEL =====
 
 @receiver(post_save, sender=ReferralCommission)
@@ -8,7 +8,6 @@ from typing import List, Dict, Optional, Tuple
 
 from celery import shared_task
 from django.utils import timezone
-from django.db import transaction
 from django.db.models import Q, Sum, Count, Avg, F
 from django.core.mail import send_mail
 from django.template.loader import render_to_string
@@ -19,6 +18,11 @@ from .models import (
     ReferralProgram, Referral, ReferralCommission, 
     PremiumSubscription, ReferralStatistics, ReferralBonus
 )
+from .click_buffer import flush_click_buffer
+from .dashboard import refresh_stale_dashboards
+from .fraud import FraudFlag, persist_flags, process_pending_events
+from .rollups import rebuild_statistics, refresh_referral_counts, rollup_periods
+from .settlement import schedule_settlement, settle_pending_commissions
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
@@ -30,71 +34,34 @@ logger = logging.getLogger(__name__)
 def calculate_pending_commissions(self):
     """
     Calculer et traiter toutes les commissions de parrainage en attente.
-    Exécuté toutes les heures.
+    Exécuté toutes les heures en filet de sécurité du règlement groupé.
     """
     try:
-        processed_count = 0
-        failed_count = 0
-        total_amount = Decimal('0.00')
-        
-        # Récupérer toutes les commissions en attente
-        pending_commissions = ReferralCommission.objects.filter(
-            status='pending'
-        ).select_related('referral', 'referral__referrer', 'game')
-        
-        logger.info(f"Traitement de {pending_commissions.count()} commissions en attente")
-        
-        for commission in pending_commissions:
-            try:
-                # Vérifier si la commission peut encore être traitée
-                can_earn, message = commission.referral.can_earn_commission(
-                    commission.game.bet_amount
-                )
-                
-                if not can_earn:
-                    commission.status = 'cancelled'
-                    commission.failure_reason = str(message)
-                    commission.save()
-                    failed_count += 1
-                    continue
-                
-                # Traiter la commission
-                with transaction.atomic():
-                    commission.process_commission()
-                    processed_count += 1
-                    total_amount += commission.amount
-                    
-                    # Notification au parrain
-                    send_commission_notification.delay(commission.id)
-                    
-            except Exception as e:
-                logger.error(f"Erreur lors du traitement de la commission {commission.id}: {e}")
-                failed_count += 1
-                
-                # Marquer comme échouée après plusieurs tentatives
-                commission.status = 'failed'
-                commission.failure_reason = str(e)
-                commission.save()
+        result = settle_pending_commissions()
         
         # Mettre à jour les statistiques
         update_daily_statistics.delay()
         
-        logger.info(
-            f"Traitement des commissions terminé: {processed_count} réussies, "
-            f"{failed_count} échouées, montant total: {total_amount} FCFA"
-        )
-        
-        return {
-            'processed': processed_count,
-            'failed': failed_count,
-            'total_amount': float(total_amount)
-        }
+        return result
         
     except Exception as exc:
         logger.error(f"Erreur dans calculate_pending_commissions: {exc}")
         raise self.retry(exc=exc)
 
 
+@shared_task(bind=True, max_retries=3, default_retry_delay=5)
+def settle_referral_commissions(self):
+    """
+    Régler les commissions accumulées pendant la fenêtre de règlement.
+    Planifié par `schedule_settlement` à la création des commissions.
+    """
+    try:
+        return settle_pending_commissions()
+    except Exception as exc:
+        logger.error(f"Erreur dans settle_referral_commissions: {exc}")
+        raise self.retry(exc=exc)
+
+
 @shared_task(bind=True, max_retries=2)
 def process_single_commission(self, commission_id: str, game_id: str, referral_id: str):
     """
@@ -133,8 +100,8 @@ def process_single_commission(self, commission_id: str, game_id: str, referral_i
             f"pour le parrain {referral.referrer.username}"
         )
         
-        # Planifier le traitement de la commission
-        calculate_pending_commissions.apply_async(countdown=10)
+        # Planifier le règlement groupé de la fenêtre courante
+        schedule_settlement()
         
         return {
             'status': 'created',
@@ -244,72 +211,20 @@ def attempt_auto_renewal(self, subscription_id: str):
 @shared_task(bind=True, max_retries=2)
 def update_referral_statistics(self):
     """
-    Calculer et mettre à jour les statistiques de parrainage.
+    Dériver les statistiques hebdomadaires, mensuelles et annuelles.
     Exécuté quotidiennement à 1h.
+    
+    Les buckets quotidiens sont alimentés en continu par les événements
+    (voir apps.referrals.rollups) : seules les périodes contenant hier et
+    aujourd'hui sont resommées.
     """
     try:
-        updated_stats = {
-            'daily': 0,
-            'weekly': 0,
-            'monthly': 0,
-            'yearly': 0
-        }
-        
-        # Récupérer tous les utilisateurs ayant des parrainages
-        users_with_referrals = User.objects.filter(
-            referrals_made__isnull=False
-        ).distinct()
+        updated_stats = {'weekly': 0, 'monthly': 0, 'yearly': 0}
         
-        today = timezone.now().date()
-        
-        for user in users_with_referrals:
-            # Statistiques quotidiennes
-            daily_stats = ReferralStatistics.calculate_statistics(
-                user=user,
-                period_type='daily',
-                start_date=today,
-                end_date=today
-            )
-            updated_stats['daily'] += 1
-            
-            # Statistiques hebdomadaires (lundi de la semaine)
-            week_start = today - timedelta(days=today.weekday())
-            week_end = week_start + timedelta(days=6)
-            
-            weekly_stats = ReferralStatistics.calculate_statistics(
-                user=user,
-                period_type='weekly',
-                start_date=week_start,
-                end_date=week_end
-            )
-            updated_stats['weekly'] += 1
-            
-            # Statistiques mensuelles (premier du mois)
-            if today.day == 1 or today.day <= 7:  # Calculer en début de mois
-                month_start = today.replace(day=1)
-                next_month = month_start + timedelta(days=32)
-                month_end = next_month.replace(day=1) - timedelta(days=1)
-                
-                monthly_stats = ReferralStatistics.calculate_statistics(
-                    user=user,
-                    period_type='monthly',
-                    start_date=month_start,
-                    end_date=month_end
-                )
-                updated_stats['monthly'] += 1
-            
-            # Statistiques annuelles (premier de l'année)
-            if today.month == 1 and today.day <= 7:
-                year_start = today.replace(month=1, day=1)
-                year_end = today.replace(month=12, day=31)
-                
-                yearly_stats = ReferralStatistics.calculate_statistics(
-                    user=user,
-                    period_type='yearly',
-                    start_date=year_start,
-                    end_date=year_end
-                )
-                updated_stats['yearly'] += 1
+        today = timezone.localdate()
+        for day in sorted({today - timedelta(days=1), today}):
+            for period_type, count in rollup_periods(day).items():
+                updated_stats[period_type] += count
         
         logger.info(f"Statistiques mises à jour: {updated_stats}")
         return updated_stats
@@ -322,27 +237,19 @@ def update_referral_statistics(self):
 @shared_task
 def update_daily_statistics():
     """
-    Mettre à jour les statistiques quotidiennes uniquement.
+    Rafraîchir le nombre de filleuls des buckets du jour.
     Appelé après traitement des commissions.
     """
     try:
-        today = timezone.now().date()
-        users_updated = 0
+        today = timezone.localdate()
         
         # Utilisateurs avec de l'activité aujourd'hui
-        active_users = User.objects.filter(
-            Q(referrals_made__commissions__created_at__date=today) |
-            Q(referrals_made__created_at__date=today)
-        ).distinct()
+        active_users = ReferralStatistics.objects.filter(
+            period_type='daily',
+            period_start=today
+        ).values_list('user_id', flat=True)
         
-        for user in active_users:
-            ReferralStatistics.calculate_statistics(
-                user=user,
-                period_type='daily',
-                start_date=today,
-                end_date=today
-            )
-            users_updated += 1
+        users_updated = refresh_referral_counts(today, list(active_users))
         
         logger.info(f"Statistiques quotidiennes mises à jour pour {users_updated} utilisateurs")
         return users_updated
@@ -490,6 +397,49 @@ def send_commission_notification(self, commission_id: str):
         raise self.retry(exc=exc)
 
 
+@shared_task(bind=True, max_retries=3, default_retry_delay=30)
+def send_commission_digest_notification(self, referrer_id: str, commission_ids: List[str]):
+    """
+    Envoyer une notification récapitulative des commissions réglées ensemble.
+    """
+    try:
+        referrer = User.objects.get(id=referrer_id)
+        commissions = list(
+            ReferralCommission.objects.filter(id__in=commission_ids)
+            .select_related('referral__referred')
+            .order_by('created_at')
+        )
+        if not commissions:
+            return False
+        
+        totals = {}
+        for commission in commissions:
+            totals[commission.currency] = totals.get(commission.currency, Decimal('0.00')) + commission.amount
+        
+        context = {
+            'referrer': referrer,
+            'commissions': commissions,
+            'totals': totals,
+            'site_name': 'RUMO RUSH',
+        }
+        
+        subject = ', '.join(f"{amount} {currency}" for currency, amount in totals.items())
+        send_mail(
+            subject=f"Commissions de parrainage reçues : {subject}",
+            message=render_to_string('emails/commission_digest.txt', context),
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            recipient_list=[referrer.email],
+            fail_silently=False
+        )
+        
+        logger.info(f"Récapitulatif de {len(commissions)} commissions envoyé à {referrer.username}")
+        return True
+        
+    except Exception as exc:
+        logger.error(f"Erreur dans send_commission_digest_notification: {exc}")
+        raise self.retry(exc=exc)
+
+
 @shared_task
 def send_subscription_expiry_notification(subscription_id: str):
     """
@@ -819,76 +769,79 @@ def send_monthly_report_email(report_data: Dict):
         return False
 
 
+# ===== TRACKING DES CODES DE PARRAINAGE =====
+
+@shared_task(bind=True, max_retries=3, default_retry_delay=5)
+def flush_referral_clicks(self):
+    """
+    Écrire en base les clics et partages tamponnés pendant la fenêtre.
+    Planifiée par `schedule_flush` au premier clic de chaque fenêtre.
+    """
+    try:
+        return flush_click_buffer()
+    except Exception as exc:
+        logger.error(f"Erreur dans flush_referral_clicks: {exc}")
+        raise self.retry(exc=exc)
+
+
+# ===== TABLEAUX DE BORD DES PARRAINS =====
+
+@shared_task
+def refresh_referral_dashboards():
+    """
+    Recalculer les tableaux de bord marqués comme périmés.
+    Planifiée par `schedule_dashboard_refresh` à la fin de chaque fenêtre.
+    """
+    try:
+        return refresh_stale_dashboards()
+    except Exception as e:
+        logger.error(f"Erreur dans refresh_referral_dashboards: {e}")
+        return 0
+
+
 # ===== TÂCHES DE DÉTECTION DE FRAUDE =====
 
+@shared_task
+def process_fraud_events():
+    """
+    Consommer les événements de parrainage publiés pour le détecteur de fraude.
+    Planifiée à la fin de chaque fenêtre d'événements (~1 s).
+    """
+    try:
+        return process_pending_events()
+    except Exception as e:
+        logger.error(f"Erreur dans process_fraud_events: {e}")
+        return {'events': 0, 'flags': 0}
+
+
 @shared_task
 def detect_suspicious_activity():
     """
-    Détecter les activités suspectes de parrainage.
+    Filet de sécurité du détecteur de fraude en continu.
+    
+    Vide la file d'événements en attente et suspend en une requête les
+    auto-parrainages qui auraient échappé au flux (imports, écritures directes).
     """
     try:
-        suspicious_activities = []
-        
-        # 1. Détection de auto-parrainage
-        self_referrals = Referral.objects.filter(
-            referrer=F('referred')
-        )
-        
-        for referral in self_referrals:
-            suspicious_activities.append({
-                'type': 'self_referral',
-                'user': referral.referrer.username,
-                'referral_id': str(referral.id)
-            })
-            
-            # Suspendre automatiquement
-            referral.status = 'suspended'
-            referral.save()
-        
-        # 2. Commission excessive en peu de temps
-        yesterday = timezone.now() - timedelta(days=1)
-        high_earners = User.objects.filter(
-            referrals_made__commissions__created_at__gte=yesterday,
-            referrals_made__commissions__status='completed'
-        ).annotate(
-            daily_commission=Sum('referrals_made__commissions__amount')
-        ).filter(
-            daily_commission__gte=Decimal('50000')  # Plus de 50k FCFA par jour
-        )
-        
-        for user in high_earners:
-            suspicious_activities.append({
-                'type': 'high_daily_earnings',
-                'user': user.username,
-                'amount': float(user.daily_commission)
-            })
+        result = process_pending_events()
         
-        # 3. Trop de nouveaux parrainages en peu de temps
-        recent_high_referrers = User.objects.filter(
-            referrals_made__created_at__gte=yesterday
-        ).annotate(
-            recent_referrals=Count('referrals_made')
-        ).filter(
-            recent_referrals__gte=10  # Plus de 10 nouveaux filleuls par jour
-        )
-        
-        for user in recent_high_referrers:
-            suspicious_activities.append({
-                'type': 'high_referral_rate',
-                'user': user.username,
-                'count': user.recent_referrals
-            })
-        
-        # Notifier les administrateurs si activité suspecte
-        if suspicious_activities:
-            notify_admins_suspicious_activity.delay(suspicious_activities)
+        self_referrals = [
+            FraudFlag(
+                user_id=str(referrer_id), rule='self_referral', severity='high',
+                details={'referral_id': str(referral_id)}, referral_id=str(referral_id)
+            )
+            for referral_id, referrer_id in Referral.objects.filter(
+                referrer=F('referred')
+            ).exclude(status='suspended').values_list('id', 'referrer_id')
+        ]
+        result['flags'] += persist_flags(self_referrals)
         
-        logger.info(f"Détection terminée: {len(suspicious_activities)} activités suspectes")
-        return suspicious_activities
+        logger.info(f"Détection terminée: {result['flags']} activités suspectes")
+        return result
         
     except Exception as e:
         logger.error(f"Erreur dans detect_suspicious_activity: {e}")
-        return []
+        return {'events': 0, 'flags': 0}
 
 
 @shared_task
@@ -945,54 +898,9 @@ def recalculate_user_statistics(user_id: str):
     try:
         user = User.objects.get(id=user_id)
         
-        # Supprimer les anciennes statistiques
-        ReferralStatistics.objects.filter(user=user).delete()
-        
-        # Recalculer par période
-        today = timezone.now().date()
-        
-        # Les 30 derniers jours
-        for i in range(30):
-            date = today - timedelta(days=i)
-            ReferralStatistics.calculate_statistics(
-                user=user,
-                period_type='daily',
-                start_date=date,
-                end_date=date
-            )
-        
-        # Les 12 dernières semaines
-        for i in range(12):
-            week_start = today - timedelta(weeks=i, days=today.weekday())
-            week_end = week_start + timedelta(days=6)
-            ReferralStatistics.calculate_statistics(
-                user=user,
-                period_type='weekly',
-                start_date=week_start,
-                end_date=week_end
-            )
-        
-        # Les 12 derniers mois
-        for i in range(12):
-            if today.month - i <= 0:
-                month = 12 + (today.month - i)
-                year = today.year - 1
-            else:
-                month = today.month - i
-                year = today.year
-            
-            month_start = date(year, month, 1)
-            if month == 12:
-                month_end = date(year + 1, 1, 1) - timedelta(days=1)
-            else:
-                month_end = date(year, month + 1, 1) - timedelta(days=1)
-            
-            ReferralStatistics.calculate_statistics(
-                user=user,
-                period_type='monthly',
-                start_date=month_start,
-                end_date=month_end
-            )
+        # Les 12 derniers mois, depuis les tables sources
+        today = timezone.localdate()
+        rebuild_statistics(today - timedelta(days=365), today, user_ids=[user.pk])
         
         logger.info(f"Statistiques recalculées pour l'utilisateur {user.username}")
         return True
@@ -0,0 +1,100 @@
+# apps/referrals/test_click_buffer.py
+# ===================================
+
+"""
+Tests du tracking différé des clics et partages de codes de parrainage.
+"""
+
+import pytest
+from unittest.mock import patch
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.accounts.models import User
+from apps.referrals.click_buffer import (
+    MemoryClickBuffer, RedisClickBuffer, flush_click_buffer, record_click, record_share,
+)
+from apps.referrals.models import ReferralCode, ReferralCodeClick, ReferralCodeShare, ReferralProgram
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def code():
+    alice = User(username='alice', email='alice@test.com', referral_code='ALICE001')
+    User.objects.bulk_create([alice])
+    program = ReferralProgram.objects.create(name='Standard', description='Test', status='active')
+    return ReferralCode.objects.create(user=alice, program=program, code='ALICE')
+
+
+@pytest.fixture(autouse=True)
+def no_scheduling():
+    with patch('apps.referrals.click_buffer.schedule_flush'), \
+            patch('apps.referrals.click_buffer.publish_on_commit'):
+        yield
+
+
+def test_burst_is_written_with_one_update_per_code(code):
+    buffer = MemoryClickBuffer()
+    for i in range(50):
+        record_click(code, ip=f'10.0.0.{i}', user_agent='Mozilla', buffer=buffer)
+    record_share(code, 'whatsapp', buffer=buffer)
+
+    assert ReferralCodeClick.objects.count() == 0
+    with CaptureQueriesContext(connection) as queries:
+        stats = flush_click_buffer(buffer)
+
+    updates = [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+    assert len(updates) == 1
+    assert stats == {'codes': 1, 'clicks': 50, 'shares': 1}
+    code.refresh_from_db()
+    assert (code.total_clicks, code.total_shares) == (50, 1)
+    assert code.clicks.count() == 50
+    assert code.shares.get().channel == 'whatsapp'
+    assert flush_click_buffer(buffer) == {'codes': 0, 'clicks': 0, 'shares': 0}
+
+
+def test_raw_rows_are_sampled_above_threshold(code, settings):
+    settings.REFERRAL_SETTINGS = {'CLICK_SAMPLE_THRESHOLD': 10, 'CLICK_SAMPLE_RATE': 0}
+    buffer = MemoryClickBuffer()
+    ids = [record_click(code, buffer=buffer) for _ in range(25)]
+    flush_click_buffer(buffer)
+
+    code.refresh_from_db()
+    assert code.total_clicks == 25
+    assert code.clicks.count() == 10
+    assert ids[9] is not None and ids[10] is None
+
+
+def test_failed_flush_is_restored(code):
+    buffer = MemoryClickBuffer()
+    record_click(code, buffer=buffer)
+    with patch.object(ReferralCodeClick.objects, 'bulk_create', side_effect=RuntimeError):
+        with pytest.raises(RuntimeError):
+            flush_click_buffer(buffer)
+
+    flush_click_buffer(buffer)
+    code.refresh_from_db()
+    assert code.total_clicks == 1
+    assert code.clicks.count() == 1
+
+
+def test_direct_rows_keep_counters_in_sync(code):
+    ReferralCodeClick.objects.create(code=code, visitor_ip='10.0.0.1')
+    ReferralCodeShare.objects.create(code=code, channel='sms')
+
+    code.refresh_from_db()
+    assert (code.total_clicks, code.total_shares) == (1, 1)
+
+
+def test_redis_buffer_round_trip(code):
+    fakeredis = pytest.importorskip('fakeredis')
+    buffer = RedisClickBuffer(fakeredis.FakeRedis())
+    record_click(code, ip='10.0.0.1', referrer='https://t.me', buffer=buffer)
+    record_click(code, buffer=buffer)
+
+    assert flush_click_buffer(buffer)['clicks'] == 2
+    code.refresh_from_db()
+    assert code.total_clicks == 2
+    assert code.clicks.filter(referrer='https://t.me').exists()
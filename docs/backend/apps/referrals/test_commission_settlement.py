@@ -0,0 +1,119 @@
+# apps/referrals/test_commission_settlement.py
+# ============================================
+
+"""
+Tests du règlement groupé des commissions de parrainage.
+"""
+
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+
+from apps.accounts.models import User
+from apps.games.models import Game, GameType
+from apps.payments.models import Transaction
+from apps.referrals.models import Referral, ReferralCommission, ReferralProgram
+from apps.referrals.settlement import settle_pending_commissions
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def setup():
+    """Deux parrains, trois filleuls et des parties terminées, sans signaux."""
+    users = [
+        User(username=name, email=f'{name}@test.com', referral_code=f'{name.upper()}001')
+        for name in ('alice', 'bob', 'carl', 'dora', 'eric')
+    ]
+    User.objects.bulk_create(users)
+    alice, bob, carl, dora, eric = users
+
+    program = ReferralProgram.objects.create(
+        name='Standard', description='Test', commission_type='percentage',
+        commission_rate=Decimal('10.00'), status='active'
+    )
+    referrals = {
+        'alice_carl': Referral(referrer=alice, referred=carl, program=program, is_premium_referrer=True),
+        'alice_dora': Referral(referrer=alice, referred=dora, program=program, is_premium_referrer=True),
+        'bob_eric': Referral(referrer=bob, referred=eric, program=program, status='cancelled'),
+    }
+    Referral.objects.bulk_create(referrals.values())
+
+    game_type = GameType.objects.create(
+        name='settlement', display_name='Settlement', description='Test', category='strategy'
+    )
+    games = Game.objects.bulk_create([
+        Game(room_code=f'{i:08x}', game_type=game_type, player1=carl,
+             bet_amount=Decimal('1000.00'), status='completed')
+        for i in range(5)
+    ])
+
+    def commission(referral, game, amount, currency='FCFA'):
+        return ReferralCommission(referral=referrals[referral], game=game, amount=Decimal(amount), currency=currency)
+
+    ReferralCommission.objects.bulk_create([
+        commission('alice_carl', games[0], '14.00'),
+        commission('alice_carl', games[1], '6.00'),
+        commission('alice_dora', games[2], '10.00'),
+        commission('alice_dora', games[3], '2.00', currency='EUR'),
+        commission('bob_eric', games[4], '14.00'),
+    ])
+    return {'alice': alice, 'bob': bob, 'referrals': referrals}
+
+
+class TestSettlePendingCommissions:
+    """Un crédit par parrain et par devise, appliqué en un seul lot."""
+
+    def test_credits_each_referrer_once_per_currency(self, setup):
+        result = settle_pending_commissions(notify=False)
+
+        assert result['processed'] == 4
+        assert result['cancelled'] == 1
+        assert result['referrers'] == 1
+        alice = User.objects.get(pk=setup['alice'].pk)
+        assert alice.balance_fcfa == Decimal('30.00')
+        assert alice.balance_eur == Decimal('2.00')
+
+        ledgers = Transaction.objects.filter(user=alice, transaction_type='referral')
+        assert sorted(ledgers.values_list('currency', 'amount')) == [
+            ('EUR', Decimal('2.00')), ('FCFA', Decimal('30.00'))
+        ]
+
+    def test_marks_commissions_and_links_ledger(self, setup):
+        settle_pending_commissions(notify=False)
+
+        completed = ReferralCommission.objects.filter(status='completed', currency='FCFA')
+        assert completed.count() == 3
+        assert completed.values('transaction').distinct().count() == 1
+        assert set(completed.values_list('referrer_balance_after', flat=True)) == {Decimal('30.00')}
+
+        cancelled = ReferralCommission.objects.get(status='cancelled')
+        assert cancelled.referral == setup['referrals']['bob_eric']
+        assert cancelled.failure_reason
+        assert User.objects.get(pk=setup['bob'].pk).balance_fcfa == Decimal('0.00')
+
+    def test_updates_referral_stats(self, setup):
+        settle_pending_commissions(notify=False)
+
+        played = dict(Referral.objects.values_list('pk', 'games_played'))
+        assert played[setup['referrals']['alice_carl'].pk] == 2
+        assert played[setup['referrals']['alice_dora'].pk] == 2
+        assert played[setup['referrals']['bob_eric'].pk] == 0
+
+    def test_small_batches_settle_everything(self, setup):
+        result = settle_pending_commissions(batch_size=2, notify=False)
+
+        assert result['processed'] == 4
+        assert not ReferralCommission.objects.filter(status='pending').exists()
+        assert User.objects.get(pk=setup['alice'].pk).balance_fcfa == Decimal('30.00')
+
+    def test_sends_one_digest_per_referrer(self, setup, django_capture_on_commit_callbacks):
+        with patch('apps.referrals.tasks.send_commission_digest_notification.delay') as digest, \
+                patch('apps.referrals.signals.check_first_deposit_bonus.delay'):
+            with django_capture_on_commit_callbacks(execute=True):
+                settle_pending_commissions()
+
+        digest.assert_called_once()
+        referrer_id, commission_ids = digest.call_args.args
+        assert referrer_id == str(setup['alice'].pk)
+        assert len(commission_ids) == 4
@@ -0,0 +1,153 @@
+# apps/referrals/test_fraud_detection.py
+# ======================================
+
+"""
+Tests du détecteur de fraude au parrainage sur des flux d'événements synthétiques.
+"""
+
+import pytest
+from decimal import Decimal
+from unittest.mock import patch
+
+from apps.accounts.models import User
+from apps.referrals.fraud import (
+    ClickVelocityRule, EarningsRateRule, FraudDetector, FraudEvent, FraudFlag,
+    MemoryWindowStore, RedisWindowStore, ReferralVelocityRule, SelfReferralRule,
+    SharedIPRule, load_rules, persist_flags,
+)
+from apps.referrals.models import Referral, ReferralFraudFlag, ReferralProgram
+
+
+def referrals(referrer, count, start=1000.0, step=1.0, ip=''):
+    """Flux de `count` nouveaux filleuls pour un parrain."""
+    return [
+        FraudEvent(kind='referral', user_id=f'filleul-{i}', referrer_id=referrer,
+                   ip=ip, timestamp=start + i * step)
+        for i in range(count)
+    ]
+
+
+def detector(*rules, cooldown=3600):
+    return FraudDetector(rules=list(rules), store=MemoryWindowStore(), cooldown=cooldown)
+
+
+class TestRules:
+    """Chaque règle isolée, sans Redis."""
+
+    def test_velocity_flags_at_threshold(self):
+        flags = detector(ReferralVelocityRule(threshold=5, window=60)).process(referrals('alice', 5))
+
+        assert [(f.user_id, f.rule) for f in flags] == [('alice', 'referral_velocity')]
+        assert flags[0].details['count'] == 5
+
+    def test_velocity_window_slides(self):
+        # Un filleul toutes les 20 s : jamais plus de 3 dans une fenêtre de 60 s
+        flags = detector(ReferralVelocityRule(threshold=4, window=60)).process(referrals('alice', 20, step=20))
+
+        assert flags == []
+
+    def test_shared_ip_counts_distinct_accounts(self):
+        events = referrals('alice', 2, ip='10.0.0.1') + [
+            # Même compte rejoué : ne compte qu'une fois
+            FraudEvent(kind='referral', user_id='filleul-0', referrer_id='alice', ip='10.0.0.1', timestamp=1010),
+            FraudEvent(kind='referral', user_id='filleul-9', referrer_id='bob', ip='10.0.0.1', timestamp=1011),
+        ]
+        assert detector(SharedIPRule(threshold=3)).process(events) == []
+
+        flags = detector(SharedIPRule(threshold=3)).process(referrals('alice', 3, ip='10.0.0.1'))
+        assert flags[0].details == {'ip': '10.0.0.1', 'accounts': 3, 'window': 86400}
+
+    def test_earnings_rate_sums_amounts_in_currency(self):
+        events = [
+            FraudEvent(kind='commission', user_id='alice', referrer_id='alice',
+                       amount=Decimal(amount), currency=currency, timestamp=1000 + i)
+            for i, (amount, currency) in enumerate([('30000', 'FCFA'), ('500', 'EUR'), ('25000', 'FCFA')])
+        ]
+        flags = detector(EarningsRateRule(threshold=Decimal('50000'))).process(events)
+
+        assert flags[0].details['amount'] == '55000'
+
+    def test_click_velocity_per_ip(self):
+        events = [
+            FraudEvent(kind='click', user_id='', referrer_id='alice', ip='10.0.0.2', timestamp=1000 + i)
+            for i in range(3)
+        ]
+        assert detector(ClickVelocityRule(threshold=3)).process(events)[0].rule == 'click_velocity'
+
+    def test_self_referral(self):
+        event = FraudEvent(kind='referral', user_id='alice', referrer_id='alice', referral_id='r1')
+        flags = detector(SelfReferralRule()).process([event])
+
+        assert flags[0].referral_id == 'r1'
+        assert flags[0].severity == 'high'
+
+
+class TestDetector:
+    """Orchestration des règles."""
+
+    def test_flags_are_deduplicated_during_cooldown(self):
+        flags = detector(ReferralVelocityRule(threshold=3, window=60)).process(referrals('alice', 10))
+
+        assert len(flags) == 1
+
+    def test_rules_only_see_their_event_kinds(self):
+        events = [FraudEvent(kind='click', user_id='', referrer_id='alice', timestamp=1000 + i) for i in range(20)]
+
+        assert detector(ReferralVelocityRule(threshold=3)).process(events) == []
+
+    def test_rules_are_configurable(self):
+        rules = load_rules({'apps.referrals.fraud.ReferralVelocityRule': {'threshold': 2}})
+
+        assert rules[0].threshold == 2
+        with pytest.raises(ValueError):
+            load_rules({'apps.referrals.fraud.ReferralVelocityRule': {'unknown': 1}})
+
+
+class TestRedisWindowStore:
+    """Le store Redis se comporte comme le store mémoire."""
+
+    @pytest.fixture
+    def store(self):
+        fakeredis = pytest.importorskip('fakeredis')
+        return RedisWindowStore(fakeredis.FakeRedis())
+
+    def test_sliding_window_and_totals(self, store):
+        assert store.hit('k', 'a', 1000, 60) == 1
+        assert store.hit('k', 'b', 1030, 60) == 2
+        assert store.hit('k', 'c', 1070, 60) == 2  # 'a' est sorti de la fenêtre
+        assert store.total('t', 'e1', Decimal('10.5'), 1000, 60) == Decimal('10.5')
+        assert store.total('t', 'e2', Decimal('4.5'), 1001, 60) == Decimal('15.0')
+
+    def test_queue_and_claims(self, store):
+        store.push(['a', 'b', 'c'])
+        assert store.pop(2) == [b'a', b'b']
+        assert store.pop(2) == [b'c']
+        assert store.claim('flag', 60) is True
+        assert store.claim('flag', 60) is False
+
+
+@pytest.mark.django_db
+class TestPersistFlags:
+    """Persistance groupée et actions automatiques."""
+
+    def test_bulk_persist_suspends_self_referrals(self):
+        alice = User(username='alice', email='alice@test.com', referral_code='ALICE001')
+        User.objects.bulk_create([alice])
+        program = ReferralProgram.objects.create(
+            name='Standard', description='Test', commission_type='percentage',
+            commission_rate=Decimal('10.00'), status='active'
+        )
+        referral = Referral(referrer=alice, referred=alice, program=program)
+        Referral.objects.bulk_create([referral])
+
+        flags = [
+            FraudFlag(user_id=str(alice.pk), rule='self_referral', severity='high',
+                      details={}, referral_id=str(referral.pk)),
+            FraudFlag(user_id=str(alice.pk), rule='referral_velocity', severity='medium', details={'count': 12}),
+        ]
+        with patch('apps.referrals.tasks.notify_admins_suspicious_activity.delay'):
+            assert persist_flags(flags) == 2
+
+        assert ReferralFraudFlag.objects.filter(user=alice).count() == 2
+        referral.refresh_from_db()
+        assert referral.status == 'suspended'
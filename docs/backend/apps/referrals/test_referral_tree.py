@@ -0,0 +1,91 @@
+# apps/referrals/test_referral_tree.py
+# ====================================
+
+"""
+Tests de l'arbre de parrainage en table de fermeture.
+"""
+
+import pytest
+from decimal import Decimal
+
+from apps.accounts.models import User
+from apps.referrals.models import Referral, ReferralProgram, ReferralTreePath
+from apps.referrals.tree import (
+    build_paths, creates_cycle, downline_by_level, downline_count, get_upline, rebuild_tree,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def users():
+    users = [
+        User(username=name, email=f'{name}@test.com', referral_code=f'{name.upper()}001')
+        for name in ('alice', 'bruno', 'carl', 'dina', 'emma')
+    ]
+    User.objects.bulk_create(users)
+    return {user.username: user for user in users}
+
+
+@pytest.fixture
+def program():
+    return ReferralProgram.objects.create(
+        name='Standard', description='Test', commission_type='percentage',
+        commission_rate=Decimal('10.00'), status='active'
+    )
+
+
+def refer(program, referrer, referred):
+    return Referral.objects.create(referrer=referrer, referred=referred, program=program)
+
+
+def test_paths_follow_referral_creation(users, program):
+    # alice → bruno → carl, alice → dina
+    refer(program, users['alice'], users['bruno'])
+    refer(program, users['bruno'], users['carl'])
+    refer(program, users['alice'], users['dina'])
+
+    assert get_upline(users['carl'].pk) == [users['bruno'].pk, users['alice'].pk]
+    assert get_upline(users['carl'].pk, max_depth=1) == [users['bruno'].pk]
+    assert downline_count(users['alice'].pk) == 3
+    assert downline_by_level(users['alice'].pk) == {1: 2, 2: 1}
+
+
+def test_subtree_is_attached_and_detached(users, program):
+    # Le sous-arbre bruno → carl est rattaché ensuite sous alice
+    refer(program, users['bruno'], users['carl'])
+    referral = refer(program, users['alice'], users['bruno'])
+
+    assert get_upline(users['carl'].pk) == [users['bruno'].pk, users['alice'].pk]
+
+    referral.delete()
+
+    assert get_upline(users['carl'].pk) == [users['bruno'].pk]
+    assert downline_count(users['alice'].pk) == 0
+
+
+def test_cycles_are_refused_at_insert(users, program):
+    refer(program, users['alice'], users['bruno'])
+    refer(program, users['bruno'], users['carl'])
+
+    assert creates_cycle(users['carl'].pk, users['alice'].pk)
+    with pytest.raises(ValueError):
+        refer(program, users['carl'], users['alice'])
+    assert not ReferralTreePath.objects.filter(descendant=users['alice']).exists()
+
+
+def test_rebuild_matches_incremental_paths(users, program):
+    refer(program, users['alice'], users['bruno'])
+    refer(program, users['bruno'], users['carl'])
+    refer(program, users['carl'], users['dina'])
+    refer(program, users['alice'], users['emma'])
+    expected = set(ReferralTreePath.objects.values_list('ancestor_id', 'descendant_id', 'depth'))
+
+    assert rebuild_tree() == len(expected) == 7
+    assert set(ReferralTreePath.objects.values_list('ancestor_id', 'descendant_id', 'depth')) == expected
+
+
+def test_build_paths_skips_legacy_cycles():
+    paths = set(build_paths([('a', 'b'), ('b', 'c'), ('x', 'y'), ('y', 'x')]))
+
+    assert paths == {('a', 'b', 1), ('b', 'c', 1), ('a', 'c', 2)}
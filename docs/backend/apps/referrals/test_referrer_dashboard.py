@@ -0,0 +1,105 @@
+# apps/referrals/test_referrer_dashboard.py
+# ========================================
+
+"""
+Tests des tableaux de bord précalculés des parrains.
+"""
+
+import pytest
+from decimal import Decimal
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.accounts.models import User
+from apps.games.models import Game, GameType
+from apps.referrals.dashboard import check_dashboards, get_dashboard
+from apps.referrals.models import Referral, ReferralCommission, ReferralProgram, ReferrerDashboardSnapshot
+from apps.referrals.settlement import settle_pending_commissions
+from apps.referrals.views import ReferralViewSet
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def referral():
+    """Un parrainage premium actif, créé sans signaux."""
+    users = [
+        User(username=name, email=f'{name}@test.com', referral_code=f'{name.upper()}001')
+        for name in ('alice', 'carl')
+    ]
+    User.objects.bulk_create(users)
+    program = ReferralProgram.objects.create(
+        name='Standard', description='Test', commission_type='percentage',
+        commission_rate=Decimal('10.00'), status='active'
+    )
+    referral = Referral(referrer=users[0], referred=users[1], program=program, is_premium_referrer=True)
+    Referral.objects.bulk_create([referral])
+    return referral
+
+
+def add_commissions(referral, amounts):
+    """Commissions en attente créées une par une (signaux compris)."""
+    game_type, _ = GameType.objects.get_or_create(
+        name='dashboard', defaults={'display_name': 'Dashboard', 'description': 'Test', 'category': 'strategy'}
+    )
+    offset = Game.objects.count()
+    for i, amount in enumerate(amounts):
+        game = Game.objects.create(
+            room_code=f'{offset + i:08x}', game_type=game_type, player1=referral.referred,
+            bet_amount=Decimal('1000.00'), status='completed'
+        )
+        ReferralCommission.objects.create(referral=referral, game=game, amount=Decimal(amount), currency='FCFA')
+
+
+def test_settlement_updates_counters_incrementally(referral):
+    get_dashboard(referral.referrer_id)
+    add_commissions(referral, ['14.00', '6.00'])
+
+    snapshot = ReferrerDashboardSnapshot.objects.get(pk=referral.referrer_id)
+    assert snapshot.pending_commissions == Decimal('20.00')
+
+    settle_pending_commissions(notify=False)
+
+    snapshot.refresh_from_db()
+    assert snapshot.pending_commissions == Decimal('0.00')
+    assert snapshot.commission_this_month == Decimal('20.00')
+    assert snapshot.total_games_played == 2
+    assert snapshot.is_stale
+    assert check_dashboards() == []
+
+
+def test_checker_reports_and_fixes_drift(referral):
+    get_dashboard(referral.referrer_id)
+    ReferrerDashboardSnapshot.objects.update(active_referrals=7)
+
+    drifts = check_dashboards(fix=True)
+
+    assert drifts[0]['fields'] == {'active_referrals': (7, 1)}
+    assert check_dashboards() == []
+
+
+def test_endpoint_serves_snapshot_with_etag(referral):
+    view = ReferralViewSet.as_view({'get': 'dashboard'})
+    factory = APIRequestFactory()
+
+    def get(**headers):
+        request = factory.get('/api/v1/referrals/dashboard/', **headers)
+        force_authenticate(request, user=referral.referrer)
+        return view(request)
+
+    response = get()
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data['total_referrals'] == 1
+    assert response.data['active_referrals'] == 1
+    etag = response['ETag']
+
+    with CaptureQueriesContext(connection) as queries:
+        response = get(HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == status.HTTP_304_NOT_MODIFIED
+    assert len(queries.captured_queries) == 1
+
+    add_commissions(referral, ['5.00'])
+    assert get(HTTP_IF_NONE_MATCH=etag).status_code == status.HTTP_200_OK
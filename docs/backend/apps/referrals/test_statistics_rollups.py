@@ -0,0 +1,142 @@
+# apps/referrals/test_statistics_rollups.py
+# =========================================
+
+"""
+Tests des agrégats incrémentaux des statistiques de parrainage.
+"""
+
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.utils import timezone
+
+from apps.accounts.models import User
+from apps.games.models import Game, GameType
+from apps.referrals import rollups
+from apps.referrals.models import Referral, ReferralCommission, ReferralProgram, ReferralStatistics
+from apps.referrals.settlement import settle_pending_commissions
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def referral():
+    """Un parrainage premium actif, créé sans signaux."""
+    users = [
+        User(username=name, email=f'{name}@test.com', referral_code=f'{name.upper()}001')
+        for name in ('alice', 'carl')
+    ]
+    User.objects.bulk_create(users)
+    program = ReferralProgram.objects.create(
+        name='Standard', description='Test', commission_type='percentage',
+        commission_rate=Decimal('10.00'), status='active'
+    )
+    referral = Referral(referrer=users[0], referred=users[1], program=program, is_premium_referrer=True)
+    Referral.objects.bulk_create([referral])
+    return referral
+
+
+def add_commissions(referral, amounts):
+    game_type, _ = GameType.objects.get_or_create(
+        name='rollups', defaults={'display_name': 'Rollups', 'description': 'Test', 'category': 'strategy'}
+    )
+    offset = Game.objects.count()
+    games = Game.objects.bulk_create([
+        Game(room_code=f'{offset + i:08x}', game_type=game_type, player1=referral.referred,
+             bet_amount=Decimal('1000.00'), status='completed')
+        for i in range(len(amounts))
+    ])
+    ReferralCommission.objects.bulk_create([
+        ReferralCommission(referral=referral, game=game, amount=Decimal(amount), currency='FCFA')
+        for game, amount in zip(games, amounts)
+    ])
+
+
+def daily_bucket(user, day=None):
+    return ReferralStatistics.objects.get(
+        user=user, period_type='daily', period_start=day or timezone.localdate()
+    )
+
+
+class TestDailyBuckets:
+    """Les événements incrémentent le bucket du jour."""
+
+    def test_settlement_increments_bucket(self, referral):
+        add_commissions(referral, ['14.00', '6.00'])
+        settle_pending_commissions(notify=False)
+        add_commissions(referral, ['10.00'])
+        settle_pending_commissions(notify=False)
+
+        bucket = daily_bucket(referral.referrer)
+        assert bucket.commission_games == 3
+        assert bucket.total_games_played == 3
+        assert bucket.total_commission_earned == Decimal('30.00')
+        assert bucket.total_bet_volume == Decimal('3000.00')
+        assert bucket.average_commission_per_game == Decimal('10.00')
+
+    def test_events_accumulate_by_field(self, referral):
+        rollups.record_event(referral.referrer_id, new_referrals=1)
+        rollups.record_event(referral.referrer_id, new_referrals=1, total_bonus_earned=Decimal('500.00'))
+
+        bucket = daily_bucket(referral.referrer)
+        assert bucket.new_referrals == 2
+        assert bucket.total_bonus_earned == Decimal('500.00')
+        assert bucket.commission_games == 0
+
+
+class TestDerivedPeriods:
+    """Semaines et mois sommés depuis les jours, années depuis les mois."""
+
+    def test_rollup_sums_daily_buckets(self, referral):
+        day = date(2025, 3, 12)  # mercredi
+        user_id = referral.referrer_id
+        rollups.record_commissions_settled(user_id, 2, Decimal('20.00'), Decimal('2000.00'), day=day)
+        rollups.record_commissions_settled(user_id, 1, Decimal('5.00'), Decimal('500.00'), day=day - timedelta(days=1))
+        rollups.record_commissions_settled(user_id, 4, Decimal('40.00'), Decimal('4000.00'), day=date(2025, 3, 2))
+
+        written = rollups.rollup_periods(day)
+
+        assert written == {'weekly': 1, 'monthly': 1, 'yearly': 1}
+        stats = {s.period_type: s for s in ReferralStatistics.objects.filter(user_id=user_id).exclude(period_type='daily')}
+        assert stats['weekly'].period_start == date(2025, 3, 10)
+        assert stats['weekly'].commission_games == 3
+        assert stats['monthly'].total_commission_earned == Decimal('65.00')
+        assert stats['yearly'].commission_games == 7
+        assert stats['monthly'].total_referrals == 1
+        assert stats['monthly'].active_referrals == 1
+
+
+class TestReconciliation:
+    """Reconstruction des buckets depuis les tables sources."""
+
+    def test_rebuild_restores_drifted_bucket(self, referral):
+        add_commissions(referral, ['14.00', '6.00'])
+        settle_pending_commissions(notify=False)
+        ReferralStatistics.objects.filter(period_type='daily').update(
+            commission_games=99, total_commission_earned=Decimal('0.00')
+        )
+
+        today = timezone.localdate()
+        written = rollups.rebuild_statistics(today, today)
+
+        assert written['daily'] >= 1
+        bucket = daily_bucket(referral.referrer)
+        assert bucket.commission_games == 2
+        assert bucket.total_commission_earned == Decimal('20.00')
+        assert bucket.new_referrals == 1
+        monthly = ReferralStatistics.objects.get(user=referral.referrer, period_type='monthly')
+        assert monthly.commission_games == 2
+
+    def test_rebuild_books_commissions_on_settlement_day(self, referral):
+        add_commissions(referral, ['14.00'])
+        ReferralCommission.objects.update(created_at=timezone.now() - timedelta(days=3))
+        settle_pending_commissions(notify=False)
+
+        today = timezone.localdate()
+        rollups.rebuild_statistics(today - timedelta(days=3), today)
+
+        assert daily_bucket(referral.referrer).total_commission_earned == Decimal('14.00')
+        assert not ReferralStatistics.objects.filter(
+            period_type='daily', period_start=today - timedelta(days=3), commission_games__gt=0
+        ).exists()
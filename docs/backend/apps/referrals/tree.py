@@ -0,0 +1,184 @@
+# apps/referrals/tree.py
+# =======================
+
+"""
+Arbre de parrainage multi-niveaux en table de fermeture.
+
+`ReferralTreePath` contient une ligne (ancêtre, descendant, profondeur) pour
+chaque paire reliée par une chaîne de parrainages. La ligne montante d'un
+joueur, la taille de son équipe (par niveau) et le revenu de son équipe sont
+chacun une seule requête indexée, quelle que soit la profondeur de l'arbre.
+
+Les chemins sont ajoutés à la création d'un parrainage ; les cycles (un joueur
+parrainant l'un de ses propres parrains) sont refusés avant l'insertion.
+`rebuild_tree` recalcule la table depuis les parrainages existants.
+"""
+
+import logging
+from collections import defaultdict
+from decimal import Decimal
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from django.db import transaction
+from django.db.models import Count, Q, Subquery, Sum
+
+from .models import Referral, ReferralCommission, ReferralTreePath
+
+logger = logging.getLogger(__name__)
+
+
+# ===== REQUÊTES =====
+
+def get_upline(user_id, max_depth: Optional[int] = None) -> List:
+    """
+    Parrains successifs d'un joueur, du parrain direct au plus lointain.
+
+    Returns:
+        list: Identifiants des ancêtres, triés par profondeur
+    """
+    paths = ReferralTreePath.objects.filter(descendant_id=user_id)
+    if max_depth is not None:
+        paths = paths.filter(depth__lte=max_depth)
+    return list(paths.order_by('depth').values_list('ancestor_id', flat=True))
+
+
+def _downline(user_id, max_depth: Optional[int] = None):
+    paths = ReferralTreePath.objects.filter(ancestor_id=user_id)
+    if max_depth is not None:
+        paths = paths.filter(depth__lte=max_depth)
+    return paths
+
+
+def downline_count(user_id, max_depth: Optional[int] = None) -> int:
+    """Taille de l'équipe d'un joueur (tous niveaux, ou jusqu'à `max_depth`)."""
+    return _downline(user_id, max_depth).count()
+
+
+def downline_by_level(user_id, max_depth: Optional[int] = None) -> Dict[int, int]:
+    """Taille de l'équipe par niveau : {profondeur: nombre de joueurs}."""
+    return dict(
+        _downline(user_id, max_depth).values('depth').annotate(count=Count('id')).values_list('depth', 'count')
+    )
+
+
+def team_revenue(user_id, max_depth: Optional[int] = None) -> Decimal:
+    """
+    Commissions réglées générées par les parties de l'équipe d'un joueur.
+
+    Une seule requête : la liste des descendants reste une sous-requête.
+    """
+    total = ReferralCommission.objects.filter(
+        status='completed',
+        referral__referred_id__in=Subquery(_downline(user_id, max_depth).values('descendant_id')),
+    ).aggregate(total=Sum('amount'))['total']
+    return total or Decimal('0.00')
+
+
+def creates_cycle(referrer_id, referred_id) -> bool:
+    """Le parrainage referrer → referred fermerait-il une boucle ?"""
+    if referrer_id == referred_id:
+        return True
+    return ReferralTreePath.objects.filter(ancestor_id=referred_id, descendant_id=referrer_id).exists()
+
+
+# ===== MAINTENANCE =====
+
+def add_referral(referrer_id, referred_id) -> int:
+    """
+    Raccorder le sous-arbre de `referred` sous `referrer`.
+
+    Chaque ancêtre de `referrer` (et lui-même) est relié au filleul et à ses
+    éventuels descendants.
+
+    Returns:
+        int: Nombre de chemins ajoutés
+    """
+    if creates_cycle(referrer_id, referred_id):
+        raise ValueError("Ce parrainage créerait un cycle dans l'arbre de parrainage")
+
+    ancestors = [(referrer_id, 0)] + list(
+        ReferralTreePath.objects.filter(descendant_id=referrer_id).values_list('ancestor_id', 'depth')
+    )
+    descendants = [(referred_id, 0)] + list(
+        ReferralTreePath.objects.filter(ancestor_id=referred_id).values_list('descendant_id', 'depth')
+    )
+    paths = ReferralTreePath.objects.bulk_create([
+        ReferralTreePath(ancestor_id=ancestor, descendant_id=descendant, depth=up + down + 1)
+        for ancestor, up in ancestors
+        for descendant, down in descendants
+    ], batch_size=1000, ignore_conflicts=True)
+    return len(paths)
+
+
+def remove_referral(referrer_id, referred_id) -> int:
+    """
+    Détacher le sous-arbre de `referred` de la ligne montante de `referrer`.
+
+    Returns:
+        int: Nombre de chemins supprimés
+    """
+    ancestors = Q(ancestor_id=referrer_id) | Q(
+        ancestor_id__in=Subquery(ReferralTreePath.objects.filter(descendant_id=referrer_id).values('ancestor_id'))
+    )
+    descendants = Q(descendant_id=referred_id) | Q(
+        descendant_id__in=Subquery(ReferralTreePath.objects.filter(ancestor_id=referred_id).values('descendant_id'))
+    )
+    deleted, _ = ReferralTreePath.objects.filter(ancestors & descendants).delete()
+    return deleted
+
+
+def build_paths(edges: Iterable[Tuple]) -> Iterator[Tuple]:
+    """
+    Chemins (ancêtre, descendant, profondeur) d'une forêt de parrainages.
+
+    Parcours en profondeur itératif depuis les racines ; les nœuds pris dans
+    un cycle (données héritées) ne sont pas rattachés.
+
+    Args:
+        edges: Paires (parrain, filleul)
+    """
+    children = defaultdict(list)
+    referred = set()
+    for referrer_id, referred_id in edges:
+        children[referrer_id].append(referred_id)
+        referred.add(referred_id)
+
+    visited = set()
+    for root in [node for node in children if node not in referred]:
+        # Pile de (nœud, ancêtres du plus lointain au plus proche)
+        stack = [(root, ())]
+        while stack:
+            node, ancestors = stack.pop()
+            if node in visited:
+                continue
+            visited.add(node)
+            depth = len(ancestors)
+            for index, ancestor in enumerate(ancestors):
+                yield ancestor, node, depth - index
+            lineage = ancestors + (node,)
+            stack.extend((child, lineage) for child in children.get(node, ()))
+
+
+def rebuild_tree(batch_size: int = 5000) -> int:
+    """
+    Recalculer toute la table de fermeture depuis les parrainages.
+
+    Returns:
+        int: Nombre de chemins écrits
+    """
+    edges = Referral.objects.values_list('referrer_id', 'referred_id').iterator(chunk_size=10000)
+    written = 0
+    with transaction.atomic():
+        ReferralTreePath.objects.all().delete()
+        batch = []
+        for ancestor, descendant, depth in build_paths(edges):
+            batch.append(ReferralTreePath(ancestor_id=ancestor, descendant_id=descendant, depth=depth))
+            if len(batch) >= batch_size:
+                ReferralTreePath.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        ReferralTreePath.objects.bulk_create(batch)
+        written += len(batch)
+
+    logger.info(f"🌳 Arbre de parrainage reconstruit: {written} chemins")
+    return written
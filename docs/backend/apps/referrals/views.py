@@ -14,7 +14,6 @@ from django.utils import timezone
 from django.contrib.auth import get_user_model
 from django.http import HttpResponse
 from decimal import Decimal
-from datetime import date
 from io import BytesIO
 import logging
 
@@ -27,9 +26,10 @@ except ImportError:
 
 from .models import (
     ReferralProgram, Referral, ReferralCommission,
-    PremiumSubscription, ReferralStatistics, ReferralBonus, ReferralCode
+    PremiumSubscription, ReferralStatistics, ReferralBonus
 )
 
+from .dashboard import dashboard_payload, get_dashboard
 from .serializers import (
     ReferralProgramSerializer, ReferralSerializer, CreateReferralSerializer,
     ReferralCommissionSerializer, PremiumSubscriptionSerializer, 
@@ -187,122 +187,21 @@ class ReferralViewSet(viewsets.ModelViewSet):
     def dashboard(self, request):
         """
         ✅ DASHBOARD COMPLET - ENDPOINT PRINCIPAL
-        Retourne toutes les données nécessaires pour le dashboard frontend
+        Retourne toutes les données nécessaires pour le dashboard frontend.
+        
+        Servi depuis le tableau de bord précalculé du parrain (une lecture) ;
+        l'ETag permet aux clients de revalider avec If-None-Match (304).
         """
         user = request.user
         
         try:
-            logger.info(f"Dashboard demandé par {user.username}")
-            
-            # ===== RÉCUPÉRATION DES DONNÉES DE BASE =====
-            referrals = self.get_queryset()
-            active_referrals = referrals.filter(status='active')
-            
-            # Commission totale gagnée
-            total_commission = referrals.aggregate(
-                total=Sum('total_commission_earned')
-            )['total'] or Decimal('0.00')
-            
-            # Commission ce mois-ci
-            current_month = date.today().replace(day=1)
-            commission_this_month = ReferralCommission.objects.filter(
-                referral__referrer=user,
-                created_at__date__gte=current_month,
-                status='completed'
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-            
-            # Commissions en attente de traitement
-            pending_commissions = ReferralCommission.objects.filter(
-                referral__referrer=user,
-                status='pending'
-            ).aggregate(total=Sum('amount'))['total'] or Decimal('0.00')
-            
-            # ===== STATUT PREMIUM =====
-            has_premium = PremiumSubscription.objects.filter(
-                user=user,
-                status='active',
-                end_date__gt=timezone.now()
-            ).exists()
-            
-            # ===== CODE DE PARRAINAGE =====
-            user_referral_code = ReferralCode.objects.filter(user=user).first()
-            referral_code = user_referral_code.code if user_referral_code else f"USER_{user.id}"
-            
-            # ===== TAUX DE COMMISSION =====
-            default_program = ReferralProgram.get_default_program()
-            commission_rate = float(default_program.commission_rate) if default_program else 10.0
-            
-            # ===== TOP FILLEULS =====
-            top_referrals = referrals.order_by('-total_commission_earned')[:5]
-            top_referrals_data = ReferralSerializer(top_referrals, many=True).data
-            
-            # ===== COMMISSIONS RÉCENTES =====
-            recent_commissions = ReferralCommission.objects.filter(
-                referral__referrer=user
-            ).select_related(
-                'referral__referred', 
-                'game'
-            ).order_by('-created_at')[:10]
-            recent_commissions_data = ReferralCommissionSerializer(
-                recent_commissions, 
-                many=True
-            ).data
+            snapshot = get_dashboard(user.pk)
+            headers = {'ETag': snapshot.etag, 'Cache-Control': 'private, no-cache'}
             
-            # ===== BONUS DISPONIBLES =====
-            available_bonuses = ReferralBonus.objects.filter(
-                referral__referrer=user,
-                status='approved'
-            ).order_by('-created_at')[:5]
-            available_bonuses_data = ReferralBonusSerializer(
-                available_bonuses, 
-                many=True
-            ).data
-            
-            # ===== STATISTIQUES AVANCÉES =====
-            stats = {
-                'conversion_rate': 0.0,
-                'average_games_per_referral': 0.0,
-                'total_games_played': 0,
-            }
-            
-            if referrals.exists():
-                total_games = referrals.aggregate(
-                    total=Sum('games_played')
-                )['total'] or 0
-                
-                stats['total_games_played'] = total_games
-                
-                if active_referrals.exists():
-                    stats['conversion_rate'] = (
-                        active_referrals.count() / referrals.count()
-                    ) * 100
-                    stats['average_games_per_referral'] = (
-                        total_games / active_referrals.count()
-                    )
-            
-            # ===== CONSTRUCTION DE LA RÉPONSE =====
-            response_data = {
-                # Statistiques principales
-                'total_referrals': referrals.count(),
-                'active_referrals': active_referrals.count(),
-                'total_commission_earned': float(total_commission),
-                'commission_this_month': float(commission_this_month),
-                'pending_commissions': float(pending_commissions),
-                
-                # Informations utilisateur
-                'premium_status': has_premium,
-                'referral_code': referral_code,
-                'commission_rate': commission_rate,
-                
-                # Données détaillées
-                'stats': stats,
-                'recent_commissions': recent_commissions_data,
-                'top_referrals': top_referrals_data,
-                'available_bonuses': available_bonuses_data,
-            }
+            if request.headers.get('If-None-Match') == snapshot.etag:
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers=headers)
             
-            logger.info(f"Dashboard généré avec succès pour {user.username}")
-            return Response(response_data)
+            return Response(dashboard_payload(snapshot), headers=headers)
             
         except Exception as e:
             logger.error(f"Erreur dashboard pour {user.username}: {str(e)}", exc_info=True)
@@ -32,6 +32,9 @@ app.conf.task_routes = {
     'apps.analytics.tasks.*': {'queue': 'analytics'},
     'apps.referrals.tasks.*': {'queue': 'analytics'},
     
+    # Queue emails (un worker garde la connexion SMTP ouverte)
+    'apps.accounts.tasks.send_email_outbox': {'queue': 'emails'},
+    
     # Queue maintenance (tâches lourdes)
     'apps.core.tasks.*': {'queue': 'maintenance'},
     'apps.games.tasks.cleanup_*': {'queue': 'maintenance'},
@@ -59,6 +62,11 @@ app.conf.task_queues = (
           routing_key='analytics',
           queue_arguments={'x-max-priority': 2}),
     
+    Queue('emails', 
+          Exchange('emails'), 
+          routing_key='emails',
+          queue_arguments={'x-max-priority': 5}),
+    
     Queue('maintenance', 
           Exchange('maintenance'), 
           routing_key='maintenance',
@@ -71,6 +79,13 @@ from celery.schedules import crontab
 app.conf.beat_schedule = {
     # ============ TÂCHES HAUTE FRÉQUENCE ============
     
+    # Envoi des emails de l'outbox toutes les 10 secondes
+    'send-email-outbox': {
+        'task': 'apps.accounts.tasks.send_email_outbox',
+        'schedule': 10.0,
+        'options': {'queue': 'emails'},
+    },
+    
     # Vérification des timeouts de jeu toutes les 15 secondes
     'check-game-timeouts': {
         'task': 'apps.games.tasks.check_all_game_timeouts',
@@ -85,6 +100,13 @@ app.conf.beat_schedule = {
         'options': {'queue': 'high_priority'},
     },
     
+    # Rafraîchissement des taux crypto toutes les minutes
+    'refresh-crypto-rates': {
+        'task': 'payments.refresh_crypto_rates',
+        'schedule': 60.0,
+        'options': {'queue': 'payments'},
+    },
+    
     # ============ TÂCHES MOYENNES FRÉQUENCE ============
     
     # Vérification des paiements en attente toutes les 2 minutes
@@ -152,6 +174,20 @@ app.conf.beat_schedule = {
         'options': {'queue': 'analytics'},
     },
     
+    # Partitions, déport des payloads et archivage des transactions à 4h
+    'maintain-transaction-storage': {
+        'task': 'payments.maintain_transaction_storage',
+        'schedule': crontab(hour=4, minute=0),
+        'options': {'queue': 'maintenance'},
+    },
+    
+    # Partitions journalières et rétention des événements de jeu à 4h30
+    'maintain-event-storage': {
+        'task': 'analytics.maintain_event_storage',
+        'schedule': crontab(hour=4, minute=30),
+        'options': {'queue': 'maintenance'},
+    },
+    
     # Nettoyage des logs anciens à 23h
     'cleanup-old-logs': {
         'task': 'apps.core.tasks.cleanup_old_logs',
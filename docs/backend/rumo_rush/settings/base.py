@@ -53,6 +53,8 @@ LOCAL_APPS = [
 INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
+    'apps.core.metrics.MetricsMiddleware',
+    'apps.core.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -60,9 +62,11 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'apps.core.middleware.LoadBalancingMiddleware',  # Après l'authentification : contournement staff
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'apps.core.middleware.SecurityMiddleware',
+    'apps.core.middleware.GameSessionMiddleware',
     'django_ratelimit.middleware.RatelimitMiddleware',
 ]
 
@@ -213,6 +217,18 @@ EMAIL_HOST_USER = env('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD', default='')
 DEFAULT_FROM_EMAIL = env('DEFAULT_FROM_EMAIL', default='noreply@rumorush.com')
 
+# Outbox des emails transactionnels (apps.accounts.email_outbox, tâche send_email_outbox)
+EMAIL_OUTBOX = {
+    'BATCH_SIZE': 50,
+    'MAX_ATTEMPTS': 5,
+    'BACKOFF_BASE': 60,  # secondes, doublé à chaque échec
+    'BACKOFF_MAX': 3600,
+    'DEDUP_WINDOWS': {  # secondes, par type d'email et destinataire
+        'login_notification': 3600,
+        'welcome': 86400,
+    },
+}
+
 # Celery Configuration
 CELERY_BROKER_URL = env('CELERY_BROKER_URL', default='redis://localhost:6379/3')
 CELERY_RESULT_BACKEND = env('CELERY_RESULT_BACKEND', default='redis://localhost:6379/3')
@@ -225,6 +241,87 @@ CELERY_TIMEZONE = TIME_ZONE
 STRIPE_PUBLISHABLE_KEY = env('STRIPE_PUBLISHABLE_KEY', default='')
 STRIPE_SECRET_KEY = env('STRIPE_SECRET_KEY', default='')
 
+# Appels HTTP sortants vers les fournisseurs de paiement (pool, retries, circuit breaker)
+PAYMENT_HTTP = {
+    'CONNECT_TIMEOUT': 3.05,  # secondes
+    'READ_TIMEOUT': 15,
+    'TOTAL_TIMEOUT': 25,  # Budget total d'un appel, retries compris
+    'MAX_RETRIES': 2,
+    'BACKOFF_BASE': 0.25,  # Backoff exponentiel avec jitter complet
+    'BACKOFF_MAX': 4,
+    'RETRY_STATUSES': [429, 502, 503, 504],
+    'POOL_CONNECTIONS': 4,
+    'POOL_MAXSIZE': 20,
+    'FAILURE_THRESHOLD': 5,  # Échecs consécutifs avant ouverture du circuit
+    'RECOVERY_TIMEOUT': 30,  # Secondes avant un appel d'essai
+    'PROVIDERS': {
+        'coingecko': {'READ_TIMEOUT': 5, 'TOTAL_TIMEOUT': 10},
+        'feexpay_payout': {'MAX_RETRIES': 0},
+    },
+}
+
+# Taux crypto servis depuis le cache (rafraîchis par la tâche payments.refresh_crypto_rates)
+CRYPTO_RATES = {
+    'REFRESH_INTERVAL': 60,  # secondes
+    'MAX_AGE': 300,  # Au-delà, le taux est signalé comme périmé
+    'MAX_STALE_AGE': 3600,  # Au-delà, plus de paiement crypto possible
+}
+
+# Délestage de charge (apps.core.load_shedding, LoadBalancingMiddleware)
+LOAD_SHEDDING = {
+    'ENABLED': True,
+    'SAMPLE_INTERVAL': 0.5,  # secondes
+    'CPU_THRESHOLD': 90,
+    'MEMORY_THRESHOLD': 90,
+    'LAG_THRESHOLD': 0.2,  # secondes
+    'INITIAL_LIMIT': 200,  # Requêtes simultanées par processus, ajustées en AIMD
+    'MIN_LIMIT': 20,
+    'MAX_LIMIT': 1000,
+    'TARGET_LATENCY': 1.0,  # secondes
+}
+
+# Sondes liveness/readiness à état caché (apps.core.health_probes, /health/live/ et /health/ready/)
+HEALTH_PROBES = {
+    'INTERVAL': 5,  # secondes entre deux cycles de sondage
+    'TIMEOUT': 2,  # secondes par sonde
+    'MAX_AGE': 30,  # Instantané plus ancien : pod non disponible
+    'READINESS_CHECKS': ['database', 'cache', 'channel_layer', 'celery'],
+    'CELERY_QUEUE_DEGRADED_DEPTH': 1000,
+    'CELERY_QUEUE_MAX_DEPTH': 10000,  # Au-delà : pod retiré de la répartition
+}
+
+# Limitation de taux partagée HTTP/WebSocket (apps.core.rate_limit, seaux à jetons Redis)
+RATE_LIMIT = {
+    'LEASE_TTL': 1.0,  # secondes de validité des jetons réservés localement
+    'FAIL_OPEN': True,  # Laisser passer si Redis est injoignable
+}
+
+# Profilage SQL par requête (apps.core.query_profiler, PerformanceMiddleware)
+QUERY_PROFILER = {
+    'ENABLED': True,
+    'SAMPLE_RATE': 0.05,  # Fraction des requêtes profilées (toutes avec DEBUG=True)
+    'DEFAULT_BUDGET': 50,
+    'N_PLUS_ONE_THRESHOLD': 5,
+    'BUDGETS': {},  # {nom d'URL: budget}, en complément de `query_budget` sur les vues
+}
+
+# Écriture différée des journaux d'audit et d'activité (apps.core.write_behind)
+WRITE_BEHIND = {
+    'ENABLED': True,
+    'MAX_QUEUE': 10000,
+    'BATCH_SIZE': 500,
+    'FLUSH_INTERVAL': 1.0,  # secondes
+    'OVERFLOW': 'spool',  # 'spool' (JSONL rejoué plus tard) ou 'drop'
+    'SPOOL_DIR': BASE_DIR / 'logs' / 'write_behind',
+}
+
+# Métriques Prometheus (apps.core.metrics, exposées sur /metrics)
+# En multi-processus, définir PROMETHEUS_MULTIPROC_DIR avant de lancer les workers
+METRICS = {
+    'ENABLED': True,
+    'ALLOWED_NETWORKS': ['127.0.0.0/8', '10.0.0.0/8', '172.16.0.0/12', '192.168.0.0/16', '::1/128'],
+}
+
 # Game settings
 GAME_SETTINGS = {
     'COMMISSION_RATE': 0.14,  # 14% commission
@@ -241,6 +338,13 @@ GAME_SETTINGS = {
         'EUR': 1500,
         'USD': 1800,
     },
+    'MAX_CONCURRENT_GAMES': 5,  # Parties non terminées par joueur (apps.games.active_games)
+}
+
+# Parties actives par joueur dans Redis (apps.games.active_games)
+ACTIVE_GAMES = {
+    'TTL': 3600,  # Reconstruction depuis la base au-delà
+    'FAIL_OPEN': True,  # Autoriser la création si Redis est injoignable
 }
 
 # Referral settings - CORRECTED
@@ -258,6 +362,28 @@ REFERRAL_SETTINGS = {
         'EUR': 15,
         'USD': 18,
     },
+    'SETTLEMENT_WINDOW_SECONDS': 1,  # Fenêtre de regroupement des commissions
+    'SETTLEMENT_BATCH_SIZE': 5000,
+    'CLICK_FLUSH_SECONDS': 5,  # Fenêtre d'écriture différée des clics et partages
+    'CLICK_SAMPLE_THRESHOLD': 1000,  # Clics bruts conservés par code et par fenêtre
+    'CLICK_SAMPLE_RATE': 0.1,  # Fraction des clics bruts conservée au-delà du seuil
+    'DASHBOARD_REFRESH_SECONDS': 2,  # Délai de recalcul des listes des tableaux de bord
+    'DASHBOARD_REFRESH_BATCH_SIZE': 500,
+}
+
+# Détection de fraude au parrainage (apps.referrals.fraud)
+REFERRAL_FRAUD = {
+    'WINDOW_SECONDS': 1,  # Regroupement des événements avant analyse
+    'BATCH_SIZE': 1000,
+    'FLAG_COOLDOWN': 3600,  # Un même signalement n'est répété qu'après 1 h
+    'RULES': {
+        'apps.referrals.fraud.SelfReferralRule': {},
+        'apps.referrals.fraud.ReferralVelocityRule': {'threshold': 10, 'window': 3600},
+        'apps.referrals.fraud.SharedIPRule': {'threshold': 3, 'window': 86400},
+        'apps.referrals.fraud.SharedDeviceRule': {'threshold': 5, 'window': 86400},
+        'apps.referrals.fraud.ClickVelocityRule': {'threshold': 30, 'window': 600},
+        'apps.referrals.fraud.EarningsRateRule': {'threshold': 50000, 'window': 86400},
+    },
 }
 
 # KYC settings
@@ -276,6 +402,36 @@ MIN_WITHDRAWAL = {
     'USD': 7,
 }
 
+# Stockage des transactions (partitions, archivage, déport des payloads)
+TRANSACTION_STORAGE = {
+    'PARTITIONS_AHEAD': 3,  # Partitions mensuelles créées à l'avance
+    'ARCHIVE_AFTER_MONTHS': 12,  # Transactions terminées archivées après 12 mois
+    'ARCHIVE_BATCH_SIZE': 5000,
+    'OFFLOAD_BATCH_SIZE': 1000,
+    'OFFLOAD_AFTER_DAYS': 7,  # Déport des payloads des transactions finalisées depuis 7 jours
+    'SYNC_LOOKBACK_DAYS': 30,  # Fenêtre des jobs de synchronisation
+    'OFFLOADED_METADATA_KEYS': [
+        'feexpay_sync',
+        'status_history',
+        'api_response',
+        'provider_response',
+        'webhook_data',
+        'raw_payload',
+    ],
+}
+
+# Ingestion et stockage des événements de jeu (apps.analytics.ingestion, apps.analytics.event_storage)
+ANALYTICS_EVENTS = {
+    'MAX_BATCH': 1000,  # Événements par appel à /api/v1/analytics/events/
+    'BUFFERED': True,  # Écriture différée par lots (thread dédié)
+    'MAX_QUEUE': 100000,
+    'BATCH_SIZE': 5000,  # Lignes par COPY / bulk_create
+    'FLUSH_INTERVAL': 0.5,  # secondes
+    'USE_COPY': True,  # COPY FROM STDIN sous PostgreSQL
+    'RETENTION_DAYS': 90,
+    'PARTITIONS_AHEAD': 7,  # Partitions journalières créées à l'avance
+}
+
 # Security settings
 SECURE_BROWSER_XSS_FILTER = True
 SECURE_CONTENT_TYPE_NOSNIFF = True
@@ -304,7 +460,9 @@ LOGGING = {
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
+            # Écriture fichier depuis un thread dédié (hors du chemin de la requête)
+            '()': 'apps.core.write_behind.queued_handler',
+            'target': 'logging.FileHandler',
             'filename': BASE_DIR / 'logs' / 'django.log',
             'formatter': 'verbose',
         },
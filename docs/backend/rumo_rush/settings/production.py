@@ -181,7 +181,8 @@ LOGGING = {
         },
         'file': {
             'level': 'WARNING',
-            'class': 'logging.handlers.RotatingFileHandler',
+            '()': 'apps.core.write_behind.queued_handler',
+            'target': 'logging.handlers.RotatingFileHandler',
             'filename': '/var/log/rumorush/django.log',
             'maxBytes': 50 * 1024 * 1024,  # 50 MB
             'backupCount': 5,
@@ -103,6 +103,12 @@ PASSWORD_HASHERS = [
 # Media temporaire pour tests
 MEDIA_ROOT = tempfile.mkdtemp()
 
+# Journaux d'audit écrits immédiatement (assertions sans attendre le thread d'écriture)
+WRITE_BEHIND = {**WRITE_BEHIND, 'ENABLED': False}
+ANALYTICS_EVENTS = {**ANALYTICS_EVENTS, 'BUFFERED': False}
+HEALTH_PROBES = {**HEALTH_PROBES, 'ENABLED': False}  # Pas de thread de sondage ; les tests appellent probe_once()
+LOAD_SHEDDING = {**LOAD_SHEDDING, 'ENABLED': False}  # Pas de délestage selon la charge de la machine de test
+
 # Désactiver la limitation de taux pour tests
 REST_FRAMEWORK['DEFAULT_THROTTLE_CLASSES'] = []
 REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'] = {}
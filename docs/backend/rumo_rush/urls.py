@@ -12,6 +12,9 @@ from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
 
+from apps.core import health_check as core_health
+from apps.core.metrics import metrics_view
+
 # Configuration du schema OpenAPI/Swagger
 schema_view = get_schema_view(
     openapi.Info(
@@ -40,9 +43,12 @@ urlpatterns = [
     # Administration Django
     path(f'{settings.ADMIN_URL}', admin.site.urls),
     
-    # Health Check et Status
+    # Health Check et Status (sondes orchestrateur : état caché, voir apps.core.health_probes)
+    path('health/live/', core_health.liveness_probe, name='liveness'),
+    path('health/ready/', core_health.readiness_probe, name='readiness'),
     path('health/', include('health_check.urls')),
     path('api/v1/status/', include('apps.core.urls')),
+    path('metrics', metrics_view, name='prometheus-metrics'),
     
     # Documentation API
     path('api/v1/docs/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
@@ -0,0 +1,129 @@
+# tests/test_active_games.py
+"""
+Tests des parties actives par joueur (apps.games.active_games).
+"""
+import threading
+from decimal import Decimal
+
+import pytest
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from apps.accounts.models import User
+from apps.core.exceptions import ConcurrentGamesLimitException
+from apps.core.middleware import GameSessionMiddleware
+from apps.games import active_games
+from apps.games.active_games import (
+    MemoryActiveGamesStore, get_active_games, reserve_game_slot,
+)
+from apps.games.models import Game, GameType
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def store():
+    active_games._local_store.clear()
+    yield active_games._local_store
+    active_games._local_store.clear()
+
+
+@pytest.fixture
+def players():
+    User.objects.bulk_create([
+        User(username=f'actif{i}', email=f'actif{i}@test.com', referral_code=f'ACTIF{i}')
+        for i in range(2)
+    ])
+    return list(User.objects.filter(username__startswith='actif').order_by('username'))
+
+
+@pytest.fixture
+def game_type():
+    return GameType.objects.create(name='chess', display_name='Échecs', description='Échecs', category='board')
+
+
+def create_game(game_type, player, **kwargs):
+    return Game.objects.create(
+        game_type=game_type, player1=player, bet_amount=Decimal('500'), status='waiting', **kwargs
+    )
+
+
+def test_middleware_reads_active_games_only_when_accessed(players, game_type):
+    game = create_game(game_type, players[0])
+    middleware = GameSessionMiddleware(lambda request: HttpResponse())
+    request = RequestFactory().get('/api/v1/games/')
+    request.user = players[0]
+
+    with CaptureQueriesContext(connection) as queries:
+        middleware.process_request(request)
+        response = middleware.process_response(request, HttpResponse())
+    assert len(queries) == 0
+    assert 'X-Active-Games' not in response
+
+    assert list(request.active_games) == [str(game.pk)]
+    response = middleware.process_response(request, HttpResponse())
+    assert response['X-Active-Games'] == '1'
+
+    with CaptureQueriesContext(connection) as queries:
+        assert get_active_games(players[0]) == [str(game.pk)]  # Ensemble chargé : plus de requête
+    assert len(queries) == 0
+
+
+def test_set_follows_create_join_and_finish(players, game_type, django_capture_on_commit_callbacks):
+    player1, player2 = players
+    assert get_active_games(player1) == get_active_games(player2) == []
+
+    with django_capture_on_commit_callbacks(execute=True):
+        game = create_game(game_type, player1)
+    assert get_active_games(player1) == [str(game.pk)]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        game.player2 = player2
+        game.status = 'ready'
+        game.save(update_fields=['player2', 'status'])
+    assert get_active_games(player2) == [str(game.pk)]
+
+    with django_capture_on_commit_callbacks(execute=True):
+        game.status = 'finished'
+        game.save()
+    assert get_active_games(player1) == get_active_games(player2) == []
+
+
+def test_reservation_enforces_limit_and_releases_on_error(players, settings):
+    settings.GAME_SETTINGS = {**settings.GAME_SETTINGS, 'MAX_CONCURRENT_GAMES': 2}
+    player = players[0]
+
+    with reserve_game_slot(player):
+        pass
+    with pytest.raises(RuntimeError):
+        with reserve_game_slot(player):
+            raise RuntimeError('création échouée')
+    with reserve_game_slot(player):
+        pass
+
+    assert len(get_active_games(player)) == 2
+    with pytest.raises(ConcurrentGamesLimitException):
+        with reserve_game_slot(player):
+            pass
+
+
+def test_parallel_reservations_never_exceed_limit():
+    store = MemoryActiveGamesStore()
+    store.load('active_games:joueur', [], ttl=60)
+    results = []
+    barrier = threading.Barrier(20)
+
+    def reserve(i):
+        barrier.wait()
+        results.append(store.reserve('active_games:joueur', f'partie-{i}', 3, 60))
+
+    threads = [threading.Thread(target=reserve, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results.count(1) == 3
+    assert len(store.members('active_games:joueur')) == 3
@@ -0,0 +1,119 @@
+# tests/test_analytics_rollups.py
+"""
+Tests des agrégats horaires et journaliers des analytics
+(apps.analytics.rollups).
+"""
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+import pytest
+from django.db import connection
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from apps.analytics import ingestion, rollups
+from apps.analytics.ingestion import write_events
+from apps.analytics.models import AnalyticsRollup, GameEvent, GameSession
+from apps.analytics.views import end_session, game_analytics, log_event, start_session
+from apps.core.write_behind import WriteBehindQueue
+
+pytestmark = pytest.mark.django_db
+
+T0 = datetime(2026, 10, 1, 22, 15, tzinfo=dt_timezone.utc)
+
+
+def get_analytics(**params):
+    response = game_analytics(RequestFactory().get('/api/v1/analytics/game/', params))
+    return response.status_code, json.loads(response.content)
+
+
+def test_hyperloglog_estimates_and_merges():
+    left, right = rollups.HyperLogLog(), rollups.HyperLogLog()
+    left.update(f'joueur_{i}' for i in range(6000))
+    right.update(f'joueur_{i}' for i in range(4000, 10000))
+
+    restored = rollups.HyperLogLog.from_bytes(left.to_bytes())
+    assert abs(restored.count() - 6000) / 6000 < 0.05
+    restored.merge(right)
+    assert abs(restored.count() - 10000) / 10000 < 0.05
+
+
+def test_range_sums_full_days_and_edge_hours():
+    delta = rollups.RollupDelta()
+    for hours in range(0, 72):
+        delta.event(f'joueur_{hours % 5}', 'level_start', T0 + timedelta(hours=hours))
+    rollups.apply_delta(delta)
+
+    start = rollups.hour_bucket(T0) + timedelta(hours=1)  # 23:00, jour 1
+    summary = rollups.summarize(start, start + timedelta(hours=49))  # 2 heures + 2 jours complets
+    assert summary['total_events'] == 49
+    assert summary['events_by_type'] == {'level_start': 49}
+    assert summary['active_players'] == 5
+    assert rollups.summarize()['total_events'] == 72
+
+
+def test_ingestion_and_sessions_maintain_rollups():
+    session = GameSession.objects.create(player_id='joueur_rollup', start_time=T0)
+    rollups.record_session_start(session)
+    write_events([
+        {'session_id': str(session.id), 'event_type': 'item_collected', 'timestamp': T0, 'data': {'item': 'coin'}},
+        {'session_id': str(session.id), 'event_type': 'game_over', 'timestamp': T0, 'data': {}},
+    ])
+    session.end_time, session.duration_seconds, session.score = T0 + timedelta(minutes=5), 300, 1500
+    rollups.record_session_end(session)
+
+    day = AnalyticsRollup.objects.get(granularity='day', bucket=rollups.day_bucket(T0))
+    assert (day.sessions_started, day.sessions_ended, day.total_events) == (1, 1, 2)
+    assert day.events_by_type == {'item_collected': 1, 'game_over': 1}
+    assert AnalyticsRollup.objects.filter(granularity='hour').count() == 1
+
+    AnalyticsRollup.objects.all().delete()
+    assert rollups.rebuild() == 2
+    assert rollups.summarize()['total_events'] == 2
+
+
+def test_game_analytics_reads_rollups_in_constant_queries():
+    session = GameSession.objects.create(player_id='joueur_volume', start_time=T0)
+    rows = [
+        {'session_id': str(session.id), 'event_type': 'obstacle_hit', 'timestamp': T0 + timedelta(minutes=i), 'data': {}}
+        for i in range(500)
+    ]
+    write_events(rows)
+    assert GameEvent.objects.count() == 500
+
+    with CaptureQueriesContext(connection) as queries:
+        status, body = get_analytics(start=T0.isoformat(), end=(T0 + timedelta(days=2)).isoformat())
+
+    assert status == 200
+    assert body['total_events'] == 500
+    assert body['events_by_type'] == {'obstacle_hit': 500}
+    assert body['total_players'] == 1
+    assert len(queries) == 1
+    assert get_analytics(start='hier')[0] == 400
+
+
+def test_session_views_queue_rollup_deltas(settings, tmp_path, monkeypatch):
+    settings.ANALYTICS_EVENTS = {**settings.ANALYTICS_EVENTS, 'BUFFERED': True}
+    buffer = WriteBehindQueue(
+        max_queue=100, batch_size=100, flush_interval=60, spool_dir=tmp_path,
+        writers={rollups.ROLLUP_MODEL: rollups.write_deltas},
+    )
+    buffer.ensure_flusher = lambda: None  # Vidage manuel : pas de thread d'écriture
+    monkeypatch.setattr(ingestion, 'get_event_queue', lambda: buffer)
+
+    def post(view, payload):
+        request = RequestFactory().post('/', json.dumps(payload), content_type='application/json')
+        return json.loads(view(request).content)
+
+    session_id = post(start_session, {'player_id': 'joueur_file'})['session_id']
+    post(log_event, {'session_id': session_id, 'event_type': 'game_over'})
+    post(end_session, {'session_id': session_id, 'score': 700})
+
+    # Aucune ligne d'agrégat verrouillée dans les requêtes
+    assert not AnalyticsRollup.objects.exists()
+    assert buffer.flush() == 3
+
+    summary = rollups.summarize()
+    assert (summary['sessions_started'], summary['sessions_ended'], summary['total_events']) == (1, 1, 1)
+    assert summary['max_score'] == 700
+
@@ -0,0 +1,69 @@
+# tests/test_balance.py
+"""
+Tests de la mutation atomique des soldes (User.update_balance).
+"""
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+import pytest
+from django.db import OperationalError, connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.accounts.models import User, UserActivity
+
+
+def create_user(username, **balances):
+    User.objects.bulk_create([User(username=username, email=f'{username}@test.com', referral_code=username[:8].upper(), **balances)])
+    return User.objects.get(username=username)
+
+
+@pytest.mark.django_db
+def test_update_balance_is_a_single_update():
+    user = create_user('solde', balance_fcfa=Decimal('100.00'))
+
+    with CaptureQueriesContext(connection) as queries:
+        new_balance = user.update_balance('FCFA', Decimal('25.50'), 'add')
+
+    assert new_balance == Decimal('125.50')
+    assert user.balance_fcfa == Decimal('125.50')
+    assert [q['sql'].split()[0] for q in queries].count('UPDATE') == 1
+    assert not [q for q in queries if q['sql'].startswith('SELECT')]
+    activity = UserActivity.objects.get(user=user, activity_type='balance_updated')
+    assert activity.metadata['old_balance'] == '100.00'
+    assert activity.metadata['new_balance'] == '125.50'
+
+
+@pytest.mark.django_db
+def test_overdraft_is_refused_by_the_database():
+    user = create_user('decouvert', balance_eur=Decimal('10.00'))
+    stale = User.objects.get(pk=user.pk)
+    user.update_balance('EUR', Decimal('8.00'), 'subtract')
+
+    # L'instance périmée croit encore disposer de 10 EUR
+    with pytest.raises(ValueError):
+        stale.update_balance('EUR', Decimal('5.00'), 'subtract')
+
+    user.refresh_from_db()
+    assert user.balance_eur == Decimal('2.00')
+
+
+@pytest.mark.django_db(transaction=True)
+def test_concurrent_credits_are_not_lost():
+    user = create_user('concurrent')
+    instances = [User.objects.get(pk=user.pk) for _ in range(8)]
+
+    def credit(index):
+        try:
+            while True:
+                try:
+                    return instances[index % len(instances)].update_balance('FCFA', Decimal('1.25'), 'add')
+                except OperationalError:
+                    continue  # Verrou de table de la base SQLite partagée des tests : rien n'a été écrit
+        finally:
+            connection.close()
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(credit, range(1000)))
+
+    user.refresh_from_db()
+    assert user.balance_fcfa == Decimal('1250.00')
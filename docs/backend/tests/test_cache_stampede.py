@@ -0,0 +1,112 @@
+# tests/test_cache_stampede.py
+"""
+Tests du remplissage de cache protégé contre les ruées (apps.core.cache_stampede).
+"""
+import threading
+import time
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from apps.core.cache_stampede import CachedValue, get_or_compute
+from apps.core.decorators import cache_result
+from apps.core.mixins import CacheResponseMixin
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def run_concurrently(count, target):
+    results = []
+    barrier = threading.Barrier(count)
+
+    def worker():
+        barrier.wait()
+        results.append(target())
+
+    threads = [threading.Thread(target=worker) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=30)
+    return results
+
+
+def test_one_recomputation_under_100_concurrent_misses():
+    calls = []
+
+    @cache_result(timeout=60, key_prefix='leaderboard')
+    def leaderboard():
+        calls.append(1)
+        time.sleep(0.2)
+        return ['alice', 'bruno']
+
+    results = run_concurrently(100, leaderboard)
+
+    assert len(calls) == 1
+    assert results == [['alice', 'bruno']] * 100
+
+
+def test_lock_coalesces_workers_without_shared_memory():
+    # Sans regroupement en mémoire, seul le verrou du cache évite les recalculs
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.2)
+        return 42
+
+    results = run_concurrently(20, lambda: get_or_compute('stats', compute, 60, coalesce=False))
+
+    assert len(calls) == 1
+    assert results == [42] * 20
+
+
+def test_stale_value_is_served_while_another_worker_recomputes():
+    cache.set('stats', CachedValue('old', 0.1, time.time() - 1), 60)
+    cache.add('stats:lock', 'other-worker', 10)
+
+    assert get_or_compute('stats', lambda: 'new', 60) == 'old'
+
+    cache.delete('stats:lock')
+    assert get_or_compute('stats', lambda: 'new', 60) == 'new'
+
+
+def test_early_refresh_depends_on_beta():
+    # Encore 1 s de fraîcheur, mais un calcul de 10 s : XFetch rafraîchit tôt
+    cache.set('stats', CachedValue('old', 10.0, time.time() + 1), 60)
+
+    assert get_or_compute('stats', lambda: 'new', 60, beta=0) == 'old'
+    assert get_or_compute('stats', lambda: 'new', 60, beta=100) == 'new'
+
+
+def test_cached_api_response_renders(settings):
+    settings.USE_CACHE = True
+    calls = []
+
+    class StatsView(CacheResponseMixin, APIView):
+        authentication_classes = []
+        permission_classes = []
+
+        def get(self, request):
+            calls.append(1)
+            return Response({'games': 3})
+
+    view = StatsView.as_view()
+    factory = APIRequestFactory()
+
+    def get():
+        request = factory.get('/stats/')
+        request.user = AnonymousUser()
+        return view(request).render()
+
+    assert get().content == get().content == b'{"games":3}'
+    assert len(calls) == 1
@@ -0,0 +1,93 @@
+# tests/test_cache_tags.py
+"""
+Tests de l'invalidation du cache par étiquettes (apps.core.cache_tags).
+"""
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from apps.core.cache_tags import get_tagged, invalidate_tags, set_tagged, tag
+from apps.core.decorators import cache_result
+from apps.core.mixins import CacheResponseMixin
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+def test_scoped_invalidation_spares_other_scopes():
+    global_board = [tag('leaderboard')]
+    chess = [tag('leaderboard', game_type=1)]
+    ludo = [tag('leaderboard', game_type=2)]
+    for key, tags in (('global', global_board), ('chess', chess), ('ludo', ludo)):
+        set_tagged(key, key, tags)
+
+    invalidate_tags(tag('leaderboard', game_type=1))
+
+    assert get_tagged('chess', chess) is None
+    assert get_tagged('global', global_board) is None
+    assert get_tagged('ludo', ludo) == 'ludo'
+
+
+def test_family_invalidation_reaches_every_scope():
+    set_tagged('alice', 'a', [tag('user_stats', user=1)])
+    set_tagged('bruno', 'b', [tag('user_stats', user=2)])
+    set_tagged('board', 'c', [tag('leaderboard')])
+
+    invalidate_tags('user_stats')
+
+    assert get_tagged('alice', [tag('user_stats', user=1)]) is None
+    assert get_tagged('bruno', [tag('user_stats', user=2)]) is None
+    assert get_tagged('board', [tag('leaderboard')]) == 'c'
+
+
+def test_cache_result_uses_call_scoped_tags():
+    calls = []
+
+    @cache_result(timeout=60, tags=lambda user_id: [tag('user_stats', user=user_id)])
+    def stats(user_id):
+        calls.append(user_id)
+        return {'user': user_id, 'call': len(calls)}
+
+    assert stats(user_id=1) == stats(user_id=1) == {'user': 1, 'call': 1}
+    stats(user_id=2)
+
+    invalidate_tags(tag('user_stats', user=1))
+
+    assert stats(user_id=1)['call'] == 3
+    assert stats(user_id=2)['call'] == 2
+
+
+def test_cached_api_response_is_invalidated_by_view_tag(settings):
+    settings.USE_CACHE = True
+    calls = []
+
+    class LeaderboardView(CacheResponseMixin, APIView):
+        authentication_classes = []
+        permission_classes = []
+        cache_tags = ('leaderboard',)
+
+        def get(self, request):
+            calls.append(1)
+            return Response({'calls': len(calls)})
+
+    view = LeaderboardView.as_view()
+    factory = APIRequestFactory()
+
+    def get():
+        request = factory.get('/board/')
+        request.user = AnonymousUser()  # Posé par AuthenticationMiddleware en production
+        return view(request).data
+
+    assert get() == {'calls': 1}
+    assert get() == {'calls': 1}
+
+    invalidate_tags(tag('leaderboard', game_type=3))
+
+    assert get() == {'calls': 2}
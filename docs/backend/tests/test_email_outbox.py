@@ -0,0 +1,90 @@
+# tests/test_email_outbox.py
+"""
+Tests de l'outbox des emails transactionnels (apps.accounts.email_outbox).
+"""
+from datetime import timedelta
+from smtplib import SMTPServerDisconnected
+
+import pytest
+from django.core import mail
+from django.core.mail import get_connection
+from django.utils import timezone
+
+from apps.accounts import email_outbox
+from apps.accounts.email_outbox import queue_email, send_outbox
+from apps.accounts.email_service import EmailService
+from apps.accounts.models import OutboundEmail, User
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def smtp(monkeypatch):
+    """Connexion persistante propre à chaque test ; compte les ouvertures."""
+    opened = []
+
+    def connect(**kwargs):
+        backend = get_connection(**kwargs)
+        opened.append(backend)
+        return backend
+
+    monkeypatch.setattr(email_outbox, '_smtp', email_outbox._SMTPConnection())
+    monkeypatch.setattr(email_outbox, 'get_connection', connect)
+    return opened
+
+
+def test_request_path_only_queues():
+    User.objects.bulk_create([User(username='outbox', email='outbox@test.com', referral_code='OUTBOX1')])
+    user = User.objects.get(username='outbox')
+
+    assert EmailService().send_verification_email(user, 'token', 'uid')
+
+    assert mail.outbox == []
+    email = OutboundEmail.objects.get(to_email='outbox@test.com')
+    assert email.kind == 'verification'
+    assert '/verify-email/uid/token' in email.html_body
+
+
+def test_batches_share_one_connection(smtp):
+    for index in range(5):
+        queue_email(f'Sujet {index}', f'joueur{index}@test.com', text_body='Bonjour')
+
+    assert send_outbox(batch_size=3)['sent'] == 3
+    assert send_outbox(batch_size=3)['sent'] == 2
+
+    assert len(mail.outbox) == 5
+    assert len(smtp) == 1
+    assert not OutboundEmail.objects.exclude(status='sent').exists()
+
+
+def test_failure_is_retried_with_backoff(monkeypatch, settings):
+    settings.EMAIL_OUTBOX = {'MAX_ATTEMPTS': 2, 'BACKOFF_BASE': 60}
+
+    def disconnected(backend, messages):
+        raise SMTPServerDisconnected('Connexion fermée')
+
+    monkeypatch.setattr('django.core.mail.backends.locmem.EmailBackend.send_messages', disconnected)
+    queue_email('Sujet', 'retry@test.com', text_body='Bonjour')
+
+    assert send_outbox()['retried'] == 1
+    email = OutboundEmail.objects.get()
+    assert email.status == 'pending'
+    assert email.attempts == 1
+    assert 'Connexion fermée' in email.last_error
+    assert timedelta(seconds=55) < email.next_attempt_at - timezone.now() <= timedelta(seconds=60)
+
+    # Pas encore dû
+    assert send_outbox() == {'sent': 0, 'retried': 0, 'failed': 0}
+
+    OutboundEmail.objects.update(next_attempt_at=timezone.now())
+    assert send_outbox()['failed'] == 1
+    assert OutboundEmail.objects.get().status == 'failed'
+
+
+def test_dedup_window_per_recipient():
+    assert queue_email('Connexion', ['a@test.com', 'b@test.com'], kind='login_notification', dedup_key='1.2.3.4') == 2
+    assert queue_email('Connexion', ['a@test.com', 'c@test.com'], kind='login_notification', dedup_key='1.2.3.4') == 1
+    assert queue_email('Connexion', 'a@test.com', kind='login_notification', dedup_key='5.6.7.8') == 1
+
+    OutboundEmail.objects.update(created_at=timezone.now() - timedelta(hours=2))
+    assert queue_email('Connexion', 'a@test.com', kind='login_notification', dedup_key='1.2.3.4') == 1
@@ -0,0 +1,92 @@
+# tests/test_field_signals.py
+"""
+Tests du dispatch par changement de champ (apps.core.field_signals).
+"""
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.accounts.models import User
+from apps.core.field_signals import on_field_change, remove_field_receiver
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def calls():
+    """Receiver de test sur User.kyc_status, immédiat et après commit."""
+    received = {'now': [], 'commit': []}
+
+    def now(instance, changes, created):
+        received['now'].append(changes)
+
+    def commit(instance, changes, created):
+        received['commit'].append(changes)
+
+    on_field_change(User, fields=['kyc_status'])(now)
+    on_field_change(User, fields=['kyc_status', 'is_verified'], on_commit=True)(commit)
+    yield received
+    remove_field_receiver(User, now)
+    remove_field_receiver(User, commit)
+
+
+@pytest.fixture
+def user():
+    User.objects.bulk_create([User(username='suivi', email='suivi@test.com', referral_code='SUIVI1')])
+    return User.objects.get(username='suivi')
+
+
+def test_untracked_change_skips_receivers_without_queries(calls, user):
+    user.first_name = 'Awa'
+
+    with CaptureQueriesContext(connection) as queries:
+        user.save()
+
+    assert calls['now'] == []
+    assert [q['sql'].split()[0] for q in queries] == ['UPDATE']
+
+
+def test_tracked_change_reaches_receiver(calls, user):
+    user.kyc_status = 'approved'
+    user.save(update_fields=['first_name'])  # Champ suivi non sauvegardé
+    assert calls['now'] == []
+
+    user.save()
+    assert calls['now'] == [{'kyc_status': ('pending', 'approved')}]
+
+    user.save()  # Instantané rafraîchi : plus de changement
+    assert len(calls['now']) == 1
+
+
+def test_on_commit_receivers_are_batched(calls, user, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        for status in ('under_review', 'approved'):
+            user.kyc_status = status
+            user.save()
+        user.is_verified = True
+        user.save()
+
+    assert len(callbacks) == 1
+    assert calls['commit'] == [{'kyc_status': ('pending', 'approved'), 'is_verified': (False, True)}]
+
+
+def test_reverted_change_is_not_dispatched_after_commit(calls, user, django_capture_on_commit_callbacks):
+    with django_capture_on_commit_callbacks(execute=True):
+        user.kyc_status = 'approved'
+        user.save()
+        user.kyc_status = 'pending'
+        user.save()
+
+    assert len(calls['now']) == 2
+    assert calls['commit'] == []
+
+
+def test_instance_without_snapshot_reads_tracked_fields_once(calls, user):
+    detached = User(pk=user.pk, kyc_status='rejected')
+    detached._state.adding = False
+
+    with CaptureQueriesContext(connection) as queries:
+        detached.save(update_fields=['kyc_status'])
+
+    assert calls['now'] == [{'kyc_status': ('pending', 'rejected')}]
+    assert len([q for q in queries if q['sql'].startswith('SELECT "users"."kyc_status"')]) == 1
@@ -0,0 +1,100 @@
+# tests/test_health_probes.py
+"""
+Tests des sondes liveness/readiness à état caché (apps.core.health_probes).
+"""
+import json
+import threading
+import time
+
+import pytest
+from django.test import RequestFactory
+
+from apps.core import health_check, health_probes
+from apps.core.health_probes import HealthProber, get_health_probes_settings
+
+
+def make_prober(probes=None, **overrides):
+    config = {**get_health_probes_settings(), 'ENABLED': True, 'TIMEOUT': 0.5, **overrides}
+    if probes is not None:
+        config['CHECKS'] = list(probes)
+    return HealthProber(config, probes)
+
+
+@pytest.fixture
+def shared_prober(monkeypatch):
+    def install(prober):
+        monkeypatch.setattr(health_probes, '_prober', prober)
+        return prober
+    return install
+
+
+def call(view):
+    response = view(RequestFactory().get('/health/ready/'))
+    return response.status_code, json.loads(response.content)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_real_dependencies_are_probed_in_background_cycle():
+    prober = make_prober(CHECKS=['database', 'cache', 'channel_layer', 'celery', 'storage'])
+    snapshot = prober.probe_once()
+
+    assert {name: result.status for name, result in snapshot.results.items()} == {
+        'database': 'ok', 'cache': 'ok', 'channel_layer': 'ok', 'celery': 'ok', 'storage': 'ok',
+    }
+    assert 'round_trip_ms' in snapshot.results['channel_layer'].detail
+    assert prober.readiness()[0] is True
+
+    prober.config['CELERY_QUEUE_MAX_DEPTH'] = -1  # Toute file dépasse le seuil
+    prober.probe_once()
+    ready, payload = prober.readiness()
+    assert ready is False and payload['status'] == 'unavailable'
+    assert 'queue backlog' in payload['checks']['celery']['error']
+
+
+def test_hung_probe_times_out_and_is_not_resubmitted():
+    release = threading.Event()
+    calls = []
+
+    def hung(config):
+        calls.append(1)
+        release.wait(5)
+        return {}
+
+    prober = make_prober({'database': hung, 'cache': lambda config: {}}, TIMEOUT=0.05)
+    started = time.monotonic()
+    prober.probe_once()
+    prober.probe_once()
+    assert time.monotonic() - started < 1
+
+    results = prober.snapshot.results
+    assert results['database'].status == 'error'
+    assert results['database'].detail == {'error': 'previous probe still running'}
+    assert results['cache'].status == 'ok'
+    assert len(calls) == 1
+    release.set()
+
+
+def test_endpoints_serve_cached_snapshot_without_io(shared_prober):
+    prober = shared_prober(make_prober({
+        'database': lambda config: {},
+        'cache': lambda config: {},
+        'celery': lambda config: {'status': 'degraded', 'queues': {'games': 1500}},
+    }))
+    prober.ensure_started = lambda: None  # Pas de thread : cycles manuels
+
+    assert call(health_check.readiness_probe) == (503, {'status': 'starting', 'probe_age_seconds': None, 'checks': {}})
+    prober.probe_once()
+
+    # Sans marqueur django_db : tout accès à la base échouerait
+    started = time.perf_counter()
+    for _ in range(200):
+        status, body = call(health_check.readiness_probe)
+    elapsed = (time.perf_counter() - started) / 200
+
+    assert elapsed < 0.001
+    assert status == 200 and body['status'] == 'degraded'
+    assert body['checks']['celery']['queues'] == {'games': 1500}
+    assert call(health_check.liveness_probe)[0] == 200
+
+    prober.snapshot = prober.snapshot._replace(completed_at=time.monotonic() - prober.config['MAX_AGE'] - 1)
+    assert call(health_check.readiness_probe)[1]['status'] == 'stale'
@@ -0,0 +1,100 @@
+# tests/test_load_shedding.py
+"""
+Tests du délestage de charge de LoadBalancingMiddleware.
+"""
+import time
+from uuid import uuid4
+
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+from apps.core.load_shedding import (
+    AdaptiveConcurrencyLimiter, LoadShedder, LoadSnapshot, get_load_shedding_settings,
+)
+from apps.core.middleware import LoadBalancingMiddleware
+
+factory = RequestFactory()
+
+# Route réelle : apps.games.urls monté sur api/v1/games/, GameViewSet enregistré sous 'games'
+MOVE = f'/api/v1/games/games/{uuid4()}/move/'
+WEBHOOK = '/api/v1/payments/webhooks/feexpay/'
+ANALYTICS = '/api/v1/analytics/overview/'
+
+
+@pytest.fixture
+def shedder():
+    config = {**get_load_shedding_settings(), 'ENABLED': True, 'INITIAL_LIMIT': 10, 'MIN_LIMIT': 2}
+    return LoadShedder(config)
+
+
+class StubSampler:
+    def __init__(self, **load):
+        self.snapshot = LoadSnapshot(
+            load.get('cpu', 10.0), load.get('memory', 40.0), load.get('lag', 0.0), time.monotonic()
+        )
+
+
+def test_routes_get_priorities(shedder):
+    assert shedder.priority_for(MOVE) == 'critical'
+    assert shedder.priority_for(WEBHOOK) == 'critical'
+    assert shedder.priority_for('/api/v1/payments/feexpay/webhook/') == 'critical'
+    assert shedder.priority_for('/api/v1/auth/login/') == 'high'
+    assert shedder.priority_for(ANALYTICS) == 'low'
+    assert shedder.priority_for('/api/v1/games/') == 'normal'
+
+
+def test_low_priority_is_shed_first_at_the_limit(shedder):
+    # Limite de 10 : les routes basses n'ont droit qu'à 5 places
+    admitted = [shedder.admit('low') for _ in range(6)]
+    assert admitted == [True] * 5 + [False]
+
+    assert all(shedder.admit('critical') for _ in range(5))
+    assert not shedder.admit('critical')
+
+
+def test_pressure_sheds_all_but_critical_routes(shedder):
+    shedder.sampler = StubSampler(cpu=97.0)
+
+    assert not shedder.admit('normal')
+    assert not shedder.admit('low')
+    assert shedder.admit('critical')
+    assert shedder.admit('high')
+
+
+def test_limit_follows_latency():
+    limiter = AdaptiveConcurrencyLimiter(
+        initial=100, minimum=10, maximum=200, target_latency=0.5, backoff=0.5, decrease_interval=60
+    )
+    limiter.try_acquire()
+    limiter.release(latency=2.0)
+    assert limiter.limit == 50
+
+    # Une seule réduction par intervalle, quelle que soit la rafale
+    limiter.try_acquire()
+    limiter.release(latency=2.0)
+    assert limiter.limit == 50
+
+    for _ in range(50):
+        limiter.try_acquire()
+        limiter.release(latency=0.01)
+    assert 50.9 < limiter.limit < 51.1
+    assert limiter.in_flight == 0
+
+
+def test_middleware_admission_does_not_block(shedder, monkeypatch):
+    monkeypatch.setattr('apps.core.middleware.get_load_shedder', lambda: shedder)
+    middleware = LoadBalancingMiddleware(lambda request: HttpResponse())
+    request = factory.get(MOVE)
+
+    started = time.perf_counter()
+    for _ in range(1000):
+        assert middleware.process_request(request) is None
+        middleware.process_response(request, HttpResponse())
+    assert (time.perf_counter() - started) / 1000 < 0.001
+    assert shedder.limiter.in_flight == 0
+
+    shedder.sampler = StubSampler(memory=95.0)
+    response = middleware.process_request(factory.get(ANALYTICS))
+    assert response.status_code == 503
+    assert response['Retry-After'] == '5'
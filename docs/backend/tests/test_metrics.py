@@ -0,0 +1,90 @@
+# tests/test_metrics.py
+"""
+Tests des métriques Prometheus (apps.core.metrics).
+"""
+import pytest
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.http import HttpResponse
+from django.test import RequestFactory
+
+prometheus_client = pytest.importorskip('prometheus_client')
+
+from apps.core import metrics  # noqa: E402
+from apps.core.cache_stampede import get_or_compute  # noqa: E402
+
+
+def sample(name, **labels):
+    return prometheus_client.REGISTRY.get_sample_value(name, labels) or 0
+
+
+@pytest.mark.django_db
+def test_middleware_records_latency_and_queries_per_route():
+    class Match:
+        view_name = 'games:game-list'
+        route = 'api/v1/games/'
+
+    def view(request):
+        request.resolver_match = Match()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+            cursor.execute('SELECT 2')
+        return HttpResponse('ok')
+
+    labels = {'method': 'GET', 'route': 'games:game-list', 'status': '200'}
+    before = sample('rumo_http_request_duration_seconds_count', **labels)
+    queries_before = sample('rumo_http_request_db_queries_sum', route='games:game-list')
+
+    metrics.MetricsMiddleware(view)(RequestFactory().get('/api/v1/games/'))
+
+    assert sample('rumo_http_request_duration_seconds_count', **labels) == before + 1
+    assert sample('rumo_http_request_db_queries_sum', route='games:game-list') == queries_before + 2
+
+
+def test_move_latency_is_labelled_by_game_type_and_result():
+    class GameType:
+        name = 'chess'
+
+    class Game:
+        game_type = GameType()
+
+        @metrics.timed_move
+        def make_move(self, valid):
+            if not valid:
+                raise ValidationError('Mouvement invalide')
+            return True
+
+    ok = sample('rumo_game_move_duration_seconds_count', game_type='chess', result='ok')
+    rejected = sample('rumo_game_move_duration_seconds_count', game_type='chess', result='rejected')
+
+    assert Game().make_move(True) is True
+    with pytest.raises(ValidationError):
+        Game().make_move(False)
+
+    assert sample('rumo_game_move_duration_seconds_count', game_type='chess', result='ok') == ok + 1
+    assert sample('rumo_game_move_duration_seconds_count', game_type='chess', result='rejected') == rejected + 1
+
+
+def test_cache_hits_and_misses_are_counted():
+    cache.clear()
+    hits = sample('rumo_cache_requests_total', result='hit')
+    misses = sample('rumo_cache_requests_total', result='miss')
+
+    get_or_compute('metrics-test', lambda: 1, 60)
+    get_or_compute('metrics-test', lambda: 1, 60, beta=0)
+
+    assert sample('rumo_cache_requests_total', result='miss') == misses + 1
+    assert sample('rumo_cache_requests_total', result='hit') == hits + 1
+    cache.clear()
+
+
+def test_metrics_view_is_restricted_to_private_networks():
+    factory = RequestFactory()
+
+    response = metrics.metrics_view(factory.get('/metrics', REMOTE_ADDR='10.0.3.7'))
+    assert response.status_code == 200
+    assert response['Content-Type'] == prometheus_client.CONTENT_TYPE_LATEST
+    assert b'rumo_http_request_duration_seconds' in response.content
+
+    assert metrics.metrics_view(factory.get('/metrics', REMOTE_ADDR='8.8.8.8')).status_code == 403
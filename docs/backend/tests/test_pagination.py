@@ -0,0 +1,94 @@
+# tests/test_pagination.py
+"""
+Tests de la pagination par clé (keyset) de apps.core.pagination.
+"""
+import pytest
+from datetime import timedelta
+from decimal import Decimal
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from apps.accounts.models import User
+from apps.core.pagination import CursorPagination, get_cached_count
+from apps.payments.models import Transaction
+
+pytestmark = pytest.mark.django_db
+
+factory = APIRequestFactory()
+
+
+@pytest.fixture
+def transactions():
+    """25 transactions dont plusieurs partagent le même created_at."""
+    user = User(username='pagination_user', email='pagination@test.com')
+    User.objects.bulk_create([user])
+    created = [
+        Transaction.objects.create(
+            user=user, transaction_type='deposit', amount=Decimal('100.00'), currency='FCFA'
+        )
+        for _ in range(25)
+    ]
+    # Horodatages identiques par groupes de 5 pour vérifier le départage par id
+    now = timezone.now()
+    for index, txn in enumerate(created):
+        Transaction.objects.filter(pk=txn.pk).update(
+            created_at=now - timedelta(minutes=index // 5)
+        )
+    return Transaction.objects.order_by('-created_at', '-id')
+
+
+def paginate(queryset, cursor=None, page_size=10):
+    params = {'page_size': page_size}
+    if cursor:
+        params['cursor'] = cursor
+    paginator = CursorPagination()
+    request = Request(factory.get('/transactions/', params))
+    page = paginator.paginate_queryset(queryset, request)
+    return paginator, page
+
+
+class TestCursorPagination:
+    """Pagination par (created_at, id) sans COUNT(*)."""
+
+    def test_walks_all_pages_without_duplicates(self, transactions):
+        expected = list(transactions.values_list('pk', flat=True))
+        seen, cursor = [], None
+        while True:
+            paginator, page = paginate(transactions, cursor)
+            seen.extend(item.pk for item in page)
+            cursor = paginator.get_next_cursor()
+            if cursor is None:
+                break
+
+        assert seen == expected
+
+    def test_previous_cursor_returns_previous_page(self, transactions):
+        first_paginator, first_page = paginate(transactions)
+        second_paginator, _ = paginate(transactions, first_paginator.get_next_cursor())
+
+        assert second_paginator.has_previous
+        _, previous_page = paginate(transactions, second_paginator.get_previous_cursor())
+        assert [item.pk for item in previous_page] == [item.pk for item in first_page]
+
+    def test_no_count_query(self, transactions):
+        first_paginator, _ = paginate(transactions)
+        with CaptureQueriesContext(connection) as queries:
+            paginate(transactions, first_paginator.get_next_cursor())
+
+        assert len(queries) == 1
+        assert 'COUNT' not in queries[0]['sql'].upper()
+
+    def test_tampered_cursor_is_rejected(self, transactions):
+        with pytest.raises(NotFound):
+            paginate(transactions, 'not-a-valid-cursor')
+
+
+def test_cached_count_reuses_previous_total(transactions):
+    assert get_cached_count(transactions) == 25
+    with CaptureQueriesContext(connection) as queries:
+        assert get_cached_count(transactions) == 25
+    assert len(queries) == 0
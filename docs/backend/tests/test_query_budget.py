@@ -0,0 +1,99 @@
+# tests/test_query_budget.py
+"""
+Tests du profileur de requêtes (apps.core.query_profiler) et budgets des vues.
+"""
+import pytest
+from decimal import Decimal
+from django.core.cache import cache
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from apps.accounts.models import User
+from apps.core.query_profiler import (
+    QueryBudgetExceeded, assert_query_budget, budget_for_view, fingerprint, profile_queries,
+)
+from apps.games.models import Game, GameType
+from apps.games.views import GameViewSet
+from apps.payments.models import PaymentMethod, Transaction
+from apps.payments.views import TransactionViewSet
+
+pytestmark = pytest.mark.django_db
+
+factory = APIRequestFactory()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    cache.clear()
+    yield
+    cache.clear()
+
+
+@pytest.fixture
+def players():
+    users = [User(username=f'budget_{i}', email=f'budget_{i}@test.com', referral_code=f'BUDGET{i}') for i in range(12)]
+    User.objects.bulk_create(users)
+    return list(User.objects.filter(username__startswith='budget_').order_by('username'))
+
+
+def call(viewset, action, user, path='/', **params):
+    request = factory.get(path, params)
+    force_authenticate(request, user=user)
+    return viewset.as_view({'get': action})(request)
+
+
+def test_fingerprint_ignores_parameter_values():
+    assert fingerprint("SELECT * FROM game WHERE id = 12 AND code = 'ab''c'") == \
+        fingerprint("SELECT * FROM game WHERE id = 7 AND code = 'x'")
+    assert fingerprint('SELECT * FROM game WHERE id IN (%s, %s, %s)') == \
+        fingerprint('SELECT * FROM game WHERE id IN (%s)')
+
+
+def test_repeated_query_fails_the_budget(players):
+    with pytest.raises(QueryBudgetExceeded, match='N\\+1|×'):
+        with assert_query_budget(100):
+            for user in players[:6]:
+                User.objects.get(pk=user.pk)
+
+    with profile_queries() as profile:
+        list(User.objects.all())
+    assert profile.count == 1
+
+
+def test_game_list_stays_within_budget(players):
+    game_type = GameType.objects.create(
+        name='budget', display_name='Budget', description='Test', category='strategy'
+    )
+    Game.objects.bulk_create([
+        Game(room_code=f'{i:08x}', game_type=game_type, player1=players[i], player2=players[i + 1],
+             current_player=players[i], bet_amount=Decimal('500.00'))
+        for i in range(10)
+    ])
+
+    with assert_query_budget(view=GameViewSet, action='list'):
+        response = call(GameViewSet, 'list', players[0])
+
+    assert response.status_code == 200
+    assert len(response.data['results']) == 10
+    assert response.data['results'][0]['player1']['referral_stats']['total_referrals'] == 0
+
+
+def test_transaction_views_stay_within_budget(players):
+    method = PaymentMethod.objects.create(name='Orange Money', method_type='mobile_money')
+    for tx_type in ['deposit', 'withdrawal', 'bet', 'win'] * 3:
+        Transaction.objects.create(user=players[0], transaction_type=tx_type, amount=Decimal('100.00'),
+                                   currency='FCFA', status='completed', payment_method=method)
+
+    with assert_query_budget(view=TransactionViewSet, action='list'):
+        response = call(TransactionViewSet, 'list', players[0])
+    assert response.status_code == 200
+
+    with assert_query_budget(view=TransactionViewSet, action='summary'):
+        response = call(TransactionViewSet, 'summary', players[0])
+    assert response.data['deposit'] == {'count': 3, 'total': Decimal('300.00')}
+
+
+def test_budget_resolution_prefers_action_then_class():
+    request = factory.get('/')
+    view = TransactionViewSet.as_view({'get': 'summary'})
+
+    assert budget_for_view(view, request) == 2
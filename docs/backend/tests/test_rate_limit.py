@@ -0,0 +1,211 @@
+# tests/test_rate_limit.py
+"""
+Tests de la limitation de taux partagée de apps.core.rate_limit.
+"""
+import multiprocessing
+import socket
+import threading
+import uuid
+
+import pytest
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.utils.decorators import method_decorator
+from django.views import View
+
+from apps.accounts.rate_limit_utils import ratelimit, safe_ratelimit_key
+from apps.core.decorators import rate_limit
+from apps.core.exceptions import RateLimitExceededException
+from apps.core.rate_limit import (
+    ConcurrencyLimiter, MemoryRateLimitStore, RateLimiter, RedisRateLimitStore, get_rate_limiter, parse_rate,
+)
+
+factory = RequestFactory()
+
+
+class CountingStore(MemoryRateLimitStore):
+    """Store mémoire qui compte les allers-retours."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = 0
+
+    def take(self, *args):
+        self.calls += 1
+        return super().take(*args)
+
+
+def unique(name):
+    return f'{name}-{uuid.uuid4().hex[:8]}'
+
+
+def test_parse_rate():
+    assert parse_rate('3/m') == (3, 60)
+    assert parse_rate('10/h') == (10, 3600)
+    assert parse_rate('10/5m') == (10, 300)
+    with pytest.raises(ValueError):
+        parse_rate('10 per hour')
+
+
+def test_bucket_denies_locally_once_exhausted():
+    store = CountingStore()
+    limiter = RateLimiter('test', limit=3, window=60, store=store)
+
+    assert [limiter.hit('alice').allowed for _ in range(3)] == [True, True, True]
+    denied = limiter.hit('alice')
+    assert not denied.allowed
+    assert 0 < denied.retry_after <= 20
+
+    # Le refus est mémorisé localement : plus d'aller-retour jusqu'au retry_after
+    calls = store.calls
+    assert not limiter.hit('alice').allowed
+    assert store.calls == calls
+    assert limiter.hit('bruno').allowed
+
+
+def test_lease_saves_round_trips_without_exceeding_limit():
+    store = CountingStore()
+    limiter = RateLimiter('test', limit=12, window=60, lease=5, store=store)
+
+    allowed = sum(limiter.hit('alice').allowed for _ in range(20))
+
+    assert allowed == 12
+    assert store.calls <= 5
+
+
+def test_concurrency_limiter_releases_slots():
+    limiter = ConcurrencyLimiter('test', limit=2, store=MemoryRateLimitStore())
+
+    assert limiter.acquire('alice') and limiter.acquire('alice')
+    assert not limiter.acquire('alice')
+    limiter.release('alice')
+    assert limiter.acquire('alice')
+
+
+def test_view_decorators_share_the_limiter():
+    @rate_limit(max_requests=2, window=60)
+    def view(request):
+        return HttpResponse()
+
+    view.__wrapped__.__name__ = unique('view')
+    request = factory.get('/')
+    request.user = AnonymousUser()
+    view(request)
+    view(request)
+    with pytest.raises(RateLimitExceededException):
+        view(request)
+
+    @ratelimit(key=safe_ratelimit_key, rate='1/m', method='POST', block=False, group=unique('register'))
+    def register(request):
+        return HttpResponse(status=429 if request.limited else 200)
+
+    assert register(factory.post('/')).status_code == 200
+    assert register(factory.get('/')).status_code == 200
+    assert register(factory.post('/')).status_code == 429
+
+
+
+def test_method_decorator_keeps_the_local_denial_cache():
+    group = unique('login')
+
+    class LoginView(View):
+        @method_decorator(ratelimit(key=safe_ratelimit_key, rate='1/m', block=False, group=group))
+        def post(self, request):
+            return HttpResponse(status=429 if request.limited else 200)
+
+    view = LoginView.as_view()
+    assert view(factory.post('/')).status_code == 200
+    assert view(factory.post('/')).status_code == 429
+
+    # Le refus mémorisé par la requête précédente est réutilisé sans aller-retour
+    limiter = get_rate_limiter(f'accounts:{group}', 1, 60)
+    assert limiter.check_local('127.0.0.1') is not None
+    assert view(factory.post('/')).status_code == 429
+
+
+# ===== REDIS =====
+
+@pytest.fixture
+def redis_server():
+    fakeredis = pytest.importorskip('fakeredis')
+    pytest.importorskip('lupa')
+    with socket.socket() as probe:
+        probe.bind(('127.0.0.1', 0))
+        port = probe.getsockname()[1]
+    server = fakeredis.TcpFakeServer(('127.0.0.1', port), server_type='redis')
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield port
+    server.shutdown()
+    server.server_close()
+
+
+def consume(port, name, lease, attempts, results):
+    import redis
+
+    store = RedisRateLimitStore(redis.Redis(port=port))
+    limiter = RateLimiter(name, limit=40, window=3600, lease=lease, store=store)
+    results.put(sum(limiter.hit('alice').allowed for _ in range(attempts)))
+
+
+@pytest.mark.parametrize('lease', [1, 5])
+def test_limit_holds_across_processes(redis_server, lease):
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    name = unique('multi')
+    workers = [
+        context.Process(target=consume, args=(redis_server, name, lease, 30, results))
+        for _ in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(timeout=30)
+
+    assert sum(results.get(timeout=5) for _ in workers) == 40
+
+
+def test_redis_slots_are_shared(redis_server):
+    import redis
+
+    store = RedisRateLimitStore(redis.Redis(port=redis_server))
+    first = ConcurrencyLimiter('ws:test', limit=1, store=store)
+    second = ConcurrencyLimiter('ws:test', limit=1, store=store)
+
+    assert first.acquire('alice')
+    assert not second.acquire('alice')
+    first.release('alice')
+    assert second.acquire('alice')
+
+
+def test_websocket_messages_over_limit_close_the_connection():
+    import asyncio
+    from apps.games.middleware import WebSocketRateLimitMiddleware
+
+    received, sent = [], []
+
+    async def app(scope, receive, send):
+        while True:
+            message = await receive()
+            received.append(message['type'])
+            if message['type'] == 'websocket.disconnect':
+                return
+
+    async def receive():
+        return {'type': 'websocket.receive', 'text': '{}'}
+
+    async def send(message):
+        sent.append(message)
+
+    class Player:
+        id = uuid.uuid4()
+        is_authenticated = True
+
+    middleware = WebSocketRateLimitMiddleware(app, max_messages_per_minute=3)
+    asyncio.run(middleware({'type': 'websocket', 'user': Player()}, receive, send))
+
+    assert received == ['websocket.receive'] * 3 + ['websocket.disconnect']
+    assert sent == [{'type': 'websocket.close', 'code': 4008}]
+    # La connexion a été libérée
+    assert middleware.connections.acquire(str(Player.id))
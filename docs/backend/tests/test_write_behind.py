@@ -0,0 +1,127 @@
+# tests/test_write_behind.py
+"""
+Tests de l'écriture différée des journaux (apps.core.write_behind).
+"""
+import sqlite3
+import subprocess
+import sys
+import textwrap
+from pathlib import Path
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.accounts.models import User, UserActivity
+from apps.core import write_behind
+from apps.core.utils import log_user_activity
+from apps.core.write_behind import WriteBehindQueue
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture
+def user(db):
+    User.objects.bulk_create([User(username='audit_user', email='audit@test.com', referral_code='AUDIT1')])
+    return User.objects.get(username='audit_user')
+
+
+def make_queue(monkeypatch, **options):
+    """File sans thread d'écriture : les tests vident la file eux-mêmes."""
+    options = {'max_queue': 100, 'batch_size': 10, 'flush_interval': 60, 'overflow': 'drop', **options}
+    pending = WriteBehindQueue(**options)
+    monkeypatch.setattr(pending, 'ensure_flusher', lambda: None)
+    return pending
+
+
+def activity(user, index):
+    return {'user_id': user.pk, 'activity_type': 'login', 'description': f'connexion {index}'}
+
+
+def test_request_path_only_enqueues(monkeypatch, settings, user):
+    settings.WRITE_BEHIND = {**settings.WRITE_BEHIND, 'ENABLED': True}
+    pending = make_queue(monkeypatch)
+    monkeypatch.setattr(write_behind, '_write_behind', pending)
+
+    with CaptureQueriesContext(connection) as queries:
+        for index in range(25):
+            log_user_activity(user, 'login', f'connexion {index}')
+    assert len(queries) == 0
+
+    with CaptureQueriesContext(connection) as queries:
+        assert pending.flush() == 25
+    assert len([q for q in queries if q['sql'].startswith('INSERT')]) == 3
+    assert UserActivity.objects.filter(user=user).count() == 25
+
+
+def test_overflow_drops_with_counter(monkeypatch, user):
+    pending = make_queue(monkeypatch, max_queue=5)
+
+    accepted = [pending.put('accounts.UserActivity', **activity(user, index)) for index in range(8)]
+
+    assert accepted.count(False) == 3
+    assert pending.stats()['dropped'] == 3
+    assert pending.flush() == 5
+
+
+def test_overflow_spools_then_replays(monkeypatch, tmp_path, user):
+    pending = make_queue(monkeypatch, max_queue=2, overflow='spool', spool_dir=tmp_path)
+
+    for index in range(5):
+        pending.put('accounts.UserActivity', **activity(user, index))
+
+    assert pending.stats()['spooled'] == 3
+    assert pending.flush() == 2
+    assert pending.replay_spool() == 3
+    assert not list(tmp_path.iterdir())
+    assert UserActivity.objects.filter(user=user).count() == 5
+
+
+def test_invalid_row_does_not_lose_the_batch(monkeypatch, user):
+    pending = make_queue(monkeypatch)
+    for index in range(4):
+        pending.put('accounts.UserActivity', **activity(user, index))
+    pending.put('accounts.UserActivity', user_id=user.pk, unknown_field=True)
+
+    assert pending.flush() == 4
+    assert pending.stats()['dropped'] == 1
+
+
+CRASH_SCRIPT = textwrap.dedent('''
+    import os, sys
+    import django
+    from django.conf import settings
+
+    settings.configure(
+        DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': sys.argv[1]}},
+        INSTALLED_APPS=['django.contrib.contenttypes', 'django.contrib.auth'],
+        BASE_DIR=os.getcwd(),
+        USE_TZ=True,
+    )
+    django.setup()
+    from django.core.management import call_command
+    call_command('migrate', verbosity=0)
+
+    from apps.core.write_behind import WriteBehindQueue
+    pending = WriteBehindQueue(max_queue=200, batch_size=50, flush_interval=0.01, overflow='drop')
+    for index in range(5000):
+        pending.put('auth.Group', name=f'group-{index}')
+    print(pending.stats()['dropped'], flush=True)
+    os._exit(1)  # Arrêt brutal : ni atexit ni vidage de la file
+''')
+
+
+def test_crash_loses_at_most_queue_plus_one_batch(tmp_path):
+    database = tmp_path / 'crash.sqlite3'
+    result = subprocess.run(
+        [sys.executable, '-c', CRASH_SCRIPT, str(database)],
+        cwd=BACKEND_DIR, capture_output=True, text=True, timeout=120,
+    )
+    assert result.returncode == 1, result.stderr
+    dropped = int(result.stdout.strip())
+
+    with sqlite3.connect(database) as db:
+        written = db.execute('SELECT COUNT(*) FROM auth_group').fetchone()[0]
+
+    lost = 5000 - dropped - written
+    assert 0 <= lost <= 200 + 50